@@ -0,0 +1,6 @@
+"""
+Micro-benchmarks do G Financas, sem banco e sem servidor.
+
+Cada módulo mede um caminho quente isolado e imprime uma tabela comparando as
+alternativas. Uso: python -m benchmarks.<modulo> --help
+"""
@@ -0,0 +1,64 @@
+"""
+Custo de CPU contra bytes economizados na compressão das respostas (gfinancas4/base/compressao.py).
+
+Renderiza listagens de despesas de vários tamanhos como a API (RespostaJson) e comprime cada
+uma com as codificações instaladas em alguns níveis:
+
+    python -m benchmarks.compressao --linhas 1 50 10000 --repeticoes 15
+
+A coluna "µs/KB" é o tempo de CPU por KB economizado: mostra a partir de que tamanho
+comprimir compensa (COMPRESSAO_MINIMO_BYTES) e qual nível escolher para cada algoritmo.
+"""
+import argparse
+import statistics
+import time
+
+from django.conf import settings
+
+if not settings.configured:
+    settings.configure(DEFAULT_CHARSET="utf-8", RENDERIZADOR_JSON="padrao")
+
+from benchmarks.renderizacao import despesas_paginadas  # noqa: E402
+from gfinancas4.base.compressao import CODIFICACOES, NIVEIS  # noqa: E402
+from gfinancas4.base.renderizacao import renderizar  # noqa: E402
+
+NIVEIS_MEDIDOS = {"gzip": (1, 6, 9), "br": (1, 5, 11), "zstd": (1, 3, 19)}
+
+
+def medir(corpo: bytes, nome: str, nivel: int, repeticoes: int) -> tuple:
+    codificacao = CODIFICACOES[nome]
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        comprimido = codificacao.comprimir(corpo, nivel)
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tempos), len(comprimido)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--linhas", type=int, nargs="+", default=[1, 50, 10000])
+    parser.add_argument("--repeticoes", type=int, default=15)
+    argumentos = parser.parse_args(argv)
+
+    print(f"Codificações instaladas: {', '.join(CODIFICACOES)} (padrão: {NIVEIS})")
+    for linhas in argumentos.linhas:
+        corpo = renderizar(despesas_paginadas(linhas))
+        print(f"\n{linhas} despesas: {len(corpo) / 1024:.1f} KB, mediana de {argumentos.repeticoes} execuções")
+        cabecalho = f"{'codificação':<14}{'ms':>9}{'KB':>10}{'razão':>8}{'MB/s':>9}{'µs/KB':>9}"
+        print(cabecalho)
+        print("-" * len(cabecalho))
+        for nome in CODIFICACOES:
+            for nivel in NIVEIS_MEDIDOS[nome]:
+                mediana, tamanho = medir(corpo, nome, nivel, argumentos.repeticoes)
+                economizado = (len(corpo) - tamanho) / 1024
+                custo = f"{mediana * 1000 / economizado:>9.1f}" if economizado > 0 else f"{'-':>9}"
+                print(
+                    f"{f'{nome} {nivel}':<14}{mediana:>9.2f}{tamanho / 1024:>10.1f}{len(corpo) / tamanho:>7.1f}x"
+                    f"{len(corpo) / 1024 / 1024 / (mediana / 1000):>9.0f}{custo}"
+                )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
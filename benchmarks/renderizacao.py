@@ -0,0 +1,105 @@
+"""
+Compara os renderizadores JSON de gfinancas4/base/renderizacao.py com o JsonResponse.
+
+Monta respostas como as das listagens (linhas de Despesa.to_dict_json, com Decimal) e como
+as de consultas values() (com datetime e Decimal) e mede a construção da resposta HTTP:
+
+    python -m benchmarks.renderizacao --linhas 10000 --repeticoes 15
+"""
+import argparse
+import statistics
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+from django.conf import settings
+
+if not settings.configured:
+    settings.configure(DEFAULT_CHARSET="utf-8")
+
+from django.http import HttpResponse, JsonResponse  # noqa: E402
+
+from gfinancas4.base.renderizacao import RENDERIZADORES  # noqa: E402
+
+ELEMENTOS = ["Material de consumo", "Serviços de terceiros", "Obras e instalações", "Equipamentos"]
+TIPOS = ["Papelaria", "Manutenção predial", "Limpeza e conservação", "Informática"]
+
+
+def _momento(indice: int) -> datetime:
+    return datetime(2026, 1, 1, tzinfo=dt_timezone.utc) + timedelta(minutes=37 * indice, microseconds=indice)
+
+
+def despesas_paginadas(linhas: int) -> dict:
+    """Formato de list_despesas: linhas de Despesa.to_dict_json mais a paginação."""
+    return {
+        "despesas": [
+            {
+                "id": i,
+                "departamento": {"id": i % 200, "nome": f"Coordenação de Gestão {i % 200}"},
+                "usuario": {"id": 1, "username": "sintetico"},
+                "valor": Decimal(f"{(i * 7919) % 100000 / 100:.2f}"),
+                "elemento": {"id": i % 4, "elemento": ELEMENTOS[i % 4]},
+                "tipoGasto": {"id": i % 16, "tipoGasto": TIPOS[i % 4]},
+                "justificativa": f"Aquisição para reposição do almoxarifado, lote {i}",
+                "created_at": _momento(i).isoformat(),
+                "updated_at": _momento(i).isoformat(),
+            }
+            for i in range(linhas)
+        ],
+        "paginacao": {"pagina_atual": 1, "total_paginas": 1, "total_despesas": linhas,
+                      "tem_proxima": False, "tem_anterior": False},
+    }
+
+
+def linhas_values(linhas: int) -> dict:
+    """Formato de consultas values(): datetime e Decimal sem conversão prévia."""
+    return {
+        "linhas": [
+            {"id": i, "departamento_id": i % 200, "valor": Decimal(f"{(i * 7919) % 100000 / 100:.2f}"),
+             "created_at": _momento(i), "elemento__elemento": ELEMENTOS[i % 4]}
+            for i in range(linhas)
+        ]
+    }
+
+
+def _caminhos() -> dict:
+    caminhos = {"JsonResponse (atual)": lambda dados: JsonResponse(dados)}
+    for nome, renderizar in sorted(RENDERIZADORES.items()):
+        caminhos[f"RespostaJson[{nome}]"] = (
+            lambda dados, renderizar=renderizar: HttpResponse(renderizar(dados), content_type="application/json")
+        )
+    return caminhos
+
+
+def medir(dados, construir, repeticoes: int) -> tuple:
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resposta = construir(dados)
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tempos), min(tempos), len(resposta.content)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--linhas", type=int, default=10000)
+    parser.add_argument("--repeticoes", type=int, default=15)
+    argumentos = parser.parse_args(argv)
+
+    cargas = {"despesas (to_dict_json)": despesas_paginadas, "values() com datetime": linhas_values}
+    for titulo, gerar in cargas.items():
+        dados = gerar(argumentos.linhas)
+        resultados = {nome: medir(dados, construir, argumentos.repeticoes) for nome, construir in _caminhos().items()}
+        referencia = resultados["JsonResponse (atual)"][0]
+
+        print(f"\n{titulo}: {argumentos.linhas} linhas, mediana de {argumentos.repeticoes} execuções")
+        cabecalho = f"{'caminho':<26}{'mediana ms':>12}{'mínimo ms':>12}{'KB':>10}{'ganho':>8}"
+        print(cabecalho)
+        print("-" * len(cabecalho))
+        for nome, (mediana, minimo, tamanho) in resultados.items():
+            print(f"{nome:<26}{mediana:>12.1f}{minimo:>12.1f}{tamanho / 1024:>10.0f}{referencia / mediana:>7.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -5,6 +5,7 @@ class User(AbstractUser):
     bio = models.TextField(null=True, blank=True)
     avatar = models.URLField(max_length=1024, null=True, blank=True)
     grupo = models.CharField(max_length=256)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return str(self.username)
@@ -7,7 +7,8 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from django.core.exceptions import ValidationError
 from django.contrib import auth
-from django.http import JsonResponse
+from gfinancas4.base.campos import ler_campos, projetar_lista
+from gfinancas4.base.renderizacao import RespostaJson
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 from ..commons.django_views_utils import ajax_login_required
@@ -52,7 +53,7 @@ def login(request):
     password = body["password"]
 
     if not username or not password:
-        return JsonResponse({"message": "Invalid credentials"}, status=400)
+        return RespostaJson({"message": "Invalid credentials"}, status=400)
 
     user_authenticated = auth.authenticate(username=username, password=password)
     user_dict = None
@@ -63,19 +64,19 @@ def login(request):
             logger.info("API login success")
     if not user_dict:
         user_dict = {"message": "Unauthorized"}
-        return JsonResponse(user_dict, safe=False, status=401)
-    return JsonResponse(user_dict, safe=False, status=201)
+        return RespostaJson(user_dict, safe=False, status=401)
+    return RespostaJson(user_dict, safe=False, status=201)
 
 def logout(request):
     """
     Encerra sessão do usuário
     """
     if request.method.lower() != "post":
-        return JsonResponse({"logout_error": "Logout method must be 'POST'"}, status=405)
+        return RespostaJson({"logout_error": "Logout method must be 'POST'"}, status=405)
     
     logger.info(f"API logout: {request.user.username}")
     auth.logout(request)
-    return JsonResponse({})
+    return RespostaJson({})
 
 def whoami(request):
     """
@@ -87,12 +88,12 @@ def whoami(request):
         user_data["user"] = request.user.to_dict_json()
 
     logger.info("API whoami")
-    return JsonResponse(user_data)
+    return RespostaJson(user_data)
 
 
 @csrf_exempt
 @ajax_login_required
 def list_users(request):
     users = User.objects.all()
-    users_json = [user.to_dict_json() for user in users]
-    return JsonResponse({"users": users_json})
\ No newline at end of file
+    users_json = projetar_lista((user.to_dict_json() for user in users), ler_campos(request))
+    return RespostaJson({"users": users_json})
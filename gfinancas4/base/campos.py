@@ -0,0 +1,140 @@
+"""
+Campos esparsos nas listagens: ?fields=id,valor,created_at,departamento.nome
+
+Caminhos com ponto selecionam campos de objetos aninhados; o nome de um objeto
+(`departamento`) seleciona todos os campos dele.
+
+Nas listagens de despesas e verbas a seleção chega ao SQL: `Projecao` traduz os caminhos em
+lookups de `values()`, de modo que só as colunas pedidas são lidas e só os JOINs necessários
+são feitos, e campos desconhecidos são recusados. Nas demais listagens, que são pequenas ou
+vêm de cache, `projetar` recorta os dicionários já serializados e ignora caminhos inexistentes.
+"""
+from typing import Callable, Dict, Iterable, Optional, Tuple, Union
+
+from .colunar import Dicionario, tabela
+from .exceptions import BusinessError
+
+PARAMETRO = "fields"
+
+Mapeamento = Union[str, Tuple[str, Callable]]
+
+
+def ler_campos(request) -> Optional[Tuple[str, ...]]:
+    """Campos pedidos em ?fields=, sem repetições; None quando o parâmetro não foi informado."""
+    valor = request.GET.get(PARAMETRO, "")
+    campos = tuple(dict.fromkeys(campo.strip() for campo in valor.split(",") if campo.strip()))
+    return campos or None
+
+
+def _atribuir(destino: dict, caminho: str, valor) -> None:
+    *objetos, folha = caminho.split(".")
+    for objeto in objetos:
+        destino = destino.setdefault(objeto, {})
+    destino[folha] = valor
+
+
+def projetar(item: dict, campos: Optional[Iterable[str]]) -> dict:
+    """Recorta um dicionário serializado; sem campos, devolve o próprio item."""
+    if not campos:
+        return item
+    resultado = {}
+    for campo in campos:
+        valor = item
+        for chave in campo.split("."):
+            if not isinstance(valor, dict) or chave not in valor:
+                break
+            valor = valor[chave]
+        else:
+            _atribuir(resultado, campo, valor)
+    return resultado
+
+
+def projetar_lista(itens: Iterable[dict], campos: Optional[Iterable[str]]) -> list:
+    return [projetar(item, campos) for item in itens] if campos else list(itens)
+
+
+class Projecao:
+    """
+    Seleção de campos de um modelo lida direto do banco com `values()`.
+
+    Args:
+        mapa: Caminho no JSON -> lookup do ORM, ou (lookup, conversor) quando o valor do
+            banco precisa ser convertido como em `to_dict_json`. A ordem do mapa é a do JSON.
+        campos: Caminhos pedidos (None: todos os do mapa)
+        obrigatorios: Lookups lidos mesmo sem terem sido pedidos (ordenação, cursor)
+        colunar: `serializar_lista` devolve o formato colunar (base.colunar)
+
+    Raises:
+        BusinessError: Se algum campo não existir no mapa
+    """
+
+    def __init__(self, mapa: Dict[str, Mapeamento], campos: Optional[Iterable[str]] = None,
+                 obrigatorios: Iterable[str] = (), colunar: bool = False):
+        campos = tuple(mapa) if campos is None else tuple(campos)
+        self.colunar = colunar
+        desconhecidos = [
+            campo for campo in campos
+            if not any(caminho == campo or caminho.startswith(campo + ".") for caminho in mapa)
+        ]
+        if desconhecidos:
+            raise BusinessError(
+                f"Campo inválido em {PARAMETRO}: {', '.join(desconhecidos)}. Opções: {', '.join(mapa)}."
+            )
+
+        self.caminhos = []
+        for caminho, mapeamento in mapa.items():
+            if any(caminho == campo or caminho.startswith(campo + ".") for campo in campos):
+                lookup, conversor = (mapeamento, None) if isinstance(mapeamento, str) else mapeamento
+                self.caminhos.append((caminho, lookup, conversor))
+        self.lookups = tuple(dict.fromkeys([lookup for _, lookup, _ in self.caminhos] + list(obrigatorios)))
+
+        # Colunas do formato colunar: o primeiro nível do caminho; as de objetos aninhados
+        # guardam (resto do caminho, lookup, conversor) de cada campo do objeto
+        self.colunas = {}
+        for caminho, lookup, conversor in self.caminhos:
+            coluna, _, resto = caminho.partition(".")
+            self.colunas.setdefault(coluna, []).append((resto, lookup, conversor))
+
+    def serializar(self, linha: dict) -> dict:
+        """Monta o JSON (com os objetos aninhados) a partir de uma linha de `values()`."""
+        resultado = {}
+        for caminho, lookup, conversor in self.caminhos:
+            valor = linha[lookup]
+            if conversor is not None and valor is not None:
+                valor = conversor(valor)
+            _atribuir(resultado, caminho, valor)
+        return resultado
+
+    def serializar_lista(self, linhas: Iterable[dict]):
+        return self.serializar_colunas(linhas) if self.colunar else [self.serializar(linha) for linha in linhas]
+
+    def serializar_colunas(self, linhas: Iterable[dict]) -> dict:
+        """
+        Formato colunar direto das linhas de `values()`, sem montar um dicionário por linha.
+
+        Cada objeto aninhado distinto (pela tupla das suas colunas) é montado uma única vez.
+        """
+        dados = {coluna: [] for coluna in self.colunas}
+        dicionarios = {coluna: Dicionario() for coluna, campos in self.colunas.items() if campos[0][0]}
+        for linha in linhas:
+            for coluna, campos in self.colunas.items():
+                dicionario = dicionarios.get(coluna)
+                if dicionario is None:
+                    _, lookup, conversor = campos[0]
+                    valor = linha[lookup]
+                    dados[coluna].append(conversor(valor) if conversor is not None and valor is not None else valor)
+                    continue
+                chave = tuple(linha[lookup] for _, lookup, _ in campos)
+                indice = dicionario.indice(chave)
+                if indice is None:
+                    indice = dicionario.adicionar(chave, self._objeto(campos, linha))
+                dados[coluna].append(indice)
+        return tabela(list(self.colunas), dados, dicionarios)
+
+    @staticmethod
+    def _objeto(campos, linha: dict) -> dict:
+        objeto = {}
+        for resto, lookup, conversor in campos:
+            valor = linha[lookup]
+            _atribuir(objeto, resto, conversor(valor) if conversor is not None and valor is not None else valor)
+        return objeto
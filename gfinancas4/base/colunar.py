@@ -0,0 +1,95 @@
+"""
+Formato colunar das listagens: ?format=columnar
+
+Gráficos e grades consomem colunas, não objetos. Com o parâmetro, cada lista da resposta vira
+
+    {"columns": [...], "data": {coluna: [valores]}, "dictionaries": {coluna: [objetos]}}
+
+Objetos aninhados (departamento, elemento, usuário...) são codificados por dicionário: a coluna
+guarda o índice do objeto em `dictionaries[coluna]`, onde cada objeto distinto aparece uma vez.
+O restante da resposta (paginação, totais) não muda.
+"""
+from typing import Iterable, Optional
+
+from .exceptions import BusinessError
+
+PARAMETRO = "format"
+COLUNAR = "columnar"
+FORMATOS = ("json", COLUNAR)
+
+
+def ler_formato_colunar(request) -> bool:
+    """True quando ?format=columnar foi pedido; sem o parâmetro, o formato é o de sempre."""
+    formato = request.GET.get(PARAMETRO) or "json"
+    if formato not in FORMATOS:
+        raise BusinessError(f"Formato inválido: {formato}. Opções: {', '.join(FORMATOS)}.")
+    return formato == COLUNAR
+
+
+class Dicionario:
+    """Objetos distintos de uma coluna, na ordem em que aparecem, indexados por uma chave."""
+
+    def __init__(self):
+        self.objetos = []
+        self._indices = {}
+
+    def indice(self, chave) -> Optional[int]:
+        return self._indices.get(chave)
+
+    def adicionar(self, chave, objeto) -> int:
+        indice = self._indices[chave] = len(self.objetos)
+        self.objetos.append(objeto)
+        return indice
+
+
+def tabela(colunas: list, dados: dict, dicionarios: dict) -> dict:
+    return {
+        "columns": colunas,
+        "data": dados,
+        "dictionaries": {coluna: dicionario.objetos for coluna, dicionario in dicionarios.items()},
+    }
+
+
+def _chave(objeto: dict):
+    chave = tuple(objeto.items())
+    try:
+        hash(chave)
+    except TypeError:
+        # Objeto com listas ou objetos dentro: a representação serve de chave
+        return repr(objeto)
+    return chave
+
+
+def colunar(itens: Iterable[dict]) -> dict:
+    """
+    Transpõe uma lista de dicionários já serializados.
+
+    As colunas são as chaves na ordem em que aparecem (chave ausente num item vale None) e
+    as colunas com objetos são codificadas por dicionário.
+    """
+    itens = list(itens)
+    colunas = list(dict.fromkeys(chave for item in itens for chave in item))
+    dados, dicionarios = {}, {}
+    for coluna in colunas:
+        valores = [item.get(coluna) for item in itens]
+        if any(isinstance(valor, dict) for valor in valores):
+            dicionario = dicionarios[coluna] = Dicionario()
+            valores = [_codificar(dicionario, valor) for valor in valores]
+        dados[coluna] = valores
+    return tabela(colunas, dados, dicionarios)
+
+
+def _codificar(dicionario: Dicionario, valor):
+    if not isinstance(valor, dict):
+        return valor
+    chave = _chave(valor)
+    indice = dicionario.indice(chave)
+    return dicionario.adicionar(chave, valor) if indice is None else indice
+
+
+def colunar_listas(resultado: dict, chaves: Iterable[str]) -> dict:
+    """Converte as listas `chaves` de uma resposta para o formato colunar (as ausentes são ignoradas)."""
+    for chave in chaves:
+        if isinstance(resultado.get(chave), list):
+            resultado[chave] = colunar(resultado[chave])
+    return resultado
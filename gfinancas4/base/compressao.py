@@ -0,0 +1,202 @@
+"""
+Compressão das respostas: gzip e, quando os pacotes estão instalados, brotli e zstd.
+
+`CompressaoMiddleware` (base/middlewares.py) escolhe a codificação pelo Accept-Encoding, na
+ordem de preferência de COMPRESSAO_CODIFICACOES, e comprime:
+    - respostas comuns a partir de COMPRESSAO_MINIMO_BYTES (abaixo disso o cabeçalho e a
+      CPU custam mais do que os bytes economizados);
+    - respostas em fluxo (exportações) pedaço a pedaço, sem juntar o corpo em memória;
+    - respostas marcadas com `reutilizar_compressao` (catálogo) uma vez por conteúdo: o corpo
+      comprimido fica no cache COMPRESSAO_CACHE sob o ETag, o caminho e os parâmetros que
+      mudam o corpo, e é servido nas seguintes.
+
+Só tipos textuais são comprimidos; XLSX e outros formatos já compactados passam intactos.
+"""
+import hashlib
+import zlib
+from functools import wraps
+from typing import Callable, Dict, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.cache import patch_vary_headers
+
+from . import campos, colunar
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - depende do ambiente
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - depende do ambiente
+    zstandard = None
+
+# Parâmetros que mudam o corpo sem mudar o ETag; os demais ficam fora da chave do cache, para
+# que parâmetros arbitrários na URL não criem entradas novas
+PARAMETROS_REPRESENTACAO = (campos.PARAMETRO, colunar.PARAMETRO)
+
+TIPOS_COMPRESSIVEIS = ("application/json", "text/", "application/javascript", "application/xml")
+
+# Níveis para conteúdo gerado a cada requisição, perto do melhor custo-benefício de cada
+# algoritmo (python -m benchmarks.compressao)
+NIVEIS = {"gzip": 6, "br": 5, "zstd": 3}
+
+# Compressão em fluxo: (comprimir um pedaço, finalizar)
+Fluxo = Tuple[Callable[[bytes], bytes], Callable[[], bytes]]
+
+
+def _gzip(nivel: int) -> Fluxo:
+    # wbits 16 + MAX_WBITS: formato gzip (cabeçalho e CRC) em vez de zlib
+    compressor = zlib.compressobj(nivel, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    return compressor.compress, compressor.flush
+
+
+def _brotli(nivel: int) -> Fluxo:
+    compressor = brotli.Compressor(quality=nivel)
+    return compressor.process, compressor.finish
+
+
+def _zstd(nivel: int) -> Fluxo:
+    compressor = zstandard.ZstdCompressor(level=nivel).compressobj()
+    return compressor.compress, compressor.flush
+
+
+class Codificacao:
+    """Um algoritmo de compressão, pelo nome usado em Content-Encoding."""
+
+    def __init__(self, nome: str, fluxo: Callable[[int], Fluxo]):
+        self.nome = nome
+        self._fluxo = fluxo
+
+    def fluxo(self, nivel: int = None) -> Fluxo:
+        return self._fluxo(NIVEIS[self.nome] if nivel is None else nivel)
+
+    def comprimir(self, dados: bytes, nivel: int = None) -> bytes:
+        comprimir, finalizar = self.fluxo(nivel)
+        return comprimir(dados) + finalizar()
+
+
+CODIFICACOES: Dict[str, Codificacao] = {"gzip": Codificacao("gzip", _gzip)}
+if brotli is not None:
+    CODIFICACOES["br"] = Codificacao("br", _brotli)
+if zstandard is not None:
+    CODIFICACOES["zstd"] = Codificacao("zstd", _zstd)
+
+
+def _aceitas(cabecalho: str) -> Dict[str, float]:
+    """Codificações do Accept-Encoding com o respectivo q (1 quando omitido)."""
+    aceitas = {}
+    for item in cabecalho.split(","):
+        nome, _, parametros = item.partition(";")
+        nome = nome.strip().lower()
+        if not nome:
+            continue
+        q = 1.0
+        parametro = parametros.strip()
+        if parametro.startswith("q="):
+            try:
+                q = float(parametro[2:])
+            except ValueError:
+                q = 0.0
+        aceitas[nome] = q
+    return aceitas
+
+
+def escolher_codificacao(cabecalho: str) -> Optional[Codificacao]:
+    """Primeira codificação de COMPRESSAO_CODIFICACOES instalada e aceita pelo cliente."""
+    aceitas = _aceitas(cabecalho or "")
+    for nome in settings.COMPRESSAO_CODIFICACOES:
+        codificacao = CODIFICACOES.get(nome)
+        if codificacao is not None and aceitas.get(nome, aceitas.get("*", 0)) > 0:
+            return codificacao
+    return None
+
+
+def reutilizar_compressao(view):
+    """
+    Marca a resposta da view para ter o corpo comprimido guardado em cache.
+
+    Para views cujo ETag muda com o conteúdo (o catálogo): a chave é o ETag, o caminho e os
+    PARAMETROS_REPRESENTACAO (?fields= e ?format= mudam o corpo sem mudar o ETag).
+    """
+    @wraps(view)
+    def _view(request, *args, **kwargs):
+        response = view(request, *args, **kwargs)
+        if response.status_code == 200 and response.has_header("ETag"):
+            parametros = " ".join(request.GET.get(nome, "") for nome in PARAMETROS_REPRESENTACAO)
+            response.chave_compressao = f"{response['ETag']} {request.path} {parametros}"
+        return response
+    return _view
+
+
+def _comprimir_corpo(response, codificacao: Codificacao) -> bytes:
+    chave = getattr(response, "chave_compressao", None)
+    if chave is None:
+        return codificacao.comprimir(response.content)
+    cache = caches[settings.COMPRESSAO_CACHE]
+    chave = f"compressao:{codificacao.nome}:{hashlib.md5(chave.encode(), usedforsecurity=False).hexdigest()}"
+    corpo = cache.get(chave)
+    if corpo is None:
+        corpo = codificacao.comprimir(response.content)
+        cache.set(chave, corpo)
+    return corpo
+
+
+def _comprimir_fluxo(codificacao: Codificacao, pedacos):
+    comprimir, finalizar = codificacao.fluxo()
+    for pedaco in pedacos:
+        saida = comprimir(pedaco)
+        if saida:
+            yield saida
+    yield finalizar()
+
+
+async def _acomprimir_fluxo(codificacao: Codificacao, pedacos):
+    comprimir, finalizar = codificacao.fluxo()
+    async for pedaco in pedacos:
+        saida = comprimir(pedaco)
+        if saida:
+            yield saida
+    yield finalizar()
+
+
+def _etag_fraco(response) -> None:
+    # O corpo comprimido não é byte a byte o mesmo: o ETag forte vira fraco (como no GZipMiddleware)
+    etag = response.get("ETag")
+    if etag and etag.startswith('"'):
+        response["ETag"] = "W/" + etag
+
+
+def comprimir_resposta(request, response):
+    """Comprime a resposta conforme o Accept-Encoding da requisição, quando compensa."""
+    if response.has_header("Content-Encoding"):
+        return response
+    if not response.get("Content-Type", "").startswith(TIPOS_COMPRESSIVEIS):
+        return response
+    if not response.streaming and len(response.content) < settings.COMPRESSAO_MINIMO_BYTES:
+        return response
+
+    patch_vary_headers(response, ("Accept-Encoding",))
+    codificacao = escolher_codificacao(request.META.get("HTTP_ACCEPT_ENCODING"))
+    if codificacao is None:
+        return response
+
+    if response.streaming:
+        if response.is_async:
+            response.streaming_content = _acomprimir_fluxo(codificacao, response.streaming_content)
+        else:
+            response.streaming_content = _comprimir_fluxo(codificacao, response.streaming_content)
+        if response.has_header("Content-Length"):
+            del response["Content-Length"]
+    else:
+        corpo = _comprimir_corpo(response, codificacao)
+        if len(corpo) >= len(response.content):
+            return response
+        response.content = corpo
+        response["Content-Length"] = str(len(corpo))
+
+    _etag_fraco(response)
+    response["Content-Encoding"] = codificacao.nome
+    return response
@@ -0,0 +1,158 @@
+"""
+Detector de N+1 e de consultas lentas, para desenvolvimento, homologação e testes.
+
+Observa as consultas de um trecho (uma requisição, pelo middleware, ou um bloco
+`with detectar_consultas()`) e agrupa pelo formato do SQL. Quando o mesmo formato se
+repete DETECTOR_CONSULTAS_REPETICOES vezes, típico de `to_dict_json` acessando uma FK
+dentro de um laço, registra o ponto do código que disparou a repetição. Consultas acima de
+DETECTOR_CONSULTAS_LENTA_MS também são registradas.
+
+Com DETECTOR_CONSULTAS_LEVANTAR, o problema vira exceção ao final do trecho, fora do
+try/except das views, para o teste falhar em vez de receber um 500.
+"""
+import logging
+import re
+import time
+import traceback
+from collections import Counter
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import List
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+
+logger = logging.getLogger("gfinancas4.detector")
+
+_LISTA_IN = re.compile(r"IN \((?:%s, )*%s\)")
+_ESPACOS = re.compile(r"\s+")
+_FRAMES_DO_DETECTOR = ("base/detector.py", "base/middlewares.py")
+_WRAPPERS_DA_TAREFA: ContextVar[tuple] = ContextVar("wrappers_da_tarefa", default=())
+
+
+class ConsultasRepetidasError(Exception):
+    pass
+
+
+def formato_consulta(sql: str) -> str:
+    """SQL sem variações que não mudam o formato (tamanho de listas IN e espaços)."""
+    return _ESPACOS.sub(" ", _LISTA_IN.sub("IN (...)", sql)).strip()
+
+
+def _pilha_do_projeto() -> List[str]:
+    raiz = str(settings.BASE_DIR)
+    return [
+        f"{frame.filename}:{frame.lineno} em {frame.name}: {frame.line}"
+        for frame in traceback.extract_stack()
+        if frame.filename.startswith(raiz) and not frame.filename.endswith(_FRAMES_DO_DETECTOR)
+    ]
+
+
+class DetectorConsultas:
+    """`execute_wrapper` que conta formatos de SQL e mede cada consulta."""
+
+    def __init__(self, repeticoes: int, lenta_ms: float, descricao: str = ""):
+        self.repeticoes = repeticoes
+        self.lenta_ms = lenta_ms
+        self.descricao = descricao
+        self.formatos = Counter()
+        self.problemas: List[str] = []
+
+    def __call__(self, execute, sql, params, many, context):
+        formato = formato_consulta(sql)
+        self.formatos[formato] += 1
+        if self.formatos[formato] == self.repeticoes:
+            self._registrar(f"consulta repetida {self.repeticoes} vezes (N+1?): {formato[:300]}")
+
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duracao_ms = (time.perf_counter() - inicio) * 1000
+            if self.lenta_ms and duracao_ms >= self.lenta_ms:
+                self._registrar(f"consulta lenta ({duracao_ms:.0f} ms): {formato[:300]}")
+
+    def _registrar(self, problema: str) -> None:
+        pilha = _pilha_do_projeto()
+        self.problemas.append(problema)
+        logger.warning(
+            f"{self.descricao or 'trecho'}: {problema}\n  " + "\n  ".join(pilha[-8:]),
+            extra={"problema": problema, "pilha": pilha},
+        )
+
+
+@asynccontextmanager
+async def execute_wrapper_assincrono(wrapper):
+    """
+    `connection.execute_wrapper` para código assíncrono.
+
+    As conexões são por thread, e o ORM chamado de código assíncrono roda na thread de
+    `sync_to_async` (thread_sensitive), não na do laço de eventos: o wrapper é instalado e
+    removido nessa thread. Como requisições simultâneas podem dividir essa thread, ele só
+    recebe as consultas feitas no contexto da tarefa que o instalou. Consultas em threads
+    próprias (thread_sensitive=False, executores) ficam de fora.
+    """
+    def da_tarefa(execute, sql, params, many, context):
+        if wrapper not in _WRAPPERS_DA_TAREFA.get():
+            return execute(sql, params, many, context)
+        return wrapper(execute, sql, params, many, context)
+
+    def instalar():
+        conexao = connections[DEFAULT_DB_ALIAS]
+        conexao.execute_wrappers.append(da_tarefa)
+        return conexao
+
+    token = _WRAPPERS_DA_TAREFA.set(_WRAPPERS_DA_TAREFA.get() + (wrapper,))
+    try:
+        conexao = await sync_to_async(instalar)()
+        try:
+            yield wrapper
+        finally:
+            await sync_to_async(conexao.execute_wrappers.remove)(da_tarefa)
+    finally:
+        _WRAPPERS_DA_TAREFA.reset(token)
+
+
+def _novo_detector(descricao: str, repeticoes: int, lenta_ms: float) -> DetectorConsultas:
+    return DetectorConsultas(
+        repeticoes if repeticoes is not None else settings.DETECTOR_CONSULTAS_REPETICOES,
+        lenta_ms if lenta_ms is not None else settings.DETECTOR_CONSULTAS_LENTA_MS,
+        descricao,
+    )
+
+
+def _verificar(detector: DetectorConsultas, descricao: str, levantar: bool) -> None:
+    if detector.problemas and (levantar if levantar is not None else settings.DETECTOR_CONSULTAS_LEVANTAR):
+        raise ConsultasRepetidasError(f"{descricao or 'trecho'}: " + "; ".join(detector.problemas))
+
+
+@contextmanager
+def detectar_consultas(descricao: str = "", levantar: bool = None, repeticoes: int = None, lenta_ms: float = None):
+    """
+    Observa as consultas feitas no bloco.
+
+    Args:
+        descricao: Identificação do trecho nos logs (por exemplo, a rota)
+        levantar: Levanta ConsultasRepetidasError ao final se houver problema
+            (padrão: DETECTOR_CONSULTAS_LEVANTAR)
+        repeticoes: Repetições do mesmo formato que caracterizam N+1 (padrão: DETECTOR_CONSULTAS_REPETICOES)
+        lenta_ms: Duração a partir da qual a consulta é lenta; 0 desliga (padrão: DETECTOR_CONSULTAS_LENTA_MS)
+
+    Raises:
+        ConsultasRepetidasError: Se `levantar` e algum problema for encontrado
+    """
+    detector = _novo_detector(descricao, repeticoes, lenta_ms)
+    with connection.execute_wrapper(detector):
+        yield detector
+    _verificar(detector, descricao, levantar)
+
+
+@asynccontextmanager
+async def adetectar_consultas(descricao: str = "", levantar: bool = None, repeticoes: int = None,
+                              lenta_ms: float = None):
+    """Versão de detectar_consultas para código assíncrono (ver execute_wrapper_assincrono)."""
+    detector = _novo_detector(descricao, repeticoes, lenta_ms)
+    async with execute_wrapper_assincrono(detector):
+        yield detector
+    _verificar(detector, descricao, levantar)
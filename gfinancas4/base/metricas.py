@@ -0,0 +1,100 @@
+"""
+Métricas de desempenho por rota, expostas no formato texto do Prometheus.
+
+O registro vive na memória do processo: com vários workers (uWSGI), cada um responde
+por si em /api/metrics, e o Prometheus soma as séries ao agregar as instâncias.
+"""
+import threading
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Dict, Sequence, Tuple
+
+BUCKETS_DURACAO = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BUCKETS_CONSULTAS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Histograma:
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        self.contagens = [0] * (len(self.buckets) + 1)
+        self.soma = 0.0
+        self.total = 0
+
+    def observar(self, valor: float) -> None:
+        self.contagens[bisect_left(self.buckets, valor)] += 1
+        self.soma += valor
+        self.total += 1
+
+    def acumulados(self):
+        """Pares (limite, contagem acumulada), terminando em +Inf."""
+        acumulado = 0
+        for limite, contagem in zip(self.buckets + (float("inf"),), self.contagens):
+            acumulado += contagem
+            yield limite, acumulado
+
+
+class Registro:
+    """Histogramas de duração, consultas e tempo de banco por (rota, método), e contagem por status."""
+
+    METRICAS = (
+        ("gfinancas_http_request_duration_seconds", "Duração das requisições HTTP em segundos.", BUCKETS_DURACAO),
+        ("gfinancas_http_request_db_queries", "Consultas ao banco por requisição.", BUCKETS_CONSULTAS),
+        ("gfinancas_http_request_db_duration_seconds", "Tempo gasto no banco por requisição.", BUCKETS_DURACAO),
+    )
+
+    def __init__(self):
+        self._trava = threading.Lock()
+        self.limpar()
+
+    def limpar(self) -> None:
+        with self._trava:
+            self._histogramas: Dict[str, Dict[Tuple[str, str], Histograma]] = {
+                nome: {} for nome, _, _ in self.METRICAS
+            }
+            self._requisicoes: Dict[Tuple[str, str, str], int] = defaultdict(int)
+
+    def registrar(self, rota: str, metodo: str, status: int, duracao: float, consultas: int,
+                  duracao_db: float) -> None:
+        chave = (rota, metodo)
+        with self._trava:
+            for (nome, _, buckets), valor in zip(self.METRICAS, (duracao, consultas, duracao_db)):
+                histogramas = self._histogramas[nome]
+                if chave not in histogramas:
+                    histogramas[chave] = Histograma(buckets)
+                histogramas[chave].observar(valor)
+            self._requisicoes[(rota, metodo, str(status))] += 1
+
+    def formatar_prometheus(self) -> str:
+        linhas = []
+        with self._trava:
+            linhas += [
+                "# HELP gfinancas_http_requests_total Requisições HTTP atendidas.",
+                "# TYPE gfinancas_http_requests_total counter",
+            ]
+            for (rota, metodo, status), quantidade in sorted(self._requisicoes.items()):
+                rotulos = _rotulos(rota=rota, metodo=metodo, status=status)
+                linhas.append(f"gfinancas_http_requests_total{{{rotulos}}} {quantidade}")
+
+            for nome, descricao, _ in self.METRICAS:
+                linhas += [f"# HELP {nome} {descricao}", f"# TYPE {nome} histogram"]
+                for (rota, metodo), histograma in sorted(self._histogramas[nome].items()):
+                    rotulos = _rotulos(rota=rota, metodo=metodo)
+                    for limite, acumulado in histograma.acumulados():
+                        le = "+Inf" if limite == float("inf") else repr(float(limite))
+                        linhas.append(f'{nome}_bucket{{{rotulos},le="{le}"}} {acumulado}')
+                    linhas.append(f"{nome}_sum{{{rotulos}}} {histograma.soma!r}")
+                    linhas.append(f"{nome}_count{{{rotulos}}} {histograma.total}")
+        return "\n".join(linhas) + "\n"
+
+
+def _escapar(valor: str) -> str:
+    return valor.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _rotulos(**rotulos) -> str:
+    return ",".join(f'{nome}="{_escapar(str(valor))}"' for nome, valor in rotulos.items())
+
+
+registro = Registro()
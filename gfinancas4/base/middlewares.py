@@ -1,15 +1,20 @@
+import logging
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.db import connection
 from django.http import JsonResponse
+from django.conf import settings
+from django.utils.deprecation import MiddlewareMixin
 from ..base.exceptions import BusinessError
+from .compressao import comprimir_resposta
+from .detector import adetectar_consultas, detectar_consultas, execute_wrapper_assincrono
+from .metricas import registro
 
+logger = logging.getLogger("gfinancas4.desempenho")
 
-class DjavueApiErrorHandlingMiddleware:
-    def __init__(self, get_response):
-        self.get_response = get_response
-
-    def __call__(self, request):
-        response = self.get_response(request)
-        return response
 
+class DjavueApiErrorHandlingMiddleware(MiddlewareMixin):
     def process_exception(self, request, exc):
         error = str(exc)
         if isinstance(exc, ValueError):
@@ -24,3 +29,116 @@ class DjavueApiErrorHandlingMiddleware:
                 status=503,
             )
         return response
+
+
+class CompressaoMiddleware(MiddlewareMixin):
+    """Comprime as respostas com gzip, brotli ou zstd conforme o Accept-Encoding (base/compressao.py)."""
+
+    def process_response(self, request, response):
+        return comprimir_resposta(request, response)
+
+
+class _MedidorBanco:
+    """`execute_wrapper` que conta as consultas e soma o tempo gasto no banco."""
+
+    def __init__(self):
+        self.consultas = 0
+        self.duracao = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duracao += time.perf_counter() - inicio
+            self.consultas += 1
+
+
+def _rota(request) -> str:
+    """Nome da URL (ou o padrão da rota, se não tiver nome); evita um rótulo por id na URL."""
+    resolver_match = getattr(request, "resolver_match", None)
+    if resolver_match is None:
+        return "<nao_resolvida>"
+    return resolver_match.url_name or resolver_match.route
+
+
+class DesempenhoMiddleware:
+    """
+    Mede cada requisição: tempo total, quantidade de consultas e tempo no banco.
+
+    Os valores saem no cabeçalho `Server-Timing` (visível nas ferramentas do navegador),
+    numa linha de log chave=valor e nos histogramas de /api/metrics. Em respostas em fluxo
+    (exportações), o tempo medido vai até o início do envio.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        medidor = _MedidorBanco()
+        inicio = time.perf_counter()
+        with connection.execute_wrapper(medidor):
+            response = self.get_response(request)
+        return self._concluir(request, response, medidor, time.perf_counter() - inicio)
+
+    async def __acall__(self, request):
+        medidor = _MedidorBanco()
+        inicio = time.perf_counter()
+        async with execute_wrapper_assincrono(medidor):
+            response = await self.get_response(request)
+        return self._concluir(request, response, medidor, time.perf_counter() - inicio)
+
+    def _concluir(self, request, response, medidor, duracao):
+        rota = _rota(request)
+        response["Server-Timing"] = (
+            f"total;dur={duracao * 1000:.1f}, "
+            f'db;dur={medidor.duracao * 1000:.1f};desc="{medidor.consultas} consultas", '
+            f"app;dur={max(duracao - medidor.duracao, 0) * 1000:.1f}"
+        )
+        registro.registrar(rota, request.method, response.status_code, duracao, medidor.consultas, medidor.duracao)
+        logger.info(
+            f"rota={rota} metodo={request.method} status={response.status_code} "
+            f"duracao_ms={duracao * 1000:.1f} consultas={medidor.consultas} db_ms={medidor.duracao * 1000:.1f}",
+            extra={
+                "rota": rota,
+                "metodo": request.method,
+                "status": response.status_code,
+                "duracao_ms": round(duracao * 1000, 1),
+                "consultas": medidor.consultas,
+                "db_ms": round(medidor.duracao * 1000, 1),
+            },
+        )
+        return response
+
+
+class DetectorConsultasMiddleware:
+    """Aplica o detector de N+1 e de consultas lentas a cada requisição quando DETECTOR_CONSULTAS está ligado."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not settings.DETECTOR_CONSULTAS:
+            return self.get_response(request)
+        with detectar_consultas(f"{request.method} {request.path}"):
+            return self.get_response(request)
+
+    async def __acall__(self, request):
+        if not settings.DETECTOR_CONSULTAS:
+            return await self.get_response(request)
+        async with adetectar_consultas(f"{request.method} {request.path}"):
+            return await self.get_response(request)
@@ -0,0 +1,108 @@
+"""
+Renderização das respostas JSON da API.
+
+`RespostaJson` substitui `JsonResponse` nas views: mesmos argumentos e mesmo JSON, com a
+conversão de Decimal, datetime e date feita por despacho direto no tipo, em vez da cadeia de
+isinstance do DjangoJSONEncoder, e sem espaços nem escapes de acentos na saída.
+
+O renderizador é escolhido em RENDERIZADOR_JSON:
+    auto    orjson quando instalado, senão padrao (padrão)
+    orjson  extensão em C; exige o pacote orjson
+    padrao  json da biblioteca padrão com o conversor rápido
+    django  o mesmo caminho do JsonResponse, para comparação
+
+Os formatos seguem o DjangoJSONEncoder (datetime em milissegundos e "Z" para UTC, Decimal
+como texto), de modo que trocar de renderizador não altera o conteúdo das respostas.
+"""
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Callable, Dict
+from uuid import UUID
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depende do ambiente
+    orjson = None
+
+_ENCODER_DJANGO = DjangoJSONEncoder()
+
+
+def _data_hora(valor: datetime) -> str:
+    texto = valor.isoformat()
+    if valor.microsecond:
+        texto = texto[:23] + texto[26:]
+    if texto.endswith("+00:00"):
+        texto = texto[:-6] + "Z"
+    return texto
+
+
+_CONVERSORES = {
+    Decimal: str,
+    datetime: _data_hora,
+    date: date.isoformat,
+    UUID: str,
+}
+
+
+def converter(valor):
+    """`default` dos encoders: despacho pelo tipo exato, com o DjangoJSONEncoder para os demais."""
+    conversor = _CONVERSORES.get(type(valor))
+    if conversor is not None:
+        return conversor(valor)
+    return _ENCODER_DJANGO.default(valor)
+
+
+def _renderizar_padrao(dados) -> bytes:
+    return json.dumps(dados, default=converter, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def _renderizar_orjson(dados) -> bytes:
+    # Datas passam pelo conversor para manter o formato do DjangoJSONEncoder
+    return orjson.dumps(dados, default=converter, option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS)
+
+
+def _renderizar_django(dados) -> bytes:
+    return json.dumps(dados, cls=DjangoJSONEncoder).encode()
+
+
+RENDERIZADORES: Dict[str, Callable[[object], bytes]] = {
+    "padrao": _renderizar_padrao,
+    "django": _renderizar_django,
+}
+if orjson is not None:
+    RENDERIZADORES["orjson"] = _renderizar_orjson
+
+
+def renderizador(nome: str = None) -> Callable[[object], bytes]:
+    """Renderizador pelo nome (padrão: RENDERIZADOR_JSON)."""
+    nome = nome or settings.RENDERIZADOR_JSON
+    if nome == "auto":
+        nome = "orjson" if orjson is not None else "padrao"
+    try:
+        return RENDERIZADORES[nome]
+    except KeyError:
+        raise ImproperlyConfigured(
+            f"RENDERIZADOR_JSON inválido ou indisponível: {nome}. Opções: auto, {', '.join(sorted(RENDERIZADORES))}."
+        )
+
+
+def renderizar(dados, nome: str = None) -> bytes:
+    return renderizador(nome)(dados)
+
+
+class RespostaJson(HttpResponse):
+    """`JsonResponse` com o renderizador configurado; aceita `safe` como o original."""
+
+    def __init__(self, data, safe=True, **kwargs):
+        if safe and not isinstance(data, dict):
+            raise TypeError(
+                "In order to allow non-dict objects to be serialized set the safe parameter to False."
+            )
+        kwargs.setdefault("content_type", "application/json")
+        super().__init__(content=renderizar(data), **kwargs)
@@ -0,0 +1,45 @@
+import pytest
+from django.test import RequestFactory
+
+from gfinancas4.base.campos import Projecao, ler_campos, projetar, projetar_lista
+from gfinancas4.base.exceptions import BusinessError
+
+ITEM = {"id": 1, "nome": "Secretaria", "responsavel": {"id": 2, "username": "ana", "email": "ana@exemplo.com"}}
+MAPA = {
+    "id": "id",
+    "valor": ("valor", str),
+    "departamento.id": "departamento_id",
+    "departamento.nome": "departamento__nome",
+}
+
+
+def test_ler_campos():
+    fabrica = RequestFactory()
+    assert ler_campos(fabrica.get("/")) is None
+    assert ler_campos(fabrica.get("/", {"fields": " , "})) is None
+    assert ler_campos(fabrica.get("/", {"fields": "id, valor,id,,departamento.nome"})) == ("id", "valor", "departamento.nome")
+
+
+def test_projetar():
+    assert projetar(ITEM, None) is ITEM
+    assert projetar(ITEM, ("nome", "responsavel.username", "inexistente", "id.x")) == {
+        "nome": "Secretaria", "responsavel": {"username": "ana"},
+    }
+    assert projetar(ITEM, ("responsavel",)) == {"responsavel": ITEM["responsavel"]}
+    assert projetar_lista([ITEM, ITEM], ("id",)) == [{"id": 1}, {"id": 1}]
+
+
+class TestProjecao:
+    def test_lookups_e_serializacao(self):
+        projecao = Projecao(MAPA, ("departamento", "valor"), obrigatorios=("id",))
+        assert projecao.lookups == ("valor", "departamento_id", "departamento__nome", "id")
+        linha = {"id": 7, "valor": 10, "departamento_id": 3, "departamento__nome": "Secretaria"}
+        assert projecao.serializar(linha) == {"valor": "10", "departamento": {"id": 3, "nome": "Secretaria"}}
+
+    def test_conversor_nao_recebe_nulo(self):
+        assert Projecao(MAPA, ("valor",)).serializar({"valor": None}) == {"valor": None}
+
+    def test_campo_desconhecido(self):
+        with pytest.raises(BusinessError) as exc:
+            Projecao(MAPA, ("id", "departamento.sigla", "depart"))
+        assert "departamento.sigla, depart" in str(exc.value)
@@ -0,0 +1,66 @@
+import pytest
+from django.test import RequestFactory
+
+from gfinancas4.base.campos import Projecao
+from gfinancas4.base.colunar import colunar, colunar_listas, ler_formato_colunar
+from gfinancas4.base.exceptions import BusinessError
+
+SECRETARIA = {"id": 1, "nome": "Secretaria"}
+OBRAS = {"id": 2, "nome": "Obras"}
+ITENS = [
+    {"id": 10, "valor": "5.00", "departamento": SECRETARIA},
+    {"id": 11, "valor": "7.50", "departamento": OBRAS, "tags": ["a"]},
+    {"id": 12, "valor": "1.00", "departamento": dict(SECRETARIA)},
+]
+
+
+def linhas(tabela: dict) -> list:
+    """Desfaz o formato colunar (com os dicionários) para comparar com a lista original."""
+    dados, dicionarios = tabela["data"], tabela["dictionaries"]
+    total = len(next(iter(dados.values()), []))
+    return [
+        {
+            coluna: dicionarios[coluna][dados[coluna][i]] if coluna in dicionarios and dados[coluna][i] is not None
+            else dados[coluna][i]
+            for coluna in tabela["columns"]
+        }
+        for i in range(total)
+    ]
+
+
+def test_ler_formato():
+    fabrica = RequestFactory()
+    assert ler_formato_colunar(fabrica.get("/")) is False
+    assert ler_formato_colunar(fabrica.get("/", {"format": "json"})) is False
+    assert ler_formato_colunar(fabrica.get("/", {"format": "columnar"})) is True
+    with pytest.raises(BusinessError):
+        ler_formato_colunar(fabrica.get("/", {"format": "csv"}))
+
+
+def test_colunar_codifica_objetos_uma_vez():
+    tabela = colunar(ITENS)
+    assert tabela["columns"] == ["id", "valor", "departamento", "tags"]
+    assert tabela["data"]["departamento"] == [0, 1, 0]
+    assert tabela["data"]["tags"] == [None, ["a"], None]
+    assert tabela["dictionaries"] == {"departamento": [SECRETARIA, OBRAS]}
+    assert linhas(tabela) == [{"tags": None, **item} for item in ITENS[:1]] + [ITENS[1]] + [{"tags": None, **ITENS[2]}]
+
+
+def test_colunar_listas():
+    resultado = colunar_listas({"total": "13.50", "itens": ITENS[:1], "vazia": []}, ("itens", "vazia", "ausente"))
+    assert resultado["total"] == "13.50"
+    assert resultado["itens"]["data"] == {"id": [10], "valor": ["5.00"], "departamento": [0]}
+    assert resultado["vazia"] == {"columns": [], "data": {}, "dictionaries": {}}
+
+
+def test_projecao_colunar():
+    mapa = {"id": "id", "valor": ("valor", str), "departamento.id": "departamento_id", "departamento.nome": "departamento__nome"}
+    projecao = Projecao(mapa, colunar=True)
+    banco = [
+        {"id": 10, "valor": 5, "departamento_id": 1, "departamento__nome": "Secretaria"},
+        {"id": 11, "valor": 7, "departamento_id": 2, "departamento__nome": "Obras"},
+        {"id": 12, "valor": 1, "departamento_id": 1, "departamento__nome": "Secretaria"},
+    ]
+    tabela = projecao.serializar_lista(banco)
+    assert tabela["data"] == {"id": [10, 11, 12], "valor": ["5", "7", "1"], "departamento": [0, 1, 0]}
+    assert linhas(tabela) == [Projecao(mapa).serializar(linha) for linha in banco]
@@ -0,0 +1,92 @@
+import gzip
+import json
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory
+
+from gfinancas4.base.compressao import comprimir_resposta, escolher_codificacao
+
+CORPO = json.dumps([{"id": i, "departamento": {"id": 1, "nome": "Secretaria"}} for i in range(100)]).encode()
+
+
+@pytest.fixture(autouse=True)
+def compressao(settings):
+    settings.COMPRESSAO_CODIFICACOES = ["zstd", "br", "gzip"]
+    settings.COMPRESSAO_MINIMO_BYTES = 1024
+
+
+def _requisicao(accept_encoding="gzip, deflate, br"):
+    return RequestFactory().get("/", HTTP_ACCEPT_ENCODING=accept_encoding)
+
+
+@pytest.mark.parametrize("cabecalho, esperado", [
+    ("gzip", "gzip"),
+    ("deflate, gzip;q=0.5", "gzip"),
+    ("*", "gzip"),
+    ("gzip;q=0", None),
+    ("identity", None),
+    ("", None),
+])
+def test_escolher_codificacao(cabecalho, esperado):
+    codificacao = escolher_codificacao(cabecalho)
+    assert (codificacao and codificacao.nome) == esperado
+
+
+def test_comprime_json_acima_do_minimo():
+    response = HttpResponse(CORPO, content_type="application/json")
+    response["ETag"] = '"abc"'
+
+    response = comprimir_resposta(_requisicao(), response)
+
+    assert response["Content-Encoding"] == "gzip"
+    assert response["Vary"] == "Accept-Encoding"
+    assert response["ETag"] == 'W/"abc"'
+    assert int(response["Content-Length"]) == len(response.content) < len(CORPO)
+    assert gzip.decompress(response.content) == CORPO
+
+
+def test_nao_comprime_abaixo_do_minimo_nem_tipos_binarios(settings):
+    pequena = comprimir_resposta(_requisicao(), HttpResponse(CORPO[:500], content_type="application/json"))
+    assert not pequena.has_header("Content-Encoding")
+
+    planilha = comprimir_resposta(_requisicao(), HttpResponse(CORPO, content_type="application/vnd.ms-excel"))
+    assert not planilha.has_header("Content-Encoding")
+
+    settings.COMPRESSAO_MINIMO_BYTES = 100
+    assert comprimir_resposta(_requisicao(), HttpResponse(CORPO[:500], content_type="application/json")).has_header(
+        "Content-Encoding"
+    )
+
+
+def test_cliente_sem_suporte():
+    response = comprimir_resposta(_requisicao("identity"), HttpResponse(CORPO, content_type="application/json"))
+    assert not response.has_header("Content-Encoding")
+    assert response["Vary"] == "Accept-Encoding"
+    assert response.content == CORPO
+
+
+def test_resposta_em_fluxo():
+    pedacos = [CORPO[i:i + 100] for i in range(0, len(CORPO), 100)]
+    response = StreamingHttpResponse(iter(pedacos), content_type="text/csv")
+
+    response = comprimir_resposta(_requisicao(), response)
+
+    assert response["Content-Encoding"] == "gzip"
+    assert not response.has_header("Content-Length")
+    assert gzip.decompress(b"".join(response.streaming_content)) == CORPO
+
+
+def test_resposta_em_fluxo_assincrona():
+    async def pedacos():
+        for i in range(0, len(CORPO), 100):
+            yield CORPO[i:i + 100]
+
+    response = comprimir_resposta(_requisicao(), StreamingHttpResponse(pedacos(), content_type="text/csv"))
+
+    async def ler():
+        return b"".join([pedaco async for pedaco in response.streaming_content])
+
+    assert response.is_async
+    assert gzip.decompress(async_to_sync(ler)()) == CORPO
@@ -0,0 +1,78 @@
+import logging
+
+import pytest
+from asgiref.sync import async_to_sync
+
+from gfinancas4.accounts.models import User
+from gfinancas4.base.detector import (
+    ConsultasRepetidasError, adetectar_consultas, detectar_consultas, formato_consulta,
+)
+
+
+def test_formato_ignora_tamanho_das_listas_in():
+    assert formato_consulta('SELECT * FROM t WHERE id IN (%s, %s, %s)') == formato_consulta(
+        'SELECT *\n  FROM t WHERE id IN (%s)'
+    )
+
+
+def test_consulta_repetida_levanta_com_o_ponto_de_origem(db, caplog):
+    usuarios = [User.objects.create_user(username=f"u{i}", password="x") for i in range(5)]
+
+    with caplog.at_level(logging.WARNING, logger="gfinancas4.detector"):
+        with pytest.raises(ConsultasRepetidasError, match="repetida 5 vezes"):
+            with detectar_consultas("laço", levantar=True, repeticoes=5, lenta_ms=0):
+                for usuario in usuarios:
+                    User.objects.filter(id=usuario.id).exists()
+
+    assert "test_detector.py" in caplog.text
+
+
+def test_consultas_distintas_nao_levantam(db):
+    with detectar_consultas("lote", levantar=True, repeticoes=2, lenta_ms=0) as detector:
+        list(User.objects.filter(id__in=[1, 2, 3]))
+        User.objects.count()
+
+    assert detector.problemas == []
+
+
+def test_consulta_lenta_registrada_sem_levantar(db):
+    with detectar_consultas("lenta", levantar=False, repeticoes=100, lenta_ms=0.000001) as detector:
+        User.objects.count()
+
+    assert detector.problemas and "consulta lenta" in detector.problemas[0]
+
+
+def test_middleware_levanta_quando_ligado(client, db, settings):
+    settings.DETECTOR_CONSULTAS = True
+    settings.DETECTOR_CONSULTAS_LEVANTAR = True
+    settings.DETECTOR_CONSULTAS_REPETICOES = 1
+    settings.DETECTOR_CONSULTAS_LENTA_MS = 0
+
+    with pytest.raises(ConsultasRepetidasError, match="GET /api/status"):
+        client.get("/api/status")
+
+
+def test_middleware_desligado_nao_interfere(client, db, settings):
+    settings.DETECTOR_CONSULTAS = False
+    settings.DETECTOR_CONSULTAS_REPETICOES = 1
+
+    assert client.get("/api/status").status_code == 200
+
+
+def test_detector_assincrono_ve_as_consultas_do_orm(db):
+    async def consultar():
+        async with adetectar_consultas("async", levantar=False, repeticoes=2, lenta_ms=0) as detector:
+            for _ in range(2):
+                await User.objects.filter(username="x").aexists()
+        return detector
+
+    assert "repetida 2 vezes" in async_to_sync(consultar)().problemas[0]
+
+
+def test_middleware_assincrono_levanta_no_n_mais_1(async_client, db, settings):
+    settings.DETECTOR_CONSULTAS = True
+    settings.DETECTOR_CONSULTAS_LEVANTAR = True
+    settings.DETECTOR_CONSULTAS_REPETICOES = 1
+
+    with pytest.raises(ConsultasRepetidasError, match="GET /api/status"):
+        async_to_sync(async_client.get)("/api/status")
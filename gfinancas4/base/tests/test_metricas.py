@@ -0,0 +1,76 @@
+import re
+
+import pytest
+from asgiref.sync import async_to_sync
+
+from gfinancas4.base.metricas import Registro, registro
+
+
+@pytest.fixture(autouse=True)
+def registro_limpo():
+    registro.limpar()
+    yield
+    registro.limpar()
+
+
+def test_server_timing_com_consultas(client, db):
+    resp = client.get("/api/status")
+
+    assert resp.status_code == 200
+    assert re.fullmatch(
+        r'total;dur=[\d.]+, db;dur=[\d.]+;desc="1 consultas", app;dur=[\d.]+', resp["Server-Timing"]
+    )
+
+
+def test_server_timing_conta_consultas_no_cliente_assincrono(async_client, db):
+    # O ORM roda na thread de sync_to_async, não na do laço de eventos do middleware
+    resp = async_to_sync(async_client.get)("/api/status")
+
+    assert resp.status_code == 200
+    assert 'desc="1 consultas"' in resp["Server-Timing"]
+
+
+def test_metricas_no_formato_prometheus(client, db, settings):
+    settings.METRICAS_TOKEN = "segredo"
+    client.get("/api/status")
+    client.get("/api/status")
+
+    resp = client.get("/api/metrics", HTTP_AUTHORIZATION="Bearer segredo")
+
+    assert resp.status_code == 200
+    assert resp["Content-Type"].startswith("text/plain; version=0.0.4")
+    texto = resp.content.decode()
+    assert 'gfinancas_http_requests_total{rota="api/status",metodo="GET",status="200"} 2' in texto
+    assert "# TYPE gfinancas_http_request_duration_seconds histogram" in texto
+    assert 'gfinancas_http_request_db_queries_bucket{rota="api/status",metodo="GET",le="1.0"} 2' in texto
+    assert 'gfinancas_http_request_db_queries_count{rota="api/status",metodo="GET"} 2' in texto
+
+
+def test_metricas_exige_token_quando_configurado(client, db, settings):
+    settings.METRICAS_TOKEN = "segredo"
+
+    assert client.get("/api/metrics").status_code == 401
+    assert client.get("/api/metrics", HTTP_AUTHORIZATION="Bearer errado").status_code == 401
+    assert client.get("/api/metrics", HTTP_AUTHORIZATION="Bearer segredo").status_code == 200
+
+
+def test_metricas_sem_token_so_para_staff(client, db, settings, django_user_model):
+    settings.METRICAS_TOKEN = ""
+
+    assert client.get("/api/metrics").status_code == 401
+    client.force_login(django_user_model.objects.create_user(username="comum", password="x", grupo="g"))
+    assert client.get("/api/metrics").status_code == 401
+    client.force_login(django_user_model.objects.create_user(username="admin", password="x", grupo="g", is_staff=True))
+    assert client.get("/api/metrics").status_code == 200
+
+
+def test_histograma_acumula_buckets_e_escapa_rotulos():
+    local = Registro()
+    local.registrar('rota"x', "GET", 200, 0.02, 3, 0.001)
+    local.registrar('rota"x', "GET", 500, 20.0, 600, 0.5)
+
+    texto = local.formatar_prometheus()
+
+    assert 'gfinancas_http_request_duration_seconds_bucket{rota="rota\\"x",metodo="GET",le="0.025"} 1' in texto
+    assert 'gfinancas_http_request_duration_seconds_bucket{rota="rota\\"x",metodo="GET",le="+Inf"} 2' in texto
+    assert 'gfinancas_http_requests_total{rota="rota\\"x",metodo="GET",status="500"} 1' in texto
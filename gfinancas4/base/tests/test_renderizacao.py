@@ -0,0 +1,62 @@
+import json
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from uuid import UUID
+
+import pytest
+from django.core.exceptions import ImproperlyConfigured
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.translation import gettext_lazy
+
+from gfinancas4.base.renderizacao import RENDERIZADORES, RespostaJson, renderizar, renderizador
+
+DADOS = {
+    "valor": Decimal("1234.50"),
+    "created_at": datetime(2026, 10, 18, 14, 5, 7, 123456, tzinfo=dt_timezone.utc),
+    "sem_micro": datetime(2026, 10, 18, 14, 5, 7, tzinfo=dt_timezone(timedelta(hours=-3))),
+    "ingenuo": datetime(2026, 1, 2, 3, 4, 5, 6000),
+    "dia": date(2026, 2, 28),
+    "hora": time(10, 30, 15, 500000),
+    "duracao": timedelta(days=1, seconds=5),
+    "id": UUID("12345678-1234-5678-1234-567812345678"),
+    "texto": "Manutenção predial",
+    "preguicoso": gettext_lazy("Usuário"),
+    "lista": [{"departamento": {"id": 1, "nome": "Secretaria"}, "total": Decimal("0.00")}, None, True, 1.5],
+    "tupla": (1, 2),
+}
+
+
+@pytest.mark.parametrize("nome", sorted(RENDERIZADORES))
+def test_mesmo_conteudo_que_o_django_json_encoder(nome):
+    esperado = json.loads(json.dumps(DADOS, cls=DjangoJSONEncoder))
+    assert json.loads(renderizar(DADOS, nome)) == esperado
+
+
+def test_saida_compacta_e_sem_escapes():
+    assert renderizar({"nome": "Ação", "valores": [1, 2]}, "padrao") == '{"nome":"Ação","valores":[1,2]}'.encode()
+
+
+def test_auto_prefere_orjson(settings):
+    settings.RENDERIZADOR_JSON = "auto"
+    esperado = "orjson" if "orjson" in RENDERIZADORES else "padrao"
+    assert renderizador() is RENDERIZADORES[esperado]
+
+
+def test_renderizador_invalido(settings):
+    settings.RENDERIZADOR_JSON = "inexistente"
+    with pytest.raises(ImproperlyConfigured):
+        renderizador()
+
+
+class TestRespostaJson:
+    def test_como_json_response(self, settings):
+        settings.RENDERIZADOR_JSON = "padrao"
+        resposta = RespostaJson({"valor": Decimal("10.00")}, status=201)
+        assert resposta.status_code == 201
+        assert resposta["Content-Type"] == "application/json"
+        assert json.loads(resposta.content) == {"valor": "10.00"}
+
+    def test_safe(self):
+        with pytest.raises(TypeError):
+            RespostaJson([1, 2])
+        assert json.loads(RespostaJson([1, 2], safe=False).content) == [1, 2]
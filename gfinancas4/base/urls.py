@@ -6,4 +6,5 @@ from . import views
 urlpatterns = [
     path("dapau", views.dapau),
     path("status", views.status),
+    path("metrics", views.metricas, name="metricas"),
 ]
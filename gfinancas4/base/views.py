@@ -1,7 +1,10 @@
+import hmac
 import os
+from django.conf import settings
 from django.db import connection
-from django.http import JsonResponse
+from django.http import HttpResponse, JsonResponse
 from .exceptions import BusinessError
+from .metricas import CONTENT_TYPE, registro
 
 def dapau(request, error: str = None):
     """
@@ -28,3 +31,22 @@ def status(request):
             "git_hash": git_hash,
         }
     )
+
+
+def _metricas_autorizadas(request) -> bool:
+    token = settings.METRICAS_TOKEN
+    if not token:
+        return request.user.is_authenticated and request.user.is_staff
+    return hmac.compare_digest(request.headers.get("Authorization", "").encode(), f"Bearer {token}".encode())
+
+
+def metricas(request):
+    """
+    Métricas de desempenho por rota no formato texto do Prometheus.
+
+    Com METRICAS_TOKEN configurado, exige `Authorization: Bearer <token>`; sem ele, só
+    usuários staff autenticados acessam.
+    """
+    if not _metricas_autorizadas(request):
+        return JsonResponse({"message": "Unauthorized"}, status=401)
+    return HttpResponse(registro.formatar_prometheus(), content_type=CONTENT_TYPE)
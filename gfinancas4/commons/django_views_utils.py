@@ -1,9 +1,23 @@
 from functools import wraps
 import json
+from asgiref.sync import iscoroutinefunction, sync_to_async
 from django.http.response import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
 
 
 def ajax_login_required(view_func):
+    if iscoroutinefunction(view_func):
+        # Em views assíncronas, request.user carregaria o usuário de forma síncrona
+        @wraps(view_func)
+        async def async_wrapper(request, *args, **kwargs):
+            user = await request.auser()
+            if user.is_authenticated:
+                return await view_func(request, *args, **kwargs)
+            resp = json.dumps({"not_authenticated": True})
+            return HttpResponse(resp, content_type="application/json", status=401)
+        return async_wrapper
+
     @wraps(view_func)
     def wrapper(request, *args, **kwargs):
         if request.user.is_authenticated:
@@ -13,6 +27,63 @@ def ajax_login_required(view_func):
     return wrapper
 
 
+def _verificar_condicional(request, validacao):
+    """Resposta 304/412 quando o validador indica recurso inalterado, ou None; mais o ETag e a data."""
+    if validacao is None:
+        return None, None, None
+    etag, modificado = validacao
+    etag = quote_etag(etag) if etag else None
+    modificado = int(modificado.timestamp()) if modificado else None
+    return get_conditional_response(request, etag=etag, last_modified=modificado), etag, modificado
+
+
+def _cabecalhos_condicional(response, etag, modificado):
+    if response.status_code not in (200, 304):
+        return
+    if etag:
+        response.headers.setdefault("ETag", etag)
+    if modificado and not response.has_header("Last-Modified"):
+        response["Last-Modified"] = http_date(modificado)
+
+
+def _condicional_assincrono(view_func, validador):
+    @wraps(view_func)
+    async def async_wrapper(request, *args, **kwargs):
+        validacao = await sync_to_async(validador)(request, *args, **kwargs)
+        response, etag, modificado = _verificar_condicional(request, validacao)
+        if response is None:
+            response = await view_func(request, *args, **kwargs)
+        _cabecalhos_condicional(response, etag, modificado)
+        return response
+    return async_wrapper
+
+
+def condicional(validador):
+    """
+    GET condicional (If-None-Match / If-Modified-Since) a partir de um único validador.
+
+    Como `django.views.decorators.http.condition`, mas `validador(request, *args, **kwargs)`
+    devolve (etag, última alteração) de uma vez, numa só consulta, ou None quando não se
+    aplica; em views assíncronas ele roda em `sync_to_async`. Com o recurso inalterado a
+    view nem é chamada: a resposta é 304, sem consultar nem serializar as linhas. A última
+    alteração pode ser None quando só o ETag é confiável (listas, em que exclusões não
+    mudam a data).
+    """
+    def decorator(view_func):
+        if iscoroutinefunction(view_func):
+            return _condicional_assincrono(view_func, validador)
+
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            response, etag, modificado = _verificar_condicional(request, validador(request, *args, **kwargs))
+            if response is None:
+                response = view_func(request, *args, **kwargs)
+            _cabecalhos_condicional(response, etag, modificado)
+            return response
+        return wrapper
+    return decorator
+
+
 def ajax_superuser_required(view_func):
     @wraps(view_func)
     def wrapper(request, *args, **kwargs):
@@ -1,29 +1,30 @@
-import csv
 from django.contrib import admin
 from .models import Departamento, Subordinacao, Responsabilidade, Verba, Despesa, Elemento, TipoGasto, ElementoTipoGasto
-from django.http import HttpResponse
+from django.db import transaction
+from . import service
+from .exportacao import resposta_exportacao
+
+def _valor_exportacao(obj, campo, relacionados):
+    valor = getattr(obj, campo)
+    # Chave estrangeira vazia sai como célula vazia, não como "None"
+    if campo in relacionados and valor is not None:
+        return str(valor)
+    return valor
 
 @admin.action(description="Exportar dados selecionados como CSV")
 def exportar_para_csv(modeladmin, request, queryset):
     # Nome do arquivo
-    nome_arquivo = f"{modeladmin.model._meta.verbose_name_plural}.csv"
-    
-    # Configurar a resposta HTTP para download do arquivo
-    response = HttpResponse(content_type="text/csv")
-    response["Content-Disposition"] = f"attachment; filename={nome_arquivo}"
-
-    # Criar o escritor CSV
-    writer = csv.writer(response)
+    nome_arquivo = f"{modeladmin.model._meta.verbose_name_plural}"
 
     # Obter os campos do modelo dinamicamente
     campos = [field.name for field in modeladmin.model._meta.fields]
-    writer.writerow(campos)  # Cabeçalho do CSV
+    relacionados = [field.name for field in modeladmin.model._meta.fields if field.is_relation]
 
-    # Preencher as linhas com os valores dos objetos selecionados
-    for obj in queryset:
-        writer.writerow([getattr(obj, campo) for campo in campos])
+    # Carrega as chaves estrangeiras no mesmo SELECT e percorre o resultado em lotes
+    objetos = queryset.select_related(*relacionados).iterator(chunk_size=2000)
+    linhas = ([_valor_exportacao(obj, campo, relacionados) for campo in campos] for obj in objetos)
 
-    return response
+    return resposta_exportacao(nome_arquivo, campos, linhas, "csv")
 
 class DepartamentoAdmin(admin.ModelAdmin):
     list_display = ("id", "nome", "description", "tipoEntidade", "responsavelId", "done")
@@ -38,7 +39,9 @@ class DepartamentoAdmin(admin.ModelAdmin):
 def remover_subordinacao(modeladmin, request, queryset):
     """Ação para remover as subordinações selecionadas."""
     count = queryset.count()
-    queryset.delete()
+    # Remove uma a uma para manter a tabela de fechamento da hierarquia sincronizada
+    for subordinacao in queryset:
+        subordinacao.delete()
     modeladmin.message_user(request, f"{count} subordinação(ões) removida(s) com sucesso.")
 
 
@@ -100,6 +103,26 @@ class DespesaAdmin(admin.ModelAdmin):
     list_filter = ("created_at", "updated_at", "tipoGasto")
     actions = [exportar_para_csv]  # Ação de exportar
 
+    # Alterações feitas pelo admin também precisam refletir no resumo mensal de despesas
+    def save_model(self, request, obj, form, change):
+        with transaction.atomic():
+            if change:
+                service.remover_despesa_agregado(Despesa.objects.get(pk=obj.pk))
+            super().save_model(request, obj, form, change)
+            service.registrar_despesa_agregado(obj)
+
+    def delete_model(self, request, obj):
+        with transaction.atomic():
+            super().delete_model(request, obj)
+            service.remover_despesa_agregado(obj)
+
+    def delete_queryset(self, request, queryset):
+        with transaction.atomic():
+            despesas = list(queryset)
+            super().delete_queryset(request, queryset)
+            for despesa in despesas:
+                service.remover_despesa_agregado(despesa)
+
     def departamento_nome(self, obj):
         return obj.departamento.nome
     departamento_nome.short_description = "Departamento"
@@ -116,7 +139,22 @@ class DespesaAdmin(admin.ModelAdmin):
         return obj.tipoGasto.descricao
     tipo_gasto_nome.short_description = "Tipo de Gasto"
 
-class ElementoAdmin(admin.ModelAdmin):
+class CatalogoAdminMixin:
+    """Invalida o cache do catálogo quando elementos, tipos de gasto ou vínculos mudam pelo admin."""
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        service.invalidar_cache_catalogo()
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        service.invalidar_cache_catalogo()
+
+    def delete_queryset(self, request, queryset):
+        super().delete_queryset(request, queryset)
+        service.invalidar_cache_catalogo()
+
+class ElementoAdmin(CatalogoAdminMixin, admin.ModelAdmin):
     list_display = ("id", "elemento", "descricao")
     search_fields = ("elemento", "descricao")
     list_filter = ("elemento",)
@@ -124,7 +162,7 @@ class ElementoAdmin(admin.ModelAdmin):
         (None, {"fields": ("elemento", "descricao")}),
     )
 
-class TipoGastoAdmin(admin.ModelAdmin):
+class TipoGastoAdmin(CatalogoAdminMixin, admin.ModelAdmin):
     list_display = ("id", "tipoGasto", "descricao")
     search_fields = ("tipoGasto", "descricao")
     list_filter = ("tipoGasto",)
@@ -132,7 +170,7 @@ class TipoGastoAdmin(admin.ModelAdmin):
         (None, {"fields": ("tipoGasto", "descricao")}),
     )
 
-class ElementoTipoGastoAdmin(admin.ModelAdmin):
+class ElementoTipoGastoAdmin(CatalogoAdminMixin, admin.ModelAdmin):
     list_display = ('elemento', 'tipo_gasto')  # Exibe as colunas elemento e tipo_gasto na listagem
     search_fields = ('elemento__elemento', 'tipo_gasto__tipoGasto')  # Permite pesquisar por nome do elemento e tipo de gasto
     list_filter = ('elemento', 'tipo_gasto')  # Filtros para elemento e tipo de gasto
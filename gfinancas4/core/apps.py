@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class coreConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "gfinancas4.core"
+
+    def ready(self):
+        from . import signals  # noqa: F401
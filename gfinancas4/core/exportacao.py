@@ -0,0 +1,225 @@
+"""
+Geração de arquivos de exportação (CSV e XLSX) em fluxo contínuo.
+
+Os geradores recebem um cabeçalho e um iterável de linhas (tuplas) e devolvem os bytes
+do arquivo em partes, sem montar o conteúdo inteiro em memória. Usados com
+`StreamingHttpResponse`, o primeiro pedaço sai assim que a consulta começa a retornar.
+
+Sob ASGI, um iterador síncrono seria consumido inteiro (com `sync_to_async(list)`) antes do
+envio; por isso a resposta recebe um iterador assíncrono que gera cada parte na thread de
+`sync_to_async`, onde o ORM lê as linhas.
+"""
+import csv
+import io
+import re
+import zipfile
+from datetime import datetime
+from decimal import Decimal
+from typing import AsyncIterator, Iterable, Iterator, Sequence
+from xml.sax.saxutils import escape
+
+from asgiref.sync import sync_to_async
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+from gfinancas4.base.exceptions import BusinessError
+
+TAMANHO_PARTE = 64 * 1024
+
+FORMATOS = {
+    "csv": "text/csv; charset=utf-8",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+
+# Texto iniciado por um destes caracteres vira fórmula ao abrir o arquivo numa planilha
+_INICIO_DE_FORMULA = ("=", "+", "-", "@", "\t", "\r")
+
+
+def _neutralizar_formula(texto: str) -> str:
+    """Prefixa com apóstrofo o texto que a planilha executaria como fórmula (injeção de CSV)."""
+    return "'" + texto if texto.startswith(_INICIO_DE_FORMULA) else texto
+
+
+def _formatar_valor(valor):
+    if valor is None:
+        return ""
+    if isinstance(valor, str):
+        return _neutralizar_formula(valor)
+    if isinstance(valor, datetime):
+        return timezone.localtime(valor).isoformat() if timezone.is_aware(valor) else valor.isoformat()
+    return valor
+
+
+def gerar_csv(cabecalho: Sequence[str], linhas: Iterable[Sequence]) -> Iterator[bytes]:
+    """Gera um CSV UTF-8 (com BOM, para o Excel reconhecer os acentos) em partes de ~64 KB."""
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    buffer.write("\ufeff")
+    escritor.writerow(cabecalho)
+
+    for linha in linhas:
+        escritor.writerow([_formatar_valor(v) for v in linha])
+        if buffer.tell() >= TAMANHO_PARTE:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+class _SaidaEmPartes:
+    """Destino de escrita sem seek para o ZipFile; acumula os bytes até serem enviados."""
+
+    def __init__(self):
+        self._partes = []
+        self._posicao = 0
+        self.pendente = 0
+
+    def write(self, dados) -> int:
+        self._partes.append(bytes(dados))
+        self._posicao += len(dados)
+        self.pendente += len(dados)
+        return len(dados)
+
+    def tell(self) -> int:
+        return self._posicao
+
+    def flush(self):
+        pass
+
+    def esvaziar(self) -> bytes:
+        dados = b"".join(self._partes)
+        self._partes.clear()
+        self.pendente = 0
+        return dados
+
+
+_CARACTERES_INVALIDOS_XML = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    "</Types>"
+)
+
+_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    "</Relationships>"
+)
+
+_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet1.xml"/>'
+    "</Relationships>"
+)
+
+
+def _workbook(nome_planilha: str) -> str:
+    return (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        f'<sheets><sheet name="{escape(nome_planilha[:31])}" sheetId="1" r:id="rId1"/></sheets>'
+        "</workbook>"
+    )
+
+
+def _coluna(indice: int) -> str:
+    letras = ""
+    indice += 1
+    while indice:
+        indice, resto = divmod(indice - 1, 26)
+        letras = chr(65 + resto) + letras
+    return letras
+
+
+def _celula(referencia: str, valor) -> str:
+    valor = _formatar_valor(valor)
+    if isinstance(valor, (int, float, Decimal)) and not isinstance(valor, bool):
+        return f'<c r="{referencia}"><v>{valor}</v></c>'
+    texto = escape(_CARACTERES_INVALIDOS_XML.sub("", str(valor)))
+    return f'<c r="{referencia}" t="inlineStr"><is><t xml:space="preserve">{texto}</t></is></c>'
+
+
+def _linha_xml(numero: int, valores: Sequence) -> str:
+    celulas = "".join(_celula(f"{_coluna(i)}{numero}", v) for i, v in enumerate(valores))
+    return f'<row r="{numero}">{celulas}</row>'
+
+
+def gerar_xlsx(cabecalho: Sequence[str], linhas: Iterable[Sequence], nome_planilha: str = "Dados") -> Iterator[bytes]:
+    """
+    Gera uma planilha XLSX com uma única aba, usando só a biblioteca padrão.
+
+    As linhas são gravadas direto na entrada comprimida do zip, que vai sendo esvaziada a
+    cada ~64 KB; números saem como células numéricas e o resto como texto.
+    """
+    saida = _SaidaEmPartes()
+    with zipfile.ZipFile(saida, "w", zipfile.ZIP_DEFLATED) as arquivo:
+        arquivo.writestr("[Content_Types].xml", _CONTENT_TYPES)
+        arquivo.writestr("_rels/.rels", _RELS)
+        arquivo.writestr("xl/workbook.xml", _workbook(nome_planilha))
+        arquivo.writestr("xl/_rels/workbook.xml.rels", _WORKBOOK_RELS)
+        yield saida.esvaziar()
+
+        with arquivo.open("xl/worksheets/sheet1.xml", "w", force_zip64=True) as planilha:
+            planilha.write(
+                b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+            )
+            planilha.write(_linha_xml(1, cabecalho).encode("utf-8"))
+            for numero, linha in enumerate(linhas, start=2):
+                planilha.write(_linha_xml(numero, linha).encode("utf-8"))
+                if saida.pendente >= TAMANHO_PARTE:
+                    yield saida.esvaziar()
+            planilha.write(b"</sheetData></worksheet>")
+
+    yield saida.esvaziar()
+
+
+async def _partes_assincronas(conteudo: Iterator[bytes]) -> AsyncIterator[bytes]:
+    """Entrega as partes do gerador síncrono uma a uma, cada uma gerada na thread de `sync_to_async`."""
+    proxima = sync_to_async(next)
+    while True:
+        parte = await proxima(conteudo, None)
+        if parte is None:
+            return
+        yield parte
+
+
+def resposta_exportacao(nome_arquivo: str, cabecalho: Sequence[str], linhas: Iterable[Sequence],
+                        formato: str = "csv", assincrona: bool = False) -> StreamingHttpResponse:
+    """
+    Monta a resposta de download no formato pedido ("csv" ou "xlsx"). Com `assincrona`
+    (requisições ASGI), o conteúdo é um iterador assíncrono.
+
+    Raises:
+        BusinessError: Se o formato não for suportado
+    """
+    if formato not in FORMATOS:
+        raise BusinessError("Formato de exportação inválido. Use csv ou xlsx.")
+
+    if formato == "xlsx":
+        conteudo = gerar_xlsx(cabecalho, linhas, nome_planilha=nome_arquivo)
+    else:
+        conteudo = gerar_csv(cabecalho, linhas)
+    if assincrona:
+        conteudo = _partes_assincronas(conteudo)
+
+    response = StreamingHttpResponse(conteudo, content_type=FORMATOS[formato])
+    response["Content-Disposition"] = f'attachment; filename="{nome_arquivo}.{formato}"'
+    return response
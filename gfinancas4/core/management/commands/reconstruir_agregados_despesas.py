@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from gfinancas4.core import service
+
+
+class Command(BaseCommand):
+    help = "Reconstrói o resumo mensal de despesas (DespesaAgregadoMensal) a partir da tabela Despesa."
+
+    def handle(self, *args, **options):
+        quantidade = service.reconstruir_agregados_despesas()
+        self.stdout.write(self.style.SUCCESS(f"{quantidade} agregados mensais reconstruídos."))
@@ -0,0 +1,64 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from gfinancas4.accounts.models import User
+from gfinancas4.core import sintetico
+
+
+class Command(BaseCommand):
+    help = "Gera dados sintéticos (departamentos, catálogo, verbas e despesas) para testes de carga."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--departamentos", type=int, default=1000, help="Quantidade de departamentos")
+        parser.add_argument("--depth", dest="profundidade", type=int, default=4,
+                            help="Níveis de subordinação abaixo da raiz")
+        parser.add_argument("--despesas", type=int, default=100000, help="Quantidade de despesas")
+        parser.add_argument("--anos", type=int, default=3, help="Anos cobertos pelas verbas e despesas")
+        parser.add_argument("--elementos", type=int, default=8, help="Elementos no catálogo")
+        parser.add_argument("--seed", dest="semente", type=int, default=42, help="Semente do gerador aleatório")
+        parser.add_argument("--referencia", help="Data final das despesas (YYYY-MM-DD); padrão: agora")
+        parser.add_argument("--lote", type=int, default=sintetico.TAMANHO_LOTE, help="Registros por INSERT")
+        parser.add_argument("--usuario", default="sintetico", help="Usuário responsável pelos registros")
+        parser.add_argument("--senha", help="Define a senha do usuário, para login nos testes de carga")
+        parser.add_argument("--limpar", action="store_true",
+                            help="Apaga todos os dados do app core antes de gerar")
+
+    def handle(self, *args, **options):
+        referencia = None
+        if options["referencia"]:
+            try:
+                referencia = timezone.make_aware(datetime.strptime(options["referencia"], "%Y-%m-%d"))
+            except ValueError:
+                raise CommandError("Data de referência inválida. Use YYYY-MM-DD.")
+
+        usuario, _ = User.objects.get_or_create(username=options["usuario"], defaults={"grupo": "Leitor"})
+        if options["senha"]:
+            usuario.set_password(options["senha"])
+            usuario.save(update_fields=["password"])
+
+        if options["limpar"]:
+            sintetico.apagar_dados_core()
+            self.stdout.write("Dados do core apagados.")
+
+        try:
+            resumo = sintetico.gerar_dados_sinteticos(
+                departamentos=options["departamentos"],
+                profundidade=options["profundidade"],
+                despesas=options["despesas"],
+                anos=options["anos"],
+                semente=options["semente"],
+                usuario=usuario,
+                elementos=options["elementos"],
+                referencia=referencia,
+                lote=options["lote"],
+                progresso=lambda mensagem: self.stdout.write(mensagem),
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(resumo['departamentos'])} departamentos, {resumo['verbas']} verbas e "
+            f"{resumo['despesas']} despesas gerados."
+        ))
@@ -0,0 +1,98 @@
+# Generated by Django 5.1.3 on 2026-10-18 13:59
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def popular_hierarquia(apps, schema_editor):
+    Subordinacao = apps.get_model("core", "Subordinacao")
+    HierarquiaDepartamento = apps.get_model("core", "HierarquiaDepartamento")
+
+    subordinados_por_superior = {}
+    for superior_id, subordinado_id in Subordinacao.objects.values_list(
+        "superior_id", "subordinado_id"
+    ):
+        subordinados_por_superior.setdefault(superior_id, []).append(subordinado_id)
+
+    linhas = []
+    for ancestral_id in subordinados_por_superior:
+        visitados = {ancestral_id}
+        fronteira = [ancestral_id]
+        profundidade = 0
+        while fronteira:
+            profundidade += 1
+            proxima = []
+            for departamento_id in fronteira:
+                for subordinado_id in subordinados_por_superior.get(
+                    departamento_id, []
+                ):
+                    if subordinado_id in visitados:
+                        continue
+                    visitados.add(subordinado_id)
+                    proxima.append(subordinado_id)
+                    linhas.append(
+                        HierarquiaDepartamento(
+                            ancestral_id=ancestral_id,
+                            descendente_id=subordinado_id,
+                            profundidade=profundidade,
+                        )
+                    )
+            fronteira = proxima
+
+    HierarquiaDepartamento.objects.bulk_create(linhas, batch_size=5000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0015_alter_departamento_tipoentidade"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="HierarquiaDepartamento",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("profundidade", models.PositiveIntegerField()),
+                (
+                    "ancestral",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="hierarquia_descendentes",
+                        to="core.departamento",
+                    ),
+                ),
+                (
+                    "descendente",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="hierarquia_ancestrais",
+                        to="core.departamento",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["descendente", "ancestral"],
+                        name="core_hierar_descend_af893e_idx",
+                    )
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("ancestral", "descendente"),
+                        name="unique_hierarquia_departamento",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(popular_hierarquia, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,96 @@
+# Generated by Django 5.1.3 on 2026-10-18 14:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import ExtractMonth, ExtractYear
+
+
+def popular_agregados(apps, schema_editor):
+    Despesa = apps.get_model("core", "Despesa")
+    DespesaAgregadoMensal = apps.get_model("core", "DespesaAgregadoMensal")
+
+    grupos = (
+        Despesa.objects.annotate(
+            ano=ExtractYear("created_at"), mes=ExtractMonth("created_at")
+        )
+        .values("departamento_id", "elemento_id", "tipoGasto_id", "ano", "mes")
+        .annotate(total=Sum("valor"), quantidade=Count("id"))
+        .order_by()
+    )
+    DespesaAgregadoMensal.objects.bulk_create(
+        [DespesaAgregadoMensal(**grupo) for grupo in grupos], batch_size=5000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0016_hierarquiadepartamento"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DespesaAgregadoMensal",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("ano", models.IntegerField()),
+                ("mes", models.PositiveSmallIntegerField()),
+                (
+                    "total",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+                ("quantidade", models.IntegerField(default=0)),
+                (
+                    "departamento",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="despesas_agregadas",
+                        to="core.departamento",
+                    ),
+                ),
+                (
+                    "elemento",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="despesas_agregadas",
+                        to="core.elemento",
+                    ),
+                ),
+                (
+                    "tipoGasto",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="despesas_agregadas",
+                        to="core.tipogasto",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["departamento", "ano", "mes"],
+                        name="core_despes_departa_ed154d_idx",
+                    ),
+                    models.Index(
+                        fields=["ano", "mes"], name="core_despes_ano_d768ff_idx"
+                    ),
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("departamento", "elemento", "tipoGasto", "ano", "mes"),
+                        name="unique_despesa_agregado_mensal",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(popular_agregados, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.1.3 on 2026-10-18 14:04
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0017_despesaagregadomensal"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="despesa",
+            index=models.Index(
+                fields=["-created_at", "-id"], name="core_despes_created_62e3f1_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="despesa",
+            index=models.Index(
+                fields=["departamento", "-created_at", "-id"],
+                name="core_despes_departa_59222e_idx",
+            ),
+        ),
+    ]
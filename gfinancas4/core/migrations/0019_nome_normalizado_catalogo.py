@@ -0,0 +1,55 @@
+# Generated by Django 5.1.3 on 2026-10-18 14:15
+
+import unicodedata
+
+from django.db import migrations, models
+
+
+def _normalizar(texto):
+    texto = "".join(
+        c
+        for c in unicodedata.normalize("NFD", texto)
+        if unicodedata.category(c) != "Mn"
+    )
+    return " ".join(texto.lower().split())
+
+
+def popular_nome_normalizado(apps, schema_editor):
+    # Duplicatas já existentes ficam com NULL: só o registro mais antigo recebe o nome
+    for modelo, campo in (("Elemento", "elemento"), ("TipoGasto", "tipoGasto")):
+        Modelo = apps.get_model("core", modelo)
+        vistos = set()
+        alterados = []
+        for obj in Modelo.objects.order_by("id").only("id", campo):
+            nome = _normalizar(getattr(obj, campo))
+            if nome in vistos:
+                continue
+            vistos.add(nome)
+            obj.nome_normalizado = nome
+            alterados.append(obj)
+        Modelo.objects.bulk_update(alterados, ["nome_normalizado"], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0018_despesa_indices_cursor"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="elemento",
+            name="nome_normalizado",
+            field=models.CharField(
+                editable=False, max_length=256, null=True, unique=True
+            ),
+        ),
+        migrations.AddField(
+            model_name="tipogasto",
+            name="nome_normalizado",
+            field=models.CharField(
+                editable=False, max_length=256, null=True, unique=True
+            ),
+        ),
+        migrations.RunPython(popular_nome_normalizado, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,63 @@
+from django.db import migrations
+
+# Busca sem acentos: unaccent() não é IMMUTABLE, então os índices usam um wrapper que é.
+# As expressões dos índices precisam ser idênticas às usadas em service.buscar.
+SQL_CRIAR = [
+    "CREATE EXTENSION IF NOT EXISTS unaccent",
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    """
+    CREATE OR REPLACE FUNCTION gfinancas_unaccent(text) RETURNS text
+    LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+    AS $$ SELECT public.unaccent('public.unaccent'::regdictionary, $1) $$
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS core_departamento_busca_trgm ON core_departamento
+    USING gin (gfinancas_unaccent(lower(nome || ' ' || description)) gin_trgm_ops)
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS core_elemento_busca_trgm ON core_elemento
+    USING gin (gfinancas_unaccent(lower(elemento || ' ' || descricao)) gin_trgm_ops)
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS core_tipogasto_busca_trgm ON core_tipogasto
+    USING gin (gfinancas_unaccent(lower("tipoGasto" || ' ' || descricao)) gin_trgm_ops)
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS core_despesa_busca_trgm ON core_despesa
+    USING gin (gfinancas_unaccent(lower(justificativa)) gin_trgm_ops)
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS core_despesa_busca_fts ON core_despesa
+    USING gin (to_tsvector('portuguese'::regconfig, gfinancas_unaccent(lower(justificativa))))
+    """,
+]
+
+SQL_REMOVER = [
+    "DROP INDEX IF EXISTS core_despesa_busca_fts",
+    "DROP INDEX IF EXISTS core_despesa_busca_trgm",
+    "DROP INDEX IF EXISTS core_tipogasto_busca_trgm",
+    "DROP INDEX IF EXISTS core_elemento_busca_trgm",
+    "DROP INDEX IF EXISTS core_departamento_busca_trgm",
+    "DROP FUNCTION IF EXISTS gfinancas_unaccent(text)",
+]
+
+
+def _executar(comandos):
+    def executar(apps, schema_editor):
+        if schema_editor.connection.vendor != "postgresql":
+            return
+        for comando in comandos:
+            schema_editor.execute(comando)
+
+    return executar
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0019_nome_normalizado_catalogo"),
+    ]
+
+    operations = [
+        migrations.RunPython(_executar(SQL_CRIAR), _executar(SQL_REMOVER)),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.1.3 on 2026-10-18 14:50
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0020_busca_textual"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="despesa",
+            index=models.Index(
+                fields=["departamento", "created_at", "elemento", "tipoGasto", "valor"],
+                name="core_despes_departa_3e2ecc_idx",
+            ),
+        ),
+    ]
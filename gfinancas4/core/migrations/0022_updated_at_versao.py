@@ -0,0 +1,18 @@
+# Generated by Django 5.1.3 on 2026-10-18 15:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0021_despesa_indice_detalhamento"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="departamento",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
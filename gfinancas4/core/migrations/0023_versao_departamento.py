@@ -0,0 +1,24 @@
+# Generated by Django 5.1.3 on 2026-10-18 16:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0022_updated_at_versao"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="VersaoDepartamento",
+            fields=[
+                (
+                    "departamento_id",
+                    models.BigIntegerField(primary_key=True, serialize=False),
+                ),
+                ("despesas", models.BigIntegerField(default=0)),
+                ("verbas", models.BigIntegerField(default=0)),
+            ],
+        ),
+    ]
@@ -1,43 +1,107 @@
-from django.db import models
+from django.db import models, transaction
 from ..accounts.models import User
 from django.core.exceptions import ValidationError
 import logging
+import unicodedata
 
 logger = logging.getLogger(__name__)
 
-def verificar_ciclo_subordinacao(superior, subordinado, visitados=None):
+def verificar_ciclo_subordinacao(superior, subordinado):
     """
     Verifica se existe um ciclo de subordinação entre dois departamentos.
+
+    Usa a tabela de fechamento (HierarquiaDepartamento): subordinar `subordinado`
+    a `superior` cria um ciclo se `subordinado` já for ancestral de `superior`.
     
     Args:
         superior: Departamento superior
         subordinado: Departamento subordinado
-        visitados: Conjunto de IDs de departamentos já visitados na busca
         
     Returns:
         bool: True se existe um ciclo, False caso contrário
     """
-    if visitados is None:
-        visitados = set()
-        
-    # Se o departamento atual já foi visitado, temos um ciclo
-    if subordinado.id in visitados:
+    if superior.id == subordinado.id:
         return True
-        
-    # Adiciona o departamento atual aos visitados
-    visitados.add(subordinado.id)
-    
-    # Verifica subordinações diretas
-    subordinacoes = Subordinacao.objects.filter(superior=subordinado)
-    for sub in subordinacoes:
-        # Se encontramos o superior em alguma subordinação, temos um ciclo
-        if sub.subordinado.id == superior.id:
-            return True
-        # Verifica recursivamente as subordinações indiretas
-        if verificar_ciclo_subordinacao(superior, sub.subordinado, visitados):
-            return True
-            
-    return False 
+
+    return HierarquiaDepartamento.objects.filter(
+        ancestral_id=subordinado.id,
+        descendente_id=superior.id
+    ).exists()
+
+def _ligar_hierarquia(superior_id, subordinado_id):
+    """
+    Inclui na tabela de fechamento os caminhos criados pela aresta superior -> subordinado:
+    cada ancestral do superior (e ele próprio) passa a alcançar o subordinado e seus descendentes.
+    """
+    ancestrais = [(superior_id, 0)] + list(
+        HierarquiaDepartamento.objects.filter(descendente_id=superior_id)
+        .values_list("ancestral_id", "profundidade")
+    )
+    descendentes = [(subordinado_id, 0)] + list(
+        HierarquiaDepartamento.objects.filter(ancestral_id=subordinado_id)
+        .values_list("descendente_id", "profundidade")
+    )
+    HierarquiaDepartamento.objects.bulk_create([
+        HierarquiaDepartamento(
+            ancestral_id=ancestral_id,
+            descendente_id=descendente_id,
+            profundidade=profundidade_ancestral + profundidade_descendente + 1,
+        )
+        for ancestral_id, profundidade_ancestral in ancestrais
+        for descendente_id, profundidade_descendente in descendentes
+    ])
+
+def _desligar_hierarquia(superior_id, subordinado_id):
+    """Remove da tabela de fechamento os caminhos que passavam pela aresta superior -> subordinado."""
+    ancestrais = [superior_id] + list(
+        HierarquiaDepartamento.objects.filter(descendente_id=superior_id)
+        .values_list("ancestral_id", flat=True)
+    )
+    descendentes = [subordinado_id] + list(
+        HierarquiaDepartamento.objects.filter(ancestral_id=subordinado_id)
+        .values_list("descendente_id", flat=True)
+    )
+    HierarquiaDepartamento.objects.filter(
+        ancestral_id__in=ancestrais,
+        descendente_id__in=descendentes
+    ).delete()
+
+def reconstruir_hierarquia_departamentos():
+    """
+    Recalcula toda a tabela de fechamento a partir das subordinações diretas.
+
+    Returns:
+        int: Quantidade de linhas geradas
+    """
+    subordinados_por_superior = {}
+    for superior_id, subordinado_id in Subordinacao.objects.values_list("superior_id", "subordinado_id"):
+        subordinados_por_superior.setdefault(superior_id, []).append(subordinado_id)
+
+    linhas = []
+    for ancestral_id in subordinados_por_superior:
+        visitados = {ancestral_id}
+        fronteira = [ancestral_id]
+        profundidade = 0
+        while fronteira:
+            profundidade += 1
+            proxima = []
+            for departamento_id in fronteira:
+                for subordinado_id in subordinados_por_superior.get(departamento_id, []):
+                    if subordinado_id in visitados:
+                        continue
+                    visitados.add(subordinado_id)
+                    proxima.append(subordinado_id)
+                    linhas.append(HierarquiaDepartamento(
+                        ancestral_id=ancestral_id,
+                        descendente_id=subordinado_id,
+                        profundidade=profundidade,
+                    ))
+            fronteira = proxima
+
+    with transaction.atomic():
+        HierarquiaDepartamento.objects.all().delete()
+        HierarquiaDepartamento.objects.bulk_create(linhas, batch_size=5000)
+    return len(linhas)
 
 class Departamento(models.Model):
     nome = models.CharField(max_length=256)
@@ -50,6 +114,7 @@ class Departamento(models.Model):
         related_name="departamentos",
         verbose_name="responsavel"
     )
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"{self.nome}"
@@ -60,10 +125,44 @@ class Departamento(models.Model):
             "nome": self.nome,
             "description": self.description,
             "tipoEntidade": self.tipoEntidade,
-            "responsavelId": self.responsavelId.id if self.responsavelId else None,
+            "responsavelId": self.responsavelId_id,
             "done": self.done,
         }
 
+class HierarquiaDepartamento(models.Model):
+    """
+    Tabela de fechamento (closure table) da hierarquia de departamentos.
+
+    Guarda um registro para cada par ancestral/descendente, direto ou indireto,
+    com a distância entre eles. É mantida por Subordinacao.save/delete, o que
+    transforma ciclos, ancestrais e descendentes em uma única consulta indexada.
+    """
+    ancestral = models.ForeignKey(
+        Departamento,
+        on_delete=models.CASCADE,
+        related_name="hierarquia_descendentes"
+    )
+    descendente = models.ForeignKey(
+        Departamento,
+        on_delete=models.CASCADE,
+        related_name="hierarquia_ancestrais"
+    )
+    profundidade = models.PositiveIntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['ancestral', 'descendente'],
+                name='unique_hierarquia_departamento'
+            )
+        ]
+        indexes = [
+            models.Index(fields=['descendente', 'ancestral']),
+        ]
+
+    def __str__(self):
+        return f"{self.descendente} abaixo de {self.ancestral} ({self.profundidade})"
+
 class Subordinacao(models.Model):
     superior = models.ForeignKey(  
         Departamento,
@@ -90,12 +189,22 @@ class Subordinacao(models.Model):
         if self.superior_id == self.subordinado_id:
             raise ValidationError("Um departamento não pode ser subordinado a si mesmo.")
             
+        # A tabela de fechamento pressupõe uma floresta: no máximo um superior direto por departamento
+        if Subordinacao.objects.filter(subordinado_id=self.subordinado_id).exclude(pk=self.pk).exists():
+            raise ValidationError("Este departamento já possui uma subordinação direta com outro departamento.")
+            
         if verificar_ciclo_subordinacao(self.superior, self.subordinado):
             raise ValidationError("Não é possível criar esta subordinação pois ela criaria um ciclo na hierarquia.")
 
     def save(self, *args, **kwargs):
         self.clean()
-        super().save(*args, **kwargs)
+        with transaction.atomic():
+            if self.pk:
+                anterior = Subordinacao.objects.filter(pk=self.pk).values_list("superior_id", "subordinado_id").first()
+                if anterior:
+                    _desligar_hierarquia(*anterior)
+            super().save(*args, **kwargs)
+            _ligar_hierarquia(self.superior_id, self.subordinado_id)
 
     def __str__(self):
         return f"{self.subordinado} subordinado a {self.superior} desde {self.data_subordinacao}"
@@ -168,6 +277,12 @@ class Verba(models.Model):
         if self.ano < 1900 or self.ano > 2100:
             raise ValidationError("O ano deve estar entre 1900 e 2100")
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        verba = super().from_db(db, field_names, values)
+        verba._departamento_salvo = verba.__dict__.get("departamento_id")
+        return verba
+
     def save(self, *args, **kwargs):
         self.full_clean()
         super().save(*args, **kwargs)
@@ -205,12 +320,58 @@ class Verba(models.Model):
             logger.error(f"Erro ao serializar verba {self.id}: {str(e)}", exc_info=True)
             raise
 
+def normalizar_texto(texto: str) -> str:
+    """
+    Normaliza um texto removendo acentos e caracteres especiais.
+    
+    Args:
+        texto: Texto a ser normalizado
+        
+    Returns:
+        str: Texto normalizado
+    """
+    # Remove acentos
+    texto = ''.join(c for c in unicodedata.normalize('NFD', texto)
+                   if unicodedata.category(c) != 'Mn')
+    # Converte para minúsculas
+    texto = texto.lower()
+    # Remove espaços extras
+    texto = ' '.join(texto.split())
+    return texto
+
+def _nome_normalizado_catalogo(instancia, nome: str):
+    """
+    Nome normalizado a gravar em Elemento ou TipoGasto.
+
+    As duplicatas antigas ficaram com NULL na migração 0019; enquanto outro registro tiver o
+    mesmo nome elas continuam com NULL, para que salvá-las não viole o índice único. O clean()
+    aponta a duplicidade.
+    """
+    normalizado = normalizar_texto(nome)
+    duplicata_antiga = instancia.pk is not None and instancia.nome_normalizado is None
+    if duplicata_antiga and type(instancia).objects.filter(
+        nome_normalizado=normalizado
+    ).exclude(pk=instancia.pk).exists():
+        return None
+    return normalizado
+
 class Elemento(models.Model):
     elemento = models.CharField(max_length=256)
     descricao = models.CharField(max_length=256)
+    # Nome sem acentos, em minúsculas e sem espaços extras; nulo só em duplicatas antigas
+    nome_normalizado = models.CharField(max_length=256, unique=True, null=True, editable=False)
 
     def __str__(self):
         return f"{self.elemento}"
+
+    def clean(self):
+        self.nome_normalizado = normalizar_texto(self.elemento)
+        if Elemento.objects.filter(nome_normalizado=self.nome_normalizado).exclude(pk=self.pk).exists():
+            raise ValidationError(f"Já existe um elemento com o nome '{self.elemento}'.")
+
+    def save(self, *args, **kwargs):
+        self.nome_normalizado = _nome_normalizado_catalogo(self, self.elemento)
+        super().save(*args, **kwargs)
     
     def to_dict_json(self):
         return {
@@ -222,9 +383,20 @@ class Elemento(models.Model):
 class TipoGasto(models.Model):
     tipoGasto = models.CharField(max_length=256)
     descricao = models.CharField(max_length=256)
+    # Nome sem acentos, em minúsculas e sem espaços extras; nulo só em duplicatas antigas
+    nome_normalizado = models.CharField(max_length=256, unique=True, null=True, editable=False)
 
     def __str__(self):
         return f"{self.tipoGasto}"
+
+    def clean(self):
+        self.nome_normalizado = normalizar_texto(self.tipoGasto)
+        if TipoGasto.objects.filter(nome_normalizado=self.nome_normalizado).exclude(pk=self.pk).exists():
+            raise ValidationError(f"Já existe um tipo de gasto com o nome '{self.tipoGasto}'.")
+
+    def save(self, *args, **kwargs):
+        self.nome_normalizado = _nome_normalizado_catalogo(self, self.tipoGasto)
+        super().save(*args, **kwargs)
     
     def to_dict_json(self):
         return {
@@ -266,6 +438,15 @@ class Despesa(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Paginação por cursor: ORDER BY created_at DESC, id DESC
+            models.Index(fields=['-created_at', '-id']),
+            models.Index(fields=['departamento', '-created_at', '-id']),
+            # Detalhamento por elemento e tipo de gasto: filtro, agrupamento e soma só pelo índice
+            models.Index(fields=['departamento', 'created_at', 'elemento', 'tipoGasto', 'valor']),
+        ]
+
     def __str__(self):
         return f"Despesa de {self.valor} - {self.departamento.nome}"
     
@@ -273,6 +454,13 @@ class Despesa(models.Model):
         if not ElementoTipoGasto.objects.filter(elemento=self.elemento, tipo_gasto=self.tipoGasto).exists():
             raise ValidationError("O tipo de gasto selecionado não está vinculado ao elemento informado.")
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        despesa = super().from_db(db, field_names, values)
+        # Departamento gravado, para que mover a despesa invalide também as listagens de origem
+        despesa._departamento_salvo = despesa.__dict__.get("departamento_id")
+        return despesa
+
     def save(self, *args, **kwargs):
         self.full_clean()  # Garante que a validação seja executada antes de salvar
         super().save(*args, **kwargs)
@@ -302,3 +490,69 @@ class Despesa(models.Model):
             "updated_at": self.updated_at.isoformat(),
         }
     
+
+class DespesaAgregadoMensal(models.Model):
+    """
+    Resumo mensal das despesas por departamento, elemento e tipo de gasto.
+
+    Mantido incrementalmente pelos serviços de despesa (core/service.py), permite que
+    os totais sejam calculados sobre meses e não sobre todas as despesas. Pode ser
+    reconstruído com `manage.py reconstruir_agregados_despesas`.
+    """
+    departamento = models.ForeignKey(Departamento, on_delete=models.CASCADE, related_name="despesas_agregadas")
+    elemento = models.ForeignKey(Elemento, on_delete=models.CASCADE, related_name="despesas_agregadas")
+    tipoGasto = models.ForeignKey(TipoGasto, on_delete=models.CASCADE, related_name="despesas_agregadas")
+    ano = models.IntegerField()
+    mes = models.PositiveSmallIntegerField()
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    quantidade = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['departamento', 'elemento', 'tipoGasto', 'ano', 'mes'],
+                name='unique_despesa_agregado_mensal'
+            )
+        ]
+        indexes = [
+            models.Index(fields=['departamento', 'ano', 'mes']),
+            models.Index(fields=['ano', 'mes']),
+        ]
+
+    def __str__(self):
+        return f"{self.departamento} {self.mes:02d}/{self.ano}: {self.total} ({self.quantidade})"
+
+class VersaoDepartamento(models.Model):
+    """
+    Contadores de alteração das despesas e das verbas de cada departamento, lidos pelos
+    validadores de GET condicional (core/service.py) no lugar de agregados sobre as tabelas.
+
+    Sobem a cada gravação ou exclusão (core/signals.py e as inserções em lote); a linha de
+    departamento_id 0 sobe quando muda um usuário, cujo nome aparece nas respostas. As linhas
+    não referenciam Departamento para sobreviver à exclusão dele: as listagens gerais somam
+    os contadores, e a soma só cresce.
+    """
+    departamento_id = models.BigIntegerField(primary_key=True)
+    despesas = models.BigIntegerField(default=0)
+    verbas = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"Departamento {self.departamento_id}: despesas {self.despesas}, verbas {self.verbas}"
+
+def incrementar_versoes(departamento_ids, despesas: bool = False, verbas: bool = False):
+    """Incrementa os contadores de VersaoDepartamento dos departamentos, criando as linhas que faltarem."""
+    departamento_ids = sorted({departamento_id for departamento_id in departamento_ids if departamento_id is not None})
+    incrementos = {}
+    if despesas:
+        incrementos["despesas"] = models.F("despesas") + 1
+    if verbas:
+        incrementos["verbas"] = models.F("verbas") + 1
+    if not departamento_ids or not incrementos:
+        return
+    linhas = VersaoDepartamento.objects.filter(departamento_id__in=departamento_ids)
+    if linhas.update(**incrementos) < len(departamento_ids):
+        VersaoDepartamento.objects.bulk_create(
+            [VersaoDepartamento(departamento_id=departamento_id) for departamento_id in departamento_ids],
+            ignore_conflicts=True,
+        )
+        linhas.update(**incrementos)
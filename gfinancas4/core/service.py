@@ -1,18 +1,35 @@
+import asyncio
+import csv
+import hashlib
+import io
+import json
 import logging
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from decimal import Decimal
 from django.core.paginator import Paginator
 from typing import List, Dict
-from django.db.models import Sum
+from django.db.models import Sum, Count, F, Max, Q, Case, When, Value, CharField, FloatField, OuterRef, Prefetch, Subquery
+from django.db.models.functions import Coalesce
+from django.db.models.functions import ExtractMonth, ExtractYear, TruncMonth
 from .models import (
-    Departamento, Responsabilidade, Verba, Elemento, TipoGasto, Despesa, Subordinacao, ElementoTipoGasto, verificar_ciclo_subordinacao
+    Departamento, Responsabilidade, Verba, Elemento, TipoGasto, Despesa, Subordinacao, ElementoTipoGasto,
+    HierarquiaDepartamento, DespesaAgregadoMensal, VersaoDepartamento, incrementar_versoes,
+    verificar_ciclo_subordinacao, normalizar_texto
 )
 from ..accounts.models import User
+from gfinancas4.base.campos import Projecao
 from gfinancas4.base.exceptions import BusinessError
 from django.core.exceptions import ValidationError
 from decimal import Decimal, InvalidOperation
 from django.shortcuts import get_object_or_404
-from datetime import datetime, date
-from django.db import models
+from datetime import datetime, date, time, timedelta, timezone as dt_timezone
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, close_old_connections, connection, models, transaction
+from django.utils import timezone
 
 logger = logging.getLogger(__name__)
 
@@ -105,43 +122,117 @@ def update_departamento(departamento_id: int, nome: str = None, description: str
     logger.info(f"Departamento {departamento.id} atualizado com sucesso.")
     return departamento.to_dict_json()
 
-def list_departamentos() -> List[dict]:
-    logger.info("SERVICE list departamentos")
-    return [item.to_dict_json() for item in Departamento.objects.all().order_by('id')]
+INCLUDES_DEPARTAMENTO = ('subordinados', 'verba_atual', 'total_despesas')
+
+def _validar_includes_departamento(include) -> set:
+    include = set(include or ())
+    desconhecidos = include - set(INCLUDES_DEPARTAMENTO)
+    if desconhecidos:
+        raise BusinessError(
+            f"Include inválido: {', '.join(sorted(desconhecidos))}. "
+            f"Opções: {', '.join(INCLUDES_DEPARTAMENTO)}."
+        )
+    return include
+
+def _filtrar_departamentos(tipo_entidade: str = None, responsavel_id: int = None, done: bool = None):
+    departamentos = Departamento.objects.all().order_by('id')
+    if tipo_entidade is not None:
+        departamentos = departamentos.filter(tipoEntidade=tipo_entidade)
+    if responsavel_id is not None:
+        departamentos = departamentos.filter(responsavelId_id=responsavel_id)
+    if done is not None:
+        departamentos = departamentos.filter(done=done)
+    return departamentos
+
+def _incluir_relacionados_departamento(departamentos, include: set):
+    """Acrescenta à consulta o prefetch e as subconsultas anotadas de cada include."""
+    if 'subordinados' in include:
+        # departamentos_superiores: subordinações em que o departamento é o superior
+        departamentos = departamentos.prefetch_related(Prefetch(
+            'departamentos_superiores',
+            queryset=Subordinacao.objects.select_related('subordinado').only(
+                'superior', 'subordinado__id', 'subordinado__nome'
+            ).order_by('subordinado__nome'),
+            to_attr='subordinacoes_diretas',
+        ))
+    if 'verba_atual' in include:
+        verbas = Verba.objects.filter(departamento=OuterRef('pk'), ano=timezone.localdate().year)
+        departamentos = departamentos.annotate(
+            verba_atual_id=Subquery(verbas.values('id')[:1]),
+            verba_atual_valor=Subquery(verbas.values('valor')[:1]),
+        )
+    if 'total_despesas' in include:
+        totais = DespesaAgregadoMensal.objects.filter(departamento=OuterRef('pk')).order_by().values(
+            'departamento'
+        ).annotate(soma=Sum('total')).values('soma')
+        departamentos = departamentos.annotate(
+            total_despesas_calculado=Coalesce(
+                Subquery(totais), Value(Decimal('0.00')), output_field=models.DecimalField()
+            ),
+        )
+    return departamentos
 
-def _verificar_ciclo_subordinacao(superior: Departamento, subordinado: Departamento, visitados=None) -> bool:
+def _serializar_departamento_com_includes(departamento: Departamento, include: set) -> dict:
+    dados = departamento.to_dict_json()
+    if 'subordinados' in include:
+        dados["subordinados"] = [
+            {"id": s.subordinado.id, "nome": s.subordinado.nome}
+            for s in departamento.subordinacoes_diretas
+        ]
+    if 'verba_atual' in include:
+        dados["verba_atual"] = None if departamento.verba_atual_id is None else {
+            "id": departamento.verba_atual_id,
+            "ano": timezone.localdate().year,
+            "valor": str(round(Decimal(departamento.verba_atual_valor), 2)),
+        }
+    if 'total_despesas' in include:
+        dados["total_despesas"] = str(round(Decimal(departamento.total_despesas_calculado), 2))
+    return dados
+
+def list_departamentos(page: int = None, per_page: int = 20, tipo_entidade: str = None,
+                       responsavel_id: int = None, done: bool = None, include=None):
     """
-    Verifica se existe um ciclo de subordinação entre dois departamentos.
-    
+    Lista departamentos ordenados por id, com filtros, paginação e dados relacionados opcionais.
+
+    Cada item de `include` acrescenta um campo calculado no banco, sem consultas por linha:
+    "subordinados" (subordinados diretos, via prefetch), "verba_atual" (verba do ano corrente)
+    e "total_despesas" (soma do resumo mensal), ambos por subconsulta anotada.
+
     Args:
-        superior: Departamento superior
-        subordinado: Departamento subordinado
-        visitados: Conjunto de IDs de departamentos já visitados na busca
-        
+        page: Número da página; se omitido, devolve a lista completa (formato antigo)
+        per_page: Itens por página
+        tipo_entidade: Filtra por tipo de entidade
+        responsavel_id: Filtra pelo responsável
+        done: Filtra pelo status de conclusão
+        include: Lista de dados relacionados a incluir
+
     Returns:
-        bool: True se existe um ciclo, False caso contrário
+        list | dict: Lista de departamentos ou, com `page`, {"departamentos", "paginacao"}
+
+    Raises:
+        BusinessError: Se algum include não for reconhecido
     """
-    if visitados is None:
-        visitados = set()
-        
-    # Se o departamento atual já foi visitado, temos um ciclo
-    if subordinado.id in visitados:
-        return True
-        
-    # Adiciona o departamento atual aos visitados
-    visitados.add(subordinado.id)
-    
-    # Verifica subordinações diretas
-    subordinacoes = Subordinacao.objects.filter(superior=subordinado)
-    for sub in subordinacoes:
-        # Se encontramos o superior em alguma subordinação, temos um ciclo
-        if sub.subordinado.id == superior.id:
-            return True
-        # Verifica recursivamente as subordinações indiretas
-        if _verificar_ciclo_subordinacao(superior, sub.subordinado, visitados):
-            return True
-            
-    return False
+    logger.info("SERVICE list departamentos")
+
+    include = _validar_includes_departamento(include)
+    departamentos = _filtrar_departamentos(tipo_entidade, responsavel_id, done)
+    departamentos = _incluir_relacionados_departamento(departamentos, include)
+
+    if page is None:
+        return [_serializar_departamento_com_includes(d, include) for d in departamentos]
+
+    paginator = Paginator(departamentos, per_page)
+    page_obj = paginator.get_page(page)
+    return {
+        "departamentos": [_serializar_departamento_com_includes(d, include) for d in page_obj.object_list],
+        "paginacao": {
+            "pagina_atual": page_obj.number,
+            "total_paginas": paginator.num_pages,
+            "total_departamentos": paginator.count,
+            "tem_proxima": page_obj.has_next(),
+            "tem_anterior": page_obj.has_previous(),
+        }
+    }
 
 def add_subordinacao(superior_id: int, subordinado_id: int, observacao: str = "") -> dict:
     """
@@ -244,7 +335,70 @@ def delete_subordinacao(id):
 def list_subordinacoes() -> list[dict]:
     """Busca e retorna todas as relações de subordinação no formato JSON."""
     logger.info("SERVICE list subordinacoes")
-    return [sub.to_dict_json() for sub in Subordinacao.objects.all()]
+    subordinacoes = Subordinacao.objects.select_related('superior', 'subordinado')
+    return [sub.to_dict_json() for sub in subordinacoes]
+
+def list_descendentes_departamento(departamento_id: int) -> List[dict]:
+    """
+    Lista todos os departamentos abaixo de um departamento na hierarquia.
+    
+    Args:
+        departamento_id: ID do departamento
+        
+    Returns:
+        list: Descendentes diretos e indiretos, dos mais próximos aos mais distantes
+        
+    Raises:
+        BusinessError: Se o departamento não for encontrado
+    """
+    logger.info(f"SERVICE list descendentes departamento: {departamento_id}")
+
+    if not Departamento.objects.filter(id=departamento_id).exists():
+        raise BusinessError("Departamento não encontrado.")
+
+    hierarquia = HierarquiaDepartamento.objects.filter(
+        ancestral_id=departamento_id
+    ).select_related('descendente').order_by('profundidade', 'descendente__nome')
+
+    return [
+        {
+            "id": item.descendente.id,
+            "nome": item.descendente.nome,
+            "profundidade": item.profundidade,
+        }
+        for item in hierarquia
+    ]
+
+def list_ancestrais_departamento(departamento_id: int) -> List[dict]:
+    """
+    Lista todos os departamentos acima de um departamento na hierarquia.
+    
+    Args:
+        departamento_id: ID do departamento
+        
+    Returns:
+        list: Ancestrais do superior direto até a raiz
+        
+    Raises:
+        BusinessError: Se o departamento não for encontrado
+    """
+    logger.info(f"SERVICE list ancestrais departamento: {departamento_id}")
+
+    if not Departamento.objects.filter(id=departamento_id).exists():
+        raise BusinessError("Departamento não encontrado.")
+
+    hierarquia = HierarquiaDepartamento.objects.filter(
+        descendente_id=departamento_id
+    ).select_related('ancestral').order_by('profundidade')
+
+    return [
+        {
+            "id": item.ancestral.id,
+            "nome": item.ancestral.nome,
+            "profundidade": item.profundidade,
+        }
+        for item in hierarquia
+    ]
 
 # SERVIÇOS PARA RESPONSABILIDADES (implementados conforme modelo e práticas)
 def add_responsabilidade(usuario_id: int, departamento_id: int, observacao: str = "") -> dict:
@@ -502,33 +656,70 @@ def get_verba(verba_id: int) -> dict:
         logger.error(f"Erro ao buscar verba: {str(e)}", exc_info=True)
         raise BusinessError(f"Erro ao buscar verba: {str(e)}")
 
-def list_verbas(page=1, per_page=10) -> List[dict]:
+# ?fields= nas listagens de verbas: caminho no JSON de Verba.to_dict_json -> coluna
+CAMPOS_VERBA = {
+    "id": "id",
+    "valor": ("valor", str),
+    "departamento.id": "departamento_id",
+    "departamento.nome": "departamento__nome",
+    "departamento.tipoEntidade": "departamento__tipoEntidade",
+    "usuario.id": "user_id",
+    "usuario.username": "user__username",
+    "usuario.email": "user__email",
+    "ano": "ano",
+    "descricao": "descricao",
+    "created_at": ("created_at", datetime.isoformat),
+    "updated_at": ("updated_at", datetime.isoformat),
+}
+
+def _projecao_verbas(campos, colunar: bool = False) -> Projecao:
+    if not campos and not colunar:
+        return None
+    return Projecao(CAMPOS_VERBA, campos, obrigatorios=('id',), colunar=colunar)
+
+def _consultar_verbas(projecao: Projecao = None, **filtros):
+    """Verbas com departamento e usuário no mesmo SELECT, ou só as colunas da projeção."""
+    # Ordem estável para a paginação: mais recentes primeiro
+    verbas = Verba.objects.filter(**filtros).order_by('-ano', 'id')
+    if projecao is not None:
+        return verbas.values(*projecao.lookups)
+    return verbas.select_related('departamento', 'user')
+
+def list_verbas(page=1, per_page=10, campos: tuple = None, colunar: bool = False) -> List[dict]:
     """
     Lista todas as verbas cadastradas com paginação.
     
     Args:
         page (int): Número da página (começando em 1)
         per_page (int): Quantidade de itens por página
+        campos (tuple): Campos de cada verba na resposta (?fields=; opcional)
+        colunar (bool): Devolve as verbas no formato colunar (?format=columnar)
         
     Returns:
         dict: Dicionário com verbas paginadas e informações de paginação
+
+    Raises:
+        BusinessError: Se algum campo pedido não existir
     """
+    projecao = _projecao_verbas(campos, colunar)
     try:
         logger.info(f"Iniciando listagem de verbas - página {page}, {per_page} itens por página")
-        verbas = Verba.objects.select_related('departamento', 'user').all()
+        verbas = _consultar_verbas(projecao)
         
         # Aplicar paginação
         paginator = Paginator(verbas, per_page)
         page_obj = paginator.get_page(page)
         
-        result = []
-        for verba in page_obj:
-            try:
-                verba_dict = verba.to_dict_json()
-                result.append(verba_dict)
-            except Exception as e:
-                logger.error(f"Erro ao serializar verba {verba.id}: {str(e)}", exc_info=True)
-                continue
+        if projecao is not None:
+            result = projecao.serializar_lista(page_obj)
+        else:
+            result = []
+            for verba in page_obj:
+                try:
+                    result.append(verba.to_dict_json())
+                except Exception as e:
+                    logger.error(f"Erro ao serializar verba {verba.id}: {str(e)}", exc_info=True)
+                    continue
                 
         logger.info(f"Listagem de verbas concluída com sucesso. Página {page} de {paginator.num_pages}")
         
@@ -545,16 +736,19 @@ def list_verbas(page=1, per_page=10) -> List[dict]:
         logger.error(f"Erro ao listar verbas: {str(e)}", exc_info=True)
         raise BusinessError(f"Erro ao listar verbas: {str(e)}")
 
-def list_verbas_departamento(departamento_id: int) -> List[dict]:
+def list_verbas_departamento(departamento_id: int, campos: tuple = None, colunar: bool = False) -> List[dict]:
     """
     Lista todas as verbas de um departamento específico.
     
     Args:
         departamento_id (int): ID do departamento
+        campos (tuple): Campos de cada verba na resposta (?fields=; opcional)
+        colunar (bool): Devolve as verbas no formato colunar (?format=columnar)
         
     Returns:
         list: Lista de verbas do departamento serializadas
     """
+    projecao = _projecao_verbas(campos, colunar)
     try:
         logger.info(f"Iniciando listagem de verbas do departamento {departamento_id}")
         
@@ -566,19 +760,21 @@ def list_verbas_departamento(departamento_id: int) -> List[dict]:
             logger.error(f"Departamento {departamento_id} não encontrado")
             raise BusinessError(f"Departamento {departamento_id} não encontrado")
             
-        verbas = Verba.objects.select_related('departamento', 'user').filter(departamento=departamento)
+        verbas = _consultar_verbas(projecao, departamento=departamento)
         logger.info(f"Encontradas {len(verbas)} verbas para o departamento {departamento.nome}")
         
-        result = []
-        for verba in verbas:
-            try:
-                verba_dict = verba.to_dict_json()
-                result.append(verba_dict)
-            except Exception as e:
-                logger.error(f"Erro ao serializar verba {verba.id}: {str(e)}", exc_info=True)
-                continue
+        if projecao is not None:
+            result = projecao.serializar_lista(verbas)
+        else:
+            result = []
+            for verba in verbas:
+                try:
+                    result.append(verba.to_dict_json())
+                except Exception as e:
+                    logger.error(f"Erro ao serializar verba {verba.id}: {str(e)}", exc_info=True)
+                    continue
                 
-        logger.info(f"Listagem de verbas do departamento {departamento.nome} concluída com sucesso. Total: {len(result)}")
+        logger.info(f"Listagem de verbas do departamento {departamento.nome} concluída com sucesso. Total: {len(verbas)}")
         return result
     except BusinessError:
         raise
@@ -666,6 +862,46 @@ def get_ultima_verba_departamento(departamento_id: int) -> dict:
         logger.error(f"Erro ao buscar última verba do departamento: {str(e)}", exc_info=True)
         raise BusinessError(f"Erro ao buscar última verba do departamento: {str(e)}")
 
+async def alist_verbas_departamento(departamento_id: int, campos: tuple = None,
+                                    colunar: bool = False) -> List[dict]:
+    """Versão assíncrona de `list_verbas_departamento`."""
+    projecao = _projecao_verbas(campos, colunar)
+    if not await Departamento.objects.filter(id=departamento_id).aexists():
+        raise BusinessError(f"Departamento {departamento_id} não encontrado")
+
+    verbas = _consultar_verbas(projecao, departamento_id=departamento_id)
+    if projecao is not None:
+        return projecao.serializar_lista([verba async for verba in verbas])
+    return [verba.to_dict_json() async for verba in verbas]
+
+async def aget_verba_departamento_ano(departamento_id: int, ano: int) -> dict:
+    """Versão assíncrona de `get_verba_departamento_ano`."""
+    if ano < 1900 or ano > 2100:
+        raise BusinessError("O ano deve estar entre 1900 e 2100")
+    try:
+        departamento = await Departamento.objects.aget(id=departamento_id)
+    except Departamento.DoesNotExist:
+        raise BusinessError("Departamento não encontrado")
+    try:
+        verba = await Verba.objects.select_related('departamento', 'user').aget(departamento=departamento, ano=ano)
+    except Verba.DoesNotExist:
+        raise BusinessError(f"Não há verba para o departamento {departamento.nome} no ano {ano}")
+    return verba.to_dict_json()
+
+async def aget_ultima_verba_departamento(departamento_id: int) -> dict:
+    """Versão assíncrona de `get_ultima_verba_departamento`."""
+    try:
+        departamento = await Departamento.objects.aget(id=departamento_id)
+    except Departamento.DoesNotExist:
+        raise BusinessError("Departamento não encontrado")
+
+    verba = await Verba.objects.select_related('departamento', 'user').filter(
+        departamento=departamento
+    ).order_by('-ano', '-id').afirst()
+    if not verba:
+        raise BusinessError(f"Não há verba registrada para o departamento {departamento.nome}")
+    return verba.to_dict_json()
+
 # SERVIÇOS PARA DESPESAS (existentes e já adequados)
 def add_despesa(user_id: int, departamento_id: int, valor: float, elemento_id: int, 
                 tipo_gasto_id: int, justificativa: str = "") -> dict:
@@ -721,7 +957,9 @@ def add_despesa(user_id: int, departamento_id: int, valor: float, elemento_id: i
 
     # Tentando salvar a despesa
     try:
-        nova_despesa.save()
+        with transaction.atomic():
+            nova_despesa.save()
+            registrar_despesa_agregado(nova_despesa)
     except ValidationError as e:
         raise BusinessError(f"Error de validação: {e.messages}")
     
@@ -748,6 +986,25 @@ def _converter_valor_br_para_decimal(valor_str: str) -> Decimal:
     except (ValueError, TypeError, InvalidOperation):
         raise BusinessError("Valor inválido. Use o formato brasileiro (ex: 1.234,56)")
 
+def _salvar_despesa_e_agregado(despesa: Despesa) -> None:
+    """
+    Salva a despesa alterada e move a sua contribuição no resumo mensal: retira os valores
+    gravados antes da alteração e inclui os novos, na mesma transação.
+
+    Raises:
+        BusinessError: Se a despesa não existir
+    """
+    with transaction.atomic():
+        # A linha fica bloqueada até o commit: outra alteração simultânea não lê o estado antigo
+        anterior = Despesa.objects.select_for_update().filter(pk=despesa.pk).only(
+            'departamento_id', 'elemento_id', 'tipoGasto_id', 'valor', 'created_at'
+        ).first()
+        if anterior is None:
+            raise BusinessError("Despesa não encontrada para atualização.")
+        despesa.save()
+        remover_despesa_agregado(anterior)
+        registrar_despesa_agregado(despesa)
+
 def update_despesa(nova_despesa: Despesa) -> dict:
     """
     Atualiza os valores, justificativa, elemento e tipoGasto de uma despesa existente.
@@ -783,68 +1040,604 @@ def update_despesa(nova_despesa: Despesa) -> dict:
     
     # Tentando salvar as alterações
     try:
-        nova_despesa.save()
+        _salvar_despesa_e_agregado(nova_despesa)
     except ValidationError as e:
         raise BusinessError(f"Erro de validação: {e.messages}")
     
     # Retornando o dicionário com os dados atualizados da despesa
     return nova_despesa.to_dict_json()
 
-def list_despesas(page=1, per_page=10) -> List[dict]:
-    """Retorna todas as despesas paginadas, independentemente do departamento."""
-    despesas = Despesa.objects.select_related(
-        'user', 'elemento', 'tipoGasto', 'departamento'
-    ).order_by("-created_at")
+def _acumular_agregado_mensal(departamento_id: int, elemento_id: int, tipo_gasto_id: int,
+                              created_at: datetime, valor: Decimal, quantidade: int) -> None:
+    """
+    Soma valor e quantidade no resumo mensal da despesa (valores negativos subtraem).
+    O mês é o do horário local de criação, o mesmo usado pelos filtros de data.
+    """
+    referencia = timezone.localtime(created_at)
+    agregado, _ = DespesaAgregadoMensal.objects.get_or_create(
+        departamento_id=departamento_id,
+        elemento_id=elemento_id,
+        tipoGasto_id=tipo_gasto_id,
+        ano=referencia.year,
+        mes=referencia.month,
+    )
+    DespesaAgregadoMensal.objects.filter(pk=agregado.pk).update(
+        total=F('total') + valor,
+        quantidade=F('quantidade') + quantidade,
+    )
+    if quantidade < 0:
+        DespesaAgregadoMensal.objects.filter(pk=agregado.pk, quantidade__lte=0).delete()
+
+def registrar_despesa_agregado(despesa: Despesa) -> None:
+    """Inclui uma despesa salva no resumo mensal."""
+    _acumular_agregado_mensal(
+        despesa.departamento_id, despesa.elemento_id, despesa.tipoGasto_id,
+        despesa.created_at, Decimal(despesa.valor), 1
+    )
 
-    paginator = Paginator(despesas, per_page)
-    page_obj = paginator.get_page(page)
+def remover_despesa_agregado(despesa: Despesa) -> None:
+    """Retira uma despesa (com os valores que tinha ao ser registrada) do resumo mensal."""
+    _acumular_agregado_mensal(
+        despesa.departamento_id, despesa.elemento_id, despesa.tipoGasto_id,
+        despesa.created_at, -Decimal(despesa.valor), -1
+    )
+
+def reconstruir_agregados_despesas() -> int:
+    """
+    Recalcula todo o resumo mensal a partir da tabela de despesas.
+    
+    Returns:
+        int: Quantidade de agregados mensais gerados
+    """
+    logger.info("SERVICE reconstruir agregados despesas")
+
+    grupos = Despesa.objects.annotate(
+        ano=ExtractYear('created_at'),
+        mes=ExtractMonth('created_at'),
+    ).values(
+        'departamento_id', 'elemento_id', 'tipoGasto_id', 'ano', 'mes'
+    ).annotate(
+        total=Sum('valor'),
+        quantidade=Count('id'),
+    ).order_by()
+
+    with transaction.atomic():
+        DespesaAgregadoMensal.objects.all().delete()
+        agregados = DespesaAgregadoMensal.objects.bulk_create(
+            [DespesaAgregadoMensal(**grupo) for grupo in grupos],
+            batch_size=5000
+        )
+
+    logger.info(f"SERVICE {len(agregados)} agregados mensais reconstruídos.")
+    return len(agregados)
+
+def _horario_local(momento: datetime) -> datetime:
+    if timezone.is_naive(momento):
+        momento = timezone.make_aware(momento)
+    return timezone.localtime(momento)
+
+def _inicio_do_mes(momento: datetime) -> datetime:
+    return momento.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+def _inicio_do_mes_seguinte(momento: datetime) -> datetime:
+    inicio = _inicio_do_mes(momento)
+    if inicio.month == 12:
+        return inicio.replace(year=inicio.year + 1, month=1)
+    return inicio.replace(month=inicio.month + 1)
+
+LIMITE_IMPORTACAO_DESPESAS = 20000
+_CAMPOS_IMPORTACAO_DESPESA = ('departamento_id', 'elemento_id', 'tipo_gasto_id', 'valor', 'justificativa')
+
+def ler_csv_despesas(conteudo: str) -> List[dict]:
+    """
+    Converte um CSV de despesas em uma lista de dicionários para `importar_despesas`.
+
+    A primeira linha deve conter os cabeçalhos departamento_id, elemento_id, tipo_gasto_id,
+    valor e justificativa. O separador (vírgula ou ponto e vírgula) é detectado automaticamente.
+
+    Raises:
+        BusinessError: Se o arquivo estiver vazio ou faltar alguma coluna obrigatória
+    """
+    if not conteudo or not conteudo.strip():
+        raise BusinessError("Arquivo CSV vazio.")
+
+    try:
+        dialeto = csv.Sniffer().sniff(conteudo.splitlines()[0], delimiters=";,")
+    except csv.Error:
+        dialeto = csv.excel
+
+    leitor = csv.DictReader(io.StringIO(conteudo), dialect=dialeto)
+    cabecalhos = {(c or '').strip() for c in (leitor.fieldnames or [])}
+    faltando = [c for c in _CAMPOS_IMPORTACAO_DESPESA if c not in cabecalhos]
+    if faltando:
+        raise BusinessError(f"Colunas obrigatórias ausentes no CSV: {', '.join(faltando)}.")
+
+    return [
+        {(chave or '').strip(): (valor or '').strip() for chave, valor in linha.items()}
+        for linha in leitor
+    ]
+
+def _converter_id_importacao(valor) -> int:
+    if isinstance(valor, bool):
+        raise ValueError
+    if isinstance(valor, (float, Decimal)):
+        # int() truncaria 3.7 para 3: só números inteiros são ids
+        try:
+            inteiro = int(valor)
+        except OverflowError:
+            raise ValueError
+        if inteiro != valor:
+            raise ValueError
+        return inteiro
+    return int(valor)
+
+def _converter_valor_importacao(valor) -> Decimal:
+    if isinstance(valor, str):
+        # Aceita tanto 1234.56 quanto o formato brasileiro 1.234,56
+        valor = _converter_valor_br_para_decimal(valor) if ',' in valor else Decimal(valor.strip())
+    elif isinstance(valor, (int, float, Decimal)) and not isinstance(valor, bool):
+        valor = Decimal(str(valor))
+    else:
+        raise InvalidOperation
+    return round(valor, 2)
+
+def _validar_valor_importacao(valor) -> tuple:
+    """Converte e valida o valor de uma linha, com as regras de `add_despesa`: (valor, mensagem de erro)."""
+    try:
+        valor = _converter_valor_importacao(valor)
+    except (BusinessError, InvalidOperation, ValueError, TypeError):
+        return None, "Valor inválido."
+    if valor <= 0:
+        return valor, "O valor da despesa deve ser maior que zero."
+    if valor.adjusted() >= Despesa._meta.get_field('valor').max_digits - 2:
+        return valor, "Valor da despesa acima do permitido."
+    return valor, None
+
+def _converter_linha_importacao(linha) -> tuple:
+    """
+    Converte os tipos de uma linha da importação, sem acesso ao banco.
+
+    Returns:
+        tuple: ((ids, valor, justificativa), []) ou (None, erros da linha)
+    """
+    if not isinstance(linha, dict):
+        return None, ["Linha deve ser um objeto."]
+
+    erros_linha = []
+    ids = {}
+    for campo, rotulo in (('departamento_id', 'Departamento'), ('elemento_id', 'Elemento'),
+                          ('tipo_gasto_id', 'Tipo de gasto')):
+        try:
+            ids[campo] = _converter_id_importacao(linha.get(campo))
+        except (ValueError, TypeError):
+            erros_linha.append(f"{rotulo} inválido.")
+
+    valor, erro_valor = _validar_valor_importacao(linha.get('valor'))
+    if erro_valor:
+        erros_linha.append(erro_valor)
+
+    justificativa = linha.get('justificativa')
+    justificativa = justificativa.strip() if isinstance(justificativa, str) else ''
+    if not justificativa:
+        erros_linha.append("Justificativa é obrigatória.")
+
+    if erros_linha:
+        return None, erros_linha
+    return (ids, valor, justificativa), []
+
+def _carregar_referencias_importacao(validas: list) -> tuple:
+    """Departamentos, elementos, tipos de gasto e vínculos referenciados pelo lote, em quatro consultas."""
+    departamentos = set(Departamento.objects.filter(
+        id__in={ids['departamento_id'] for ids, _, _ in validas}
+    ).values_list('id', flat=True))
+    elementos = set(Elemento.objects.filter(
+        id__in={ids['elemento_id'] for ids, _, _ in validas}
+    ).values_list('id', flat=True))
+    tipos_gasto = set(TipoGasto.objects.filter(
+        id__in={ids['tipo_gasto_id'] for ids, _, _ in validas}
+    ).values_list('id', flat=True))
+    vinculos = set(ElementoTipoGasto.objects.filter(
+        elemento_id__in=elementos, tipo_gasto_id__in=tipos_gasto
+    ).values_list('elemento_id', 'tipo_gasto_id'))
+    return departamentos, elementos, tipos_gasto, vinculos
+
+def _erros_referencias_importacao(ids: dict, referencias: tuple) -> List[str]:
+    departamentos, elementos, tipos_gasto, vinculos = referencias
+    erros_linha = []
+    if ids['departamento_id'] not in departamentos:
+        erros_linha.append("Departamento não encontrado.")
+    if ids['elemento_id'] not in elementos:
+        erros_linha.append("Elemento não encontrado.")
+    if ids['tipo_gasto_id'] not in tipos_gasto:
+        erros_linha.append("Tipo de gasto não encontrado.")
+    if not erros_linha and (ids['elemento_id'], ids['tipo_gasto_id']) not in vinculos:
+        erros_linha.append("O tipo de gasto selecionado não está vinculado ao elemento informado.")
+    return erros_linha
+
+def _agregados_travados(chaves) -> dict:
+    """Agregados existentes das chaves (departamento, elemento, tipo de gasto, ano, mês), travados para atualização."""
+    # Filtro por conjuntos traz um superconjunto das chaves; a chave completa separa em memória
+    chaves = set(chaves)
+    agregados = DespesaAgregadoMensal.objects.select_for_update().filter(
+        departamento_id__in={chave[0] for chave in chaves},
+        elemento_id__in={chave[1] for chave in chaves},
+        tipoGasto_id__in={chave[2] for chave in chaves},
+        ano__in={chave[3] for chave in chaves},
+        mes__in={chave[4] for chave in chaves},
+    )
+    travados = {}
+    for agregado in agregados:
+        chave = (agregado.departamento_id, agregado.elemento_id, agregado.tipoGasto_id, agregado.ano, agregado.mes)
+        if chave in chaves:
+            travados[chave] = agregado
+    return travados
+
+def _acumular_agregados_importacao(novas: List[Despesa]) -> None:
+    """
+    Soma as despesas importadas no resumo mensal: os totais por (departamento, elemento,
+    tipo de gasto, mês) são somados em memória e gravados num único bulk_update, qualquer
+    que seja o número de grupos.
+
+    Os grupos que ainda não existem são criados zerados com ignore_conflicts e relidos
+    travados antes da soma: se outra importação criar o mesmo grupo no meio do caminho, o
+    insert não falha por chave duplicada e os totais dela são preservados.
+    """
+    grupos = {}
+    for despesa in novas:
+        referencia = timezone.localtime(despesa.created_at)
+        chave = (despesa.departamento_id, despesa.elemento_id, despesa.tipoGasto_id,
+                 referencia.year, referencia.month)
+        total, quantidade = grupos.get(chave, (Decimal('0.00'), 0))
+        grupos[chave] = (total + despesa.valor, quantidade + 1)
+
+    agregados = _agregados_travados(grupos)
+    faltantes = [chave for chave in grupos if chave not in agregados]
+    if faltantes:
+        DespesaAgregadoMensal.objects.bulk_create(
+            [
+                DespesaAgregadoMensal(departamento_id=departamento_id, elemento_id=elemento_id,
+                                      tipoGasto_id=tipo_gasto_id, ano=ano, mes=mes)
+                for departamento_id, elemento_id, tipo_gasto_id, ano, mes in faltantes
+            ],
+            batch_size=1000,
+            ignore_conflicts=True,
+        )
+        agregados.update(_agregados_travados(faltantes))
+
+    for chave, (total, quantidade) in grupos.items():
+        agregado = agregados[chave]
+        agregado.total += total
+        agregado.quantidade += quantidade
+    DespesaAgregadoMensal.objects.bulk_update(agregados.values(), ['total', 'quantidade'], batch_size=1000)
+
+def importar_despesas(user_id: int, linhas: List[dict]) -> dict:
+    """
+    Importa um lote de despesas de uma só vez (tudo ou nada).
+
+    Departamentos, elementos, tipos de gasto e os vínculos Elemento–TipoGasto referenciados
+    pelo lote são carregados em poucas consultas e cada linha é validada em memória, com as
+    mesmas regras de `add_despesa`. Se alguma linha for inválida nada é gravado e os erros
+    são devolvidos por linha; caso contrário as despesas são inseridas com `bulk_create` e
+    o resumo mensal é atualizado na mesma transação.
+
+    Args:
+        user_id: ID do usuário responsável pelas despesas
+        linhas: Lista de dicionários com departamento_id, elemento_id, tipo_gasto_id,
+            valor e justificativa
+
+    Returns:
+        dict: {"importadas": quantidade inserida, "erros": [{"linha": n, "erros": [...]}]},
+            com as linhas numeradas a partir de 1
+
+    Raises:
+        BusinessError: Se o usuário não existir ou o lote estiver vazio ou for grande demais
+    """
+    logger.info(f"SERVICE importar despesas: {len(linhas) if isinstance(linhas, list) else 0} linhas")
+
+    if not isinstance(linhas, list) or not linhas:
+        raise BusinessError("Nenhuma despesa informada para importação.")
+    if len(linhas) > LIMITE_IMPORTACAO_DESPESAS:
+        raise BusinessError(f"A importação aceita no máximo {LIMITE_IMPORTACAO_DESPESAS} despesas por vez.")
+    if not User.objects.filter(id=user_id).exists():
+        raise BusinessError("Usuário não encontrado.")
+
+    # Primeira passada: conversão de tipos, sem acesso ao banco
+    convertidas = []
+    erros = []
+    for numero, linha in enumerate(linhas, start=1):
+        convertida, erros_linha = _converter_linha_importacao(linha)
+        if erros_linha:
+            erros.append({"linha": numero, "erros": erros_linha})
+        convertidas.append(convertida)
+
+    # Segunda passada: referências carregadas de uma vez para todo o lote
+    referencias = _carregar_referencias_importacao([c for c in convertidas if c is not None])
+    novas = []
+    for numero, convertida in enumerate(convertidas, start=1):
+        if convertida is None:
+            continue
+        ids, valor, justificativa = convertida
+        erros_linha = _erros_referencias_importacao(ids, referencias)
+        if erros_linha:
+            erros.append({"linha": numero, "erros": erros_linha})
+            continue
+        novas.append(Despesa(
+            user_id=user_id,
+            departamento_id=ids['departamento_id'],
+            elemento_id=ids['elemento_id'],
+            tipoGasto_id=ids['tipo_gasto_id'],
+            valor=valor,
+            justificativa=justificativa,
+        ))
+
+    if erros:
+        erros.sort(key=lambda e: e["linha"])
+        return {"importadas": 0, "erros": erros}
+
+    with transaction.atomic():
+        Despesa.objects.bulk_create(novas, batch_size=1000)
+        _acumular_agregados_importacao(novas)
+        incrementar_versoes({despesa.departamento_id for despesa in novas}, despesas=True)
+
+    return {"importadas": len(novas), "erros": []}
+
+def _consultas_soma_despesas(departamento_id: int, inicio: datetime = None, fim: datetime = None) -> list:
+    """
+    Monta as consultas cuja soma dá o total de um departamento no intervalo [inicio, fim].
+
+    Os meses inteiros do intervalo vêm do resumo mensal; só as frações de mês nas
+    pontas são somadas diretamente em Despesa. Cada item é (queryset, campo a somar).
+    """
+    inicio = _horario_local(inicio) if inicio is not None else None
+    fim = _horario_local(fim) if fim is not None else None
+
+    # Meses completos: [primeiro_mes, fim_meses)
+    primeiro_mes = None
+    if inicio is not None:
+        primeiro_mes = inicio if inicio == _inicio_do_mes(inicio) else _inicio_do_mes_seguinte(inicio)
+    fim_meses = _inicio_do_mes(fim) if fim is not None else None
+
+    despesas = Despesa.objects.filter(departamento_id=departamento_id)
+    if primeiro_mes is not None and fim_meses is not None and primeiro_mes >= fim_meses:
+        return [(despesas.filter(created_at__range=[inicio, fim]), 'valor')]
+
+    agregados = DespesaAgregadoMensal.objects.filter(departamento_id=departamento_id)
+    if primeiro_mes is not None:
+        agregados = agregados.filter(
+            Q(ano__gt=primeiro_mes.year) | Q(ano=primeiro_mes.year, mes__gte=primeiro_mes.month)
+        )
+    if fim_meses is not None:
+        agregados = agregados.filter(
+            Q(ano__lt=fim_meses.year) | Q(ano=fim_meses.year, mes__lt=fim_meses.month)
+        )
+    consultas = [(agregados, 'total')]
+
+    if inicio is not None and inicio < primeiro_mes:
+        consultas.append((despesas.filter(created_at__gte=inicio, created_at__lt=primeiro_mes), 'valor'))
+    if fim is not None:
+        consultas.append((despesas.filter(created_at__gte=fim_meses, created_at__lte=fim), 'valor'))
+    return consultas
+
+def _somar_despesas(departamento_id: int, inicio: datetime = None, fim: datetime = None) -> Decimal:
+    """Soma as despesas de um departamento criadas no intervalo [inicio, fim] (limites opcionais)."""
+    total = Decimal('0.00')
+    for consulta, campo in _consultas_soma_despesas(departamento_id, inicio, fim):
+        total += consulta.aggregate(total=Sum(campo))['total'] or Decimal('0.00')
+    return total
+
+async def _asomar_despesas(departamento_id: int, inicio: datetime = None, fim: datetime = None) -> Decimal:
+    """Versão assíncrona de `_somar_despesas`."""
+    total = Decimal('0.00')
+    for consulta, campo in _consultas_soma_despesas(departamento_id, inicio, fim):
+        total += (await consulta.aaggregate(total=Sum(campo)))['total'] or Decimal('0.00')
+    return total
+
+# Colunas lidas por Despesa.to_dict_json; qualquer campo novo na serialização entra aqui também
+_CAMPOS_DESPESA_JSON = (
+    'id', 'valor', 'justificativa', 'created_at', 'updated_at',
+    'departamento__id', 'departamento__nome',
+    'user__id', 'user__username',
+    'elemento__id', 'elemento__elemento',
+    'tipoGasto__id', 'tipoGasto__tipoGasto',
+)
+
+# ?fields= nas listagens de despesas: caminho no JSON de Despesa.to_dict_json -> coluna
+CAMPOS_DESPESA = {
+    "id": "id",
+    "departamento.id": "departamento_id",
+    "departamento.nome": "departamento__nome",
+    "usuario.id": "user_id",
+    "usuario.username": "user__username",
+    "valor": "valor",
+    "elemento.id": "elemento_id",
+    "elemento.elemento": "elemento__elemento",
+    "tipoGasto.id": "tipoGasto_id",
+    "tipoGasto.tipoGasto": "tipoGasto__tipoGasto",
+    "justificativa": "justificativa",
+    "created_at": ("created_at", datetime.isoformat),
+    "updated_at": ("updated_at", datetime.isoformat),
+}
+
+def _projecao_despesas(campos, colunar: bool = False) -> Projecao:
+    if not campos and not colunar:
+        return None
+    # id e created_at ordenam as páginas e formam o cursor
+    return Projecao(CAMPOS_DESPESA, campos, obrigatorios=('id', 'created_at'), colunar=colunar)
+
+def _consultar_despesas(projecao: Projecao = None, **filtros):
+    """
+    Caminho único de leitura para as listagens de despesas.
+
+    Traz departamento, usuário, elemento e tipo de gasto no mesmo SELECT e apenas as
+    colunas usadas por `Despesa.to_dict_json`, de modo que serializar uma página custa
+    uma consulta, qualquer que seja o tamanho dela. Com uma projeção (?fields=), lê só as
+    colunas pedidas com `values()`, sem os JOINs que elas não usam.
+    """
+    despesas = Despesa.objects.filter(**filtros)
+    if projecao is not None:
+        return despesas.values(*projecao.lookups)
+    return despesas.select_related(
+        'departamento', 'user', 'elemento', 'tipoGasto'
+    ).only(*_CAMPOS_DESPESA_JSON)
+
+def _serializar_despesas(despesas, projecao: Projecao = None) -> list:
+    if projecao is not None:
+        return projecao.serializar_lista(despesas)
+    return [d.to_dict_json() for d in despesas]
+
+_FORMATO_CURSOR = "%Y-%m-%dT%H:%M:%S.%fZ"
+MAXIMO_POR_PAGINA_CURSOR = 500
+
+def _codificar_cursor(despesa) -> str:
+    """Gera o cursor `<created_at em UTC>,<id>` que aponta para depois da despesa (modelo ou linha de values())."""
+    if isinstance(despesa, dict):
+        created_at, despesa_id = despesa['created_at'], despesa['id']
+    else:
+        created_at, despesa_id = despesa.created_at, despesa.id
+    return f"{created_at.astimezone(dt_timezone.utc).strftime(_FORMATO_CURSOR)},{despesa_id}"
+
+def _decodificar_cursor(cursor: str) -> tuple:
+    try:
+        created_at, despesa_id = cursor.split(",")
+        return (
+            datetime.strptime(created_at, _FORMATO_CURSOR).replace(tzinfo=dt_timezone.utc),
+            int(despesa_id),
+        )
+    except (ValueError, TypeError):
+        raise BusinessError("Cursor inválido.")
+
+def _filtrar_por_cursor(despesas, cursor: str):
+    """
+    Paginação por cursor (keyset) ordenada por (-created_at, -id).
+
+    Não executa COUNT e não usa OFFSET: cada página parte do cursor da anterior pelo
+    índice composto, com custo constante mesmo nas páginas mais profundas.
+    Um cursor vazio devolve a primeira página.
+    """
+    despesas = despesas.order_by("-created_at", "-id")
+    if cursor:
+        created_at, despesa_id = _decodificar_cursor(cursor)
+        despesas = despesas.filter(created_at__lte=created_at).exclude(
+            created_at=created_at, id__gte=despesa_id
+        )
+    return despesas
+
+def _resposta_cursor(pagina: list, per_page: int, projecao: Projecao = None) -> dict:
+    """Monta a página a partir de até `per_page + 1` despesas; a excedente só indica que há próxima."""
+    tem_proxima = len(pagina) > per_page
+    pagina = pagina[:per_page]
+
+    return {
+        "despesas": _serializar_despesas(pagina, projecao),
+        "paginacao": {
+            "next_cursor": _codificar_cursor(pagina[-1]) if tem_proxima else None,
+            "tem_proxima": tem_proxima,
+            "itens_por_pagina": per_page,
+        }
+    }
+
+def _validar_por_pagina_cursor(per_page: int) -> None:
+    if not 1 <= per_page <= MAXIMO_POR_PAGINA_CURSOR:
+        raise BusinessError(f"per_page deve estar entre 1 e {MAXIMO_POR_PAGINA_CURSOR}.")
+
+def _paginar_despesas_por_cursor(despesas, cursor: str, per_page: int, projecao: Projecao = None) -> dict:
+    _validar_por_pagina_cursor(per_page)
+    despesas = _filtrar_por_cursor(despesas, cursor)
+    return _resposta_cursor(list(despesas[:per_page + 1]), per_page, projecao)
 
-    despesas_serializadas = [d.to_dict_json() for d in page_obj.object_list]
+async def _apaginar_despesas_por_cursor(despesas, cursor: str, per_page: int, projecao: Projecao = None) -> dict:
+    _validar_por_pagina_cursor(per_page)
+    despesas = _filtrar_por_cursor(despesas, cursor)
+    return _resposta_cursor([d async for d in despesas[:per_page + 1]], per_page, projecao)
 
+def _resposta_paginada(despesas, page_obj, projecao: Projecao = None) -> dict:
     return {
-        "despesas": despesas_serializadas,
+        "despesas": _serializar_despesas(despesas, projecao),
         "paginacao": {
             "pagina_atual": page_obj.number,
-            "total_paginas": paginator.num_pages,
-            "total_despesas": paginator.count,
+            "total_paginas": page_obj.paginator.num_pages,
+            "total_despesas": page_obj.paginator.count,
             "tem_proxima": page_obj.has_next(),
             "tem_anterior": page_obj.has_previous(),
         }
     }
 
-def list_despesas_departamento(departamento_id, page=1, per_page=10) -> List[dict]:
-    """Retorna todas as despesas de um departamento específico com paginação."""
-    try:
-        departamento = Departamento.objects.get(id=departamento_id)
-        
-        # Filtra as despesas do departamento
-        despesas = Despesa.objects.filter(departamento=departamento).select_related(
-            'user', 'elemento', 'tipoGasto'
-        ).order_by("-created_at")
+def _paginar_despesas(despesas, page, per_page: int, projecao: Projecao = None) -> dict:
+    """Paginação numerada, ordenada da despesa mais recente para a mais antiga."""
+    page_obj = Paginator(despesas.order_by("-created_at", "-id"), per_page).get_page(page)
+    return _resposta_paginada(page_obj.object_list, page_obj, projecao)
 
-        # Pagina as despesas
-        paginator = Paginator(despesas, per_page)
-        page_obj = paginator.get_page(page)
+async def _apaginar_despesas(despesas, page, per_page: int, projecao: Projecao = None) -> dict:
+    """Versão assíncrona de `_paginar_despesas`; o Paginator só calcula os limites da página."""
+    total = await despesas.acount()
+    page_obj = Paginator(range(total), per_page).get_page(page)
+    inicio = (page_obj.number - 1) * per_page
+    despesas = despesas.order_by("-created_at", "-id")[inicio:inicio + per_page]
+    return _resposta_paginada([d async for d in despesas], page_obj, projecao)
 
-        # Serializa as despesas da página atual
-        despesas_serializadas = [despesa.to_dict_json() for despesa in page_obj.object_list]
+def list_despesas(page=1, per_page=10, cursor: str = None, campos: tuple = None, colunar: bool = False) -> List[dict]:
+    """
+    Retorna todas as despesas paginadas, independentemente do departamento.
+    Com `cursor` (mesmo vazio) usa a paginação por cursor em vez de páginas numeradas;
+    com `campos` (?fields=) cada despesa traz só os campos pedidos e, com `colunar`
+    (?format=columnar), a lista de despesas vem no formato colunar.
+    """
+    projecao = _projecao_despesas(campos, colunar)
+    despesas = _consultar_despesas(projecao)
+    if cursor is not None:
+        return _paginar_despesas_por_cursor(despesas, cursor, per_page, projecao)
+    return _paginar_despesas(despesas, page, per_page, projecao)
 
-        # Retorna o resultado com a paginação
-        return {
-            "despesas": despesas_serializadas,
-            "paginacao": {
-                "pagina_atual": page_obj.number,
-                "total_paginas": paginator.num_pages,
-                "total_despesas": paginator.count,
-                "tem_proxima": page_obj.has_next(),
-                "tem_anterior": page_obj.has_previous(),
-            }
-        }
+async def alist_despesas(page=1, per_page=10, cursor: str = None, campos: tuple = None,
+                        colunar: bool = False) -> dict:
+    """Versão assíncrona de `list_despesas`."""
+    projecao = _projecao_despesas(campos, colunar)
+    despesas = _consultar_despesas(projecao)
+    if cursor is not None:
+        return await _apaginar_despesas_por_cursor(despesas, cursor, per_page, projecao)
+    return await _apaginar_despesas(despesas, page, per_page, projecao)
 
+def list_despesas_departamento(departamento_id, page=1, per_page=10, cursor: str = None,
+                               campos: tuple = None, colunar: bool = False) -> List[dict]:
+    """
+    Retorna todas as despesas de um departamento específico com paginação.
+    Com `cursor` (mesmo vazio) usa a paginação por cursor em vez de páginas numeradas.
+    """
+    try:
+        departamento = Departamento.objects.get(id=departamento_id)
     except Departamento.DoesNotExist:
         raise ValueError("Departamento não encontrado")
 
-def list_despesas_departamento_apartir_data(departamento_id: int, data_inicio: date, page=1, per_page=10) -> dict:
+    projecao = _projecao_despesas(campos, colunar)
+    despesas = _consultar_despesas(projecao, departamento=departamento)
+    if cursor is not None:
+        return _paginar_despesas_por_cursor(despesas, cursor, per_page, projecao)
+    return _paginar_despesas(despesas, page, per_page, projecao)
+
+async def alist_despesas_departamento(departamento_id, page=1, per_page=10, cursor: str = None,
+                                      campos: tuple = None, colunar: bool = False) -> dict:
+    """Versão assíncrona de `list_despesas_departamento`."""
+    if not await Departamento.objects.filter(id=departamento_id).aexists():
+        raise ValueError("Departamento não encontrado")
+
+    projecao = _projecao_despesas(campos, colunar)
+    despesas = _consultar_despesas(projecao, departamento_id=departamento_id)
+    if cursor is not None:
+        return await _apaginar_despesas_por_cursor(despesas, cursor, per_page, projecao)
+    return await _apaginar_despesas(despesas, page, per_page, projecao)
+
+def _despesas_apartir_data(departamento_id: int, data_inicio: date, projecao: Projecao = None):
+    # Comparar created_at com o início do dia (e não created_at__date) mantém o filtro
+    # utilizável pelo índice (departamento, -created_at, -id)
+    return _consultar_despesas(
+        projecao,
+        departamento_id=departamento_id,
+        created_at__gte=_horario_local(datetime.combine(data_inicio, time.min)),
+    )
+
+def list_despesas_departamento_apartir_data(departamento_id: int, data_inicio: date, page=1, per_page=10,
+                                            cursor: str = None, campos: tuple = None,
+                                            colunar: bool = False) -> dict:
     """
     Lista despesas de um departamento a partir de uma data específica, com paginação.
     
@@ -853,6 +1646,9 @@ def list_despesas_departamento_apartir_data(departamento_id: int, data_inicio: d
         data_inicio: Data inicial (inclusive) para filtragem.
         page: Número da página.
         per_page: Quantidade de itens por página.
+        cursor: Cursor da paginação por cursor (opcional; vazio para a primeira página).
+        campos: Campos de cada despesa na resposta (?fields=; opcional).
+        colunar: Devolve as despesas no formato colunar (?format=columnar).
     
     Returns:
         dict: Dicionário contendo despesas paginadas.
@@ -862,106 +1658,300 @@ def list_despesas_departamento_apartir_data(departamento_id: int, data_inicio: d
     """
     try:
         departamento = Departamento.objects.get(id=departamento_id)
+    except Departamento.DoesNotExist:
+        raise ValueError("Departamento não encontrado.")
 
-        despesas = Despesa.objects.filter(
-            departamento=departamento,
-            created_at__date__gte=data_inicio
-        ).select_related(
-            'user', 'elemento', 'tipoGasto'
-        ).order_by("-created_at")
+    projecao = _projecao_despesas(campos, colunar)
+    despesas = _despesas_apartir_data(departamento.id, data_inicio, projecao)
+    if cursor is not None:
+        return _paginar_despesas_por_cursor(despesas, cursor, per_page, projecao)
+    return _paginar_despesas(despesas, page, per_page, projecao)
 
-        paginator = Paginator(despesas, per_page)
-        page_obj = paginator.get_page(page)
+async def alist_despesas_departamento_apartir_data(departamento_id: int, data_inicio: date, page=1, per_page=10,
+                                                   cursor: str = None, campos: tuple = None,
+                                                   colunar: bool = False) -> dict:
+    """Versão assíncrona de `list_despesas_departamento_apartir_data`."""
+    if not await Departamento.objects.filter(id=departamento_id).aexists():
+        raise ValueError("Departamento não encontrado.")
 
-        despesas_serializadas = [d.to_dict_json() for d in page_obj.object_list]
+    projecao = _projecao_despesas(campos, colunar)
+    despesas = _despesas_apartir_data(departamento_id, data_inicio, projecao)
+    if cursor is not None:
+        return await _apaginar_despesas_por_cursor(despesas, cursor, per_page, projecao)
+    return await _apaginar_despesas(despesas, page, per_page, projecao)
 
-        return {
-            "despesas": despesas_serializadas,
-            "paginacao": {
-                "pagina_atual": page_obj.number,
-                "total_paginas": paginator.num_pages,
-                "total_despesas": paginator.count,
-                "tem_proxima": page_obj.has_next(),
-                "tem_anterior": page_obj.has_previous(),
-            }
-        }
+def _datas_periodo(data_inicio: str, data_termino: str) -> tuple:
+    """Início de cada dia no fuso local, comparável diretamente com created_at."""
+    try:
+        return (
+            _horario_local(datetime.strptime(data_inicio, '%Y-%m-%d')),
+            _horario_local(datetime.strptime(data_termino, '%Y-%m-%d')),
+        )
+    except ValueError:
+        raise BusinessError("Formato de data inválido. Use o formato YYYY-MM-DD")
 
-    except Departamento.DoesNotExist:
-        raise ValueError("Departamento não encontrado.")
+def _despesas_periodo(departamento_id, data_inicio: str, data_termino: str, projecao: Projecao = None):
+    data_inicio, data_termino = _datas_periodo(data_inicio, data_termino)
+    return _consultar_despesas(
+        projecao,
+        departamento_id=departamento_id,
+        created_at__range=[data_inicio, data_termino]
+    ).order_by('-created_at', '-id')
+
+def _resposta_periodo(despesas, total: int, page: int, per_page: int, projecao: Projecao = None) -> dict:
+    return {
+        "total": total,
+        "page": page,
+        "per_page": per_page,
+        "results": _serializar_despesas(despesas, projecao)
+    }
 
-def list_despesas_departamento_periodo(departamento_id, data_inicio, data_termino, page=1, per_page=10):
+def list_despesas_departamento_periodo(departamento_id, data_inicio, data_termino, page=1, per_page=10,
+                                       campos: tuple = None, colunar: bool = False):
     """Lista despesas de um departamento em um período específico com paginação"""
+    projecao = _projecao_despesas(campos, colunar)
+    despesas = _despesas_periodo(departamento_id, data_inicio, data_termino, projecao)
+    offset = (page - 1) * per_page
     try:
-        data_inicio = datetime.strptime(data_inicio, '%Y-%m-%d')
-        data_termino = datetime.strptime(data_termino, '%Y-%m-%d')
-        
-        # Calcula o offset para paginação
-        offset = (page - 1) * per_page
-        
-        # Busca as despesas do departamento no período
-        despesas = Despesa.objects.filter(
-            departamento_id=departamento_id,
-            created_at__range=[data_inicio, data_termino]
-        ).order_by('-created_at')
-        
-        # Aplica paginação
-        total = despesas.count()
-        despesas = despesas[offset:offset + per_page]
-        
-        # Converte para dicionário
-        despesas_list = [despesa.to_dict_json() for despesa in despesas]
-        
-        return {
-            "total": total,
-            "page": page,
-            "per_page": per_page,
-            "results": despesas_list
-        }
-    except ValueError as e:
-        raise BusinessError("Formato de data inválido. Use o formato YYYY-MM-DD")
+        return _resposta_periodo(despesas[offset:offset + per_page], despesas.count(), page, per_page, projecao)
+    except Exception as e:
+        logger.error(f"Erro ao listar despesas do departamento: {str(e)}")
+        raise BusinessError("Erro ao listar despesas do departamento")
+
+async def alist_despesas_departamento_periodo(departamento_id, data_inicio, data_termino, page=1, per_page=10,
+                                              campos: tuple = None, colunar: bool = False):
+    """Versão assíncrona de `list_despesas_departamento_periodo`."""
+    projecao = _projecao_despesas(campos, colunar)
+    despesas = _despesas_periodo(departamento_id, data_inicio, data_termino, projecao)
+    offset = (page - 1) * per_page
+    try:
+        pagina = [d async for d in despesas[offset:offset + per_page]]
+        return _resposta_periodo(pagina, await despesas.acount(), page, per_page, projecao)
     except Exception as e:
         logger.error(f"Erro ao listar despesas do departamento: {str(e)}")
         raise BusinessError("Erro ao listar despesas do departamento")
 
 def total_despesas_departamento_periodo(departamento_id, data_inicio, data_termino):
     """Calcula o valor total das despesas de um departamento em um período específico"""
+    data_inicio, data_termino = _datas_periodo(data_inicio, data_termino)
     try:
-        data_inicio = datetime.strptime(data_inicio, '%Y-%m-%d')
-        data_termino = datetime.strptime(data_termino, '%Y-%m-%d')
-        
-        # Soma o valor das despesas do departamento no período
-        total = Despesa.objects.filter(
-            departamento_id=departamento_id,
-            created_at__range=[data_inicio, data_termino]
-        ).aggregate(total=models.Sum('valor'))['total'] or Decimal('0.00')
-        
-        return total
-    except ValueError as e:
-        raise BusinessError("Formato de data inválido. Use o formato YYYY-MM-DD")
+        return _somar_despesas(departamento_id, data_inicio, data_termino)
     except Exception as e:
         logger.error(f"Erro ao calcular total de despesas do departamento: {str(e)}")
         raise BusinessError("Erro ao calcular total de despesas do departamento")
 
-# SERVIÇOS PARA ELEMENTOS (implementados conforme práticas)
-def _normalizar_texto(texto: str) -> str:
+async def atotal_despesas_departamento_periodo(departamento_id, data_inicio, data_termino):
+    """Versão assíncrona de `total_despesas_departamento_periodo`."""
+    data_inicio, data_termino = _datas_periodo(data_inicio, data_termino)
+    try:
+        return await _asomar_despesas(departamento_id, data_inicio, data_termino)
+    except Exception as e:
+        logger.error(f"Erro ao calcular total de despesas do departamento: {str(e)}")
+        raise BusinessError("Erro ao calcular total de despesas do departamento")
+
+def get_orcamento_consolidado_departamento(departamento_id: int, ano: int) -> dict:
     """
-    Normaliza um texto removendo acentos e caracteres especiais.
+    Consolida verba e despesas de um departamento e de toda a sua subárvore em um ano.
+
+    O número de consultas é fixo, qualquer que seja o tamanho da hierarquia: a subárvore
+    vem da tabela de fechamento, as verbas e o resumo mensal de despesas são agrupados
+    por departamento.
     
     Args:
-        texto: Texto a ser normalizado
+        departamento_id: ID do departamento raiz
+        ano: Ano de referência
         
     Returns:
-        str: Texto normalizado
-    """
-    import unicodedata
-    # Remove acentos
-    texto = ''.join(c for c in unicodedata.normalize('NFD', texto)
-                   if unicodedata.category(c) != 'Mn')
-    # Converte para minúsculas
-    texto = texto.lower()
-    # Remove espaços extras
-    texto = ' '.join(texto.split())
-    return texto
+        dict: Totais de cada departamento da subárvore e totais consolidados da raiz
+        
+    Raises:
+        BusinessError: Se o ano for inválido ou o departamento não for encontrado
+    """
+    logger.info(f"SERVICE get orcamento consolidado: departamento_id={departamento_id}, ano={ano}")
+
+    if ano < 1900 or ano > 2100:
+        raise BusinessError("O ano deve estar entre 1900 e 2100")
+
+    try:
+        raiz = Departamento.objects.get(id=departamento_id)
+    except Departamento.DoesNotExist:
+        raise BusinessError("Departamento não encontrado")
+
+    nos = {
+        raiz.id: {"id": raiz.id, "nome": raiz.nome, "superior_id": None, "profundidade": 0}
+    }
+    descendentes = HierarquiaDepartamento.objects.filter(ancestral=raiz).values_list(
+        'descendente_id', 'descendente__nome', 'profundidade'
+    )
+    for descendente_id, nome, profundidade in descendentes:
+        nos[descendente_id] = {"id": descendente_id, "nome": nome, "superior_id": None, "profundidade": profundidade}
+
+    ids = list(nos)
+    superiores = Subordinacao.objects.filter(subordinado_id__in=ids).exclude(subordinado=raiz).values_list(
+        'subordinado_id', 'superior_id'
+    )
+    for subordinado_id, superior_id in superiores:
+        nos[subordinado_id]["superior_id"] = superior_id
+
+    verbas = dict(
+        Verba.objects.filter(departamento_id__in=ids, ano=ano).values_list('departamento_id', 'valor')
+    )
+    despesas = dict(
+        DespesaAgregadoMensal.objects.filter(departamento_id__in=ids, ano=ano)
+        .values('departamento_id')
+        .annotate(soma=Sum('total'))
+        .values_list('departamento_id', 'soma')
+    )
+
+    for no in nos.values():
+        no["verba"] = verbas.get(no["id"], Decimal('0.00'))
+        no["despesas"] = despesas.get(no["id"], Decimal('0.00'))
+        no["verba_subarvore"] = no["verba"]
+        no["despesas_subarvore"] = no["despesas"]
+
+    # Acumula de baixo para cima: cada nó soma sua subárvore no superior direto
+    for no in sorted(nos.values(), key=lambda n: n["profundidade"], reverse=True):
+        if no["superior_id"] is not None:
+            superior = nos[no["superior_id"]]
+            superior["verba_subarvore"] += no["verba_subarvore"]
+            superior["despesas_subarvore"] += no["despesas_subarvore"]
+
+    departamentos = []
+    for no in sorted(nos.values(), key=lambda n: (n["profundidade"], n["nome"])):
+        departamentos.append({
+            "id": no["id"],
+            "nome": no["nome"],
+            "superior_id": no["superior_id"],
+            "profundidade": no["profundidade"],
+            "verba": str(no["verba"]),
+            "despesas": str(no["despesas"]),
+            "verba_subarvore": str(no["verba_subarvore"]),
+            "despesas_subarvore": str(no["despesas_subarvore"]),
+            "saldo_subarvore": str(no["verba_subarvore"] - no["despesas_subarvore"]),
+        })
+
+    total_verba = nos[raiz.id]["verba_subarvore"]
+    total_despesas = nos[raiz.id]["despesas_subarvore"]
+
+    return {
+        "departamento_id": raiz.id,
+        "departamento_nome": raiz.nome,
+        "ano": ano,
+        "total_verba": str(total_verba),
+        "total_despesas": str(total_despesas),
+        "saldo": str(total_verba - total_despesas),
+        "departamentos": departamentos,
+    }
+
+# SERVIÇOS PARA ELEMENTOS (implementados conforme práticas)
+# CACHE DO CATÁLOGO
+# Elementos, tipos de gasto e o vínculo entre eles mudam poucas vezes por ano e são lidos
+# a cada formulário de despesa. As entradas ficam no cache "catalogo" sob um número de versão;
+# qualquer alteração no catálogo incrementa a versão, o que invalida todas de uma vez.
+CACHE_CATALOGO = "catalogo"
+_CHAVE_VERSAO_CATALOGO = "catalogo:versao"
+
+def _cache_catalogo():
+    return caches[CACHE_CATALOGO]
+
+def _versao_inicial_catalogo() -> int:
+    # Se a chave da versão for despejada, recomeçar de um número maior que qualquer versão
+    # anterior evita servir entradas antigas ainda no cache (ou repetir um ETag de despesas)
+    return int(timezone.now().timestamp() * 1_000_000)
+
+def _versao_catalogo() -> int:
+    cache = _cache_catalogo()
+    versao = cache.get(_CHAVE_VERSAO_CATALOGO)
+    if versao is None:
+        cache.add(_CHAVE_VERSAO_CATALOGO, _versao_inicial_catalogo(), timeout=None)
+        versao = cache.get(_CHAVE_VERSAO_CATALOGO, 1)
+    return versao
+
+def _etag_catalogo(dados) -> str:
+    conteudo = json.dumps(dados, cls=DjangoJSONEncoder, sort_keys=True).encode("utf-8")
+    return hashlib.md5(conteudo, usedforsecurity=False).hexdigest()
+
+def _obter_catalogo(nome: str, carregar):
+    """Devolve a entrada `nome` do catálogo, carregando-a com `carregar()` se não estiver no cache."""
+    cache = _cache_catalogo()
+    chave = f"catalogo:{_versao_catalogo()}:{nome}"
+    entrada = cache.get(chave)
+    if entrada is None:
+        entrada = carregar()
+        cache.set(chave, entrada)
+    return entrada
+
+def _incrementar_versao_catalogo() -> None:
+    cache = _cache_catalogo()
+    try:
+        cache.incr(_CHAVE_VERSAO_CATALOGO)
+    except ValueError:
+        cache.set(_CHAVE_VERSAO_CATALOGO, _versao_inicial_catalogo(), timeout=None)
+
+def invalidar_cache_catalogo() -> None:
+    """
+    Invalida o catálogo em cache. Chamado pelos serviços que alteram elementos, tipos de gasto
+    ou seus vínculos.
+
+    A versão sobe na hora e de novo após o commit: dentro de uma transação, outra requisição
+    pode recarregar o cache com os dados ainda não confirmados, e o segundo incremento descarta
+    essa entrada.
+    """
+    _incrementar_versao_catalogo()
+    transaction.on_commit(_incrementar_versao_catalogo)
+
+def catalogo_elementos() -> tuple:
+    """
+    Elementos ordenados por nome, a partir do cache do catálogo.
+
+    Returns:
+        tuple: (lista de elementos, ETag do conteúdo)
+    """
+    def carregar():
+        dados = [item.to_dict_json() for item in Elemento.objects.all().order_by('elemento')]
+        return {"dados": dados, "etag": _etag_catalogo(dados)}
+    entrada = _obter_catalogo("elementos", carregar)
+    return entrada["dados"], entrada["etag"]
+
+def catalogo_tipo_gastos() -> tuple:
+    """
+    Tipos de gasto, a partir do cache do catálogo.
+
+    Returns:
+        tuple: (lista de tipos de gasto, ETag do conteúdo)
+    """
+    def carregar():
+        dados = [tg.to_dict_json() for tg in TipoGasto.objects.all().order_by('id')]
+        return {"dados": dados, "etag": _etag_catalogo(dados)}
+    entrada = _obter_catalogo("tipo_gastos", carregar)
+    return entrada["dados"], entrada["etag"]
+
+def catalogo_tipo_gastos_por_elemento(elemento_id: int) -> tuple:
+    """
+    Vínculos Elemento–TipoGasto de um elemento, a partir do cache do catálogo.
+
+    O mapeamento Elemento→TipoGasto inteiro é carregado de uma vez (duas consultas) e
+    guardado como uma única entrada, servindo qualquer elemento sem novas consultas.
+
+    Returns:
+        tuple: (lista de vínculos do elemento, ETag do conteúdo)
+
+    Raises:
+        BusinessError: Se o elemento não existir
+    """
+    def carregar():
+        mapa = {elemento: [] for elemento in Elemento.objects.values_list('id', flat=True)}
+        vinculos = ElementoTipoGasto.objects.select_related('elemento', 'tipo_gasto').order_by('id')
+        for vinculo in vinculos:
+            mapa[vinculo.elemento_id].append(vinculo.to_dict_json())
+        return {
+            "dados": mapa,
+            "etags": {elemento: _etag_catalogo(dados) for elemento, dados in mapa.items()},
+        }
+    entrada = _obter_catalogo("mapa_elemento_tipo_gasto", carregar)
+    if elemento_id not in entrada["dados"]:
+        raise BusinessError(f"Elemento com ID {elemento_id} não encontrado")
+    return entrada["dados"][elemento_id], entrada["etags"][elemento_id]
 
 def add_elemento(elemento: str, descricao: str) -> dict:
     """Adiciona um novo elemento."""
@@ -975,14 +1965,10 @@ def add_elemento(elemento: str, descricao: str) -> dict:
         if not descricao:
             raise BusinessError("O campo 'descricao' é obrigatório")
             
-        # Normaliza o nome do elemento para comparação
-        elemento_normalizado = _normalizar_texto(elemento)
-            
-        # Verifica se já existe um elemento com o mesmo nome (considerando normalização)
-        elementos_existentes = Elemento.objects.all()
-        for elem in elementos_existentes:
-            if _normalizar_texto(elem.elemento) == elemento_normalizado:
-                raise BusinessError(f"Já existe um elemento com o nome '{elem.elemento}'. Use um nome diferente.")
+        # Verifica se já existe um elemento com o mesmo nome (sem diferenciar acentos e maiúsculas)
+        existente = Elemento.objects.filter(nome_normalizado=normalizar_texto(elemento)).first()
+        if existente:
+            raise BusinessError(f"Já existe um elemento com o nome '{existente.elemento}'. Use um nome diferente.")
             
         elemento_obj = Elemento(
             elemento=elemento,
@@ -990,11 +1976,14 @@ def add_elemento(elemento: str, descricao: str) -> dict:
         )
         
         elemento_obj.save()
+        invalidar_cache_catalogo()
         logger.info("SERVICE elemento created.")
         return elemento_obj.to_dict_json()
         
     except BusinessError:
         raise
+    except IntegrityError:
+        raise BusinessError(f"Já existe um elemento com o nome '{elemento}'. Use um nome diferente.")
     except Exception as e:
         logger.error(f"Erro ao adicionar elemento: {str(e)}")
         raise BusinessError("Erro ao adicionar elemento")
@@ -1018,18 +2007,21 @@ def update_elemento(elemento_id: int, elemento: str, descricao: str) -> dict:
             raise BusinessError(f"Elemento com ID {elemento_id} não encontrado")
             
         # Verifica se já existe outro elemento com o mesmo nome (exceto o atual)
-        if Elemento.objects.filter(elemento=elemento).exclude(id=elemento_id).exists():
+        if Elemento.objects.filter(nome_normalizado=normalizar_texto(elemento)).exclude(id=elemento_id).exists():
             raise BusinessError(f"Já existe um elemento com o nome '{elemento}'")
             
         elemento_obj.elemento = elemento
         elemento_obj.descricao = descricao
         elemento_obj.save()
+        invalidar_cache_catalogo()
         
         logger.info("SERVICE elemento updated.")
         return elemento_obj.to_dict_json()
         
     except BusinessError:
         raise
+    except IntegrityError:
+        raise BusinessError(f"Já existe um elemento com o nome '{elemento}'")
     except Exception as e:
         logger.error(f"Erro ao atualizar elemento: {str(e)}")
         raise BusinessError("Erro ao atualizar elemento")
@@ -1041,6 +2033,7 @@ def delete_elemento(elemento_id: int) -> None:
     try:
         elemento = Elemento.objects.get(id=elemento_id)
         elemento.delete()
+        invalidar_cache_catalogo()
         logger.info("SERVICE elemento deleted.")
     except Elemento.DoesNotExist:
         raise BusinessError(f"Elemento com ID {elemento_id} não encontrado.")
@@ -1049,7 +2042,7 @@ def list_elementos() -> List[dict]:
     """Lista todos os elementos ordenados alfabeticamente por nome."""
     logger.info("SERVICE list elementos")
     try:
-        return [item.to_dict_json() for item in Elemento.objects.all().order_by('elemento')]
+        return catalogo_elementos()[0]
     except Exception as e:
         logger.error(f"Erro ao listar elementos: {str(e)}")
         raise BusinessError("Erro ao listar elementos")
@@ -1067,8 +2060,8 @@ def add_tipo_gasto(tipo_gasto: str, descricao: str) -> dict:
         if not descricao:
             raise BusinessError("O campo 'descricao' é obrigatório")
             
-        # Verifica se já existe um tipo de gasto com o mesmo nome
-        if TipoGasto.objects.filter(tipoGasto=tipo_gasto).exists():
+        # Verifica se já existe um tipo de gasto com o mesmo nome (sem diferenciar acentos e maiúsculas)
+        if TipoGasto.objects.filter(nome_normalizado=normalizar_texto(tipo_gasto)).exists():
             raise BusinessError(f"Já existe um tipo de gasto com o nome '{tipo_gasto}'")
             
         tipo_gasto_obj = TipoGasto(
@@ -1077,11 +2070,14 @@ def add_tipo_gasto(tipo_gasto: str, descricao: str) -> dict:
         )
         
         tipo_gasto_obj.save()
+        invalidar_cache_catalogo()
         logger.info("SERVICE tipo_gasto created.")
         return tipo_gasto_obj.to_dict_json()
         
     except BusinessError:
         raise
+    except IntegrityError:
+        raise BusinessError(f"Já existe um tipo de gasto com o nome '{tipo_gasto}'")
     except Exception as e:
         logger.error(f"Erro ao adicionar tipo de gasto: {str(e)}")
         raise BusinessError("Erro ao adicionar tipo de gasto")
@@ -1105,18 +2101,21 @@ def update_tipo_gasto(tipo_gasto_id: int, tipo_gasto: str, descricao: str) -> di
             raise BusinessError(f"Tipo de Gasto com ID {tipo_gasto_id} não encontrado")
             
         # Verifica se já existe outro tipo de gasto com o mesmo nome (exceto o atual)
-        if TipoGasto.objects.filter(tipoGasto=tipo_gasto).exclude(id=tipo_gasto_id).exists():
+        if TipoGasto.objects.filter(nome_normalizado=normalizar_texto(tipo_gasto)).exclude(id=tipo_gasto_id).exists():
             raise BusinessError(f"Já existe um tipo de gasto com o nome '{tipo_gasto}'")
             
         tipo_gasto_obj.tipoGasto = tipo_gasto
         tipo_gasto_obj.descricao = descricao
         tipo_gasto_obj.save()
+        invalidar_cache_catalogo()
         
         logger.info("SERVICE tipo_gasto updated.")
         return tipo_gasto_obj.to_dict_json()
         
     except BusinessError:
         raise
+    except IntegrityError:
+        raise BusinessError(f"Já existe um tipo de gasto com o nome '{tipo_gasto}'")
     except Exception as e:
         logger.error(f"Erro ao atualizar tipo de gasto: {str(e)}")
         raise BusinessError("Erro ao atualizar tipo de gasto")
@@ -1128,6 +2127,7 @@ def delete_tipo_gasto(tipo_gasto_id: int) -> None:
     try:
         tipo_gasto = TipoGasto.objects.get(id=tipo_gasto_id)
         tipo_gasto.delete()
+        invalidar_cache_catalogo()
         logger.info("SERVICE tipo_gasto deleted.")
     except TipoGasto.DoesNotExist:
         raise BusinessError(f"Tipo de Gasto com ID {tipo_gasto_id} não encontrado.")
@@ -1159,6 +2159,7 @@ def add_elemento_tipo_gasto(elemento_id: int, tipo_gasto_id: int) -> dict:
         )
         
         elemento_tipo_gasto.save()
+        invalidar_cache_catalogo()
         logger.info("SERVICE elemento_tipo_gasto created.")
         return elemento_tipo_gasto.to_dict_json()
     except BusinessError:
@@ -1174,10 +2175,19 @@ def delete_elemento_tipo_gasto(id: int) -> None:
     try:
         elemento_tipo_gasto = ElementoTipoGasto.objects.get(id=id)
         elemento_tipo_gasto.delete()
+        invalidar_cache_catalogo()
         logger.info("SERVICE elemento_tipo_gasto deleted.")
     except ElementoTipoGasto.DoesNotExist:
         raise BusinessError(f"Relacionamento com ID {id} não encontrado.")
 
+def _resposta_total_despesas(departamento: Departamento, total_despesas: Decimal) -> dict:
+    return {
+        "departamento_id": departamento.id,
+        "departamento_nome": departamento.nome,
+        "total_despesas": float(total_despesas),
+        "total_despesas_formatado": f"R$ {total_despesas:,.2f}".replace(',', '_').replace('.', ',').replace('_', '.')
+    }
+
 def get_total_despesas_departamento(departamento_id: int) -> dict:
     """
     Calcula o total de despesas de um departamento específico.
@@ -1188,25 +2198,25 @@ def get_total_despesas_departamento(departamento_id: int) -> dict:
     try:
         departamento = Departamento.objects.get(id=departamento_id)
         
-        # Calcula o total de despesas
-        resultado = Despesa.objects.filter(departamento=departamento).aggregate(
-            total_despesas=Sum('valor')
-        )
-        
-        total_despesas = resultado['total_despesas'] or Decimal('0.00')
-        
-        return {
-            "departamento_id": departamento_id,
-            "departamento_nome": departamento.nome,
-            "total_despesas": float(total_despesas),
-            "total_despesas_formatado": f"R$ {total_despesas:,.2f}".replace(',', '_').replace('.', ',').replace('_', '.')
-        }
+        # Calcula o total de despesas a partir do resumo mensal
+        return _resposta_total_despesas(departamento, _somar_despesas(departamento.id))
         
     except Departamento.DoesNotExist:
         raise ValueError("Departamento não encontrado")
     except Exception as e:
         logger.error(f"Erro ao calcular total de despesas: {str(e)}")
         raise BusinessError(f"Erro ao calcular total de despesas: {str(e)}")
+
+async def aget_total_despesas_departamento(departamento_id: int) -> dict:
+    """Versão assíncrona de `get_total_despesas_departamento`."""
+    try:
+        departamento = await Departamento.objects.aget(id=departamento_id)
+        return _resposta_total_despesas(departamento, await _asomar_despesas(departamento.id))
+    except Departamento.DoesNotExist:
+        raise ValueError("Departamento não encontrado")
+    except Exception as e:
+        logger.error(f"Erro ao calcular total de despesas: {str(e)}")
+        raise BusinessError(f"Erro ao calcular total de despesas: {str(e)}")
     
 def get_total_despesas_departamento_apartir_data(departamento_id: int, data_inicio: date) -> dict:
     """
@@ -1222,21 +2232,20 @@ def get_total_despesas_departamento_apartir_data(departamento_id: int, data_inic
     Raises:
         ValueError: Se o departamento não existir.
     """
-    try:
-        departamento = Departamento.objects.get(id=departamento_id)
-
-        total = Despesa.objects.filter(
-            departamento=departamento,
-            created_at__date__gte=data_inicio
-        ).aggregate(
-            total=Sum("valor")
-        )["total"] or Decimal("0.00")
+    if not Departamento.objects.filter(id=departamento_id).exists():
+        raise ValueError("Departamento não encontrado.")
 
-        return {"total": round(total, 2)}
+    total = _somar_despesas(departamento_id, datetime.combine(data_inicio, time.min))
+    return {"total": round(total, 2)}
 
-    except Departamento.DoesNotExist:
+async def aget_total_despesas_departamento_apartir_data(departamento_id: int, data_inicio: date) -> dict:
+    """Versão assíncrona de `get_total_despesas_departamento_apartir_data`."""
+    if not await Departamento.objects.filter(id=departamento_id).aexists():
         raise ValueError("Departamento não encontrado.")
 
+    total = await _asomar_despesas(departamento_id, datetime.combine(data_inicio, time.min))
+    return {"total": round(total, 2)}
+
 def delete_despesa(despesa_id: int) -> bool:
     """
     Remove uma despesa existente.
@@ -1252,7 +2261,9 @@ def delete_despesa(despesa_id: int) -> bool:
     """
     try:
         despesa = Despesa.objects.get(id=despesa_id)
-        despesa.delete()
+        with transaction.atomic():
+            despesa.delete()
+            remover_despesa_agregado(despesa)
         return True
     except Despesa.DoesNotExist:
         raise BusinessError("Despesa não encontrada.")
@@ -1264,7 +2275,7 @@ def list_tipo_gastos() -> List[dict]:
     """Lista todos os tipos de gasto."""
     logger.info("SERVICE list tipo_gastos")
     try:
-        return [tg.to_dict_json() for tg in TipoGasto.objects.all()]
+        return catalogo_tipo_gastos()[0]
     except Exception as e:
         logger.error(f"Erro ao listar tipos de gasto: {str(e)}")
         raise BusinessError("Erro ao listar tipos de gasto")
@@ -1273,10 +2284,9 @@ def list_tipo_gastos_por_elemento(elemento_id: int) -> List[dict]:
     """Lista todos os tipos de gasto associados a um elemento."""
     logger.info(f"SERVICE list tipo_gastos por elemento {elemento_id}")
     try:
-        elemento = Elemento.objects.get(id=elemento_id)
-        return [tg.to_dict_json() for tg in elemento.tipos_gasto.all()]
-    except Elemento.DoesNotExist:
-        raise BusinessError(f"Elemento com ID {elemento_id} não encontrado")
+        return catalogo_tipo_gastos_por_elemento(elemento_id)[0]
+    except BusinessError:
+        raise
     except Exception as e:
         logger.error(f"Erro ao listar tipos de gasto do elemento: {str(e)}")
         raise BusinessError("Erro ao listar tipos de gasto do elemento")
@@ -1321,4 +2331,612 @@ def delete_departamento(departamento_id):
     except Departamento.DoesNotExist:
         raise BusinessError("Departamento não encontrado.")
     except Exception as e:
-        raise BusinessError(f"Erro ao excluir departamento: {str(e)}")
\ No newline at end of file
+        raise BusinessError(f"Erro ao excluir departamento: {str(e)}")
+
+
+# EXPORTAÇÃO
+CABECALHO_EXPORTACAO_DESPESAS = (
+    'id', 'data', 'departamento_id', 'departamento', 'elemento_id', 'elemento',
+    'tipo_gasto_id', 'tipo_gasto', 'usuario', 'valor', 'justificativa',
+)
+CABECALHO_EXPORTACAO_VERBAS = (
+    'id', 'ano', 'departamento_id', 'departamento', 'usuario', 'valor', 'descricao', 'created_at',
+)
+TAMANHO_LOTE_EXPORTACAO = 2000
+
+def _filtro_departamentos(departamento_id: int, incluir_subordinados: bool) -> Q:
+    if not Departamento.objects.filter(id=departamento_id).exists():
+        raise BusinessError("Departamento não encontrado.")
+    filtro = Q(departamento_id=departamento_id)
+    if incluir_subordinados:
+        filtro |= Q(departamento_id__in=HierarquiaDepartamento.objects.filter(
+            ancestral_id=departamento_id
+        ).values('descendente_id'))
+    return filtro
+
+def _converter_data_exportacao(valor: str) -> date:
+    try:
+        return datetime.strptime(valor, '%Y-%m-%d').date()
+    except (ValueError, TypeError):
+        raise BusinessError("Formato de data inválido. Use o formato YYYY-MM-DD")
+
+def exportar_despesas(departamento_id: int = None, incluir_subordinados: bool = False,
+                      data_inicio: str = None, data_termino: str = None, elemento_id: int = None) -> tuple:
+    """
+    Prepara a exportação de despesas, para ser consumida em fluxo.
+
+    Os filtros são validados na chamada; as linhas só são lidas do banco quando o iterável
+    devolvido é percorrido, em lotes de `TAMANHO_LOTE_EXPORTACAO` via `.iterator()`, de modo
+    que o consumo de memória não depende do volume exportado.
+
+    Args:
+        departamento_id: Restringe ao departamento (opcional)
+        incluir_subordinados: Inclui toda a subárvore do departamento
+        data_inicio: Data inicial (inclusive) no formato YYYY-MM-DD (opcional)
+        data_termino: Data final (inclusive) no formato YYYY-MM-DD (opcional)
+        elemento_id: Restringe ao elemento (opcional)
+
+    Returns:
+        tuple: (cabeçalho, iterável de linhas) na ordem de criação das despesas
+
+    Raises:
+        BusinessError: Se o departamento ou o elemento não existir ou uma data for inválida
+    """
+    logger.info(f"SERVICE exportar despesas: departamento {departamento_id}")
+
+    despesas = Despesa.objects.all()
+    if departamento_id is not None:
+        despesas = despesas.filter(_filtro_departamentos(departamento_id, incluir_subordinados))
+    if elemento_id is not None:
+        if not Elemento.objects.filter(id=elemento_id).exists():
+            raise BusinessError("Elemento não encontrado.")
+        despesas = despesas.filter(elemento_id=elemento_id)
+    if data_inicio:
+        inicio = _converter_data_exportacao(data_inicio)
+        despesas = despesas.filter(created_at__gte=_horario_local(datetime.combine(inicio, time.min)))
+    if data_termino:
+        termino = _converter_data_exportacao(data_termino)
+        despesas = despesas.filter(created_at__lte=_horario_local(datetime.combine(termino, time.max)))
+
+    linhas = despesas.order_by('created_at', 'id').values_list(
+        'id', 'created_at', 'departamento_id', 'departamento__nome', 'elemento_id', 'elemento__elemento',
+        'tipoGasto_id', 'tipoGasto__tipoGasto', 'user__username', 'valor', 'justificativa',
+    )
+    return CABECALHO_EXPORTACAO_DESPESAS, linhas.iterator(chunk_size=TAMANHO_LOTE_EXPORTACAO)
+
+def exportar_verbas(departamento_id: int = None, incluir_subordinados: bool = False,
+                    ano_inicio: int = None, ano_termino: int = None) -> tuple:
+    """
+    Prepara a exportação de verbas, para ser consumida em fluxo (ver `exportar_despesas`).
+
+    Args:
+        departamento_id: Restringe ao departamento (opcional)
+        incluir_subordinados: Inclui toda a subárvore do departamento
+        ano_inicio: Primeiro ano (inclusive) (opcional)
+        ano_termino: Último ano (inclusive) (opcional)
+
+    Returns:
+        tuple: (cabeçalho, iterável de linhas) ordenadas por ano e departamento
+
+    Raises:
+        BusinessError: Se o departamento não existir
+    """
+    logger.info(f"SERVICE exportar verbas: departamento {departamento_id}")
+
+    verbas = Verba.objects.all()
+    if departamento_id is not None:
+        verbas = verbas.filter(_filtro_departamentos(departamento_id, incluir_subordinados))
+    if ano_inicio is not None:
+        verbas = verbas.filter(ano__gte=ano_inicio)
+    if ano_termino is not None:
+        verbas = verbas.filter(ano__lte=ano_termino)
+
+    linhas = verbas.order_by('ano', 'departamento__nome', 'id').values_list(
+        'id', 'ano', 'departamento_id', 'departamento__nome', 'user__username', 'valor', 'descricao', 'created_at',
+    )
+    return CABECALHO_EXPORTACAO_VERBAS, linhas.iterator(chunk_size=TAMANHO_LOTE_EXPORTACAO)
+
+# BUSCA
+TAMANHO_MINIMO_BUSCA = 2
+MAXIMO_POR_PAGINA_BUSCA = 100
+
+def _sql_busca_postgres() -> str:
+    """
+    Monta a consulta de busca do PostgreSQL: uma única ida ao banco que une as quatro fontes,
+    ordena por relevância, pagina e devolve o total em todas as linhas.
+
+    Os textos são comparados sem acentos e em minúsculas pelas mesmas expressões dos índices
+    GIN da migração 0020 (trigramas para LIKE e similaridade de palavras; full-text em
+    português para as justificativas de despesas).
+    """
+    termo = "gfinancas_unaccent(lower(%(q)s))"
+    padrao = "('%%' || gfinancas_unaccent(lower(%(q_like)s)) || '%%')"
+    fontes = [
+        # tipo, FROM, id, título, detalhe, texto indexado, campo do prefixo
+        ("departamento", "core_departamento d", "d.id", "d.nome", "d.description",
+         "gfinancas_unaccent(lower(d.nome || ' ' || d.description))", "d.nome"),
+        ("elemento", "core_elemento e", "e.id", "e.elemento", "e.descricao",
+         "gfinancas_unaccent(lower(e.elemento || ' ' || e.descricao))", "e.elemento"),
+        ("tipo_gasto", "core_tipogasto g", "g.id", 'g."tipoGasto"', "g.descricao",
+         "gfinancas_unaccent(lower(g.\"tipoGasto\" || ' ' || g.descricao))", 'g."tipoGasto"'),
+        ("despesa", "core_despesa x JOIN core_departamento xd ON xd.id = x.departamento_id", "x.id",
+         "x.justificativa", "xd.nome", "gfinancas_unaccent(lower(x.justificativa))", "x.justificativa"),
+    ]
+    selects = []
+    for tipo, origem, id_, titulo, detalhe, texto, prefixo in fontes:
+        relevancia = (
+            f"word_similarity({termo}, {texto})"
+            f" + CASE WHEN gfinancas_unaccent(lower({prefixo})) LIKE gfinancas_unaccent(lower(%(q_like)s)) || '%%'"
+            f" THEN 1 ELSE 0 END"
+        )
+        condicao = f"{texto} LIKE {padrao} OR {termo} <%% {texto}"
+        if tipo == "despesa":
+            documento = f"to_tsvector('portuguese'::regconfig, {texto})"
+            consulta = f"plainto_tsquery('portuguese'::regconfig, {termo})"
+            relevancia += f" + ts_rank({documento}, {consulta})"
+            condicao += f" OR {documento} @@ {consulta}"
+        selects.append(
+            f"SELECT '{tipo}' AS tipo, {id_} AS id, {titulo} AS titulo, {detalhe} AS detalhe, "
+            f"({relevancia}) AS relevancia FROM {origem} WHERE {condicao}"
+        )
+    return (
+        "WITH resultados AS (" + " UNION ALL ".join(selects) + ") "
+        "SELECT r.tipo, r.id, r.titulo, r.detalhe, r.relevancia, c.total "
+        "FROM (SELECT count(*) AS total FROM resultados) c "
+        "LEFT JOIN LATERAL (SELECT * FROM resultados ORDER BY relevancia DESC, tipo, id "
+        "LIMIT %(limite)s OFFSET %(deslocamento)s) r ON true"
+    )
+
+def _buscar_postgres(q: str, deslocamento: int, limite: int) -> tuple:
+    q_like = q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    with connection.cursor() as cursor:
+        cursor.execute(_sql_busca_postgres(), {
+            "q": q, "q_like": q_like, "limite": limite, "deslocamento": deslocamento,
+        })
+        linhas = cursor.fetchall()
+    total = linhas[0][5] if linhas else 0
+    resultados = [
+        {"tipo": tipo, "id": id_, "titulo": titulo, "detalhe": detalhe, "relevancia": round(float(relevancia), 4)}
+        for tipo, id_, titulo, detalhe, relevancia, _ in linhas if tipo is not None
+    ]
+    return resultados, total
+
+def _buscar_generico(q: str, deslocamento: int, limite: int) -> tuple:
+    """
+    Busca para bancos sem unaccent/pg_trgm (SQLite nos testes): LIKE sem diferenciar
+    maiúsculas, usando nome_normalizado para elementos e tipos de gasto, com as fontes
+    unidas em uma única consulta e o total em outra.
+    """
+    normalizado = normalizar_texto(q)
+
+    def fonte(queryset, tipo, titulo, detalhe, filtro, prefixo):
+        return queryset.filter(filtro).annotate(
+            tipo_resultado=Value(tipo, output_field=CharField()),
+            relevancia=Case(When(prefixo, then=Value(2.0)), default=Value(1.0), output_field=FloatField()),
+        ).values('tipo_resultado', 'id', 'relevancia', titulo_resultado=F(titulo), detalhe_resultado=F(detalhe))
+
+    fontes = [
+        fonte(Departamento.objects.all(), 'departamento', 'nome', 'description',
+              Q(nome__icontains=q) | Q(description__icontains=q), Q(nome__istartswith=q)),
+        fonte(Elemento.objects.all(), 'elemento', 'elemento', 'descricao',
+              Q(nome_normalizado__contains=normalizado) | Q(descricao__icontains=q),
+              Q(nome_normalizado__startswith=normalizado)),
+        fonte(TipoGasto.objects.all(), 'tipo_gasto', 'tipoGasto', 'descricao',
+              Q(nome_normalizado__contains=normalizado) | Q(descricao__icontains=q),
+              Q(nome_normalizado__startswith=normalizado)),
+        fonte(Despesa.objects.all(), 'despesa', 'justificativa', 'departamento__nome',
+              Q(justificativa__icontains=q), Q(justificativa__istartswith=q)),
+    ]
+    uniao = fontes[0].union(*fontes[1:], all=True)
+    total = uniao.count()
+    pagina = uniao.order_by('-relevancia', 'tipo_resultado', 'id')[deslocamento:deslocamento + limite]
+    resultados = [
+        {
+            "tipo": item["tipo_resultado"], "id": item["id"], "titulo": item["titulo_resultado"],
+            "detalhe": item["detalhe_resultado"], "relevancia": item["relevancia"],
+        }
+        for item in pagina
+    ]
+    return resultados, total
+
+def buscar(q: str, page: int = 1, per_page: int = 20) -> dict:
+    """
+    Busca textual em departamentos, elementos, tipos de gasto e despesas, sem diferenciar
+    acentos nem maiúsculas.
+
+    No PostgreSQL usa unaccent, pg_trgm e full-text em uma única consulta, ordenada por
+    relevância (similaridade de palavras, bônus para prefixo e ts_rank nas justificativas).
+    Em outros bancos recorre a uma busca por LIKE.
+
+    Args:
+        q: Termo buscado (mínimo de 2 caracteres)
+        page: Número da página
+        per_page: Itens por página (máximo de 100)
+
+    Returns:
+        dict: {"q", "resultados": [{tipo, id, titulo, detalhe, relevancia}], "paginacao"}
+
+    Raises:
+        BusinessError: Se o termo for curto demais
+    """
+    q = ' '.join((q or '').split())
+    logger.info(f"SERVICE buscar: {q}")
+    if len(q) < TAMANHO_MINIMO_BUSCA:
+        raise BusinessError(f"Informe ao menos {TAMANHO_MINIMO_BUSCA} caracteres para a busca.")
+
+    page = max(int(page), 1)
+    per_page = min(max(int(per_page), 1), MAXIMO_POR_PAGINA_BUSCA)
+    deslocamento = (page - 1) * per_page
+
+    if connection.vendor == 'postgresql':
+        resultados, total = _buscar_postgres(q, deslocamento, per_page)
+    else:
+        resultados, total = _buscar_generico(q, deslocamento, per_page)
+
+    total_paginas = max((total + per_page - 1) // per_page, 1)
+    return {
+        "q": q,
+        "resultados": resultados,
+        "paginacao": {
+            "pagina_atual": page,
+            "total_paginas": total_paginas,
+            "total_resultados": total,
+            "tem_proxima": page < total_paginas,
+            "tem_anterior": page > 1,
+        }
+    }
+
+# DASHBOARD
+# Cada painel é uma consulta agrupada independente das outras: os departamentos do usuário
+# entram como subconsulta, sem uma ida prévia ao banco para descobrir os ids. Por padrão os
+# painéis rodam em sequência na conexão da requisição; no PostgreSQL, DASHBOARD_PAINEIS_PARALELOS
+# os distribui entre um número fixo de threads (fora de transações).
+MAXIMO_ULTIMAS_DESPESAS_DASHBOARD = 50
+
+def _departamentos_do_usuario(usuario_id: int, departamento_id: int = None):
+    """Departamentos de que o usuário é responsável, direto ou por Responsabilidade."""
+    departamentos = Departamento.objects.filter(
+        Q(responsavelId_id=usuario_id)
+        | Q(id__in=Responsabilidade.objects.filter(usuario_id=usuario_id).values('departamento_id'))
+    )
+    if departamento_id is not None:
+        departamentos = departamentos.filter(id=departamento_id)
+    return departamentos
+
+def _dinheiro(valor) -> str:
+    return str(round(Decimal(valor or 0), 2))
+
+def _painel_departamentos(departamentos, ano: int, ultimas: int) -> list:
+    return list(departamentos.order_by('nome', 'id').values('id', 'nome'))
+
+def _painel_verbas(departamentos, ano: int, ultimas: int) -> dict:
+    return dict(Verba.objects.filter(
+        departamento_id__in=departamentos.values('id'), ano=ano
+    ).values_list('departamento_id', 'valor'))
+
+def _painel_gasto_por_departamento(departamentos, ano: int, ultimas: int) -> dict:
+    grupos = DespesaAgregadoMensal.objects.filter(
+        departamento_id__in=departamentos.values('id'), ano=ano
+    ).order_by().values('departamento_id').annotate(soma=Sum('total'), despesas=Sum('quantidade'))
+    return {g['departamento_id']: (g['soma'], g['despesas']) for g in grupos}
+
+def _painel_gasto_por_elemento(departamentos, ano: int, ultimas: int) -> list:
+    grupos = DespesaAgregadoMensal.objects.filter(
+        departamento_id__in=departamentos.values('id'), ano=ano
+    ).order_by().values('elemento_id', 'elemento__elemento').annotate(soma=Sum('total')).order_by('-soma', 'elemento_id')
+    return [
+        {"elemento_id": g['elemento_id'], "elemento": g['elemento__elemento'], "total": _dinheiro(g['soma'])}
+        for g in grupos
+    ]
+
+def _painel_gasto_por_mes(departamentos, ano: int, ultimas: int) -> list:
+    somas = dict(DespesaAgregadoMensal.objects.filter(
+        departamento_id__in=departamentos.values('id'), ano=ano
+    ).order_by().values('mes').annotate(soma=Sum('total')).values_list('mes', 'soma'))
+    return [{"mes": mes, "total": _dinheiro(somas.get(mes))} for mes in range(1, 13)]
+
+def _painel_ultimas_despesas(departamentos, ano: int, ultimas: int) -> list:
+    despesas = _consultar_despesas(departamento_id__in=departamentos.values('id')).order_by('-created_at', '-id')
+    return [despesa.to_dict_json() for despesa in despesas[:ultimas]]
+
+PAINEIS_DASHBOARD = {
+    "departamentos": _painel_departamentos,
+    "verbas": _painel_verbas,
+    "gasto_por_departamento": _painel_gasto_por_departamento,
+    "gasto_por_elemento": _painel_gasto_por_elemento,
+    "gasto_por_mes": _painel_gasto_por_mes,
+    "ultimas_despesas": _painel_ultimas_despesas,
+}
+
+@lru_cache(maxsize=None)
+def _executor_paineis(tamanho: int) -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(max_workers=tamanho, thread_name_prefix="dashboard")
+
+def _na_thread_do_executor(painel):
+    """
+    Roda o painel numa thread do executor dos painéis. A thread guarda a sua conexão entre
+    requisições (CONN_MAX_AGE), como um pool: close_old_connections só fecha as expiradas
+    ou com erro.
+    """
+    def executar(*args):
+        close_old_connections()
+        try:
+            return painel(*args)
+        finally:
+            close_old_connections()
+    return executar
+
+def _paineis_em_sequencia(*args) -> dict:
+    return {nome: painel(*args) for nome, painel in PAINEIS_DASHBOARD.items()}
+
+def _paineis_em_paralelo() -> bool:
+    # Consultado na thread da requisição: é a conexão dela que pode estar numa transação
+    return (settings.DASHBOARD_PAINEIS_PARALELOS > 0 and connection.vendor == 'postgresql'
+            and not connection.in_atomic_block)
+
+async def _executar_paineis(*args) -> dict:
+    """
+    Por padrão os painéis rodam em sequência na conexão da requisição (um só snapshot).
+    Com DASHBOARD_PAINEIS_PARALELOS > 0 (PostgreSQL), rodam em paralelo num executor com
+    esse número de threads, o que limita as conexões extras por processo; cada painel vê
+    então o seu próprio snapshot.
+    """
+    if not await sync_to_async(_paineis_em_paralelo)():
+        return await sync_to_async(_paineis_em_sequencia)(*args)
+    executor = _executor_paineis(settings.DASHBOARD_PAINEIS_PARALELOS)
+    loop = asyncio.get_running_loop()
+    tarefas = [loop.run_in_executor(executor, _na_thread_do_executor(painel), *args)
+               for painel in PAINEIS_DASHBOARD.values()]
+    return dict(zip(PAINEIS_DASHBOARD, await asyncio.gather(*tarefas)))
+
+async def adashboard(usuario_id: int, ano: int = None, departamento_id: int = None, ultimas: int = 5) -> dict:
+    """
+    Monta todos os painéis do dashboard do usuário numa única resposta.
+
+    Args:
+        usuario_id: ID do usuário logado
+        ano: Ano de referência de verbas e gastos (padrão: ano corrente)
+        departamento_id: Restringe o dashboard a um dos departamentos do usuário
+        ultimas: Quantidade de despesas recentes (máximo MAXIMO_ULTIMAS_DESPESAS_DASHBOARD)
+
+    Returns:
+        dict: Verba, gasto e saldo por departamento e no total, gasto por elemento,
+            gasto por mês e as últimas despesas
+
+    Raises:
+        BusinessError: Se o ano ou a quantidade forem inválidos
+    """
+    logger.info(f"SERVICE dashboard: usuario={usuario_id} ano={ano} departamento={departamento_id}")
+    ano = timezone.localdate().year if ano is None else int(ano)
+    if ano < 1900 or ano > 2100:
+        raise BusinessError("O ano deve estar entre 1900 e 2100")
+    ultimas = min(max(int(ultimas), 0), MAXIMO_ULTIMAS_DESPESAS_DASHBOARD)
+
+    departamentos = _departamentos_do_usuario(usuario_id, departamento_id)
+    paineis = await _executar_paineis(departamentos, ano, ultimas)
+
+    resumo = []
+    total_verba, total_gasto, total_despesas = Decimal('0.00'), Decimal('0.00'), 0
+    for departamento in paineis["departamentos"]:
+        verba = paineis["verbas"].get(departamento['id'])
+        gasto, quantidade = paineis["gasto_por_departamento"].get(departamento['id'], (Decimal('0.00'), 0))
+        total_verba += verba or 0
+        total_gasto += gasto
+        total_despesas += quantidade
+        resumo.append({
+            "id": departamento['id'],
+            "nome": departamento['nome'],
+            "verba": None if verba is None else _dinheiro(verba),
+            "gasto": _dinheiro(gasto),
+            "saldo": None if verba is None else _dinheiro(verba - gasto),
+            "percentual_executado": round(float(gasto / verba * 100), 2) if verba else None,
+            "quantidade_despesas": quantidade,
+        })
+
+    return {
+        "ano": ano,
+        "totais": {
+            "verba": _dinheiro(total_verba),
+            "gasto": _dinheiro(total_gasto),
+            "saldo": _dinheiro(total_verba - total_gasto),
+            "quantidade_despesas": total_despesas,
+        },
+        "departamentos": resumo,
+        "gasto_por_elemento": paineis["gasto_por_elemento"],
+        "gasto_por_mes": paineis["gasto_por_mes"],
+        "ultimas_despesas": paineis["ultimas_despesas"],
+    }
+
+# DETALHAMENTO DE DESPESAS
+def _somar_grupo(destino: dict, grupo: dict) -> None:
+    destino["total"] += grupo['total']
+    destino["quantidade"] += grupo['quantidade']
+
+def _serializar_grupos(grupos: dict, por_mes: bool) -> list:
+    """Converte os acumuladores em lista, do maior para o menor total."""
+    resultado = []
+    for grupo in sorted(grupos.values(), key=lambda g: (-g["total"], g["nome"])):
+        item = {**grupo["chave"], "total": _dinheiro(grupo["total"]), "quantidade": grupo["quantidade"]}
+        if "filhos" in grupo:
+            item["tipos_gasto"] = _serializar_grupos(grupo["filhos"], por_mes)
+        if por_mes:
+            item["meses"] = [
+                {"mes": mes, "total": _dinheiro(m["total"]), "quantidade": m["quantidade"]}
+                for mes, m in sorted(grupo["meses"].items())
+            ]
+        resultado.append(item)
+    return resultado
+
+def _acumulador(chave: dict, nome: str, filhos: bool = False) -> dict:
+    acumulador = {"chave": chave, "nome": nome, "total": Decimal('0.00'), "quantidade": 0, "meses": {}}
+    if filhos:
+        acumulador["filhos"] = {}
+    return acumulador
+
+def detalhar_despesas_departamento(departamento_id: int, data_inicio: str = None, data_termino: str = None,
+                                   incluir_subordinados: bool = False, por_mes: bool = False) -> dict:
+    """
+    Totais de despesas por elemento e por tipo de gasto (e, opcionalmente, por mês) em uma consulta.
+
+    Um único GROUP BY sobre Despesa, coberto pelo índice (departamento, created_at, elemento,
+    tipoGasto, valor); os totais por elemento, por tipo de gasto e por mês são somados em
+    memória a partir das linhas agrupadas.
+
+    Args:
+        departamento_id: ID do departamento
+        data_inicio: Data inicial (inclusive) no formato YYYY-MM-DD (opcional)
+        data_termino: Data final (inclusive) no formato YYYY-MM-DD (opcional)
+        incluir_subordinados: Inclui toda a subárvore do departamento
+        por_mes: Detalha cada total por mês (AAAA-MM)
+
+    Returns:
+        dict: Total geral, lista por elemento (com seus tipos de gasto) e lista por tipo de gasto
+
+    Raises:
+        BusinessError: Se o departamento não existir ou uma data for inválida
+    """
+    logger.info(f"SERVICE detalhar despesas departamento {departamento_id}")
+
+    despesas = Despesa.objects.filter(_filtro_departamentos(departamento_id, incluir_subordinados))
+    if data_inicio:
+        inicio = _converter_data_exportacao(data_inicio)
+        despesas = despesas.filter(created_at__gte=_horario_local(datetime.combine(inicio, time.min)))
+    if data_termino:
+        termino = _converter_data_exportacao(data_termino) + timedelta(days=1)
+        despesas = despesas.filter(created_at__lt=_horario_local(datetime.combine(termino, time.min)))
+
+    campos = ['elemento_id', 'elemento__elemento', 'tipoGasto_id', 'tipoGasto__tipoGasto']
+    if por_mes:
+        despesas = despesas.annotate(mes=TruncMonth('created_at'))
+        campos.append('mes')
+    grupos = despesas.order_by().values(*campos).annotate(total=Sum('valor'), quantidade=Count('*'))
+
+    geral = _acumulador({}, "")
+    elementos, tipos = {}, {}
+    for grupo in grupos:
+        elemento = elementos.get(grupo['elemento_id'])
+        if elemento is None:
+            elemento = elementos[grupo['elemento_id']] = _acumulador(
+                {"elemento_id": grupo['elemento_id'], "elemento": grupo['elemento__elemento']},
+                grupo['elemento__elemento'], filhos=True,
+            )
+        chave_tipo = {"tipo_gasto_id": grupo['tipoGasto_id'], "tipo_gasto": grupo['tipoGasto__tipoGasto']}
+        tipo_no_elemento = elemento["filhos"].setdefault(
+            grupo['tipoGasto_id'], _acumulador(chave_tipo, grupo['tipoGasto__tipoGasto'])
+        )
+        tipo = tipos.setdefault(grupo['tipoGasto_id'], _acumulador(chave_tipo, grupo['tipoGasto__tipoGasto']))
+
+        # TruncMonth já devolve o início do mês no fuso local
+        mes = grupo['mes'].strftime('%Y-%m') if por_mes else None
+        for destino in (geral, elemento, tipo_no_elemento, tipo):
+            _somar_grupo(destino, grupo)
+            if por_mes:
+                _somar_grupo(destino["meses"].setdefault(mes, {"total": Decimal('0.00'), "quantidade": 0}), grupo)
+
+    resultado = {
+        "departamento_id": departamento_id,
+        "subordinados": incluir_subordinados,
+        "data_inicio": data_inicio,
+        "data_termino": data_termino,
+        "total": _dinheiro(geral["total"]),
+        "quantidade": geral["quantidade"],
+        "por_elemento": _serializar_grupos(elementos, por_mes),
+        "por_tipo_gasto": _serializar_grupos(tipos, por_mes),
+    }
+    if por_mes:
+        resultado["por_mes"] = _serializar_grupos({"geral": geral}, True)[0]["meses"]
+    return resultado
+
+def total_despesas_departamento_elemento(departamento_id: int, elemento_id: int) -> Decimal:
+    """
+    Total das despesas de um departamento em um elemento, a partir do resumo mensal.
+
+    Args:
+        departamento_id: ID do departamento
+        elemento_id: ID do elemento
+
+    Returns:
+        Decimal: Soma das despesas (zero se não houver)
+
+    Raises:
+        BusinessError: Se o departamento ou o elemento não existir
+    """
+    logger.info(f"SERVICE total despesas departamento {departamento_id} elemento {elemento_id}")
+    if not Departamento.objects.filter(id=departamento_id).exists():
+        raise BusinessError("Departamento não encontrado.")
+    if not Elemento.objects.filter(id=elemento_id).exists():
+        raise BusinessError("Elemento não encontrado.")
+
+    total = DespesaAgregadoMensal.objects.filter(
+        departamento_id=departamento_id, elemento_id=elemento_id
+    ).aggregate(total=Sum('total'))['total']
+    return total or Decimal('0.00')
+
+# GET CONDICIONAL
+# Validadores baratos das leituras de verbas e despesas. As listagens usam os contadores de
+# VersaoDepartamento, que sobem a cada alteração das despesas ou verbas do departamento, do
+# próprio departamento ou de um usuário (linha 0): uma leitura por chave primária, ou a soma
+# dos contadores nas listagens gerais, qualquer que seja o tamanho do conjunto ou a página
+# pedida. A versão do catálogo cobre os nomes de elemento e tipo de gasto das despesas.
+
+def _etag_versao(*partes) -> str:
+    conteudo = "|".join("" if parte is None else str(parte) for parte in partes)
+    return hashlib.md5(conteudo.encode("utf-8"), usedforsecurity=False).hexdigest()
+
+def _contador_versoes(campo: str, departamento_id: int = None) -> int:
+    versoes = VersaoDepartamento.objects.all()
+    if departamento_id is not None:
+        versoes = versoes.filter(departamento_id__in=[0, departamento_id])
+    return versoes.aggregate(total=Coalesce(Sum(campo), 0))['total']
+
+def versao_despesas(departamento_id: int = None, data_inicio: date = None, periodo: tuple = None,
+                    variante: str = "") -> str:
+    """
+    Validador de GET condicional das listagens de despesas.
+
+    Args:
+        departamento_id: Restringe ao departamento (opcional)
+        data_inicio: Despesas a partir da data, como em list_despesas_departamento_apartir_data
+        periodo: (data_inicio, data_termino) em YYYY-MM-DD, como em list_despesas_departamento_periodo
+        variante: Parte da requisição que muda a representação (página, campos, formato)
+
+    Returns:
+        str: ETag da listagem
+
+    Raises:
+        BusinessError: Se o período for inválido
+    """
+    if periodo is not None:
+        _datas_periodo(*periodo)
+    versao = _contador_versoes('despesas', departamento_id)
+    return _etag_versao(
+        "despesas", departamento_id, data_inicio, periodo, versao, _versao_catalogo(), variante
+    )
+
+def versao_verbas(departamento_id: int = None, variante: str = "") -> str:
+    """
+    Validador de GET condicional das listagens de verbas (todas ou de um departamento).
+
+    Returns:
+        str: ETag da listagem
+    """
+    versao = _contador_versoes('verbas', departamento_id)
+    return _etag_versao("verbas", departamento_id, versao, variante)
+
+def _ultima_alteracao(*datas):
+    datas = [data for data in datas if data is not None]
+    return max(datas) if datas else None
+
+def versao_verba(verba_id: int) -> tuple:
+    """
+    Validador de GET condicional de uma verba: o updated_at da linha, do departamento e do usuário.
+
+    Returns:
+        tuple: (ETag, data da última alteração) ou None se a verba não existir
+    """
+    versao = Verba.objects.filter(id=verba_id).values_list(
+        'updated_at', 'departamento__updated_at', 'user__updated_at'
+    ).first()
+    if versao is None:
+        return None
+    return _etag_versao("verba", verba_id, *versao), _ultima_alteracao(*versao)
@@ -0,0 +1,57 @@
+"""
+Manutenção de dados derivados que precisa valer também fora dos serviços (admin, exclusões
+em lote ou em cascata): a tabela de fechamento da hierarquia e os contadores de
+VersaoDepartamento (GET condicional das listagens). As inserções em lote, que não disparam
+sinais, chamam incrementar_versoes diretamente.
+"""
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from ..accounts.models import User
+from .models import Departamento, Despesa, Subordinacao, Verba, _desligar_hierarquia, incrementar_versoes
+
+
+@receiver(pre_delete, sender=Subordinacao)
+def subordinacao_excluida(sender, instance, **kwargs):
+    # Antes da exclusão: numa exclusão em cascata, as linhas da tabela de fechamento que
+    # indicam os caminhos a remover podem sair no mesmo lote
+    _desligar_hierarquia(instance.superior_id, instance.subordinado_id)
+
+
+def _departamentos_gravados(instancia) -> set:
+    departamentos = {instancia.departamento_id, getattr(instancia, "_departamento_salvo", None)}
+    instancia._departamento_salvo = instancia.departamento_id
+    return departamentos
+
+@receiver(post_save, sender=Despesa)
+def despesa_gravada(sender, instance, **kwargs):
+    incrementar_versoes(_departamentos_gravados(instance), despesas=True)
+
+@receiver(post_delete, sender=Despesa)
+def despesa_excluida(sender, instance, **kwargs):
+    incrementar_versoes([instance.departamento_id], despesas=True)
+
+@receiver(post_save, sender=Verba)
+def verba_gravada(sender, instance, **kwargs):
+    incrementar_versoes(_departamentos_gravados(instance), verbas=True)
+
+@receiver(post_delete, sender=Verba)
+def verba_excluida(sender, instance, **kwargs):
+    incrementar_versoes([instance.departamento_id], verbas=True)
+
+@receiver(post_save, sender=Departamento)
+def departamento_gravado(sender, instance, created, **kwargs):
+    # O nome do departamento aparece nas despesas e verbas dele
+    if not created:
+        incrementar_versoes([instance.pk], despesas=True, verbas=True)
+
+@receiver(post_save, sender=User)
+def usuario_gravado(sender, instance, created, update_fields=None, **kwargs):
+    if created or (update_fields is not None and set(update_fields) <= {"last_login"}):
+        return
+    incrementar_versoes([0], despesas=True, verbas=True)
+
+@receiver(post_delete, sender=User)
+def usuario_excluido(sender, instance, **kwargs):
+    # As despesas e verbas do usuário passam ao usuário padrão (SET_DEFAULT)
+    incrementar_versoes([0], despesas=True, verbas=True)
@@ -0,0 +1,293 @@
+"""
+Geração de dados sintéticos para testes de carga e de desempenho.
+
+Monta um organograma de departamentos com a profundidade pedida, o catálogo de
+elementos e tipos de gasto, uma verba por departamento e ano e as despesas espalhadas
+pelos anos, tudo com inserções em lote. O conteúdo depende só da semente e da data
+de referência, então duas cargas com os mesmos parâmetros geram os mesmos dados.
+
+Como as inserções em lote não chamam `save()`, a tabela de fechamento da hierarquia e o resumo
+mensal de despesas são reconstruídos ao final, e os contadores de versão sobem de uma vez.
+"""
+import logging
+import random
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Callable, Iterator, List
+
+from django.db import connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from ..accounts.models import User
+from .models import (
+    Departamento, Despesa, DespesaAgregadoMensal, Elemento, ElementoTipoGasto, HierarquiaDepartamento,
+    Responsabilidade, Subordinacao, TipoGasto, Verba, VersaoDepartamento, incrementar_versoes, normalizar_texto,
+    reconstruir_hierarquia_departamentos,
+)
+from .service import invalidar_cache_catalogo, reconstruir_agregados_despesas
+
+logger = logging.getLogger(__name__)
+
+TAMANHO_LOTE = 5000
+
+TIPOS_POR_NIVEL = ("Secretaria", "Diretoria", "Coordenação", "Divisão", "Setor", "Núcleo")
+
+ELEMENTOS = (
+    "Material de Consumo",
+    "Serviços de Terceiros - Pessoa Jurídica",
+    "Serviços de Terceiros - Pessoa Física",
+    "Passagens e Despesas com Locomoção",
+    "Diárias",
+    "Equipamentos e Material Permanente",
+    "Obras e Instalações",
+    "Serviços de Tecnologia da Informação",
+)
+
+TIPOS_GASTO = (
+    "Papelaria", "Limpeza", "Combustível", "Manutenção predial", "Manutenção de veículos",
+    "Passagens aéreas", "Hospedagem", "Licenças de software", "Computadores", "Mobiliário",
+    "Energia elétrica", "Telefonia", "Vigilância", "Consultoria", "Treinamento", "Gêneros alimentícios",
+)
+
+JUSTIFICATIVAS = (
+    "Compra de material de escritório",
+    "Manutenção de equipamentos de informática",
+    "Serviço de limpeza terceirizado",
+    "Passagens aéreas para viagem a trabalho",
+    "Diárias de hospedagem em missão técnica",
+    "Licenças de software de gestão",
+    "Reforma elétrica do prédio anexo",
+    "Combustível da frota oficial",
+    "Contratação de curso de capacitação",
+    "Aquisição de mobiliário para atendimento ao público",
+)
+
+
+def _inserir_com_datas(modelo, objetos: List, batch_size: int = None) -> None:
+    """
+    Insere os objetos com as datas que trazem, mesmo em campos auto_now/auto_now_add: no modo
+    `raw` (o do loaddata) o insert não chama `pre_save` dos campos, então as datas retroativas
+    entram já no INSERT, sem um UPDATE depois. Os ids gerados não são lidos de volta.
+    """
+    banco = modelo.objects.db
+    campos = [campo for campo in modelo._meta.local_concrete_fields if not campo.primary_key]
+    tamanho = connections[banco].ops.bulk_batch_size(campos, objetos) or len(objetos)
+    if batch_size:
+        tamanho = min(tamanho, batch_size)
+    for inicio in range(0, len(objetos), tamanho):
+        modelo._base_manager.using(banco)._insert(objetos[inicio:inicio + tamanho], fields=campos, raw=True)
+
+
+def _ramificacao(quantidade: int, profundidade: int) -> int:
+    """Menor número de filhos por nó que acomoda `quantidade` departamentos em `profundidade` níveis."""
+    if profundidade <= 0:
+        return 0
+    ramificacao = 2
+    while sum(ramificacao ** nivel for nivel in range(profundidade + 1)) < quantidade:
+        ramificacao += 1
+    return ramificacao
+
+
+def _lotes(itens: Iterator, tamanho: int) -> Iterator[List]:
+    lote = []
+    for item in itens:
+        lote.append(item)
+        if len(lote) >= tamanho:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+
+def _gerar_catalogo(quantidade_elementos: int, tipos_por_elemento: int) -> List[tuple]:
+    """Cria (ou reaproveita, pelo nome normalizado) o catálogo e devolve os pares (elemento_id, tipo_gasto_id)."""
+    nomes_elementos = [
+        ELEMENTOS[i % len(ELEMENTOS)] + (f" {i // len(ELEMENTOS) + 1}" if i >= len(ELEMENTOS) else "")
+        for i in range(quantidade_elementos)
+    ]
+    quantidade_tipos = max(len(TIPOS_GASTO), tipos_por_elemento)
+    nomes_tipos = [
+        TIPOS_GASTO[i % len(TIPOS_GASTO)] + (f" {i // len(TIPOS_GASTO) + 1}" if i >= len(TIPOS_GASTO) else "")
+        for i in range(quantidade_tipos)
+    ]
+
+    Elemento.objects.bulk_create(
+        [Elemento(elemento=nome, descricao=nome, nome_normalizado=normalizar_texto(nome)) for nome in nomes_elementos],
+        ignore_conflicts=True,
+    )
+    TipoGasto.objects.bulk_create(
+        [TipoGasto(tipoGasto=nome, descricao=nome, nome_normalizado=normalizar_texto(nome)) for nome in nomes_tipos],
+        ignore_conflicts=True,
+    )
+    elementos = dict(Elemento.objects.filter(
+        nome_normalizado__in=[normalizar_texto(n) for n in nomes_elementos]
+    ).values_list("nome_normalizado", "id"))
+    tipos = dict(TipoGasto.objects.filter(
+        nome_normalizado__in=[normalizar_texto(n) for n in nomes_tipos]
+    ).values_list("nome_normalizado", "id"))
+    elemento_ids = [elementos[normalizar_texto(n)] for n in nomes_elementos]
+    tipo_ids = [tipos[normalizar_texto(n)] for n in nomes_tipos]
+
+    pares = [
+        (elemento_id, tipo_ids[(i * tipos_por_elemento + j) % len(tipo_ids)])
+        for i, elemento_id in enumerate(elemento_ids)
+        for j in range(tipos_por_elemento)
+    ]
+    ElementoTipoGasto.objects.bulk_create(
+        [ElementoTipoGasto(elemento_id=e, tipo_gasto_id=t) for e, t in pares],
+        ignore_conflicts=True,
+    )
+    return pares
+
+
+def _gerar_departamentos(quantidade: int, profundidade: int, usuario: User, referencia: datetime,
+                         lote: int) -> List[int]:
+    ramificacao = _ramificacao(quantidade, profundidade)
+    niveis = [0] * quantidade
+    if ramificacao:
+        for i in range(1, quantidade):
+            niveis[i] = niveis[(i - 1) // ramificacao] + 1
+
+    departamentos = Departamento.objects.bulk_create(
+        [
+            Departamento(
+                nome=f"{TIPOS_POR_NIVEL[min(niveis[i], len(TIPOS_POR_NIVEL) - 1)]} {i + 1}",
+                description=f"Unidade administrativa {i + 1}",
+                tipoEntidade=TIPOS_POR_NIVEL[min(niveis[i], len(TIPOS_POR_NIVEL) - 1)],
+                responsavelId=usuario,
+            )
+            for i in range(quantidade)
+        ],
+        batch_size=lote,
+    )
+    ids = [departamento.id for departamento in departamentos]
+
+    if ramificacao:
+        _inserir_com_datas(
+            Subordinacao,
+            [
+                Subordinacao(superior_id=ids[(i - 1) // ramificacao], subordinado_id=ids[i],
+                             data_subordinacao=referencia)
+                for i in range(1, quantidade)
+            ],
+            batch_size=lote,
+        )
+    return ids
+
+
+def _gerar_verbas(departamento_ids: List[int], anos: List[int], usuario: User, aleatorio: random.Random,
+                  lote: int) -> int:
+    verbas = (
+        Verba(valor=Decimal(aleatorio.randrange(10000, 5000000)), departamento_id=departamento_id,
+              user=usuario, ano=ano, descricao=f"Verba anual {ano}")
+        for departamento_id in departamento_ids
+        for ano in anos
+    )
+    total = 0
+    for parte in _lotes(verbas, lote):
+        Verba.objects.bulk_create(parte)
+        total += len(parte)
+    return total
+
+
+def _gerar_despesas(quantidade: int, departamento_ids: List[int], pares: List[tuple], usuario: User,
+                    inicio: datetime, referencia: datetime, aleatorio: random.Random, lote: int,
+                    progresso: Callable[[str], None]) -> int:
+    segundos = max(int((referencia - inicio).total_seconds()), 1)
+
+    def despesas():
+        for _ in range(quantidade):
+            elemento_id, tipo_gasto_id = aleatorio.choice(pares)
+            momento = inicio + timedelta(seconds=aleatorio.randrange(segundos))
+            # Valores concentrados em centenas de reais, com cauda longa
+            valor = min(max(round(aleatorio.lognormvariate(6, 1.3), 2), 1.0), 9_999_999.99)
+            yield Despesa(
+                user=usuario, departamento_id=aleatorio.choice(departamento_ids), elemento_id=elemento_id,
+                tipoGasto_id=tipo_gasto_id, valor=Decimal(str(valor)), justificativa=aleatorio.choice(JUSTIFICATIVAS),
+                created_at=momento, updated_at=momento,
+            )
+
+    total = 0
+    for parte in _lotes(despesas(), lote):
+        with transaction.atomic():
+            _inserir_com_datas(Despesa, parte)
+        total += len(parte)
+        progresso(f"{total}/{quantidade} despesas")
+    return total
+
+
+def gerar_dados_sinteticos(departamentos: int = 1000, profundidade: int = 4, despesas: int = 100000,
+                           anos: int = 3, semente: int = 42, usuario: User = None,
+                           elementos: int = 8, tipos_por_elemento: int = 4, referencia: datetime = None,
+                           lote: int = TAMANHO_LOTE, progresso: Callable[[str], None] = None) -> dict:
+    """
+    Gera uma base sintética completa.
+
+    Args:
+        departamentos: Quantidade de departamentos
+        profundidade: Níveis de subordinação abaixo da raiz (0 gera departamentos sem hierarquia)
+        despesas: Quantidade de despesas
+        anos: Anos cobertos pelas verbas e despesas, terminando no ano da referência
+        semente: Semente do gerador aleatório
+        usuario: Responsável pelos registros (padrão: usuário "sintetico", criado se preciso)
+        elementos: Quantidade de elementos no catálogo
+        tipos_por_elemento: Tipos de gasto vinculados a cada elemento
+        referencia: Data final das despesas (padrão: agora)
+        lote: Registros por `bulk_create`
+        progresso: Função chamada com mensagens de andamento
+
+    Returns:
+        dict: Ids e quantidades gerados (usuario, departamentos, pares, anos, verbas, despesas)
+
+    Raises:
+        ValueError: Se algum parâmetro for inválido
+    """
+    if departamentos < 1 or despesas < 0 or anos < 1 or profundidade < 0 or elementos < 1 or tipos_por_elemento < 1:
+        raise ValueError("Parâmetros inválidos para a geração de dados sintéticos.")
+
+    progresso = progresso or logger.info
+    aleatorio = random.Random(semente)
+    referencia = referencia or timezone.now()
+    lista_anos = list(range(referencia.year - anos + 1, referencia.year + 1))
+    inicio = referencia.replace(year=lista_anos[0], month=1, day=1, hour=0, minute=0, second=0, microsecond=0)
+
+    if usuario is None:
+        usuario, _ = User.objects.get_or_create(username="sintetico", defaults={"grupo": "Leitor"})
+
+    with transaction.atomic():
+        pares = _gerar_catalogo(elementos, tipos_por_elemento)
+        departamento_ids = _gerar_departamentos(departamentos, profundidade, usuario, referencia, lote)
+    progresso(f"{len(departamento_ids)} departamentos e {len(pares)} pares elemento/tipo de gasto")
+
+    verbas = _gerar_verbas(departamento_ids, lista_anos, usuario, aleatorio, lote)
+    progresso(f"{verbas} verbas")
+
+    total_despesas = _gerar_despesas(despesas, departamento_ids, pares, usuario, inicio, referencia,
+                                     aleatorio, lote, progresso)
+
+    progresso("Reconstruindo hierarquia e resumo mensal")
+    reconstruir_hierarquia_departamentos()
+    reconstruir_agregados_despesas()
+    invalidar_cache_catalogo()
+    incrementar_versoes(departamento_ids, despesas=True, verbas=True)
+
+    return {
+        "usuario": usuario.id,
+        "departamentos": departamento_ids,
+        "pares": pares,
+        "anos": lista_anos,
+        "verbas": verbas,
+        "despesas": total_despesas,
+    }
+
+
+def apagar_dados_core() -> None:
+    """Remove todos os registros do app core, na ordem inversa das dependências."""
+    with transaction.atomic():
+        for modelo in (Despesa, DespesaAgregadoMensal, Verba, Responsabilidade, HierarquiaDepartamento,
+                       Subordinacao, ElementoTipoGasto, Departamento, Elemento, TipoGasto):
+            # DELETE direto: a exclusão pelo ORM carregaria cada linha para disparar os sinais
+            modelo.objects.all()._raw_delete(modelo.objects.db)
+        VersaoDepartamento.objects.update(despesas=F("despesas") + 1, verbas=F("verbas") + 1)
+    invalidar_cache_catalogo()
@@ -0,0 +1,39 @@
+import pytest
+from django.core.cache import caches
+from gfinancas4.core.models import Departamento, Elemento, TipoGasto, ElementoTipoGasto
+from gfinancas4.core.service import CACHE_CATALOGO
+from gfinancas4.accounts.models import User
+
+
+@pytest.fixture
+def cenario(db):
+    user = User.objects.create_user(username="testuser", password="testpass")
+    departamento = Departamento.objects.create(nome="Departamento", description="Descrição", responsavelId=user)
+    elemento = Elemento.objects.create(elemento="Material", descricao="Material de consumo")
+    outro_elemento = Elemento.objects.create(elemento="Serviços", descricao="Serviços de terceiros")
+    tipo_gasto = TipoGasto.objects.create(tipoGasto="Papelaria", descricao="Papelaria")
+    ElementoTipoGasto.objects.create(elemento=elemento, tipo_gasto=tipo_gasto)
+    ElementoTipoGasto.objects.create(elemento=outro_elemento, tipo_gasto=tipo_gasto)
+    return {
+        "user": user,
+        "departamento": departamento,
+        "elemento": elemento,
+        "outro_elemento": outro_elemento,
+        "tipo_gasto": tipo_gasto,
+    }
+
+
+@pytest.fixture(autouse=True)
+def limpar_cache_catalogo():
+    # O cache sobrevive ao rollback do banco entre os testes
+    caches[CACHE_CATALOGO].clear()
+    yield
+    caches[CACHE_CATALOGO].clear()
+
+
+@pytest.fixture(autouse=True)
+def detector_consultas(settings):
+    # Uma consulta repetida em laço (N+1) numa view faz o teste falhar
+    settings.DETECTOR_CONSULTAS = True
+    settings.DETECTOR_CONSULTAS_LEVANTAR = True
+    settings.DETECTOR_CONSULTAS_LENTA_MS = 0
@@ -0,0 +1,130 @@
+import pytest
+import threading
+from asgiref.sync import async_to_sync
+from decimal import Decimal
+from unittest import mock
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from ..models import Departamento, Responsabilidade, Verba
+from .. import service
+from ..service import PAINEIS_DASHBOARD, add_despesa, adashboard
+from gfinancas4.accounts.models import User
+
+dashboard = async_to_sync(adashboard)
+
+
+def _despesa(cenario, departamento, valor, elemento=None):
+    return add_despesa(
+        cenario["user"].id, departamento.id, Decimal(valor),
+        (elemento or cenario["elemento"]).id, cenario["tipo_gasto"].id, "Justificativa"
+    )
+
+
+@pytest.fixture
+def dados(cenario):
+    ano = timezone.localdate().year
+    outro_usuario = User.objects.create_user(username="outro", password="testpass")
+    compartilhado = Departamento.objects.create(nome="Compartilhado", description="D", responsavelId=outro_usuario)
+    Responsabilidade.objects.create(usuario=cenario["user"], departamento=compartilhado)
+    alheio = Departamento.objects.create(nome="Alheio", description="D", responsavelId=outro_usuario)
+
+    Verba.objects.create(valor=Decimal("100.00"), user=cenario["user"], departamento=cenario["departamento"],
+                         ano=ano, descricao="Verba")
+    _despesa(cenario, cenario["departamento"], "10.00")
+    _despesa(cenario, cenario["departamento"], "15.00", cenario["outro_elemento"])
+    _despesa(cenario, compartilhado, "7.50")
+    _despesa(cenario, alheio, "1000.00")
+    return {**cenario, "ano": ano, "compartilhado": compartilhado, "alheio": alheio}
+
+
+@pytest.mark.django_db
+class TestDashboardService:
+    def test_paineis_dos_departamentos_do_usuario(self, dados):
+        resultado = dashboard(dados["user"].id)
+
+        assert resultado["ano"] == dados["ano"]
+        assert resultado["totais"] == {
+            "verba": "100.00", "gasto": "32.50", "saldo": "67.50", "quantidade_despesas": 3,
+        }
+        assert [d["nome"] for d in resultado["departamentos"]] == ["Compartilhado", "Departamento"]
+        assert resultado["departamentos"][1] == {
+            "id": dados["departamento"].id, "nome": "Departamento", "verba": "100.00", "gasto": "25.00",
+            "saldo": "75.00", "percentual_executado": 25.0, "quantidade_despesas": 2,
+        }
+        assert resultado["departamentos"][0]["verba"] is None
+        assert resultado["gasto_por_elemento"] == [
+            {"elemento_id": dados["elemento"].id, "elemento": "Material", "total": "17.50"},
+            {"elemento_id": dados["outro_elemento"].id, "elemento": "Serviços", "total": "15.00"},
+        ]
+        por_mes = {m["mes"]: m["total"] for m in resultado["gasto_por_mes"]}
+        assert len(por_mes) == 12
+        assert por_mes[timezone.localdate().month] == "32.50"
+        assert [d["valor"] for d in resultado["ultimas_despesas"]] == [Decimal("7.50"), Decimal("15.00"), Decimal("10.00")]
+
+    def test_filtra_departamento_e_ultimas(self, dados):
+        resultado = dashboard(dados["user"].id, departamento_id=dados["compartilhado"].id, ultimas=1)
+        assert resultado["totais"]["gasto"] == "7.50"
+        assert len(resultado["ultimas_despesas"]) == 1
+
+        assert dashboard(dados["user"].id, departamento_id=dados["alheio"].id)["departamentos"] == []
+
+    def test_uma_consulta_por_painel(self, dados):
+        with CaptureQueriesContext(connection) as consultas:
+            dashboard(dados["user"].id)
+        assert len(consultas) == len(PAINEIS_DASHBOARD)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_paineis_em_paralelo_no_executor(dados, settings):
+    esperado = dashboard(dados["user"].id)
+
+    # O caminho paralelo só é escolhido no PostgreSQL; aqui ele é forçado
+    settings.DASHBOARD_PAINEIS_PARALELOS = 2
+    threads = set()
+    paineis = {
+        nome: (lambda painel: lambda *args: threads.add(threading.current_thread().name) or painel(*args))(painel)
+        for nome, painel in PAINEIS_DASHBOARD.items()
+    }
+    with mock.patch.object(service, "_paineis_em_paralelo", return_value=True), \
+            mock.patch.dict(PAINEIS_DASHBOARD, paineis):
+        resultado = dashboard(dados["user"].id)
+
+    assert resultado == esperado
+    # No máximo DASHBOARD_PAINEIS_PARALELOS threads (e conexões) para os seis painéis
+    assert 1 <= len(threads) <= 2
+    assert all(nome.startswith("dashboard") for nome in threads)
+
+
+@pytest.mark.django_db
+class TestDashboardView:
+    def test_dashboard(self, client, dados):
+        client.force_login(dados["user"])
+        response = client.get(reverse("dashboard"), {"ano": dados["ano"], "ultimas": 2})
+        assert response.status_code == 200
+        assert response.json()["totais"]["gasto"] == "32.50"
+        assert len(response.json()["ultimas_despesas"]) == 2
+
+    def test_formato_colunar(self, client, dados):
+        client.force_login(dados["user"])
+        resultado = client.get(reverse("dashboard"), {"format": "columnar", "ultimas": 3}).json()
+        assert resultado["totais"]["gasto"] == "32.50"
+        assert resultado["gasto_por_mes"]["columns"] == ["mes", "total"]
+        assert resultado["gasto_por_mes"]["data"]["mes"] == list(range(1, 13))
+        assert resultado["departamentos"]["data"]["nome"] == ["Compartilhado", "Departamento"]
+        ultimas = resultado["ultimas_despesas"]
+        assert len(ultimas["data"]["id"]) == 3
+        assert sorted(d["nome"] for d in ultimas["dictionaries"]["departamento"]) == ["Compartilhado", "Departamento"]
+
+    def test_departamento_de_outro_usuario(self, client, dados):
+        client.force_login(dados["user"])
+        response = client.get(reverse("dashboard"), {"departamento": dados["alheio"].id})
+        assert response.status_code == 404
+
+    def test_parametro_invalido(self, client, dados):
+        client.force_login(dados["user"])
+        assert client.get(reverse("dashboard"), {"ano": "abc"}).status_code == 400
+
+    def test_requer_login(self, client, dados):
+        assert client.get(reverse("dashboard")).status_code == 401
@@ -0,0 +1,443 @@
+"""
+Orçamento de consultas e de tempo para cada endpoint da API.
+
+Semeia com core/sintetico.py uma base com volume realista (milhares de departamentos,
+dezenas de milhares de despesas), chama cada rota de core/urls.py e accounts/urls.py e
+falha se alguma passar do número de consultas ou do tempo previstos em ORCAMENTOS. Ao
+final grava um relatório JSON ordenado, para comparar execuções com um simples diff.
+
+A carga demora, então os testes de medição só rodam quando pedidos:
+
+    GFINANCAS_DESEMPENHO=1 pytest gfinancas4/core/tests/test_desempenho.py
+
+Variáveis opcionais:
+    GFINANCAS_DESEMPENHO_DEPARTAMENTOS  quantidade de departamentos (padrão 2000)
+    GFINANCAS_DESEMPENHO_DESPESAS       quantidade de despesas (padrão 20000)
+    GFINANCAS_DESEMPENHO_FATOR_TEMPO    multiplica os limites de tempo (padrão 1)
+    GFINANCAS_DESEMPENHO_RELATORIO      caminho do relatório (padrão desempenho.json)
+
+O limite de consultas não depende do volume: se ele estoura com mais dados, há consulta
+dentro de laço. O limite de tempo é a mediana de algumas repetições, com o cache frio só
+na primeira.
+"""
+import json
+import os
+import statistics
+from datetime import timedelta
+from decimal import Decimal
+from time import perf_counter
+from typing import Callable, NamedTuple
+
+import pytest
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from gfinancas4.accounts import urls as accounts_urls
+from gfinancas4.accounts.models import User
+from gfinancas4.core import urls as core_urls
+from gfinancas4.core.models import Departamento, Despesa, Elemento, ElementoTipoGasto, Subordinacao, TipoGasto, Verba
+from gfinancas4.core.sintetico import apagar_dados_core, gerar_dados_sinteticos
+
+ATIVO = os.environ.get("GFINANCAS_DESEMPENHO", "").lower() in ("1", "true", "sim")
+QTD_DEPARTAMENTOS = int(os.environ.get("GFINANCAS_DESEMPENHO_DEPARTAMENTOS", 2000))
+QTD_DESPESAS = int(os.environ.get("GFINANCAS_DESEMPENHO_DESPESAS", 20000))
+FATOR_TEMPO = float(os.environ.get("GFINANCAS_DESEMPENHO_FATOR_TEMPO", 1))
+CAMINHO_RELATORIO = os.environ.get("GFINANCAS_DESEMPENHO_RELATORIO", "desempenho.json")
+REPETICOES = 3
+PROFUNDIDADE = 4
+SENHA = "desempenho123"
+
+requer_desempenho = pytest.mark.skipif(
+    not ATIVO, reason="Defina GFINANCAS_DESEMPENHO=1 para medir os endpoints."
+)
+
+PREFIXOS = (("api/core/", core_urls), ("api/accounts/", accounts_urls))
+
+
+class Orcamento(NamedTuple):
+    """Um caso medido: rota, como chamá-la e os limites aceitos."""
+    rota: str
+    metodo: str
+    consultas: int
+    ms: float
+    parametros: Callable[[dict], dict] = lambda d: {}
+    corpo: Callable[[dict], object] = None
+    query: Callable[[dict], str] = lambda d: ""
+    status: int = 200
+
+
+def _data(dias_atras: int) -> str:
+    return (timezone.localdate() - timedelta(days=dias_atras)).isoformat()
+
+
+ORCAMENTOS = {
+    # Busca
+    "buscar": Orcamento(
+        "api/core/search", "GET", 4, 400, query=lambda d: "q=manutencao"
+    ),
+    # Dashboard
+    "dashboard": Orcamento("api/core/dashboard", "GET", 8, 300),
+    # Departamentos
+    "add_departamento": Orcamento(
+        "api/core/departamentos/add", "POST", 4, 100,
+        corpo=lambda d: {"nome": "Novo", "description": "Novo departamento",
+                         "tipoEntidade": "Setor", "responsavelId": d["user"]},
+        status=201,
+    ),
+    "list_departamentos": Orcamento("api/core/departamentos/list", "GET", 3, 200),
+    "list_departamentos_paginado": Orcamento(
+        "api/core/departamentos/list", "GET", 5, 200,
+        query=lambda d: "page=2&per_page=50&include=subordinados,verba_atual,total_despesas",
+    ),
+    "update_departamento": Orcamento(
+        "api/core/departamentos/update", "PUT", 5, 100,
+        corpo=lambda d: {"id": d["folha"], "nome": "Renomeado", "description": "Alterado"},
+    ),
+    "delete_departamento": Orcamento(
+        "api/core/departamentos/delete/<int:id>", "DELETE", 16, 100,
+        parametros=lambda d: {"id": d["departamento_livre"]},
+    ),
+    "total_despesas_departamento": Orcamento(
+        "api/core/departamentos/total-despesas/<int:departamento_id>", "GET", 4, 100,
+        parametros=lambda d: {"departamento_id": d["raiz"]},
+    ),
+    "total_despesas_departamento_elemento": Orcamento(
+        "api/core/departamentos/total-despesas/<int:departamento_id>/elemento/<int:elemento_id>", "GET", 5, 100,
+        parametros=lambda d: {"departamento_id": d["raiz"], "elemento_id": d["elemento"]},
+    ),
+    "total_despesas_departamento_apartir_data": Orcamento(
+        "api/core/departamentos/total-despesas-apartir-data/<int:departamento_id>/data/<str:data_inicio>", "GET", 4, 150,
+        parametros=lambda d: {"departamento_id": d["raiz"], "data_inicio": _data(200)},
+    ),
+    "total_despesas_departamento_periodo": Orcamento(
+        "api/core/departamentos/total-despesas-periodo/<int:departamento_id>/data/<str:data_inicio>/<str:data_termino>",
+        "GET", 5, 150,
+        parametros=lambda d: {"departamento_id": d["raiz"], "data_inicio": _data(400), "data_termino": _data(30)},
+    ),
+    "get_orcamento_consolidado_departamento": Orcamento(
+        "api/core/departamentos/orcamento-consolidado/<int:departamento_id>/ano/<int:ano>", "GET", 7, 200,
+        parametros=lambda d: {"departamento_id": d["raiz"], "ano": d["ano"]},
+    ),
+    # Subordinações
+    "add_subordinacao": Orcamento(
+        "api/core/subordinacoes/add", "POST", 15, 100,
+        corpo=lambda d: {"IdDepartamentoA": d["raiz"], "IdDepartamentoB": d["departamento_livre"]},
+        status=201,
+    ),
+    "list_subordinacoes": Orcamento("api/core/subordinacoes/list", "GET", 3, 300),
+    "update_subordinacao": Orcamento(
+        "api/core/subordinacoes/update/<int:id>", "PUT", 20, 150,
+        parametros=lambda d: {"id": d["subordinacao"]},
+        corpo=lambda d: {"IdDepartamentoA": d["raiz"], "IdDepartamentoB": d["folha"]},
+    ),
+    "delete_subordinacao": Orcamento(
+        "api/core/subordinacoes/delete/<int:id>", "DELETE", 9, 100,
+        parametros=lambda d: {"id": d["subordinacao"]},
+    ),
+    "list_descendentes_departamento": Orcamento(
+        "api/core/subordinacoes/descendentes/<int:departamento_id>", "GET", 4, 300,
+        parametros=lambda d: {"departamento_id": d["raiz"]},
+    ),
+    "list_ancestrais_departamento": Orcamento(
+        "api/core/subordinacoes/ancestrais/<int:departamento_id>", "GET", 4, 100,
+        parametros=lambda d: {"departamento_id": d["folha"]},
+    ),
+    # Responsabilidades
+    "add_responsabilidade": Orcamento(
+        "api/core/responsabilidades/add", "POST", 6, 100,
+        corpo=lambda d: {"usuario_id": d["user"], "departamento_id": d["folha"]},
+        status=201,
+    ),
+    "list_responsabilidades": Orcamento("api/core/responsabilidades/list", "GET", 3, 100),
+    # Catálogo
+    "list_elementos": Orcamento("api/core/elementos/list", "GET", 3, 100),
+    "add_elemento": Orcamento(
+        "api/core/elementos/add", "POST", 4, 100,
+        corpo=lambda d: {"elemento": "Elemento novo", "descricao": "Criado na medição"},
+        status=201,
+    ),
+    "update_elemento": Orcamento(
+        "api/core/elementos/update", "PUT", 5, 100,
+        corpo=lambda d: {"id": d["elemento_livre"], "elemento": "Elemento alterado", "descricao": "Alterado"},
+    ),
+    "delete_elemento": Orcamento(
+        "api/core/elementos/delete/<int:id>", "DELETE", 7, 100,
+        parametros=lambda d: {"id": d["elemento_livre"]},
+        status=204,
+    ),
+    "list_tipo_gastos": Orcamento("api/core/tipo-gastos/list", "GET", 3, 100),
+    "add_tipo_gasto": Orcamento(
+        "api/core/tipo-gastos/add", "POST", 4, 100,
+        corpo=lambda d: {"tipoGasto": "Tipo novo", "descricao": "Criado na medição"},
+        status=201,
+    ),
+    "update_tipo_gasto": Orcamento(
+        "api/core/tipo-gastos/update", "PUT", 5, 100,
+        corpo=lambda d: {"id": d["tipo_gasto_livre"], "tipoGasto": "Tipo alterado", "descricao": "Alterado"},
+    ),
+    "delete_tipo_gasto": Orcamento(
+        "api/core/tipo-gastos/delete/<int:id>", "DELETE", 7, 100,
+        parametros=lambda d: {"id": d["tipo_gasto_livre"]},
+        status=204,
+    ),
+    "list_tipo_gastos_por_elemento": Orcamento(
+        "api/core/tipo-gastos/por-elemento/<int:elemento_id>", "GET", 4, 100,
+        parametros=lambda d: {"elemento_id": d["elemento"]},
+    ),
+    "add_elemento_tipo_gasto": Orcamento(
+        "api/core/elemento-tipo-gasto/add", "POST", 6, 100,
+        corpo=lambda d: {"elemento_id": d["elemento_livre"], "tipo_gasto_id": d["tipo_gasto"]},
+        status=201,
+    ),
+    "delete_elemento_tipo_gasto": Orcamento(
+        "api/core/elemento-tipo-gasto/delete/<int:id>", "DELETE", 4, 100,
+        parametros=lambda d: {"id": d["elemento_tipo_gasto_livre"]},
+        status=204,
+    ),
+    # Despesas
+    "add_despesa": Orcamento(
+        "api/core/despesas/add", "POST", 20, 100,
+        corpo=lambda d: {"departamento_id": d["folha"], "valor": 123.45,
+                         "elemento_id": d["elemento"], "tipo_gasto_id": d["tipo_gasto"],
+                         "justificativa": "Medição"},
+    ),
+    "importar_despesas": Orcamento(
+        "api/core/despesas/bulk", "POST", 16, 500,
+        corpo=lambda d: [
+            {"departamento_id": d["folha"], "valor": "10.00", "elemento_id": d["elemento"],
+             "tipo_gasto_id": d["tipo_gasto"], "justificativa": f"Importada {i}"}
+            for i in range(200)
+        ],
+        status=201,
+    ),
+    "exportar_despesas": Orcamento(
+        "api/core/despesas/exportar", "GET", 4, 2500,
+        query=lambda d: f"departamento_id={d['raiz']}&subordinados=1",
+    ),
+    "detalhar_despesas_departamento": Orcamento(
+        "api/core/despesas/detalhamento/<int:departamento_id>", "GET", 4, 500,
+        parametros=lambda d: {"departamento_id": d["raiz"]},
+        query=lambda d: f"subordinados=1&por_mes=1&data_inicio={_data(365)}&data_termino={_data(0)}",
+    ),
+    "update_despesa": Orcamento(
+        "api/core/despesas/update", "PUT", 32, 100,
+        corpo=lambda d: {"id": d["despesa"], "valor": "99,90", "justificativa": "Alterada"},
+    ),
+    "delete_despesa": Orcamento(
+        "api/core/despesas/delete/<int:id>", "DELETE", 13, 100,
+        parametros=lambda d: {"id": d["despesa"]},
+    ),
+    "list_despesas": Orcamento("api/core/despesas/list", "GET", 5, 150),
+    "list_despesas_pagina_profunda": Orcamento(
+        "api/core/despesas/list", "GET", 5, 200, query=lambda d: "page=1500&per_page=10"
+    ),
+    "list_despesas_cursor": Orcamento(
+        "api/core/despesas/list", "GET", 4, 100, query=lambda d: "cursor=&per_page=50"
+    ),
+    "list_despesas_departamento": Orcamento(
+        "api/core/despesas/list/<int:departamento_id>", "GET", 6, 100,
+        parametros=lambda d: {"departamento_id": d["folha"]},
+    ),
+    "list_despesas_departamento_apartir_data": Orcamento(
+        "api/core/despesas/list/departamento/<int:departamento_id>/apartir-data/<str:data_inicio>", "GET", 6, 100,
+        parametros=lambda d: {"departamento_id": d["folha"], "data_inicio": _data(200)},
+    ),
+    "list_despesas_departamento_periodo": Orcamento(
+        "api/core/despesas/list/departamento/<int:departamento_id>/periodo/<str:data_inicio>/<str:data_termino>",
+        "GET", 5, 100,
+        parametros=lambda d: {"departamento_id": d["folha"], "data_inicio": _data(400), "data_termino": _data(30)},
+    ),
+    # Verbas
+    "add_verba": Orcamento(
+        "api/core/verbas/add", "POST", 10, 100,
+        corpo=lambda d: {"valor": "1000.00", "departamento_id": d["folha"], "ano": d["ano"] + 1,
+                         "descricao": "Verba do próximo ano"},
+        status=201,
+    ),
+    "update_verba": Orcamento(
+        "api/core/verbas/update/<int:id>", "PUT", 11, 100,
+        parametros=lambda d: {"id": d["verba"]},
+        corpo=lambda d: {"valor": "2000.00", "departamento_id": d["folha"], "ano": d["ano"],
+                         "descricao": "Verba revista"},
+    ),
+    "delete_verba": Orcamento(
+        "api/core/verbas/delete/<int:id>", "DELETE", 6, 100,
+        parametros=lambda d: {"id": d["verba"]},
+    ),
+    "get_verba": Orcamento(
+        "api/core/verbas/get/<int:id>", "GET", 6, 100,
+        parametros=lambda d: {"id": d["verba"]},
+    ),
+    "list_verbas": Orcamento("api/core/verbas/list", "GET", 5, 100),
+    "exportar_verbas": Orcamento(
+        "api/core/verbas/exportar", "GET", 3, 1000, query=lambda d: "format=xlsx"
+    ),
+    "list_verbas_departamento": Orcamento(
+        "api/core/verbas/departamento/<int:departamento_id>", "GET", 5, 100,
+        parametros=lambda d: {"departamento_id": d["folha"]},
+    ),
+    "get_verba_departamento_ano": Orcamento(
+        "api/core/verbas/departamento/<int:departamento_id>/ano/<int:ano>", "GET", 6, 100,
+        parametros=lambda d: {"departamento_id": d["folha"], "ano": d["ano"]},
+    ),
+    "get_ultima_verba_departamento": Orcamento(
+        "api/core/verbas/ultima-do-departamento/<int:departamento_id>", "GET", 6, 100,
+        parametros=lambda d: {"departamento_id": d["folha"]},
+    ),
+    # Contas
+    "login": Orcamento(
+        "api/accounts/login", "POST", 6, 1500,
+        corpo=lambda d: {"username": "desempenho", "password": SENHA},
+        status=201,
+    ),
+    "logout": Orcamento("api/accounts/logout", "POST", 4, 100),
+    "whoami": Orcamento("api/accounts/whoami", "GET", 2, 100),
+    "list_users": Orcamento("api/accounts/list-users", "GET", 3, 100),
+    "add_user": Orcamento(
+        "api/accounts/add-user", "POST", 3, 1500,
+        corpo=lambda d: {"username": "novo_desempenho", "password": "senha-segura"},
+        status=201,
+    ),
+}
+
+
+def _rotas_da_api() -> set:
+    return {prefixo + str(padrao.pattern) for prefixo, modulo in PREFIXOS for padrao in modulo.urlpatterns}
+
+
+def _montar_caminho(rota: str, parametros: dict) -> str:
+    caminho = rota
+    for nome, valor in parametros.items():
+        for conversor in ("int", "str"):
+            caminho = caminho.replace(f"<{conversor}:{nome}>", str(valor))
+    return "/" + caminho
+
+
+def _semear() -> dict:
+    user = User.objects.create_user(username="desempenho", password=SENHA)
+    gerado = gerar_dados_sinteticos(
+        departamentos=QTD_DEPARTAMENTOS, profundidade=PROFUNDIDADE, despesas=QTD_DESPESAS, anos=2,
+        usuario=user, progresso=lambda mensagem: None,
+    )
+    ano = gerado["anos"][-1]
+    raiz, folha = gerado["departamentos"][0], gerado["departamentos"][-1]
+    elemento_id, tipo_gasto_id = gerado["pares"][0]
+
+    # Registros sem vínculos, para as rotas de exclusão e de criação de vínculos
+    livre = Departamento.objects.create(nome="Departamento livre", description="Sem vínculos", responsavelId=user)
+    elemento_livre = Elemento.objects.create(elemento="Elemento livre", descricao="Sem despesas")
+    tipo_gasto_livre = TipoGasto.objects.create(tipoGasto="Tipo livre", descricao="Sem despesas")
+    par_livre = ElementoTipoGasto.objects.create(elemento=elemento_livre, tipo_gasto=tipo_gasto_livre)
+    despesa = Despesa.objects.create(user=user, departamento_id=folha, elemento_id=elemento_id,
+                                     tipoGasto_id=tipo_gasto_id, valor=Decimal("50.00"),
+                                     justificativa="Despesa de referência")
+
+    return {
+        "user": user.id,
+        "raiz": raiz,
+        "folha": folha,
+        "departamento_livre": livre.id,
+        "subordinacao": Subordinacao.objects.get(subordinado_id=folha).id,
+        "elemento": elemento_id,
+        "tipo_gasto": tipo_gasto_id,
+        "elemento_livre": elemento_livre.id,
+        "tipo_gasto_livre": tipo_gasto_livre.id,
+        "elemento_tipo_gasto_livre": par_livre.id,
+        "despesa": despesa.id,
+        "verba": Verba.objects.get(departamento_id=folha, ano=ano).id,
+        "ano": ano,
+    }
+
+
+def _limpar():
+    # A base de teste é compartilhada com os outros módulos
+    apagar_dados_core()
+    User.objects.filter(username__in=("desempenho", "novo_desempenho")).delete()
+
+
+@pytest.fixture(scope="module")
+def dados(django_db_setup, django_db_blocker):
+    with django_db_blocker.unblock():
+        _limpar()
+        try:
+            yield _semear()
+        finally:
+            _limpar()
+
+
+@pytest.fixture(scope="module")
+def relatorio():
+    medicoes = {}
+    yield medicoes
+    if not medicoes:
+        return
+    conteudo = {
+        "banco": connection.vendor,
+        "escala": {"departamentos": QTD_DEPARTAMENTOS, "despesas": QTD_DESPESAS},
+        "endpoints": medicoes,
+    }
+    with open(CAMINHO_RELATORIO, "w", encoding="utf-8") as arquivo:
+        json.dump(conteudo, arquivo, indent=2, sort_keys=True, ensure_ascii=False)
+        arquivo.write("\n")
+
+
+def _requisitar(client, orcamento: Orcamento, dados: dict):
+    caminho = _montar_caminho(orcamento.rota, orcamento.parametros(dados))
+    query = orcamento.query(dados)
+    if query:
+        caminho = f"{caminho}?{query}"
+    corpo = orcamento.corpo(dados) if orcamento.corpo else None
+    resposta = client.generic(
+        orcamento.metodo, caminho,
+        data=json.dumps(corpo) if corpo is not None else "",
+        content_type="application/json",
+    )
+    if resposta.streaming:
+        b"".join(resposta.streaming_content)
+    return resposta
+
+
+def test_todas_as_rotas_tem_orcamento():
+    rotas_medidas = {orcamento.rota for orcamento in ORCAMENTOS.values()}
+    assert _rotas_da_api() - rotas_medidas == set()
+    assert rotas_medidas - _rotas_da_api() == set()
+
+
+@requer_desempenho
+@pytest.mark.django_db
+@pytest.mark.parametrize("nome", sorted(ORCAMENTOS))
+def test_orcamento_do_endpoint(nome, dados, relatorio, client):
+    orcamento = ORCAMENTOS[nome]
+    usuario = User.objects.get(id=dados["user"])
+    tempos, consultas, status = [], [], set()
+
+    for _ in range(REPETICOES):
+        # Cada repetição parte do mesmo estado: escritas são desfeitas no savepoint
+        with transaction.atomic():
+            client.force_login(usuario)
+            with CaptureQueriesContext(connection) as capturadas:
+                inicio = perf_counter()
+                resposta = _requisitar(client, orcamento, dados)
+                tempos.append((perf_counter() - inicio) * 1000)
+            consultas.append(len(capturadas))
+            status.add(resposta.status_code)
+            transaction.set_rollback(True)
+
+    medido = {
+        "rota": orcamento.rota,
+        "metodo": orcamento.metodo,
+        "status": sorted(status),
+        "consultas": max(consultas),
+        "limite_consultas": orcamento.consultas,
+        "ms": round(statistics.median(tempos), 1),
+        "limite_ms": round(orcamento.ms * FATOR_TEMPO, 1),
+    }
+    relatorio[nome] = medido
+
+    assert status == {orcamento.status}, f"{nome}: status {sorted(status)}: {resposta.content[:300]!r}"
+    assert medido["consultas"] <= orcamento.consultas, (
+        f"{nome}: {medido['consultas']} consultas (limite {orcamento.consultas})\n"
+        + "\n".join(q["sql"][:200] for q in capturadas.captured_queries)
+    )
+    assert medido["ms"] <= medido["limite_ms"], f"{nome}: {medido['ms']} ms (limite {medido['limite_ms']} ms)"
@@ -0,0 +1,180 @@
+import csv
+import io
+import zipfile
+import xml.etree.ElementTree as ET
+import pytest
+from asgiref.sync import async_to_sync
+from datetime import datetime
+from decimal import Decimal
+from types import SimpleNamespace
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from unittest import mock
+from ..admin import _valor_exportacao
+from ..exportacao import gerar_csv, gerar_xlsx
+from ..models import Departamento, Despesa, Verba
+from ..service import add_despesa, add_subordinacao, exportar_despesas, exportar_verbas
+from gfinancas4.base.exceptions import BusinessError
+
+NS = {"s": "http://schemas.openxmlformats.org/spreadsheetml/2006/main"}
+
+
+def _ler_csv(partes):
+    return list(csv.reader(io.StringIO(b"".join(partes).decode("utf-8-sig"))))
+
+
+def _ler_xlsx(partes):
+    with zipfile.ZipFile(io.BytesIO(b"".join(partes))) as arquivo:
+        assert arquivo.testzip() is None
+        planilha = ET.fromstring(arquivo.read("xl/worksheets/sheet1.xml"))
+    return [
+        [c.findtext("s:v", namespaces=NS) or c.findtext("s:is/s:t", namespaces=NS) for c in linha]
+        for linha in planilha.iterfind("s:sheetData/s:row", NS)
+    ]
+
+
+class TestGeradores:
+    LINHAS = [(1, "Água & luz", Decimal("10.50"), None), (2, "Linha\nquebrada", 3, "x\x01y")]
+
+    def test_csv(self):
+        assert _ler_csv(gerar_csv(("id", "nome", "valor", "obs"), self.LINHAS)) == [
+            ["id", "nome", "valor", "obs"],
+            ["1", "Água & luz", "10.50", ""],
+            ["2", "Linha\nquebrada", "3", "x\x01y"],
+        ]
+
+    def test_xlsx(self):
+        assert _ler_xlsx(gerar_xlsx(("id", "nome", "valor", "obs"), self.LINHAS)) == [
+            ["id", "nome", "valor", "obs"],
+            ["1", "Água & luz", "10.50", ""],
+            ["2", "Linha\nquebrada", "3", "xy"],
+        ]
+
+    def test_texto_com_cara_de_formula_sai_como_texto(self):
+        linha = ["=HYPERLINK(\"http://x\")", "+1", "-2", "@SUM(A1)", "\tx", "a=b", Decimal("-5.00")]
+        esperado = ["'=HYPERLINK(\"http://x\")", "'+1", "'-2", "'@SUM(A1)", "'\tx", "a=b", "-5.00"]
+        cabecalho = [f"c{i}" for i in range(len(linha))]
+
+        assert _ler_csv(gerar_csv(cabecalho, [linha]))[1] == esperado
+        assert _ler_xlsx(gerar_xlsx(cabecalho, [linha]))[1] == esperado
+
+    def test_envia_em_partes(self):
+        linhas = ((i, "x" * 100) for i in range(5000))
+        assert len(list(gerar_csv(("id", "texto"), linhas))) > 1
+        linhas = ((i, f"texto {i}" * 20) for i in range(20000))
+        assert len(list(gerar_xlsx(("id", "texto"), linhas))) > 2
+
+
+@pytest.mark.django_db
+class TestExportacaoServices:
+    @pytest.fixture
+    def arvore(self, cenario):
+        user = cenario["user"]
+        raiz = cenario["departamento"]
+        filho = Departamento.objects.create(nome="Filho", description="Filho", responsavelId=user)
+        outro = Departamento.objects.create(nome="Outro", description="Outro", responsavelId=user)
+        add_subordinacao(raiz.id, filho.id)
+        for departamento, valor, data in ((raiz, "1.00", datetime(2024, 1, 10)), (filho, "2.00", datetime(2024, 2, 10)),
+                                          (outro, "3.00", datetime(2024, 3, 10)), (filho, "4.00", datetime(2024, 4, 10))):
+            despesa = add_despesa(user.id, departamento.id, Decimal(valor), cenario["elemento"].id,
+                                  cenario["tipo_gasto"].id, "Exportação")
+            Despesa.objects.filter(id=despesa["id"]).update(created_at=timezone.make_aware(data))
+        for departamento, ano in ((raiz, 2024), (filho, 2024), (outro, 2024), (filho, 2025)):
+            Verba.objects.create(valor=Decimal("100.00"), user=user, departamento=departamento, ano=ano,
+                                 descricao="Verba anual")
+        return cenario
+
+    def _valores(self, resultado):
+        cabecalho, linhas = resultado
+        return [linha[cabecalho.index("valor")] for linha in linhas]
+
+    def test_filtra_subarvore_e_periodo(self, arvore):
+        raiz_id = arvore["departamento"].id
+        assert self._valores(exportar_despesas(raiz_id)) == [Decimal("1.00")]
+        assert self._valores(exportar_despesas(raiz_id, incluir_subordinados=True)) == [
+            Decimal("1.00"), Decimal("2.00"), Decimal("4.00")
+        ]
+        assert self._valores(exportar_despesas(
+            raiz_id, incluir_subordinados=True, data_inicio="2024-02-10", data_termino="2024-03-31"
+        )) == [Decimal("2.00")]
+        assert self._valores(exportar_despesas(elemento_id=arvore["outro_elemento"].id)) == []
+
+    def test_verbas(self, arvore):
+        cabecalho, linhas = exportar_verbas(arvore["departamento"].id, incluir_subordinados=True, ano_termino=2024)
+        assert [linha[cabecalho.index("departamento")] for linha in linhas] == ["Departamento", "Filho"]
+
+    def test_uma_consulta_para_as_linhas(self, arvore):
+        _, linhas = exportar_despesas()
+        with CaptureQueriesContext(connection) as consultas:
+            assert len(list(linhas)) == 4
+        assert len(consultas) == 1
+
+    def test_filtros_invalidos(self, arvore):
+        with pytest.raises(BusinessError):
+            exportar_despesas(999)
+        with pytest.raises(BusinessError):
+            exportar_despesas(data_inicio="10/02/2024")
+
+
+@pytest.mark.django_db
+class TestExportacaoViews:
+    def test_exportar_despesas_csv(self, client, cenario):
+        client.force_login(cenario["user"])
+        add_despesa(cenario["user"].id, cenario["departamento"].id, Decimal("12.34"), cenario["elemento"].id,
+                    cenario["tipo_gasto"].id, "Exportação")
+
+        response = client.get(reverse("exportar_despesas"), {"departamento_id": cenario["departamento"].id})
+
+        assert response.status_code == 200
+        assert response.streaming
+        assert response["Content-Disposition"] == 'attachment; filename="despesas.csv"'
+        linhas = _ler_csv(response.streaming_content)
+        assert linhas[1][linhas[0].index("valor")] == "12.34"
+
+    def test_exportar_verbas_xlsx(self, client, cenario):
+        client.force_login(cenario["user"])
+        Verba.objects.create(valor=Decimal("100.00"), user=cenario["user"], departamento=cenario["departamento"],
+                             ano=2024, descricao="Verba anual")
+
+        response = client.get(reverse("exportar_verbas"), {"format": "xlsx"})
+
+        assert response.status_code == 200
+        assert _ler_xlsx(response.streaming_content)[1][1] == "2024"
+
+    def test_fluxo_assincrono_sob_asgi(self, async_client, cenario):
+        async_client.force_login(cenario["user"])
+        for valor in ("1.00", "2.00"):
+            add_despesa(cenario["user"].id, cenario["departamento"].id, Decimal(valor), cenario["elemento"].id,
+                        cenario["tipo_gasto"].id, "Exportação")
+
+        async def baixar():
+            response = await async_client.get(reverse("exportar_despesas"))
+            return response, [parte async for parte in response.streaming_content]
+
+        response, partes = async_to_sync(baixar)()
+
+        assert response.is_async
+        assert [linha[-1] for linha in _ler_csv(partes)[1:]] == ["Exportação", "Exportação"]
+
+    def test_formato_invalido(self, client, cenario):
+        client.force_login(cenario["user"])
+        response = client.get(reverse("exportar_despesas"), {"format": "pdf"})
+        assert response.status_code == 400
+
+    def test_erro_interno(self, client, cenario):
+        client.force_login(cenario["user"])
+        with mock.patch("gfinancas4.core.service.exportar_verbas", side_effect=RuntimeError("falha")):
+            response = client.get(reverse("exportar_verbas"))
+        assert response.status_code == 500
+        assert response.json() == {"error": "Erro interno do servidor"}
+
+
+def test_admin_exporta_chave_estrangeira_vazia_como_celula_vazia():
+    # Nenhum modelo do core tem chave estrangeira anulável: um objeto simples faz o papel
+    despesa = SimpleNamespace(departamento=None, valor=Decimal("1.00"))
+    linha = list(gerar_csv(["departamento", "valor"], [
+        [_valor_exportacao(despesa, campo, ["departamento"]) for campo in ("departamento", "valor")]
+    ]))
+    assert _ler_csv(linha)[1] == ["", "1.00"]
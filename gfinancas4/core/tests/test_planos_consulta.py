@@ -0,0 +1,75 @@
+"""
+Planos das consultas de período de despesas (só no PostgreSQL).
+
+Semeia uma base sintética, atualiza as estatísticas e confere com EXPLAIN que as listagens
+e os totais por departamento e período são resolvidos por índice, sem varrer as tabelas.
+Um filtro que envolva created_at numa função (como created_at__date) volta a aparecer
+aqui como Seq Scan.
+"""
+from datetime import timedelta
+
+import pytest
+from django.db import connection
+from django.utils import timezone
+
+from gfinancas4.accounts.models import User
+from gfinancas4.core.service import _consultas_soma_despesas, _datas_periodo, _despesas_apartir_data, _despesas_periodo
+from gfinancas4.core.sintetico import apagar_dados_core, gerar_dados_sinteticos
+
+TABELAS = ("core_despesa", "core_despesaagregadomensal")
+POR_PAGINA = 10
+
+
+def _limpar():
+    apagar_dados_core()
+    User.objects.filter(username="planos").delete()
+
+
+@pytest.fixture(scope="module")
+def dados(django_db_setup, django_db_blocker):
+    with django_db_blocker.unblock():
+        if connection.vendor != "postgresql":
+            pytest.skip("Os planos verificados são os do PostgreSQL.")
+        _limpar()
+        try:
+            gerado = gerar_dados_sinteticos(
+                departamentos=300, profundidade=3, despesas=30000, anos=2,
+                usuario=User.objects.create_user(username="planos", password="planos123"),
+                progresso=lambda mensagem: None,
+            )
+            with connection.cursor() as cursor:
+                cursor.execute(f"ANALYZE {', '.join(TABELAS)}")
+            yield {"departamento": gerado["departamentos"][-1]}
+        finally:
+            _limpar()
+
+
+def _assert_usa_indice(queryset):
+    plano = queryset.explain()
+    for tabela in TABELAS:
+        assert f"Seq Scan on {tabela}" not in plano, plano
+    assert "Index" in plano, plano
+
+
+def _periodo():
+    hoje = timezone.localdate()
+    return (hoje - timedelta(days=200)).isoformat(), (hoje - timedelta(days=20)).isoformat()
+
+
+@pytest.mark.django_db
+class TestPlanosPeriodo:
+    def test_pagina_a_partir_de_data(self, dados):
+        despesas = _despesas_apartir_data(dados["departamento"], timezone.localdate() - timedelta(days=90))
+        _assert_usa_indice(despesas.order_by("-created_at", "-id")[:POR_PAGINA])
+        _assert_usa_indice(despesas.order_by().values("id"))
+
+    def test_pagina_do_periodo(self, dados):
+        despesas = _despesas_periodo(dados["departamento"], *_periodo())
+        _assert_usa_indice(despesas[:POR_PAGINA])
+
+    @pytest.mark.parametrize("limites", ["periodo", "apartir_data", "geral"])
+    def test_consultas_do_total(self, dados, limites):
+        inicio, fim = _datas_periodo(*_periodo())
+        inicio, fim = {"periodo": (inicio, fim), "apartir_data": (inicio, None), "geral": (None, None)}[limites]
+        for consulta, campo in _consultas_soma_despesas(dados["departamento"], inicio, fim):
+            _assert_usa_indice(consulta.order_by().values(campo))
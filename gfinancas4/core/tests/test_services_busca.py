@@ -0,0 +1,123 @@
+import re
+import pytest
+from decimal import Decimal
+from unittest import mock
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from ..models import Departamento
+from .. import service
+from ..service import _buscar_postgres, _sql_busca_postgres, add_despesa, add_elemento, add_tipo_gasto, buscar
+from gfinancas4.base.exceptions import BusinessError
+
+
+@pytest.fixture
+def acervo(cenario):
+    user = cenario["user"]
+    Departamento.objects.create(nome="Secretaria de Educação", description="Gestão escolar", responsavelId=user)
+    Departamento.objects.create(nome="Almoxarifado", description="Materiais da educação infantil", responsavelId=user)
+    add_elemento("Educação continuada", "Cursos e treinamentos")
+    add_tipo_gasto("Manutenção predial", "Reparos")
+    add_despesa(user.id, cenario["departamento"].id, Decimal("10.00"), cenario["elemento"].id,
+                cenario["tipo_gasto"].id, "Livros para educação de jovens")
+    return cenario
+
+
+@pytest.mark.django_db
+class TestBusca:
+    def _tipos(self, resultado):
+        return [(r["tipo"], r["titulo"]) for r in resultado["resultados"]]
+
+    def test_busca_em_todas_as_fontes(self, acervo):
+        resultado = buscar("educa")
+        assert set(self._tipos(resultado)) == {
+            ("departamento", "Secretaria de Educação"),
+            ("departamento", "Almoxarifado"),
+            ("elemento", "Educação continuada"),
+            ("despesa", "Livros para educação de jovens"),
+        }
+        assert resultado["paginacao"]["total_resultados"] == 4
+        # Prefixo do título vem antes de ocorrências no meio do texto
+        assert resultado["resultados"][0]["relevancia"] >= resultado["resultados"][-1]["relevancia"]
+        assert resultado["resultados"][-1]["titulo"] in ("Almoxarifado", "Livros para educação de jovens")
+
+    def test_nome_normalizado_ignora_acentos(self, acervo):
+        assert self._tipos(buscar("MANUTENCAO")) == [("tipo_gasto", "Manutenção predial")]
+
+    def test_paginacao(self, acervo):
+        primeira = buscar("educa", page=1, per_page=3)
+        segunda = buscar("educa", page=2, per_page=3)
+        assert len(primeira["resultados"]) == 3
+        assert len(segunda["resultados"]) == 1
+        assert primeira["paginacao"]["tem_proxima"] and not segunda["paginacao"]["tem_proxima"]
+        ids = {(r["tipo"], r["id"]) for r in primeira["resultados"] + segunda["resultados"]}
+        assert len(ids) == 4
+
+    def test_termo_curto(self, acervo):
+        with pytest.raises(BusinessError):
+            buscar(" a ")
+
+    @pytest.mark.skipif(connection.vendor != "postgresql", reason="consulta única exige PostgreSQL")
+    def test_postgres_uma_consulta_sem_acentos(self, acervo):
+        with CaptureQueriesContext(connection) as consultas:
+            resultado = buscar("EDUCACAO")
+        assert len(consultas) == 1
+        assert ("elemento", "Educação continuada") in self._tipos(resultado)
+
+    def test_view_erro_interno(self, client, acervo):
+        client.force_login(acervo["user"])
+        with mock.patch("gfinancas4.core.service.buscar", side_effect=RuntimeError("falha")):
+            response = client.get(reverse("buscar"), {"q": "almox"})
+        assert response.status_code == 500
+
+    def test_view(self, client, acervo):
+        client.force_login(acervo["user"])
+        response = client.get(reverse("buscar"), {"q": "almox"})
+        assert response.status_code == 200
+        assert response.json()["resultados"][0]["titulo"] == "Almoxarifado"
+        assert client.get(reverse("buscar"), {"q": ""}).status_code == 400
+
+
+class TestSqlBuscaPostgres:
+    """
+    Roda em qualquer banco: confere a montagem da consulta do PostgreSQL e o tratamento das
+    linhas. A execução de verdade (unaccent, pg_trgm, full-text) só é coberta por
+    test_postgres_uma_consulta_sem_acentos, que exige um PostgreSQL.
+    """
+
+    def test_parametros_e_escapes(self):
+        sql = _sql_busca_postgres()
+        assert set(re.findall(r"(?<!%)%\((\w+)\)s", sql)) == {"q", "q_like", "limite", "deslocamento"}
+        # Com os parâmetros no formato pyformat do psycopg, os %% viram % literais
+        renderizado = sql % {"q": "'x'", "q_like": "'x'", "limite": 10, "deslocamento": 0}
+        assert "'%' || gfinancas_unaccent(lower('x')) || '%'" in renderizado
+        assert "gfinancas_unaccent(lower('x')) <% gfinancas_unaccent(lower(d.nome" in renderizado
+        for tabela in ("core_departamento d", "core_elemento e", "core_tipogasto g", "core_despesa x"):
+            assert f"FROM {tabela}" in renderizado
+        assert "to_tsvector('portuguese'::regconfig, gfinancas_unaccent(lower(x.justificativa)))" in renderizado
+
+    def test_linhas_e_termo_escapado(self):
+        cursor = mock.MagicMock()
+        cursor.fetchall.return_value = [
+            ("elemento", 3, "Educação continuada", "Cursos", Decimal("1.23456"), 2),
+            ("despesa", 7, "Livros", "Departamento", 0.5, 2),
+        ]
+        with mock.patch.object(service, "connection") as conexao:
+            conexao.cursor.return_value.__enter__.return_value = cursor
+            resultados, total = _buscar_postgres("50%_a", 0, 10)
+
+        parametros = cursor.execute.call_args.args[1]
+        assert parametros["q"] == "50%_a"
+        assert parametros["q_like"] == "50\\%\\_a"
+        assert total == 2
+        assert resultados[0] == {
+            "tipo": "elemento", "id": 3, "titulo": "Educação continuada", "detalhe": "Cursos", "relevancia": 1.2346,
+        }
+
+    def test_pagina_alem_do_fim(self):
+        # O LEFT JOIN LATERAL devolve uma linha só com o total quando a página está vazia
+        cursor = mock.MagicMock()
+        cursor.fetchall.return_value = [(None, None, None, None, None, 4)]
+        with mock.patch.object(service, "connection") as conexao:
+            conexao.cursor.return_value.__enter__.return_value = cursor
+            assert _buscar_postgres("educa", 40, 10) == ([], 4)
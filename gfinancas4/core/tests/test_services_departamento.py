@@ -1,9 +1,11 @@
 import pytest
 from decimal import Decimal
 from django.core.exceptions import ValidationError
-from ..models import Departamento
+from django.utils import timezone
+from ..models import Departamento, Verba
 from ..service import (
-    add_departamento, update_departamento, delete_departamento, list_departamentos
+    add_departamento, update_departamento, delete_departamento, list_departamentos,
+    add_despesa, add_subordinacao
 )
 from gfinancas4.base.exceptions import BusinessError
 from gfinancas4.accounts.models import User
@@ -95,4 +97,58 @@ class TestDepartamentoServices:
         departamentos = list_departamentos()
         assert len(departamentos) == 2
         assert departamentos[0]["nome"] == "Teste1"
-        assert departamentos[1]["nome"] == "Teste2" 
\ No newline at end of file
+        assert departamentos[1]["nome"] == "Teste2" 
+
+@pytest.mark.django_db
+class TestListDepartamentosPaginada:
+    @pytest.fixture
+    def departamentos(self, cenario):
+        user = cenario["user"]
+        outro = User.objects.create_user(username="outro", password="testpass")
+        raiz = cenario["departamento"]
+        filhos = [
+            Departamento.objects.create(nome=f"Filho {i}", description="Filho", tipoEntidade="Setor",
+                                        responsavelId=outro if i % 2 else user, done=bool(i % 2))
+            for i in range(4)
+        ]
+        for filho in filhos:
+            add_subordinacao(raiz.id, filho.id)
+        Verba.objects.create(valor=Decimal("500.00"), user=user, departamento=raiz,
+                             ano=timezone.localdate().year, descricao="Verba anual")
+        add_despesa(user.id, raiz.id, Decimal("12.50"), cenario["elemento"].id, cenario["tipo_gasto"].id, "Compra")
+        add_despesa(user.id, raiz.id, Decimal("7.50"), cenario["elemento"].id, cenario["tipo_gasto"].id, "Compra")
+        return raiz, filhos, outro
+
+    def test_include_e_paginacao(self, departamentos):
+        raiz, filhos, _ = departamentos
+        resultado = list_departamentos(page=1, per_page=2, include=["subordinados", "verba_atual", "total_despesas"])
+
+        assert resultado["paginacao"]["total_departamentos"] == 5
+        assert resultado["paginacao"]["total_paginas"] == 3
+        primeiro = resultado["departamentos"][0]
+        assert primeiro["id"] == raiz.id
+        assert [s["id"] for s in primeiro["subordinados"]] == [f.id for f in filhos]
+        assert primeiro["verba_atual"]["valor"] == "500.00"
+        assert primeiro["total_despesas"] == "20.00"
+        segundo = resultado["departamentos"][1]
+        assert segundo["subordinados"] == []
+        assert segundo["verba_atual"] is None
+        assert segundo["total_despesas"] == "0.00"
+
+    @pytest.mark.parametrize("per_page", [2, 5])
+    def test_numero_fixo_de_consultas(self, departamentos, per_page, django_assert_num_queries):
+        # COUNT + página + prefetch dos subordinados
+        with django_assert_num_queries(3):
+            list_departamentos(page=1, per_page=per_page, include=["subordinados", "verba_atual", "total_despesas"])
+        with django_assert_num_queries(1):
+            list_departamentos()
+
+    def test_filtros(self, departamentos):
+        raiz, filhos, outro = departamentos
+        assert [d["id"] for d in list_departamentos(responsavel_id=outro.id)] == [filhos[1].id, filhos[3].id]
+        assert [d["id"] for d in list_departamentos(tipo_entidade="Setor", done=False)] == [filhos[0].id, filhos[2].id]
+
+    def test_include_invalido(self, departamentos):
+        with pytest.raises(BusinessError) as exc:
+            list_departamentos(include=["verbas"])
+        assert "Include inválido" in str(exc.value)
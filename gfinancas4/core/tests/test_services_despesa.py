@@ -0,0 +1,515 @@
+import pytest
+from datetime import datetime, timedelta
+from decimal import Decimal
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Sum
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from unittest import mock
+from .. import service
+from ..models import Departamento, Despesa, DespesaAgregadoMensal, ElementoTipoGasto, TipoGasto, Verba
+from ..service import (
+    list_verbas, list_verbas_departamento, add_despesa, update_despesa, delete_despesa, get_total_despesas_departamento,
+    get_total_despesas_departamento_apartir_data, total_despesas_departamento_periodo,
+    list_despesas, list_despesas_departamento, list_despesas_departamento_apartir_data,
+    list_despesas_departamento_periodo, importar_despesas, ler_csv_despesas,
+    detalhar_despesas_departamento, total_despesas_departamento_elemento, add_subordinacao
+)
+from gfinancas4.base.exceptions import BusinessError
+
+
+def _nova_despesa(cenario, valor, elemento=None):
+    elemento = elemento or cenario["elemento"]
+    return add_despesa(
+        cenario["user"].id, cenario["departamento"].id, Decimal(valor),
+        elemento.id, cenario["tipo_gasto"].id, "Justificativa"
+    )
+
+
+def _linhas(tabela):
+    """Desfaz o formato colunar para comparar com a lista de objetos."""
+    dados, dicionarios = tabela["data"], tabela["dictionaries"]
+    return [
+        {coluna: dicionarios[coluna][dados[coluna][i]] if coluna in dicionarios else dados[coluna][i]
+         for coluna in tabela["columns"]}
+        for i in range(len(dados[tabela["columns"][0]]))
+    ]
+
+
+def _agregados():
+    return list(DespesaAgregadoMensal.objects.values_list("elemento_id", "total", "quantidade").order_by("elemento_id"))
+
+
+@pytest.mark.django_db
+class TestAgregadoMensal:
+    def test_add_despesa_acumula_no_mes(self, cenario):
+        _nova_despesa(cenario, "10.00")
+        _nova_despesa(cenario, "5.50")
+        assert _agregados() == [(cenario["elemento"].id, Decimal("15.50"), 2)]
+
+        agregado = DespesaAgregadoMensal.objects.get()
+        agora = timezone.localtime()
+        assert (agregado.ano, agregado.mes) == (agora.year, agora.month)
+
+    def test_update_despesa_move_valor_entre_agregados(self, cenario):
+        despesa_dict = _nova_despesa(cenario, "10.00")
+        _nova_despesa(cenario, "1.00")
+
+        despesa = Despesa.objects.get(id=despesa_dict["id"])
+        despesa.valor = Decimal("30.00")
+        despesa.elemento = cenario["outro_elemento"]
+        update_despesa(despesa)
+
+        assert _agregados() == [
+            (cenario["elemento"].id, Decimal("1.00"), 1),
+            (cenario["outro_elemento"].id, Decimal("30.00"), 1),
+        ]
+
+    def test_delete_despesa_remove_agregado_vazio(self, cenario):
+        despesa = _nova_despesa(cenario, "10.00")
+        delete_despesa(despesa["id"])
+        assert _agregados() == []
+
+    def test_reconstruir_agregados(self, cenario):
+        _nova_despesa(cenario, "10.00")
+        _nova_despesa(cenario, "20.00", cenario["outro_elemento"])
+        esperado = _agregados()
+        DespesaAgregadoMensal.objects.all().delete()
+
+        call_command("reconstruir_agregados_despesas")
+        assert _agregados() == esperado
+
+
+@pytest.mark.django_db
+class TestTotaisDespesas:
+    DATAS = [
+        datetime(2024, 1, 15, 10), datetime(2024, 1, 31, 23, 30), datetime(2024, 2, 1, 0, 0),
+        datetime(2024, 2, 20, 12), datetime(2024, 3, 10, 8), datetime(2024, 4, 30, 18),
+        datetime(2024, 5, 2, 9),
+    ]
+
+    @pytest.fixture
+    def historico(self, cenario):
+        for i, data in enumerate(self.DATAS):
+            despesa = _nova_despesa(cenario, f"{i + 1}.00")
+            Despesa.objects.filter(id=despesa["id"]).update(created_at=timezone.make_aware(data))
+        call_command("reconstruir_agregados_despesas")
+        return cenario
+
+    def _esperado(self, departamento, inicio=None, fim=None):
+        despesas = Despesa.objects.filter(departamento=departamento)
+        if inicio:
+            despesas = despesas.filter(created_at__gte=timezone.make_aware(inicio))
+        if fim:
+            despesas = despesas.filter(created_at__lte=timezone.make_aware(fim))
+        return despesas.aggregate(total=Sum("valor"))["total"] or Decimal("0.00")
+
+    def test_total_geral(self, historico):
+        departamento = historico["departamento"]
+        resultado = get_total_despesas_departamento(departamento.id)
+        assert Decimal(str(resultado["total_despesas"])) == self._esperado(departamento)
+
+    @pytest.mark.parametrize("inicio,termino", [
+        ("2024-01-01", "2024-05-31"),
+        ("2024-01-20", "2024-04-15"),
+        ("2024-02-01", "2024-03-01"),
+        ("2024-02-05", "2024-02-25"),
+        ("2023-06-01", "2024-01-31"),
+    ])
+    def test_total_periodo(self, historico, inicio, termino):
+        departamento = historico["departamento"]
+        esperado = self._esperado(
+            departamento, datetime.strptime(inicio, "%Y-%m-%d"), datetime.strptime(termino, "%Y-%m-%d")
+        )
+        assert total_despesas_departamento_periodo(departamento.id, inicio, termino) == esperado
+
+    @pytest.mark.parametrize("inicio", ["2024-01-31", "2024-02-01", "2024-04-30", "2025-01-01"])
+    def test_total_apartir_data(self, historico, inicio):
+        departamento = historico["departamento"]
+        data = datetime.strptime(inicio, "%Y-%m-%d")
+        resultado = get_total_despesas_departamento_apartir_data(departamento.id, data.date())
+        assert resultado["total"] == self._esperado(departamento, data)
+
+
+@pytest.mark.django_db
+class TestPaginacaoCursor:
+    @pytest.fixture
+    def despesas(self, cenario):
+        # Duas despesas com o mesmo created_at para exercitar o desempate por id
+        datas = [datetime(2024, 1, d, 12) for d in (1, 2, 3, 3, 4, 5, 6)]
+        for i, data in enumerate(datas):
+            despesa = _nova_despesa(cenario, f"{i + 1}.00")
+            Despesa.objects.filter(id=despesa["id"]).update(created_at=timezone.make_aware(data))
+        return list(Despesa.objects.order_by("-created_at", "-id").values_list("id", flat=True))
+
+    def _percorrer(self, listar, per_page=3):
+        ids, cursor = [], ""
+        while True:
+            resultado = listar(cursor)
+            ids += [d["id"] for d in resultado["despesas"]]
+            cursor = resultado["paginacao"]["next_cursor"]
+            if not resultado["paginacao"]["tem_proxima"]:
+                assert cursor is None
+                return ids
+
+    def test_percorre_todas_as_despesas_sem_repetir(self, cenario, despesas):
+        assert self._percorrer(lambda cursor: list_despesas(per_page=3, cursor=cursor)) == despesas
+
+    def test_por_departamento(self, cenario, despesas):
+        departamento_id = cenario["departamento"].id
+        ids = self._percorrer(lambda cursor: list_despesas_departamento(departamento_id, per_page=2, cursor=cursor))
+        assert ids == despesas
+
+    def test_nao_executa_count(self, cenario, despesas):
+        with CaptureQueriesContext(connection) as consultas:
+            list_despesas(per_page=3, cursor="")
+        assert len(consultas) == 1
+        assert "COUNT(" not in consultas[0]["sql"].upper()
+
+    def test_cursor_invalido(self, cenario):
+        with pytest.raises(BusinessError) as exc:
+            list_despesas(cursor="nao-e-um-cursor")
+        assert "Cursor inválido" in str(exc.value)
+
+    @pytest.mark.parametrize("per_page", [0, -1, 501])
+    def test_cursor_per_page_invalido(self, cenario, per_page):
+        with pytest.raises(BusinessError) as exc:
+            list_despesas(per_page=per_page, cursor="")
+        assert "per_page deve estar entre 1 e 500" in str(exc.value)
+
+
+@pytest.mark.django_db
+class TestConsultasListagemDespesas:
+    @pytest.fixture
+    def despesas(self, cenario):
+        for i in range(12):
+            _nova_despesa(cenario, f"{i + 1}.00", cenario["elemento"] if i % 2 else cenario["outro_elemento"])
+        return cenario
+
+    @pytest.mark.parametrize("per_page", [1, 5, 12])
+    def test_numero_fixo_de_consultas(self, despesas, per_page, django_assert_num_queries):
+        departamento_id = despesas["departamento"].id
+        hoje = timezone.localdate()
+
+        # COUNT + página
+        with django_assert_num_queries(2):
+            list_despesas(per_page=per_page)
+        # busca do departamento + COUNT + página
+        with django_assert_num_queries(3):
+            list_despesas_departamento(departamento_id, per_page=per_page)
+        with django_assert_num_queries(3):
+            list_despesas_departamento_apartir_data(departamento_id, hoje, per_page=per_page)
+        with django_assert_num_queries(2):
+            resultado = list_despesas_departamento_periodo(
+                departamento_id, "2000-01-01", "2100-01-01", per_page=per_page
+            )
+        assert len(resultado["results"]) == per_page
+
+    def test_serializacao_completa(self, despesas):
+        despesa = list_despesas(per_page=1)["despesas"][0]
+        esperado = Despesa.objects.get(id=despesa["id"]).to_dict_json()
+        assert despesa == esperado
+
+
+@pytest.mark.django_db
+class TestCamposEsparsos:
+    @pytest.fixture
+    def despesas(self, cenario):
+        for i in range(3):
+            _nova_despesa(cenario, f"{i + 1}.00")
+        return cenario
+
+    def test_mesmos_valores_da_serializacao_completa(self, despesas):
+        campos = ("id", "valor", "created_at", "departamento.nome", "tipoGasto")
+        despesa = list_despesas(per_page=1, campos=campos)["despesas"][0]
+        completa = Despesa.objects.get(id=despesa["id"]).to_dict_json()
+        assert despesa == {
+            "id": completa["id"],
+            "valor": completa["valor"],
+            "created_at": completa["created_at"],
+            "departamento": {"nome": completa["departamento"]["nome"]},
+            "tipoGasto": completa["tipoGasto"],
+        }
+
+    def test_sem_joins_desnecessarios(self, despesas):
+        with CaptureQueriesContext(connection) as consultas:
+            list_despesas(per_page=3, cursor="", campos=("id", "valor"))
+        sql = consultas[0]["sql"].upper()
+        assert "JOIN" not in sql
+        assert "JUSTIFICATIVA" not in sql
+
+        with CaptureQueriesContext(connection) as consultas:
+            list_despesas(per_page=3, cursor="", campos=("valor", "departamento.nome"))
+        assert consultas[0]["sql"].upper().count("JOIN") == 1
+
+    def test_cursor_e_demais_listagens(self, despesas):
+        departamento_id = despesas["departamento"].id
+        resultado = list_despesas_departamento(departamento_id, per_page=2, cursor="", campos=("valor",))
+        assert resultado["despesas"] == [{"valor": Decimal("3.00")}, {"valor": Decimal("2.00")}]
+        resultado = list_despesas_departamento(departamento_id, per_page=2, cursor=resultado["paginacao"]["next_cursor"],
+                                               campos=("valor",))
+        assert resultado["despesas"] == [{"valor": Decimal("1.00")}]
+
+        hoje = timezone.localdate()
+        apartir = list_despesas_departamento_apartir_data(departamento_id, hoje, campos=("id",))
+        periodo = list_despesas_departamento_periodo(departamento_id, "2000-01-01", "2100-01-01", campos=("id",))
+        assert apartir["despesas"] == periodo["results"]
+        assert all(list(d) == ["id"] for d in periodo["results"])
+
+    def test_campo_invalido(self, despesas):
+        with pytest.raises(BusinessError) as exc:
+            list_despesas(campos=("valor", "senha"))
+        assert "senha" in str(exc.value)
+
+    def test_verbas(self, cenario):
+        verba = Verba.objects.create(valor=Decimal("1000.00"), user=cenario["user"], departamento=cenario["departamento"],
+                                     ano=2024, descricao="Verba anual")
+        campos = ("valor", "usuario.username", "ano")
+        esperado = {"valor": "1000.00", "usuario": {"username": "testuser"}, "ano": 2024}
+
+        with CaptureQueriesContext(connection) as consultas:
+            assert list_verbas(campos=campos)["verbas"] == [esperado]
+        assert all(consulta["sql"].upper().count("JOIN") <= 1 for consulta in consultas)
+        assert list_verbas_departamento(cenario["departamento"].id, campos=campos) == [esperado]
+        assert list_verbas_departamento(cenario["departamento"].id, campos=("id",)) == [{"id": verba.id}]
+
+
+@pytest.mark.django_db
+class TestFormatoColunar:
+    @pytest.fixture
+    def despesas(self, cenario):
+        for i in range(4):
+            _nova_despesa(cenario, f"{i + 1}.00", cenario["elemento"] if i % 2 else cenario["outro_elemento"])
+        return cenario
+
+    def test_mesmo_conteudo_das_listas(self, despesas):
+        departamento_id = despesas["departamento"].id
+        chamadas = [
+            (lambda **kw: list_despesas(per_page=3, **kw), "despesas"),
+            (lambda **kw: list_despesas_departamento(departamento_id, per_page=3, cursor="", **kw), "despesas"),
+            (lambda **kw: list_despesas_departamento_periodo(departamento_id, "2000-01-01", "2100-01-01", **kw),
+             "results"),
+        ]
+        for listar, chave in chamadas:
+            lista, tabela = listar(), listar(colunar=True)
+            assert _linhas(tabela[chave]) == lista[chave]
+            assert tabela["paginacao" if chave == "despesas" else "total"] == lista[
+                "paginacao" if chave == "despesas" else "total"
+            ]
+
+    def test_objetos_repetidos_uma_vez(self, despesas):
+        tabela = list_despesas(per_page=4, colunar=True)["despesas"]
+        assert len(tabela["dictionaries"]["departamento"]) == 1
+        assert len(tabela["dictionaries"]["elemento"]) == 2
+        assert tabela["data"]["departamento"] == [0, 0, 0, 0]
+
+    def test_com_fields(self, despesas):
+        tabela = list_despesas(per_page=2, campos=("valor", "elemento.elemento"), colunar=True)["despesas"]
+        assert tabela["columns"] == ["valor", "elemento"]
+        assert tabela["data"]["valor"] == [Decimal("4.00"), Decimal("3.00")]
+        assert tabela["dictionaries"]["elemento"] == [{"elemento": "Material"}, {"elemento": "Serviços"}]
+
+    def test_verbas(self, cenario):
+        Verba.objects.create(valor=Decimal("1000.00"), user=cenario["user"], departamento=cenario["departamento"],
+                             ano=2024, descricao="Verba anual")
+        assert _linhas(list_verbas(colunar=True)["verbas"]) == list_verbas()["verbas"]
+        departamento_id = cenario["departamento"].id
+        assert _linhas(list_verbas_departamento(departamento_id, colunar=True)) == list_verbas_departamento(departamento_id)
+
+
+@pytest.mark.django_db
+class TestImportacaoDespesas:
+    def _linha(self, cenario, valor="10.00", **extra):
+        linha = {
+            "departamento_id": cenario["departamento"].id,
+            "elemento_id": cenario["elemento"].id,
+            "tipo_gasto_id": cenario["tipo_gasto"].id,
+            "valor": valor,
+            "justificativa": "Importada",
+        }
+        linha.update(extra)
+        return linha
+
+    def test_importa_lote_e_atualiza_agregados(self, cenario):
+        linhas = [self._linha(cenario, "1.234,50"), self._linha(cenario, 20), self._linha(cenario, "0.5",
+                  elemento_id=cenario["outro_elemento"].id)]
+
+        resultado = importar_despesas(cenario["user"].id, linhas)
+
+        assert resultado == {"importadas": 3, "erros": []}
+        assert Despesa.objects.count() == 3
+        assert _agregados() == [
+            (cenario["elemento"].id, Decimal("1254.50"), 2),
+            (cenario["outro_elemento"].id, Decimal("0.50"), 1),
+        ]
+
+    def test_numero_de_consultas_nao_depende_do_tamanho(self, cenario):
+        # Primeira importação cria o agregado do mês; as seguintes apenas o atualizam
+        importar_despesas(cenario["user"].id, [self._linha(cenario)])
+        with CaptureQueriesContext(connection) as consultas:
+            importar_despesas(cenario["user"].id, [self._linha(cenario)] * 5)
+        pequeno = len(consultas)
+
+        # 100 linhas cabem em um único INSERT mesmo no limite de parâmetros do SQLite
+        with CaptureQueriesContext(connection) as consultas:
+            importar_despesas(cenario["user"].id, [self._linha(cenario)] * 100)
+        assert len(consultas) == pequeno
+
+    def test_erros_por_linha_e_nada_gravado(self, cenario):
+        sem_vinculo = TipoGasto.objects.create(tipoGasto="Diárias", descricao="Diárias")
+        linhas = [
+            self._linha(cenario),
+            self._linha(cenario, "-5"),
+            self._linha(cenario, departamento_id=999),
+            self._linha(cenario, tipo_gasto_id=sem_vinculo.id),
+            self._linha(cenario, "abc", justificativa=""),
+        ]
+
+        resultado = importar_despesas(cenario["user"].id, linhas)
+
+        assert resultado["importadas"] == 0
+        assert resultado["erros"] == [
+            {"linha": 2, "erros": ["O valor da despesa deve ser maior que zero."]},
+            {"linha": 3, "erros": ["Departamento não encontrado."]},
+            {"linha": 4, "erros": ["O tipo de gasto selecionado não está vinculado ao elemento informado."]},
+            {"linha": 5, "erros": ["Valor inválido.", "Justificativa é obrigatória."]},
+        ]
+        assert Despesa.objects.count() == 0
+        assert _agregados() == []
+
+    def test_ids_nao_inteiros(self, cenario):
+        linhas = [
+            self._linha(cenario, departamento_id=cenario["departamento"].id + 0.7),
+            self._linha(cenario, elemento_id=Decimal(cenario["elemento"].id) + Decimal("0.5")),
+            self._linha(cenario, tipo_gasto_id=float("inf")),
+            self._linha(cenario, departamento_id=float(cenario["departamento"].id)),
+        ]
+
+        resultado = importar_despesas(cenario["user"].id, linhas)
+
+        assert resultado["erros"] == [
+            {"linha": 1, "erros": ["Departamento inválido."]},
+            {"linha": 2, "erros": ["Elemento inválido."]},
+            {"linha": 3, "erros": ["Tipo de gasto inválido."]},
+        ]
+
+    def test_agregados_de_varios_grupos_em_um_update(self, cenario):
+        outro = cenario["outro_elemento"].id
+        importar_despesas(cenario["user"].id, [
+            self._linha(cenario, "1.00"), self._linha(cenario, "1.00", elemento_id=outro),
+        ])
+
+        linhas = [self._linha(cenario, "2.00"), self._linha(cenario, "3.00", elemento_id=outro),
+                  self._linha(cenario, "4.00", elemento_id=outro)]
+        with CaptureQueriesContext(connection) as consultas:
+            importar_despesas(cenario["user"].id, linhas)
+
+        # Os dois grupos já existem: uma leitura e um único UPDATE, nenhum INSERT de agregado
+        sql = [c["sql"] for c in consultas if "despesaagregadomensal" in c["sql"].lower()]
+        assert [comando.split()[0] for comando in sql] == ["SELECT", "UPDATE"]
+        assert _agregados() == [
+            (cenario["elemento"].id, Decimal("3.00"), 2),
+            (outro, Decimal("8.00"), 3),
+        ]
+
+    def test_grupo_criado_por_importacao_concorrente(self, cenario):
+        hoje = timezone.localtime()
+        real = service._agregados_travados
+
+        def leitura_antes_da_outra_importacao(chaves):
+            # Outra importação grava o mesmo grupo logo depois da primeira leitura
+            encontrados = real(chaves)
+            if not DespesaAgregadoMensal.objects.exists():
+                DespesaAgregadoMensal.objects.create(
+                    departamento=cenario["departamento"], elemento=cenario["elemento"],
+                    tipoGasto=cenario["tipo_gasto"], ano=hoje.year, mes=hoje.month,
+                    total=Decimal("5.00"), quantidade=1,
+                )
+            return encontrados
+
+        with mock.patch.object(service, "_agregados_travados", side_effect=leitura_antes_da_outra_importacao):
+            resultado = importar_despesas(cenario["user"].id, [self._linha(cenario, "2.00")] * 2)
+
+        assert resultado["importadas"] == 2
+        assert _agregados() == [(cenario["elemento"].id, Decimal("9.00"), 3)]
+
+    def test_lote_vazio(self, cenario):
+        with pytest.raises(BusinessError) as exc:
+            importar_despesas(cenario["user"].id, [])
+        assert "Nenhuma despesa" in str(exc.value)
+
+    def test_ler_csv_com_ponto_e_virgula(self):
+        conteudo = "departamento_id;elemento_id;tipo_gasto_id;valor;justificativa\n1;2;3;1.234,56;Compra\n"
+        assert ler_csv_despesas(conteudo) == [{
+            "departamento_id": "1", "elemento_id": "2", "tipo_gasto_id": "3",
+            "valor": "1.234,56", "justificativa": "Compra",
+        }]
+
+    def test_ler_csv_sem_coluna(self):
+        with pytest.raises(BusinessError) as exc:
+            ler_csv_despesas("departamento_id,valor\n1,10\n")
+        assert "elemento_id" in str(exc.value)
+
+
+@pytest.mark.django_db
+class TestDetalhamento:
+    @pytest.fixture
+    def dados(self, cenario):
+        outro_tipo = TipoGasto.objects.create(tipoGasto="Limpeza", descricao="Limpeza")
+        ElementoTipoGasto.objects.create(elemento=cenario["elemento"], tipo_gasto=outro_tipo)
+        filho = Departamento.objects.create(nome="Filho", description="D", responsavelId=cenario["user"])
+        add_subordinacao(cenario["departamento"].id, filho.id)
+
+        _nova_despesa(cenario, "10.00")
+        _nova_despesa(cenario, "5.00")
+        _nova_despesa(cenario, "20.00", cenario["outro_elemento"])
+        add_despesa(cenario["user"].id, cenario["departamento"].id, Decimal("3.00"),
+                    cenario["elemento"].id, outro_tipo.id, "Justificativa")
+        add_despesa(cenario["user"].id, filho.id, Decimal("100.00"),
+                    cenario["elemento"].id, cenario["tipo_gasto"].id, "Justificativa")
+        return {**cenario, "outro_tipo": outro_tipo, "filho": filho}
+
+    def test_totais_por_elemento_e_tipo_em_uma_consulta(self, dados):
+        with CaptureQueriesContext(connection) as consultas:
+            resultado = detalhar_despesas_departamento(dados["departamento"].id)
+        assert len(consultas) == 2  # existência do departamento e o GROUP BY
+
+        assert (resultado["total"], resultado["quantidade"]) == ("38.00", 4)
+        servicos, material = resultado["por_elemento"]
+        assert (servicos["elemento"], servicos["total"], servicos["quantidade"]) == ("Serviços", "20.00", 1)
+        assert (material["elemento"], material["total"], material["quantidade"]) == ("Material", "18.00", 3)
+        assert [(t["tipo_gasto"], t["total"]) for t in material["tipos_gasto"]] == [
+            ("Papelaria", "15.00"), ("Limpeza", "3.00"),
+        ]
+        assert [(t["tipo_gasto"], t["total"], t["quantidade"]) for t in resultado["por_tipo_gasto"]] == [
+            ("Papelaria", "35.00", 3), ("Limpeza", "3.00", 1),
+        ]
+        assert "por_mes" not in resultado
+
+    def test_subordinados_e_por_mes(self, dados):
+        resultado = detalhar_despesas_departamento(dados["departamento"].id, incluir_subordinados=True, por_mes=True)
+        mes = timezone.localtime().strftime("%Y-%m")
+
+        assert resultado["total"] == "138.00"
+        assert resultado["por_mes"] == [{"mes": mes, "total": "138.00", "quantidade": 5}]
+        assert resultado["por_elemento"][0]["meses"] == [{"mes": mes, "total": "118.00", "quantidade": 4}]
+
+    def test_periodo_inclui_o_dia_final(self, dados):
+        hoje = timezone.localdate()
+        ontem = (hoje - timedelta(days=1)).isoformat()
+
+        assert detalhar_despesas_departamento(dados["departamento"].id, hoje.isoformat(), hoje.isoformat())["total"] == "38.00"
+        assert detalhar_despesas_departamento(dados["departamento"].id, data_termino=ontem)["por_elemento"] == []
+
+    def test_departamento_ou_data_invalidos(self, dados):
+        with pytest.raises(BusinessError):
+            detalhar_despesas_departamento(999999)
+        with pytest.raises(BusinessError):
+            detalhar_despesas_departamento(dados["departamento"].id, data_inicio="18/10/2026")
+
+    def test_total_por_elemento(self, dados):
+        assert total_despesas_departamento_elemento(dados["departamento"].id, dados["elemento"].id) == Decimal("18.00")
+        assert total_despesas_departamento_elemento(dados["filho"].id, dados["outro_elemento"].id) == Decimal("0.00")
+        with pytest.raises(BusinessError):
+            total_despesas_departamento_elemento(dados["departamento"].id, 999999)
@@ -1,11 +1,15 @@
+import importlib
 import pytest
+from django.apps import apps
 from decimal import Decimal
 from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
 from ..models import Elemento, TipoGasto, ElementoTipoGasto
 from ..service import (
     add_elemento, update_elemento, delete_elemento, list_elementos,
     add_tipo_gasto, update_tipo_gasto, delete_tipo_gasto, list_tipo_gastos,
-    add_elemento_tipo_gasto, delete_elemento_tipo_gasto, list_tipo_gastos_por_elemento
+    add_elemento_tipo_gasto, delete_elemento_tipo_gasto, list_tipo_gastos_por_elemento,
+    catalogo_elementos, invalidar_cache_catalogo
 )
 from gfinancas4.base.exceptions import BusinessError
 
@@ -208,4 +212,119 @@ class TestElementoTipoGastoServices:
         # Teste de listagem para elemento inexistente
         with pytest.raises(BusinessError) as exc:
             list_tipo_gastos_por_elemento(999)
-        assert "Elemento com ID 999 não encontrado" in str(exc.value) 
\ No newline at end of file
+        assert "Elemento com ID 999 não encontrado" in str(exc.value) 
+
+@pytest.mark.django_db
+class TestCacheCatalogo:
+    def test_leituras_seguintes_nao_consultam_o_banco(self, django_assert_num_queries):
+        elemento = add_elemento("Material", "Material de consumo")
+        tipo_gasto = add_tipo_gasto("Papelaria", "Papelaria")
+        add_elemento_tipo_gasto(elemento["id"], tipo_gasto["id"])
+        list_elementos(), list_tipo_gastos(), list_tipo_gastos_por_elemento(elemento["id"])
+
+        with django_assert_num_queries(0):
+            assert [e["id"] for e in list_elementos()] == [elemento["id"]]
+            assert [t["id"] for t in list_tipo_gastos()] == [tipo_gasto["id"]]
+            assert len(list_tipo_gastos_por_elemento(elemento["id"])) == 1
+
+    def test_servicos_de_escrita_invalidam(self):
+        elemento = add_elemento("Material", "Material de consumo")
+        tipo_gasto = add_tipo_gasto("Papelaria", "Papelaria")
+        assert list_tipo_gastos_por_elemento(elemento["id"]) == []
+        _, etag = catalogo_elementos()
+
+        relacao = add_elemento_tipo_gasto(elemento["id"], tipo_gasto["id"])
+        assert len(list_tipo_gastos_por_elemento(elemento["id"])) == 1
+
+        update_elemento(elemento["id"], "Material novo", "Material de consumo")
+        assert list_elementos()[0]["elemento"] == "Material novo"
+        assert catalogo_elementos()[1] != etag
+
+        delete_elemento_tipo_gasto(relacao["id"])
+        update_tipo_gasto(tipo_gasto["id"], "Papel", "Papel")
+        assert list_tipo_gastos_por_elemento(elemento["id"]) == []
+        assert list_tipo_gastos()[0]["tipoGasto"] == "Papel"
+
+        delete_tipo_gasto(tipo_gasto["id"])
+        delete_elemento(elemento["id"])
+        assert list_tipo_gastos() == []
+        assert list_elementos() == []
+
+    def test_etag_estavel_sem_alteracoes(self):
+        add_elemento("Material", "Material de consumo")
+        _, etag = catalogo_elementos()
+        invalidar_cache_catalogo()
+        assert catalogo_elementos()[1] == etag
+
+
+@pytest.mark.django_db
+class TestNomeNormalizado:
+    def test_nome_normalizado_gravado_no_save(self):
+        elemento = add_elemento("  Material   de Consumo ", "Descrição")
+        tipo_gasto = add_tipo_gasto("Manutenção", "Descrição")
+        assert Elemento.objects.get(id=elemento["id"]).nome_normalizado == "material de consumo"
+        assert TipoGasto.objects.get(id=tipo_gasto["id"]).nome_normalizado == "manutencao"
+
+    def test_duplicata_sem_acento_e_maiusculas(self):
+        add_elemento("Serviços", "Descrição")
+        with pytest.raises(BusinessError) as exc:
+            add_elemento("SERVICOS", "Outra descrição")
+        assert "Já existe um elemento com o nome 'Serviços'" in str(exc.value)
+
+        add_tipo_gasto("Manutenção", "Descrição")
+        with pytest.raises(BusinessError):
+            add_tipo_gasto("manutencao", "Outra descrição")
+
+    def test_update_para_nome_equivalente(self):
+        add_tipo_gasto("Diárias", "Descrição")
+        outro = add_tipo_gasto("Passagens", "Descrição")
+        with pytest.raises(BusinessError):
+            update_tipo_gasto(outro["id"], "DIARIAS", "Descrição")
+
+    def test_verificacao_de_duplicata_em_uma_consulta(self, django_assert_num_queries):
+        for i in range(20):
+            add_elemento(f"Elemento {i}", "Descrição")
+        # verificação + INSERT
+        with django_assert_num_queries(2):
+            add_elemento("Elemento novo", "Descrição")
+
+    def test_clean_bloqueia_duplicata(self):
+        add_elemento("Obras", "Descrição")
+        with pytest.raises(ValidationError):
+            Elemento(elemento="obras", descricao="Descrição").full_clean()
+
+    def test_migracao_mantem_so_a_primeira_duplicata(self):
+        migracao = importlib.import_module("gfinancas4.core.migrations.0019_nome_normalizado_catalogo")
+        primeiro = Elemento.objects.create(elemento="Água", descricao="Descrição")
+        Elemento.objects.filter(id=primeiro.id).update(nome_normalizado=None)
+        duplicado = Elemento.objects.create(elemento="AGUA", descricao="Descrição")
+        Elemento.objects.all().update(nome_normalizado=None)
+
+        migracao.popular_nome_normalizado(apps, None)
+
+        assert Elemento.objects.get(id=primeiro.id).nome_normalizado == "agua"
+        assert Elemento.objects.get(id=duplicado.id).nome_normalizado is None
+
+    def test_duplicata_antiga_pode_ser_salva(self):
+        original = TipoGasto.objects.create(tipoGasto="Água", descricao="Descrição")
+        # Duplicata de antes da migração 0019: mesmo nome normalizado, gravada com NULL
+        duplicado = TipoGasto.objects.create(tipoGasto="Provisório", descricao="Descrição")
+        TipoGasto.objects.filter(id=duplicado.id).update(tipoGasto="Agua ", nome_normalizado=None)
+        duplicado = TipoGasto.objects.get(id=duplicado.id)
+
+        # Sem IntegrityError: continua NULL enquanto "agua" for do original, e o clean() avisa
+        duplicado.descricao = "Outra descrição"
+        duplicado.save()
+        assert TipoGasto.objects.get(id=duplicado.id).nome_normalizado is None
+        with pytest.raises(ValidationError):
+            TipoGasto.objects.get(id=duplicado.id).full_clean()
+
+        # Renomeada para um nome livre, a duplicata volta a ter o nome normalizado
+        duplicado.tipoGasto = "Água mineral"
+        duplicado.save()
+        assert TipoGasto.objects.get(id=duplicado.id).nome_normalizado == "agua mineral"
+        assert TipoGasto.objects.get(id=original.id).nome_normalizado == "agua"
+
+        # Registros novos continuam barrados pelo índice único
+        with pytest.raises(IntegrityError), transaction.atomic():
+            TipoGasto.objects.create(tipoGasto="ÁGUA", descricao="Descrição")
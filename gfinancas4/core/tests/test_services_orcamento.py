@@ -0,0 +1,83 @@
+import pytest
+from datetime import datetime
+from decimal import Decimal
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from ..models import Departamento, Despesa, Elemento, TipoGasto, ElementoTipoGasto, Verba
+from ..service import (
+    add_despesa, add_subordinacao, get_orcamento_consolidado_departamento, reconstruir_agregados_despesas
+)
+from gfinancas4.base.exceptions import BusinessError
+from gfinancas4.accounts.models import User
+
+
+@pytest.mark.django_db
+class TestOrcamentoConsolidado:
+    def setup_method(self, method):
+        self.user = User.objects.create_user(username="testuser", password="testpass")
+        self.elemento = Elemento.objects.create(elemento="Material", descricao="Material de consumo")
+        self.tipo_gasto = TipoGasto.objects.create(tipoGasto="Papelaria", descricao="Papelaria")
+        ElementoTipoGasto.objects.create(elemento=self.elemento, tipo_gasto=self.tipo_gasto)
+        self.ano = timezone.localtime().year
+
+    def _departamento(self, nome):
+        return Departamento.objects.create(nome=nome, description=nome, responsavelId=self.user)
+
+    def _despesa(self, departamento, valor):
+        return add_despesa(self.user.id, departamento.id, Decimal(valor), self.elemento.id, self.tipo_gasto.id, "teste")
+
+    def _arvore(self):
+        # secretaria -> (diretoria_a -> setor), diretoria_b
+        secretaria = self._departamento("Secretaria")
+        diretoria_a = self._departamento("Diretoria A")
+        diretoria_b = self._departamento("Diretoria B")
+        setor = self._departamento("Setor")
+        add_subordinacao(secretaria.id, diretoria_a.id)
+        add_subordinacao(secretaria.id, diretoria_b.id)
+        add_subordinacao(diretoria_a.id, setor.id)
+        return secretaria, diretoria_a, diretoria_b, setor
+
+    def test_consolida_subarvore(self):
+        secretaria, diretoria_a, diretoria_b, setor = self._arvore()
+        Verba.objects.create(valor=Decimal("1000.00"), user=self.user, departamento=secretaria, ano=self.ano, descricao="Verba anual")
+        Verba.objects.create(valor=Decimal("500.00"), user=self.user, departamento=diretoria_a, ano=self.ano, descricao="Verba anual")
+        Verba.objects.create(valor=Decimal("200.00"), user=self.user, departamento=setor, ano=self.ano, descricao="Verba anual")
+        self._despesa(setor, "50.00")
+        self._despesa(setor, "25.00")
+        self._despesa(diretoria_b, "10.00")
+        antiga = self._despesa(diretoria_a, "999.00")
+        Despesa.objects.filter(pk=antiga["id"]).update(
+            created_at=timezone.make_aware(datetime(self.ano - 1, 6, 1))
+        )
+        reconstruir_agregados_despesas()
+
+        resultado = get_orcamento_consolidado_departamento(secretaria.id, self.ano)
+
+        assert resultado["total_verba"] == "1700.00"
+        assert resultado["total_despesas"] == "85.00"
+        assert resultado["saldo"] == "1615.00"
+        por_id = {d["id"]: d for d in resultado["departamentos"]}
+        assert set(por_id) == {secretaria.id, diretoria_a.id, diretoria_b.id, setor.id}
+        assert por_id[diretoria_a.id]["verba_subarvore"] == "700.00"
+        assert por_id[diretoria_a.id]["despesas"] == "0.00"
+        assert por_id[diretoria_a.id]["despesas_subarvore"] == "75.00"
+        assert por_id[setor.id]["superior_id"] == diretoria_a.id
+        assert por_id[setor.id]["profundidade"] == 2
+
+    def test_numero_de_consultas_nao_depende_da_arvore(self):
+        secretaria, _, _, setor = self._arvore()
+        with CaptureQueriesContext(connection) as consultas:
+            get_orcamento_consolidado_departamento(secretaria.id, self.ano)
+        pequena = len(consultas)
+
+        for i in range(5):
+            add_subordinacao(setor.id, self._departamento(f"Núcleo {i}").id)
+        with CaptureQueriesContext(connection) as consultas:
+            get_orcamento_consolidado_departamento(secretaria.id, self.ano)
+        assert len(consultas) == pequena
+
+    def test_departamento_not_found(self):
+        with pytest.raises(BusinessError) as exc:
+            get_orcamento_consolidado_departamento(999, self.ano)
+        assert "Departamento não encontrado" in str(exc.value)
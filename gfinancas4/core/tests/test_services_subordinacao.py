@@ -0,0 +1,124 @@
+import pytest
+from django.db import connection
+from django.db.models import Q
+from django.test.utils import CaptureQueriesContext
+from ..models import Departamento, HierarquiaDepartamento, Subordinacao, reconstruir_hierarquia_departamentos
+from ..service import (
+    add_subordinacao, update_subordinacao, delete_subordinacao,
+    list_descendentes_departamento, list_ancestrais_departamento
+)
+from gfinancas4.base.exceptions import BusinessError
+from gfinancas4.accounts.models import User
+
+
+def _pares_hierarquia():
+    return set(HierarquiaDepartamento.objects.values_list("ancestral_id", "descendente_id", "profundidade"))
+
+
+@pytest.mark.django_db
+class TestSubordinacaoServices:
+    def setup_method(self, method):
+        self.user = User.objects.create_user(username="testuser", password="testpass")
+        self.deps = [
+            Departamento.objects.create(nome=f"Dep {i}", description=f"Descrição {i}", responsavelId=self.user)
+            for i in range(5)
+        ]
+
+    def _cadeia(self):
+        # Dep 0 -> Dep 1 -> Dep 2 -> Dep 3
+        a, b, c, d, _ = self.deps
+        add_subordinacao(a.id, b.id)
+        add_subordinacao(b.id, c.id)
+        add_subordinacao(c.id, d.id)
+
+    def test_add_subordinacao_mantem_hierarquia(self):
+        a, b, c, d, _ = self.deps
+        self._cadeia()
+        assert _pares_hierarquia() == {
+            (a.id, b.id, 1), (a.id, c.id, 2), (a.id, d.id, 3),
+            (b.id, c.id, 1), (b.id, d.id, 2),
+            (c.id, d.id, 1),
+        }
+
+    def test_add_subordinacao_ciclo(self):
+        a, _, _, d, _ = self.deps
+        self._cadeia()
+        with pytest.raises(BusinessError) as exc:
+            add_subordinacao(d.id, a.id)
+        assert "criaria um ciclo" in str(exc.value)
+
+    def test_verificacao_de_ciclo_nao_depende_da_profundidade(self):
+        a, _, _, d, e = self.deps
+        self._cadeia()
+        with CaptureQueriesContext(connection) as consultas:
+            with pytest.raises(BusinessError):
+                add_subordinacao(d.id, a.id)
+        raso = len(consultas)
+
+        add_subordinacao(d.id, e.id)
+        with CaptureQueriesContext(connection) as consultas:
+            with pytest.raises(BusinessError):
+                add_subordinacao(e.id, a.id)
+        assert len(consultas) == raso
+
+    def test_update_subordinacao_move_subarvore(self):
+        a, b, c, d, e = self.deps
+        self._cadeia()
+        sub = Subordinacao.objects.get(superior=b, subordinado=c)
+        update_subordinacao(sub.id, e.id, c.id)
+
+        assert _pares_hierarquia() == {
+            (a.id, b.id, 1),
+            (e.id, c.id, 1), (e.id, d.id, 2),
+            (c.id, d.id, 1),
+        }
+
+    def test_update_subordinacao_ciclo(self):
+        a, b, c, d, _ = self.deps
+        self._cadeia()
+        sub = Subordinacao.objects.get(superior=a, subordinado=b)
+        with pytest.raises(BusinessError) as exc:
+            update_subordinacao(sub.id, d.id, b.id)
+        assert "criaria um ciclo" in str(exc.value)
+
+    def test_delete_subordinacao_remove_caminhos(self):
+        a, b, c, d, _ = self.deps
+        self._cadeia()
+        sub = Subordinacao.objects.get(superior=b, subordinado=c)
+        delete_subordinacao(sub.id)
+
+        assert _pares_hierarquia() == {(a.id, b.id, 1), (c.id, d.id, 1)}
+
+    def test_excluir_departamento_do_meio_pelo_queryset(self):
+        # Exclusão em lote (ação do admin, limpezas) não passa por Subordinacao.delete
+        a, b, c, d, _ = self.deps
+        self._cadeia()
+
+        Subordinacao.objects.filter(Q(superior=b) | Q(subordinado=b)).delete()
+        b.delete()
+
+        assert _pares_hierarquia() == {(c.id, d.id, 1)}
+        assert reconstruir_hierarquia_departamentos() == 1
+
+    def test_list_descendentes_e_ancestrais(self):
+        a, b, c, d, _ = self.deps
+        self._cadeia()
+
+        descendentes = list_descendentes_departamento(b.id)
+        assert [(x["id"], x["profundidade"]) for x in descendentes] == [(c.id, 1), (d.id, 2)]
+
+        ancestrais = list_ancestrais_departamento(d.id)
+        assert [(x["id"], x["profundidade"]) for x in ancestrais] == [(c.id, 1), (b.id, 2), (a.id, 3)]
+
+    def test_list_descendentes_departamento_not_found(self):
+        with pytest.raises(BusinessError) as exc:
+            list_descendentes_departamento(999)
+        assert "Departamento não encontrado" in str(exc.value)
+
+    def test_reconstruir_hierarquia(self):
+        self._cadeia()
+        esperado = _pares_hierarquia()
+        HierarquiaDepartamento.objects.all().delete()
+
+        assert reconstruir_hierarquia_departamentos() == len(esperado)
+        assert _pares_hierarquia() == esperado
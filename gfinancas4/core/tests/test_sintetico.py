@@ -0,0 +1,89 @@
+import io
+import pytest
+from datetime import datetime
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Count, F, Sum
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from gfinancas4.core.models import (
+    Departamento, Despesa, DespesaAgregadoMensal, HierarquiaDepartamento, Subordinacao, Verba
+)
+from gfinancas4.core.sintetico import gerar_dados_sinteticos
+from gfinancas4.accounts.models import User
+
+REFERENCIA = timezone.make_aware(datetime(2024, 6, 30, 12, 0))
+
+
+def _conteudo_despesas():
+    return list(Despesa.objects.order_by("id").values_list(
+        "departamento__nome", "elemento__elemento", "tipoGasto__tipoGasto", "valor", "justificativa", "created_at"
+    ))
+
+
+@pytest.mark.django_db
+class TestDadosSinteticos:
+
+    def test_gera_arvore_com_a_profundidade_pedida(self):
+        resumo = gerar_dados_sinteticos(departamentos=40, profundidade=3, despesas=0, anos=1,
+                                        referencia=REFERENCIA)
+
+        assert len(resumo["departamentos"]) == 40
+        assert Subordinacao.objects.count() == 39
+        raiz = resumo["departamentos"][0]
+        assert HierarquiaDepartamento.objects.filter(ancestral_id=raiz).count() == 39
+        assert HierarquiaDepartamento.objects.filter(ancestral_id=raiz, profundidade__gt=3).count() == 0
+        assert Verba.objects.filter(ano=2024).count() == 40
+
+    def test_despesas_e_resumo_mensal_consistentes(self):
+        resumo = gerar_dados_sinteticos(departamentos=10, profundidade=2, despesas=500, anos=2,
+                                        referencia=REFERENCIA, lote=128)
+
+        assert resumo["despesas"] == Despesa.objects.count() == 500
+        assert resumo["anos"] == [2023, 2024]
+        datas = Despesa.objects.values_list("created_at", flat=True)
+        assert min(datas).year == 2023 and max(datas) <= REFERENCIA
+        assert not Despesa.objects.exclude(updated_at=F("created_at")).exists()
+        assert set(Subordinacao.objects.values_list("data_subordinacao", flat=True)) == {REFERENCIA}
+        agregado = DespesaAgregadoMensal.objects.aggregate(total=Sum("total"), quantidade=Sum("quantidade"))
+        assert agregado["total"] == Despesa.objects.aggregate(total=Sum("valor"))["total"]
+        assert agregado["quantidade"] == 500
+
+    def test_datas_gravadas_no_proprio_insert(self):
+        with CaptureQueriesContext(connection) as consultas:
+            gerar_dados_sinteticos(departamentos=10, profundidade=2, despesas=300, anos=1,
+                                   referencia=REFERENCIA, lote=128)
+
+        tabelas = (Despesa._meta.db_table, Subordinacao._meta.db_table)
+        assert not [
+            consulta["sql"] for consulta in consultas.captured_queries
+            if consulta["sql"].startswith("UPDATE") and any(tabela in consulta["sql"] for tabela in tabelas)
+        ]
+
+    def test_mesma_semente_gera_os_mesmos_dados(self):
+        gerar_dados_sinteticos(departamentos=5, profundidade=1, despesas=50, referencia=REFERENCIA, semente=7)
+        primeira = _conteudo_despesas()
+        Despesa.objects.all().delete()
+        Verba.objects.all().delete()
+        Subordinacao.objects.all().delete()
+        Departamento.objects.all().delete()
+
+        gerar_dados_sinteticos(departamentos=5, profundidade=1, despesas=50, referencia=REFERENCIA, semente=7)
+
+        assert _conteudo_despesas() == primeira
+
+    def test_sem_profundidade_gera_departamentos_sem_hierarquia(self):
+        gerar_dados_sinteticos(departamentos=5, profundidade=0, despesas=0, referencia=REFERENCIA)
+
+        assert Departamento.objects.count() == 5
+        assert Subordinacao.objects.count() == 0
+
+    def test_comando_seed_gfinancas(self):
+        call_command("seed_gfinancas", "--departamentos", "20", "--depth", "2", "--despesas", "100",
+                     "--anos", "1", "--referencia", "2024-06-30", "--senha", "carga123", stdout=io.StringIO())
+
+        usuario = User.objects.get(username="sintetico")
+        assert usuario.check_password("carga123")
+        assert Departamento.objects.filter(responsavelId=usuario).count() == 20
+        assert Despesa.objects.values("departamento").annotate(n=Count("id")).count() > 1
@@ -0,0 +1,104 @@
+import asyncio
+import pytest
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from datetime import timedelta
+from decimal import Decimal
+from django.urls import reverse
+from django.utils import timezone
+from .. import views
+from ..models import Verba
+from ..service import add_despesa
+
+VIEWS_ASSINCRONAS = [
+    views.list_despesas,
+    views.list_despesas_departamento,
+    views.list_despesas_departamento_apartir_data,
+    views.list_despesas_departamento_periodo,
+    views.total_despesas_departamento,
+    views.total_despesas_departamento_apartir_data,
+    views.total_despesas_departamento_periodo,
+    views.list_verbas_departamento,
+    views.get_verba_departamento_ano,
+    views.get_ultima_verba_departamento,
+]
+
+
+@pytest.fixture
+def dados(cenario):
+    for valor in ("10.00", "5.50"):
+        add_despesa(
+            cenario["user"].id, cenario["departamento"].id, Decimal(valor),
+            cenario["elemento"].id, cenario["tipo_gasto"].id, "Justificativa"
+        )
+    Verba.objects.create(
+        valor=Decimal("1000.00"), user=cenario["user"], departamento=cenario["departamento"],
+        ano=timezone.localdate().year, descricao="Verba anual"
+    )
+    return cenario
+
+
+def _rotas(cenario):
+    departamento_id = cenario["departamento"].id
+    amanha = (timezone.localdate() + timedelta(days=1)).isoformat()
+    return {
+        "list_despesas": reverse("list_despesas"),
+        "list_despesas_departamento": reverse("list_despesas_departamento", args=[departamento_id]),
+        "list_despesas_departamento_apartir_data": reverse(
+            "list_despesas_departamento_apartir_data", args=[departamento_id, "2000-01-01"]),
+        "list_despesas_departamento_periodo": reverse(
+            "list_despesas_departamento_periodo", args=[departamento_id, "2000-01-01", amanha]),
+        "total_despesas_departamento": reverse("total_despesas_departamento", args=[departamento_id]),
+        "total_despesas_departamento_apartir_data": reverse(
+            "total_despesas_departamento_apartir_data", args=[departamento_id, "2000-01-01"]),
+        "total_despesas_departamento_periodo": reverse(
+            "total_despesas_departamento_periodo", args=[departamento_id, "2000-01-01", amanha]),
+        "list_verbas_departamento": reverse("list_verbas_departamento", args=[departamento_id]),
+        "get_verba_departamento_ano": reverse(
+            "get_verba_departamento_ano", args=[departamento_id, timezone.localdate().year]),
+        "get_ultima_verba_departamento": reverse("get_ultima_verba_departamento", args=[departamento_id]),
+    }
+
+
+@pytest.mark.parametrize("view", VIEWS_ASSINCRONAS, ids=lambda view: view.__name__)
+def test_views_de_leitura_sao_assincronas(view):
+    assert iscoroutinefunction(view)
+
+
+@pytest.mark.django_db
+class TestViewsAssincronas:
+    def test_respostas_pelo_cliente_assincrono(self, async_client, dados):
+        async_client.force_login(dados["user"])
+        rotas = _rotas(dados)
+
+        async def requisitar_todas():
+            return await asyncio.gather(*(async_client.get(url) for url in rotas.values()))
+
+        respostas = dict(zip(rotas, async_to_sync(requisitar_todas)()))
+
+        assert {nome: r.status_code for nome, r in respostas.items()} == {nome: 200 for nome in rotas}
+        assert respostas["total_despesas_departamento"].json()["total_despesas"] == 15.5
+        assert respostas["total_despesas_departamento_apartir_data"].json() == {"total": "15.50"}
+        assert respostas["total_despesas_departamento_periodo"].json() == {"total": "15.50"}
+        assert respostas["list_despesas_departamento"].json()["paginacao"]["total_despesas"] == 2
+        assert respostas["list_verbas_departamento"].json()["verbas"][0]["descricao"] == "Verba anual"
+        assert respostas["get_ultima_verba_departamento"].json()["valor"] == "1000.00"
+
+    def test_mesma_resposta_pelo_cliente_sincrono(self, client, async_client, dados):
+        client.force_login(dados["user"])
+        async_client.force_login(dados["user"])
+        for nome, url in _rotas(dados).items():
+            sincrona = client.get(url)
+            assincrona = async_to_sync(async_client.get)(url)
+            assert (sincrona.status_code, sincrona.json()) == (assincrona.status_code, assincrona.json()), nome
+
+    def test_requer_login(self, async_client, dados):
+        response = async_to_sync(async_client.get)(_rotas(dados)["total_despesas_departamento"])
+        assert response.status_code == 401
+        assert response.json() == {"not_authenticated": True}
+
+    def test_departamento_inexistente(self, async_client, dados):
+        async_client.force_login(dados["user"])
+        response = async_to_sync(async_client.get)(reverse("total_despesas_departamento", args=[999999]))
+        assert response.status_code == 404
+        response = async_to_sync(async_client.get)(reverse("get_ultima_verba_departamento", args=[999999]))
+        assert response.status_code == 404
@@ -0,0 +1,73 @@
+import gzip
+import json
+import pytest
+from unittest import mock
+from django.urls import reverse
+from gfinancas4.base.compressao import CODIFICACOES
+from gfinancas4.core.service import add_elemento, add_tipo_gasto, add_elemento_tipo_gasto
+
+
+@pytest.mark.django_db
+class TestCatalogoViews:
+    def test_elementos_304_com_if_none_match(self, client, cenario):
+        client.force_login(cenario["user"])
+        url = reverse("list_elementos")
+
+        response = client.get(url)
+        assert response.status_code == 200
+        assert "private" in response["Cache-Control"]
+        etag = response["ETag"]
+
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304
+        assert response.content == b""
+
+        add_elemento("Obras", "Obras e instalações")
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+        assert response["ETag"] != etag
+        assert "Obras" in [e["elemento"] for e in response.json()["elementos"]]
+
+    def test_reutiliza_corpo_comprimido(self, client, cenario, settings):
+        settings.COMPRESSAO_MINIMO_BYTES = 10
+        client.force_login(cenario["user"])
+        url = reverse("list_elementos")
+        esperado = client.get(url).json()
+
+        with mock.patch.object(CODIFICACOES["gzip"], "comprimir", wraps=CODIFICACOES["gzip"].comprimir) as comprimir:
+            respostas = [client.get(url, HTTP_ACCEPT_ENCODING="gzip") for _ in range(3)]
+            # Parâmetros que não mudam o corpo não criam outra entrada no cache
+            respostas += [client.get(url, {"qualquer": n}, HTTP_ACCEPT_ENCODING="gzip") for n in range(3)]
+            filtrada = client.get(url, {"fields": "elemento"}, HTTP_ACCEPT_ENCODING="gzip")
+
+        # Uma compressão para a URL sem parâmetros e outra para ?fields=
+        assert comprimir.call_count == 2
+        for response in respostas:
+            assert response["Content-Encoding"] == "gzip"
+            assert json.loads(gzip.decompress(response.content)) == esperado
+        # Corpo pequeno demais para ganhar com gzip: segue sem compressão
+        corpo = gzip.decompress(filtrada.content) if filtrada.has_header("Content-Encoding") else filtrada.content
+        assert "descricao" not in corpo.decode()
+
+        response = client.get(url, HTTP_ACCEPT_ENCODING="gzip", HTTP_IF_NONE_MATCH=respostas[0]["ETag"])
+        assert response.status_code == 304
+
+    def test_tipo_gastos_por_elemento(self, client, cenario):
+        client.force_login(cenario["user"])
+        url = f"/api/core/tipo-gastos/por-elemento/{cenario['elemento'].id}"
+
+        response = client.get(url)
+        assert response.status_code == 200
+        assert [t["tipoGasto"]["id"] for t in response.json()["tipo_gastos"]] == [cenario["tipo_gasto"].id]
+
+        response = client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        assert response.status_code == 304
+
+        tipo_gasto = add_tipo_gasto("Combustível", "Combustível")
+        add_elemento_tipo_gasto(cenario["elemento"].id, tipo_gasto["id"])
+        assert len(client.get(url).json()["tipo_gastos"]) == 2
+
+    def test_elemento_inexistente(self, client, cenario):
+        client.force_login(cenario["user"])
+        response = client.get("/api/core/tipo-gastos/por-elemento/999")
+        assert response.status_code == 400
@@ -169,6 +169,30 @@ class TestDepartamentoViews:
         assert response_data["departamentos"][0]["nome"] == "Departamento 1"
         assert response_data["departamentos"][1]["nome"] == "Departamento 2"
 
+    def test_list_departamentos_paginada(self, client):
+        """Testa a listagem paginada com filtros e include"""
+        client.login(username='testuser', password='testpass123')
+        for i in range(3):
+            Departamento.objects.create(
+                nome=f"Departamento {i}",
+                description="Descrição",
+                responsavelId=self.user,
+                done=i == 1
+            )
+
+        url = reverse('list_departamentos')
+        response = client.get(url, {"page": 1, "per_page": 1, "done": "false", "include": "subordinados,total_despesas"})
+
+        assert response.status_code == 200
+        response_data = json.loads(response.content)
+        assert response_data["paginacao"]["total_departamentos"] == 2
+        assert response_data["departamentos"][0]["nome"] == "Departamento 0"
+        assert response_data["departamentos"][0]["subordinados"] == []
+        assert response_data["departamentos"][0]["total_despesas"] == "0.00"
+
+        response = client.get(url, {"include": "inexistente"})
+        assert response.status_code == 400
+
     def test_add_departamento_unauthorized(self, client):
         """Testa a adição de departamento sem autenticação"""
         url = reverse('add_departamento')
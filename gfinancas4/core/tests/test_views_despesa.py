@@ -0,0 +1,270 @@
+import json
+import pytest
+from datetime import timedelta
+from unittest import mock
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from gfinancas4.core import service
+from gfinancas4.core.models import Departamento, Despesa, Verba
+
+
+@pytest.mark.django_db
+class TestImportarDespesasView:
+    def _csv(self, cenario, valor="10,00"):
+        return (
+            "departamento_id,elemento_id,tipo_gasto_id,valor,justificativa\n"
+            f'{cenario["departamento"].id},{cenario["elemento"].id},{cenario["tipo_gasto"].id},"{valor}",Compra\n'
+        )
+
+    def test_importa_json(self, client, cenario):
+        client.force_login(cenario["user"])
+        linhas = [{
+            "departamento_id": cenario["departamento"].id,
+            "elemento_id": cenario["elemento"].id,
+            "tipo_gasto_id": cenario["tipo_gasto"].id,
+            "valor": "15.00",
+            "justificativa": "Compra",
+        }] * 3
+
+        response = client.post(reverse("importar_despesas"), data=json.dumps(linhas), content_type="application/json")
+
+        assert response.status_code == 201
+        assert response.json() == {"importadas": 3, "erros": []}
+        assert set(Despesa.objects.values_list("user_id", flat=True)) == {cenario["user"].id}
+
+    def test_importa_arquivo_csv(self, client, cenario):
+        client.force_login(cenario["user"])
+        arquivo = SimpleUploadedFile("despesas.csv", self._csv(cenario).encode("utf-8"), content_type="text/csv")
+
+        response = client.post(reverse("importar_despesas"), data={"arquivo": arquivo})
+
+        assert response.status_code == 201
+        assert Despesa.objects.get().valor == 10
+
+    def test_csv_com_erros(self, client, cenario):
+        client.force_login(cenario["user"])
+
+        response = client.post(reverse("importar_despesas"), data=self._csv(cenario, "0"), content_type="text/csv")
+
+        assert response.status_code == 400
+        assert response.json()["erros"] == [{"linha": 1, "erros": ["O valor da despesa deve ser maior que zero."]}]
+        assert not Despesa.objects.exists()
+
+    def test_requer_login(self, client, cenario):
+        response = client.post(reverse("importar_despesas"), data="[]", content_type="application/json")
+        assert response.status_code == 401
+
+
+@pytest.mark.django_db
+class TestCamposEsparsosView:
+    def test_listagens_com_fields(self, client, cenario):
+        client.force_login(cenario["user"])
+        Despesa.objects.create(
+            user=cenario["user"], departamento=cenario["departamento"], valor="15.50",
+            elemento=cenario["elemento"], tipoGasto=cenario["tipo_gasto"], justificativa="Compra",
+        )
+
+        response = client.get(reverse("list_despesas"), {"fields": "valor,elemento.elemento"})
+        assert response.status_code == 200
+        assert response.json()["despesas"] == [{"valor": "15.50", "elemento": {"elemento": "Material"}}]
+
+        response = client.get(reverse("list_elementos"), {"fields": "elemento"})
+        assert sorted(response.json()["elementos"], key=lambda e: e["elemento"]) == [
+            {"elemento": "Material"}, {"elemento": "Serviços"},
+        ]
+
+    def test_campo_invalido(self, client, cenario):
+        client.force_login(cenario["user"])
+        response = client.get(reverse("list_despesas"), {"fields": "valor,senha"})
+        assert response.status_code == 400
+        assert "senha" in response.json()["error"]
+
+
+@pytest.mark.django_db
+class TestFormatoColunarView:
+    def test_lista_e_detalhamento(self, client, cenario):
+        client.force_login(cenario["user"])
+        for valor in ("15.50", "4.50"):
+            Despesa.objects.create(
+                user=cenario["user"], departamento=cenario["departamento"], valor=valor,
+                elemento=cenario["elemento"], tipoGasto=cenario["tipo_gasto"], justificativa="Compra",
+            )
+
+        response = client.get(reverse("list_despesas"), {"format": "columnar", "fields": "valor,departamento"})
+        assert response.status_code == 200
+        assert response.json()["despesas"] == {
+            "columns": ["departamento", "valor"],
+            "data": {"departamento": [0, 0], "valor": ["4.50", "15.50"]},
+            "dictionaries": {"departamento": [{"id": cenario["departamento"].id, "nome": "Departamento"}]},
+        }
+
+        response = client.get(
+            reverse("detalhar_despesas_departamento", args=[cenario["departamento"].id]), {"format": "columnar"}
+        )
+        por_elemento = response.json()["por_elemento"]
+        assert por_elemento["data"]["total"] == ["20.00"]
+        assert por_elemento["data"]["elemento"] == ["Material"]
+
+    def test_formato_invalido(self, client, cenario):
+        client.force_login(cenario["user"])
+        response = client.get(reverse("list_despesas"), {"format": "xml"})
+        assert response.status_code == 400
+
+
+@pytest.mark.django_db
+class TestGetCondicional:
+    @pytest.fixture
+    def dados(self, client, cenario):
+        client.force_login(cenario["user"])
+        despesas = [
+            Despesa.objects.create(
+                user=cenario["user"], departamento=cenario["departamento"], valor=valor,
+                elemento=cenario["elemento"], tipoGasto=cenario["tipo_gasto"], justificativa="Compra",
+            )
+            for valor in ("10.00", "20.00")
+        ]
+        verba = Verba.objects.create(valor="1000.00", user=cenario["user"], departamento=cenario["departamento"],
+                                     ano=2024, descricao="Verba anual")
+        return {**cenario, "despesas": despesas, "verba": verba}
+
+    def test_lista_de_despesas_304_sem_serializar(self, client, dados):
+        url = reverse("list_despesas_departamento", args=[dados["departamento"].id])
+        response = client.get(url)
+        assert response.status_code == 200
+        assert "private" in response["Cache-Control"]
+        assert not response.has_header("Last-Modified")
+        etag = response["ETag"]
+
+        with mock.patch("gfinancas4.core.service.alist_despesas_departamento", side_effect=AssertionError):
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response["ETag"] == etag
+
+        # Outra página (ou fields/format) é outra representação
+        assert client.get(url, {"page": 2}, HTTP_IF_NONE_MATCH=etag).status_code == 200
+
+    @pytest.mark.parametrize("alterar", ["editar", "excluir", "incluir"])
+    def test_alteracoes_mudam_o_etag(self, client, dados, alterar):
+        url = reverse("list_despesas")
+        etag = client.get(url)["ETag"]
+
+        primeira = dados["despesas"][0]
+        if alterar == "editar":
+            primeira.justificativa = "Compra revista"
+            primeira.save()
+        elif alterar == "excluir":
+            primeira.delete()
+        else:
+            Despesa.objects.create(
+                user=dados["user"], departamento=dados["departamento"], valor="5.00",
+                elemento=dados["elemento"], tipoGasto=dados["tipo_gasto"], justificativa="Nova",
+            )
+
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+        assert response["ETag"] != etag
+
+    @pytest.mark.parametrize("alterar", ["departamento", "usuario"])
+    def test_dados_embutidos_mudam_o_etag(self, client, dados, alterar):
+        urls = [
+            reverse("list_despesas"),
+            reverse("list_verbas_departamento", args=[dados["departamento"].id]),
+            reverse("get_verba", args=[dados["verba"].id]),
+        ]
+        etags = [client.get(url)["ETag"] for url in urls]
+
+        if alterar == "departamento":
+            dados["departamento"].nome = "Departamento renomeado"
+            dados["departamento"].save()
+        else:
+            dados["user"].email = "novo@exemplo.com"
+            dados["user"].save()
+
+        for url, etag in zip(urls, etags):
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+            assert response.status_code == 200
+            assert response["ETag"] != etag
+
+    def test_validador_nao_le_as_despesas(self, dados):
+        def consultas_do_validador():
+            with CaptureQueriesContext(connection) as consultas:
+                service.versao_despesas()
+                service.versao_despesas(dados["departamento"].id, periodo=("2000-01-01", "2100-01-01"))
+                service.versao_verbas(dados["departamento"].id)
+            return [consulta["sql"] for consulta in consultas.captured_queries]
+
+        antes = consultas_do_validador()
+        Despesa.objects.bulk_create([
+            Despesa(user=dados["user"], departamento=dados["departamento"], valor="1.00",
+                    elemento=dados["elemento"], tipoGasto=dados["tipo_gasto"], justificativa="Lote")
+            for _ in range(200)
+        ])
+
+        depois = consultas_do_validador()
+        assert len(depois) == len(antes) == 3
+        assert not any("core_despesa" in sql or "core_verba" in sql for sql in depois)
+
+    def test_mover_despesa_muda_o_etag_da_origem(self, client, dados):
+        destino = Departamento.objects.create(nome="Destino", description="Destino", responsavelId=dados["user"])
+        url = reverse("list_despesas_departamento", args=[dados["departamento"].id])
+        etag = client.get(url)["ETag"]
+
+        despesa = Despesa.objects.get(pk=dados["despesas"][0].pk)
+        despesa.departamento = destino
+        despesa.save()
+
+        assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 200
+
+    def test_importacao_muda_o_etag(self, client, dados):
+        url = reverse("list_despesas_departamento", args=[dados["departamento"].id])
+        etag = client.get(url)["ETag"]
+
+        service.importar_despesas(dados["user"].id, [{
+            "departamento_id": dados["departamento"].id, "elemento_id": dados["elemento"].id,
+            "tipo_gasto_id": dados["tipo_gasto"].id, "valor": "5.00", "justificativa": "Importada",
+        }])
+
+        assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 200
+
+    def test_periodo_e_apartir_data(self, client, dados):
+        hoje = timezone.localdate()
+        urls = [
+            reverse("list_despesas_departamento_periodo",
+                    args=[dados["departamento"].id, "2000-01-01", (hoje + timedelta(days=1)).isoformat()]),
+            reverse("list_despesas_departamento_apartir_data", args=[dados["departamento"].id, hoje.isoformat()]),
+        ]
+        for url in urls:
+            etag = client.get(url)["ETag"]
+            assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 304
+
+        invalida = reverse("list_despesas_departamento_periodo", args=[dados["departamento"].id, "ontem", "hoje"])
+        response = client.get(invalida)
+        assert response.status_code == 400
+        assert not response.has_header("ETag")
+
+    def test_verbas(self, client, dados):
+        for url in (reverse("list_verbas"), reverse("list_verbas_departamento", args=[dados["departamento"].id])):
+            etag = client.get(url)["ETag"]
+            assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 304
+
+        url = reverse("get_verba", args=[dados["verba"].id])
+        response = client.get(url)
+        assert response.json()["descricao"] == "Verba anual"
+        ultima_alteracao = response["Last-Modified"]
+        assert client.get(url, HTTP_IF_NONE_MATCH=response["ETag"]).status_code == 304
+        assert client.get(url, HTTP_IF_MODIFIED_SINCE=ultima_alteracao).status_code == 304
+
+        dados["verba"].descricao = "Verba revista"
+        dados["verba"].save()
+        response = client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        assert response.status_code == 200
+        assert response.json()["descricao"] == "Verba revista"
+
+    def test_verba_inexistente(self, client, dados):
+        response = client.get(reverse("get_verba", args=[dados["verba"].id + 100]))
+        assert response.status_code == 404
+        assert not response.has_header("ETag")
@@ -3,6 +3,10 @@ from django.urls import path
 from . import views
 
 urlpatterns = [
+    # Busca
+    path("search", views.buscar, name="buscar"),
+    # Dashboard
+    path("dashboard", views.dashboard, name="dashboard"),
     # Endpoints para Departamento
     path("departamentos/add", views.add_departamento, name="add_departamento"),
     path("departamentos/list", views.list_departamentos, name="list_departamentos"),
@@ -12,11 +16,17 @@ urlpatterns = [
     path("departamentos/total-despesas/<int:departamento_id>/elemento/<int:elemento_id>", views.total_despesas_departamento_elemento, name="total_despesas_departamento_elemento"),
     path("departamentos/total-despesas-apartir-data/<int:departamento_id>/data/<str:data_inicio>", views.total_despesas_departamento_apartir_data, name="total_despesas_departamento_apartir_data"),
     path("departamentos/total-despesas-periodo/<int:departamento_id>/data/<str:data_inicio>/<str:data_termino>", views.total_despesas_departamento_periodo, name="total_despesas_departamento_periodo"),
+    path("departamentos/orcamento-consolidado/<int:departamento_id>/ano/<int:ano>",
+         views.get_orcamento_consolidado_departamento, name="get_orcamento_consolidado_departamento"),
     # Endpoints para Subordinação
     path("subordinacoes/add", views.add_subordinacao, name="add_subordinacao"),
     path("subordinacoes/list", views.list_subordinacoes, name="list_subordinacoes"),
     path("subordinacoes/update/<int:id>", views.update_subordinacao, name="update_subordinacao"),
     path("subordinacoes/delete/<int:id>", views.delete_subordinacao, name="delete_subordinacao"),
+    path("subordinacoes/descendentes/<int:departamento_id>", views.list_descendentes_departamento,
+         name="list_descendentes_departamento"),
+    path("subordinacoes/ancestrais/<int:departamento_id>", views.list_ancestrais_departamento,
+         name="list_ancestrais_departamento"),
     
     # Endpoints para Responsabilidade
     path("responsabilidades/add", views.add_responsabilidade, name="add_responsabilidade"),
@@ -39,6 +49,10 @@ urlpatterns = [
     path("elemento-tipo-gasto/delete/<int:id>", views.delete_elemento_tipo_gasto, name="delete_elemento_tipo_gasto"),
      # Endpoints para Despesa
     path("despesas/add", views.add_despesa_view, name="add_despesa"),
+    path("despesas/bulk", views.importar_despesas, name="importar_despesas"),
+    path("despesas/exportar", views.exportar_despesas, name="exportar_despesas"),
+    path("despesas/detalhamento/<int:departamento_id>", views.detalhar_despesas_departamento,
+         name="detalhar_despesas_departamento"),
     path("despesas/update", views.update_despesa, name="update_despesa"),
     path("despesas/delete/<int:id>", views.delete_despesa, name="delete_despesa"),
     path("despesas/list", views.list_despesas, name="list_despesas"),
@@ -51,6 +65,7 @@ urlpatterns = [
     path("verbas/delete/<int:id>", views.delete_verba, name="delete_verba"),
     path("verbas/get/<int:id>", views.get_verba, name="get_verba"),
     path("verbas/list", views.list_verbas, name="list_verbas"),
+    path("verbas/exportar", views.exportar_verbas, name="exportar_verbas"),
     path("verbas/departamento/<int:departamento_id>", views.list_verbas_departamento, name="list_verbas_departamento"),
     path("verbas/departamento/<int:departamento_id>/ano/<int:ano>", views.get_verba_departamento_ano, name="get_verba_departamento_ano"),
     path("verbas/ultima-do-departamento/<int:departamento_id>", views.get_ultima_verba_departamento, name="get_ultima_verba_departamento"),
@@ -2,13 +2,19 @@
 import logging
 import json
 from django.contrib.auth import get_user_model
+from django.core.handlers.asgi import ASGIRequest
+from gfinancas4.base.campos import ler_campos, projetar_lista
+from gfinancas4.base.colunar import colunar_listas, ler_formato_colunar
+from gfinancas4.base.compressao import reutilizar_compressao
 from gfinancas4.base.exceptions import BusinessError
-from django.http import JsonResponse
+from gfinancas4.base.renderizacao import RespostaJson
 from django.views.decorators.csrf import csrf_exempt
-from django.views.decorators.http import require_http_methods
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import require_http_methods, condition
 from django.shortcuts import get_object_or_404
-from ..commons.django_views_utils import ajax_login_required
+from ..commons.django_views_utils import ajax_login_required, condicional
 from . import service
+from .exportacao import resposta_exportacao
 from .models import Departamento, Responsabilidade, Elemento, TipoGasto, Despesa
 from ..accounts.models import User
 from rest_framework.decorators import api_view, permission_classes
@@ -42,12 +48,12 @@ def add_departamento(request):
             responsavelId=responsavelId,
             done=done
         )
-        return JsonResponse(new_departamento, status=201)
+        return RespostaJson(new_departamento, status=201)
     except BusinessError as e:
-        return JsonResponse({"error": str(e)}, status=400)
+        return RespostaJson({"error": str(e)}, status=400)
     except Exception as e:
         logger.error(f"Erro ao adicionar departamento: {str(e)}")
-        return JsonResponse({"error": "Erro interno do servidor"}, status=500)
+        return RespostaJson({"error": "Erro interno do servidor"}, status=500)
 
 @csrf_exempt
 @ajax_login_required
@@ -60,7 +66,7 @@ def update_departamento(request):
     departamento_id = body.get("id")
     
     if not departamento_id:
-        return JsonResponse({"error": "ID do departamento não fornecido."}, status=400)
+        return RespostaJson({"error": "ID do departamento não fornecido."}, status=400)
     
     nome = body.get("nome")
     description = body.get("description")
@@ -77,21 +83,46 @@ def update_departamento(request):
             responsavelId=responsavelId,
             done=done
         )
-        return JsonResponse(updated_departamento, status=200)
+        return RespostaJson(updated_departamento, status=200)
     except BusinessError as e:
-        return JsonResponse({"error": str(e)}, status=400)
+        return RespostaJson({"error": str(e)}, status=400)
     except Exception as e:
         logger.error(f"Erro ao atualizar departamento: {str(e)}")
-        return JsonResponse({"error": "Erro interno do servidor"}, status=500)
+        return RespostaJson({"error": "Erro interno do servidor"}, status=500)
 
 @csrf_exempt
 @require_http_methods(["GET"])
 @ajax_login_required
 def list_departamentos(request):
-    """Lista Departamentos"""
+    """
+    Lista Departamentos.
+
+    Parâmetros opcionais: page e per_page (ativam a paginação), tipoEntidade, responsavelId,
+    done (true/false), include=subordinados,verba_atual,total_despesas e fields.
+    """
     logger.info("API list departamentos")
-    departamentos = service.list_departamentos()
-    return JsonResponse({"departamentos": departamentos})
+    try:
+        page = request.GET.get("page")
+        done = request.GET.get("done")
+        include = request.GET.get("include")
+        resultado = service.list_departamentos(
+            page=int(page) if page else None,
+            per_page=int(request.GET.get("per_page", 20)),
+            tipo_entidade=request.GET.get("tipoEntidade"),
+            responsavel_id=_parametro_inteiro(request, "responsavelId"),
+            done=None if done in (None, "") else done.lower() in ("1", "true", "sim"),
+            include=[i.strip() for i in include.split(",") if i.strip()] if include else None,
+        )
+    except ValueError:
+        return RespostaJson({"error": "Parâmetros de paginação inválidos."}, status=400)
+    except BusinessError as e:
+        return RespostaJson({"error": str(e)}, status=400)
+
+    campos = ler_campos(request)
+    if isinstance(resultado, dict):
+        resultado["departamentos"] = projetar_lista(resultado["departamentos"], campos)
+        return RespostaJson(resultado)
+    return RespostaJson({"departamentos": projetar_lista(resultado, campos)})
 
 @csrf_exempt
 @ajax_login_required
@@ -107,7 +138,7 @@ def add_subordinacao(request):
     
     # Previne laços de subordinação direta
     if id_departamento_a == id_departamento_b:
-        return JsonResponse(
+        return RespostaJson(
             {"error": "Um departamento não pode ser subordinado a si mesmo."}, 
             status=400
         )
@@ -118,19 +149,49 @@ def add_subordinacao(request):
             subordinado_id=id_departamento_b,
             observacao=observacao
         )
-        return JsonResponse(subordinacao, status=201)
+        return RespostaJson(subordinacao, status=201)
     except BusinessError as e:
-        return JsonResponse({"error": str(e)}, status=400)
+        return RespostaJson({"error": str(e)}, status=400)
     except Exception as e:
         logger.error(f"Erro ao adicionar subordinação: {str(e)}")
-        return JsonResponse({"error": "Erro interno do servidor"}, status=500)
+        return RespostaJson({"error": "Erro interno do servidor"}, status=500)
 
 @require_http_methods(["GET"])
 @ajax_login_required
 def list_subordinacoes(request):
     """Lista as relações de subordinação entre departamentos."""
-    subordinacoes = service.list_subordinacoes()
-    return JsonResponse({"subordinacoes": subordinacoes}, status=200)
+    subordinacoes = projetar_lista(service.list_subordinacoes(), ler_campos(request))
+    return RespostaJson({"subordinacoes": subordinacoes}, status=200)
+
+@require_http_methods(["GET"])
+@ajax_login_required
+def list_descendentes_departamento(request, departamento_id):
+    """Lista os departamentos abaixo de um departamento na hierarquia."""
+    logger.info(f"API list descendentes departamento: {departamento_id}")
+
+    try:
+        descendentes = projetar_lista(service.list_descendentes_departamento(departamento_id), ler_campos(request))
+        return RespostaJson({"descendentes": descendentes}, status=200)
+    except BusinessError as e:
+        return RespostaJson({"error": str(e)}, status=404)
+    except Exception as e:
+        logger.error(f"Erro ao listar descendentes do departamento: {str(e)}")
+        return RespostaJson({"error": "Erro interno do servidor"}, status=500)
+
+@require_http_methods(["GET"])
+@ajax_login_required
+def list_ancestrais_departamento(request, departamento_id):
+    """Lista os departamentos acima de um departamento na hierarquia."""
+    logger.info(f"API list ancestrais departamento: {departamento_id}")
+
+    try:
+        ancestrais = projetar_lista(service.list_ancestrais_departamento(departamento_id), ler_campos(request))
+        return RespostaJson({"ancestrais": ancestrais}, status=200)
+    except BusinessError as e:
+        return RespostaJson({"error": str(e)}, status=404)
+    except Exception as e:
+        logger.error(f"Erro ao listar ancestrais do departamento: {str(e)}")
+        return RespostaJson({"error": "Erro interno do servidor"}, status=500)
 
 @csrf_exempt
 @ajax_login_required
@@ -152,13 +213,13 @@ def add_responsabilidade(request):
             departamento_id=departamento_id,
             observacao=observacao
         )
-        return JsonResponse(response_data, status=201)
+        return RespostaJson(response_data, status=201)
     
     except BusinessError as e:
-        return JsonResponse({"error": str(e)}, status=400)
+        return RespostaJson({"error": str(e)}, status=400)
     except Exception as e:
         logger.error(f"Erro ao adicionar responsabilidade: {str(e)}")
-        return JsonResponse({"error": "Erro interno do servidor"}, status=500)
+        return RespostaJson({"error": "Erro interno do servidor"}, status=500)
 
 @csrf_exempt
 @ajax_login_required
@@ -176,13 +237,13 @@ def update_responsabilidade_view(request, id):
             responsabilidade_id=id,
             observacao=observacao
         )
-        return JsonResponse(response_data, status=200)
+        return RespostaJson(response_data, status=200)
     
     except BusinessError as e:
-        return JsonResponse({"error": str(e)}, status=400)
+        return RespostaJson({"error": str(e)}, status=400)
     except Exception as e:
         logger.error(f"Erro ao atualizar responsabilidade: {str(e)}")
-        return JsonResponse({"error": "Erro interno do servidor"}, status=500)
+        return RespostaJson({"error": "Erro interno do servidor"}, status=500)
 
 @csrf_exempt
 @ajax_login_required
@@ -193,59 +254,81 @@ def list_responsabilidades(request):
     
     try:
         # Chama o serviço para listar as responsabilidades
-        response_data = service.list_responsabilidades()
-        return JsonResponse(response_data, safe=False, status=200)
+        response_data = projetar_lista(service.list_responsabilidades(), ler_campos(request))
+        return RespostaJson(response_data, safe=False, status=200)
     
     except Exception as e:
-        return JsonResponse({"error": str(e)}, status=500)
+        return RespostaJson({"error": str(e)}, status=500)
+
+# ETags do catálogo: com If-None-Match igual, o navegador recebe 304 sem corpo
+def _etag_elementos(request):
+    return service.catalogo_elementos()[1]
+
+def _etag_tipo_gastos(request):
+    return service.catalogo_tipo_gastos()[1]
+
+def _etag_tipo_gastos_por_elemento(request, elemento_id):
+    try:
+        return service.catalogo_tipo_gastos_por_elemento(elemento_id)[1]
+    except BusinessError:
+        return None
 
 @csrf_exempt    
 @ajax_login_required
 @require_http_methods(["GET"])
+@cache_control(private=True, no_cache=True)
+@reutilizar_compressao
+@condition(etag_func=_etag_elementos)
 def list_elementos(request):
     """Lista todos os elementos."""
     logger.info("API list elementos.")
     
     try:
-        response_data = service.list_elementos()
-        return JsonResponse({"elementos": response_data}, safe=False, status=200)
+        response_data = projetar_lista(service.catalogo_elementos()[0], ler_campos(request))
+        return RespostaJson({"elementos": response_data}, safe=False, status=200)
     except BusinessError as e:
-        return JsonResponse({"error": str(e)}, status=400)
+        return RespostaJson({"error": str(e)}, status=400)
     except Exception as e:
         logger.error(f"Erro ao listar elementos: {str(e)}")
-        return JsonResponse({"error": "Erro interno do servidor"}, status=500)
+        return RespostaJson({"error": "Erro interno do servidor"}, status=500)
 
 @csrf_exempt    
 @ajax_login_required
 @require_http_methods(["GET"])
+@cache_control(private=True, no_cache=True)
+@reutilizar_compressao
+@condition(etag_func=_etag_tipo_gastos)
 def list_tipo_gastos(request):
     """Lista todos os Tipos de Gastos."""
     logger.info("API list tipo gastos.")
     
     try:
-        response_data = service.list_tipo_gastos()
-        return JsonResponse({"tipoGastos": response_data}, safe=False, status=200)
+        response_data = projetar_lista(service.catalogo_tipo_gastos()[0], ler_campos(request))
+        return RespostaJson({"tipoGastos": response_data}, safe=False, status=200)
     except BusinessError as e:
-        return JsonResponse({"error": str(e)}, status=400)
+        return RespostaJson({"error": str(e)}, status=400)
     except Exception as e:
         logger.error(f"Erro ao listar tipos de gasto: {str(e)}")
-        return JsonResponse({"error": "Erro interno do servidor"}, status=500)
+        return RespostaJson({"error": "Erro interno do servidor"}, status=500)
 
 @csrf_exempt
 @ajax_login_required
-@require_http_methods(["GET"])    
+@require_http_methods(["GET"])
+@cache_control(private=True, no_cache=True)
+@reutilizar_compressao
+@condition(etag_func=_etag_tipo_gastos_por_elemento)
 def list_tipo_gastos_por_elemento(request, elemento_id):
     """Lista todos os tipos de gasto associados a um elemento."""
     logger.info(f"API list tipo gastos por elemento {elemento_id}")
     
     try:
-        response_data = service.list_tipo_gastos_por_elemento(elemento_id)
-        return JsonResponse({"tipo_gastos": response_data}, safe=False, status=200)
+        response_data = projetar_lista(service.catalogo_tipo_gastos_por_elemento(elemento_id)[0], ler_campos(request))
+        return RespostaJson({"tipo_gastos": response_data}, safe=False, status=200)
     except BusinessError as e:
-        return JsonResponse({"error": str(e)}, status=400)
+        return RespostaJson({"error": str(e)}, status=400)
     except Exception as e:
         logger.error(f"Erro ao listar tipos de gasto do elemento: {str(e)}")
-        return JsonResponse({"error": "Erro interno do servidor"}, status=500)
+        return RespostaJson({"error": "Erro interno do servidor"}, status=500)
 
 @csrf_exempt
 @ajax_login_required
@@ -271,13 +354,13 @@ def add_despesa(request):
         tipo_gasto = TipoGasto.objects.get(id=tipo_gasto_id)
 
     except User.DoesNotExist:
-        return JsonResponse({"error": "Usuário não encontrado."}, status=404)
+        return RespostaJson({"error": "Usuário não encontrado."}, status=404)
     except Departamento.DoesNotExist:
-        return JsonResponse({"error": "Departamento não encontrado."}, status=404)
+        return RespostaJson({"error": "Departamento não encontrado."}, status=404)
     except Elemento.DoesNotExist:
-        return JsonResponse({"error": "Elemento não encontrado."}, status=404)
+        return RespostaJson({"error": "Elemento não encontrado."}, status=404)
     except TipoGasto.DoesNotExist:
-        return JsonResponse({"error": "Tipo de Gasto não encontrado."}, status=404)
+        return RespostaJson({"error": "Tipo de Gasto não encontrado."}, status=404)
 
     # Criando uma nova instância de Despesa
     nova_despesa = Despesa(
@@ -292,11 +375,11 @@ def add_despesa(request):
     try:
         # Chama o serviço para adicionar a despesa
         response_data = service.add_despesa(nova_despesa)
-        return JsonResponse(response_data, status=201)
+        return RespostaJson(response_data, status=201)
     except BusinessError as e:
-        return JsonResponse({"errorr": str(e)}, status=400)
+        return RespostaJson({"errorr": str(e)}, status=400)
     except Exception as e:
-        return JsonResponse({"errorr": str(e)}, status=500)
+        return RespostaJson({"errorr": str(e)}, status=500)
     
 @csrf_exempt
 @ajax_login_required
@@ -338,84 +421,136 @@ def update_despesa(request):
 
         # Chama o serviço para atualizar a despesa
         response_data = service.update_despesa(despesa)
-        return JsonResponse(response_data, status=200)
+        return RespostaJson(response_data, status=200)
 
     except User.DoesNotExist:
-        return JsonResponse({"error": "Usuário não encontrado."}, status=404)
+        return RespostaJson({"error": "Usuário não encontrado."}, status=404)
     except Departamento.DoesNotExist:
-        return JsonResponse({"error": "Departamento não encontrado."}, status=404)
+        return RespostaJson({"error": "Departamento não encontrado."}, status=404)
     except Elemento.DoesNotExist:
-        return JsonResponse({"error": "Elemento não encontrado."}, status=404)
+        return RespostaJson({"error": "Elemento não encontrado."}, status=404)
     except TipoGasto.DoesNotExist:
-        return JsonResponse({"error": "Tipo de Gasto não encontrado."}, status=404)
+        return RespostaJson({"error": "Tipo de Gasto não encontrado."}, status=404)
     except BusinessError as e:
-        return JsonResponse({"error": str(e)}, status=400)
+        return RespostaJson({"error": str(e)}, status=400)
     except Exception as e:
         logger.error(f"Erro ao atualizar despesa: {str(e)}")
-        return JsonResponse({"error": "Erro interno do servidor"}, status=500)
+        return RespostaJson({"error": "Erro interno do servidor"}, status=500)
     
+# Validadores do GET condicional de verbas e despesas. Nas listas só vai o ETag: uma exclusão
+# não muda a última alteração, e um If-Modified-Since confirmaria um conjunto que perdeu linhas.
+# A query string entra no ETag porque página, cursor, fields e format mudam o corpo.
+def _versao_lista(etag: str) -> tuple:
+    return etag, None
+
+def _versao_despesas(request):
+    return _versao_lista(service.versao_despesas(variante=request.GET.urlencode()))
+
+def _versao_despesas_departamento(request, departamento_id):
+    return _versao_lista(service.versao_despesas(departamento_id, variante=request.GET.urlencode()))
+
+def _versao_despesas_apartir_data(request, departamento_id, data_inicio):
+    try:
+        data_inicio = datetime.strptime(data_inicio, "%Y-%m-%d").date()
+    except ValueError:
+        return None
+    return _versao_lista(service.versao_despesas(departamento_id, data_inicio, variante=request.GET.urlencode()))
+
+def _versao_despesas_periodo(request, departamento_id, data_inicio, data_termino):
+    try:
+        versao = service.versao_despesas(
+            departamento_id, periodo=(data_inicio, data_termino), variante=request.GET.urlencode()
+        )
+    except BusinessError:
+        return None
+    return _versao_lista(versao)
+
+def _versao_verbas(request):
+    return _versao_lista(service.versao_verbas(variante=request.GET.urlencode()))
+
+def _versao_verbas_departamento(request, departamento_id):
+    return _versao_lista(service.versao_verbas(departamento_id, variante=request.GET.urlencode()))
+
+def _versao_verba(request, id):
+    return service.versao_verba(id)
+
 @csrf_exempt
 @ajax_login_required
 @require_http_methods(["GET"])
-def list_despesas(request):
+@cache_control(private=True, no_cache=True)
+@condicional(_versao_despesas)
+async def list_despesas(request):
     """View que retorna despesas paginadas."""
     try:
         page = int(request.GET.get("page", 1))
         per_page = int(request.GET.get("per_page", 10))
+        cursor = request.GET.get("cursor")
 
-        resultado = service.list_despesas(page, per_page)
-        return JsonResponse(resultado, status=200)
+        resultado = await service.alist_despesas(
+            page, per_page, cursor=cursor, campos=ler_campos(request), colunar=ler_formato_colunar(request)
+        )
+        return RespostaJson(resultado, status=200)
 
+    except BusinessError as e:
+        return RespostaJson({"error": str(e)}, status=400)
     except Exception as e:
         logger.error(f"Erro ao paginar despesas: {e}")
-        return JsonResponse({"error": "Erro ao listar despesas."}, status=500)
+        return RespostaJson({"error": "Erro ao listar despesas."}, status=500)
 
 @csrf_exempt
 @ajax_login_required
 @require_http_methods(["GET"])
-def list_despesas_departamento(request, departamento_id):
+@cache_control(private=True, no_cache=True)
+@condicional(_versao_despesas_departamento)
+async def list_despesas_departamento(request, departamento_id):
     """Lista as despesas de um departamento específico com paginação."""
     try:
         # Obtendo os parâmetros de paginação da requisição (padrão: página 1, 10 itens por página)
         page = int(request.GET.get("page", 1))
         per_page = int(request.GET.get("per_page", 10))
+        cursor = request.GET.get("cursor")
 
         # Chamando o serviço para obter as despesas paginadas
-        despesas = service.list_despesas_departamento(departamento_id, page, per_page)
+        despesas = await service.alist_despesas_departamento(
+            departamento_id, page, per_page, cursor=cursor,
+            campos=ler_campos(request), colunar=ler_formato_colunar(request),
+        )
 
         # Retornando o resultado com as despesas e informações de paginação
-        return JsonResponse(despesas, status=200)
+        return RespostaJson(despesas, status=200)
     
+    except BusinessError as e:
+        return RespostaJson({"error": str(e)}, status=400)
     except ValueError as e:
-        return JsonResponse({"error": str(e)}, status=404)
+        return RespostaJson({"error": str(e)}, status=404)
     except Exception as e:
         logger.error(f"Erro ao listar despesas do departamento {departamento_id}: {e}")
-        return JsonResponse({"error": "Erro ao listar despesas do departamento."}, status=500)
+        return RespostaJson({"error": "Erro ao listar despesas do departamento."}, status=500)
 
 @csrf_exempt
 @ajax_login_required
 @require_http_methods(["GET"])
-def total_despesas_departamento(request, departamento_id):
+async def total_despesas_departamento(request, departamento_id):
     """
     Retorna o total de despesas de um departamento específico.
     """
     logger.info(f"API get total despesas departamento: {departamento_id}")
     
     try:
-        resultado = service.get_total_despesas_departamento(departamento_id)
-        return JsonResponse(resultado, status=200)
+        resultado = await service.aget_total_despesas_departamento(departamento_id)
+        return RespostaJson(resultado, status=200)
     except ValueError as e:
-        return JsonResponse({"error": str(e)}, status=404)
+        return RespostaJson({"error": str(e)}, status=404)
     except BusinessError as e:
-        return JsonResponse({"error": str(e)}, status=400)
+        return RespostaJson({"error": str(e)}, status=400)
     except Exception as e:
         logger.error(f"Erro ao obter total de despesas: {str(e)}")
-        return JsonResponse({"error": "Erro interno do servidor"}, status=500)
+        return RespostaJson({"error": "Erro interno do servidor"}, status=500)
 
 @csrf_exempt
 @ajax_login_required
 @require_http_methods(["GET"])
-def total_despesas_departamento_apartir_data(request, departamento_id, data_inicio):
+async def total_despesas_departamento_apartir_data(request, departamento_id, data_inicio):
     """
     Retorna o total das despesas de um departamento a partir de uma data específica.
     """
@@ -423,20 +558,22 @@ def total_despesas_departamento_apartir_data(request, departamento_id, data_inic
     try:
         data_inicio_date = datetime.strptime(data_inicio, "%Y-%m-%d").date()
         
-        resultado = service.get_total_despesas_departamento_apartir_data(departamento_id, data_inicio_date)
-        return JsonResponse(resultado, status=200)
+        resultado = await service.aget_total_despesas_departamento_apartir_data(departamento_id, data_inicio_date)
+        return RespostaJson(resultado, status=200)
     
     except ValueError as e:
         logger.error(f"Erro de valor: {e}")
-        return JsonResponse({"error": "Data em formato inválido. Use AAAA-MM-DD."}, status=400)
+        return RespostaJson({"error": "Data em formato inválido. Use AAAA-MM-DD."}, status=400)
     except Exception as e:
         logger.error(f"Erro ao calcular total de despesas do departamento {departamento_id} a partir da data {data_inicio}: {e}")
-        return JsonResponse({"error": "Erro interno do servidor."}, status=500)
+        return RespostaJson({"error": "Erro interno do servidor."}, status=500)
 
 @csrf_exempt
 @ajax_login_required
 @require_http_methods(["GET"])
-def list_despesas_departamento_apartir_data(request, departamento_id, data_inicio):
+@cache_control(private=True, no_cache=True)
+@condicional(_versao_despesas_apartir_data)
+async def list_despesas_departamento_apartir_data(request, departamento_id, data_inicio):
     """
     Lista paginada das despesas de um departamento a partir de uma data específica.
     """
@@ -448,17 +585,23 @@ def list_despesas_departamento_apartir_data(request, departamento_id, data_inici
         # Paginação
         page = int(request.GET.get("page", 1))
         per_page = int(request.GET.get("per_page", 10))
+        cursor = request.GET.get("cursor")
         
         # Chamada ao serviço
-        resultado = service.list_despesas_departamento_apartir_data(departamento_id, data_inicio_date, page, per_page)
-        return JsonResponse(resultado, status=200)
+        resultado = await service.alist_despesas_departamento_apartir_data(
+            departamento_id, data_inicio_date, page, per_page, cursor=cursor,
+            campos=ler_campos(request), colunar=ler_formato_colunar(request),
+        )
+        return RespostaJson(resultado, status=200)
     
+    except BusinessError as e:
+        return RespostaJson({"error": str(e)}, status=400)
     except ValueError as e:
         logger.error(f"Erro de valor: {e}")
-        return JsonResponse({"error": "Parâmetros inválidos. Verifique a data e paginação."}, status=400)
+        return RespostaJson({"error": "Parâmetros inválidos. Verifique a data e paginação."}, status=400)
     except Exception as e:
         logger.error(f"Erro ao listar despesas do departamento {departamento_id} a partir da data {data_inicio}: {e}")
-        return JsonResponse({"error": "Erro interno do servidor."}, status=500)
+        return RespostaJson({"error": "Erro interno do servidor."}, status=500)
 
 @csrf_exempt
 @ajax_login_required
@@ -475,7 +618,7 @@ def add_despesa_view(request):
             justificativa = data.get('justificativa', '')
 
             if not all([departamento_id, valor, elemento_id, tipo_gasto_id]):
-                return JsonResponse({'error': 'Dados incompletos'}, status=400)
+                return RespostaJson({'error': 'Dados incompletos'}, status=400)
 
             despesa = service.add_despesa(
                 user_id=user_id,
@@ -485,13 +628,140 @@ def add_despesa_view(request):
                 tipo_gasto_id=tipo_gasto_id,
                 justificativa=justificativa
             )
-            return JsonResponse(despesa)
+            return RespostaJson(despesa)
         except service.BusinessError as e:
-            return JsonResponse({'error': str(e)}, status=400)
+            return RespostaJson({'error': str(e)}, status=400)
         except Exception as e:
             logger.error(f"Erro ao adicionar despesa: {str(e)}")
-            return JsonResponse({'error': 'Erro interno do servidor'}, status=500)
-    return JsonResponse({'error': 'Método não permitido'}, status=405)
+            return RespostaJson({'error': 'Erro interno do servidor'}, status=500)
+    return RespostaJson({'error': 'Método não permitido'}, status=405)
+
+@csrf_exempt
+@ajax_login_required
+@require_http_methods(["POST"])
+def importar_despesas(request):
+    """
+    Importa despesas em lote para o usuário logado.
+
+    Aceita um array JSON (ou {"despesas": [...]}) ou um CSV, enviado como corpo text/csv
+    ou como arquivo no campo "arquivo" de um formulário multipart.
+    """
+    logger.info("API importar despesas.")
+    try:
+        if "arquivo" in request.FILES:
+            linhas = service.ler_csv_despesas(request.FILES["arquivo"].read().decode("utf-8-sig"))
+        elif request.content_type in ("text/csv", "application/csv"):
+            linhas = service.ler_csv_despesas(request.body.decode("utf-8-sig"))
+        else:
+            linhas = json.loads(request.body)
+            if isinstance(linhas, dict):
+                linhas = linhas.get("despesas")
+
+        resultado = service.importar_despesas(request.user.id, linhas)
+        return RespostaJson(resultado, status=400 if resultado["erros"] else 201)
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        return RespostaJson({"error": "Conteúdo inválido."}, status=400)
+    except BusinessError as e:
+        return RespostaJson({"error": str(e)}, status=400)
+    except Exception as e:
+        logger.error(f"Erro ao importar despesas: {str(e)}")
+        return RespostaJson({"error": "Erro interno do servidor"}, status=500)
+
+def _parametro_inteiro(request, nome):
+    valor = request.GET.get(nome)
+    if valor in (None, ""):
+        return None
+    try:
+        return int(valor)
+    except ValueError:
+        raise BusinessError(f"Parâmetro {nome} inválido.")
+
+def _parametro_booleano(request, nome):
+    return request.GET.get(nome, "").lower() in ("1", "true", "sim")
+
+@csrf_exempt
+@ajax_login_required
+@require_http_methods(["GET"])
+def exportar_despesas(request):
+    """
+    Exporta despesas em CSV (padrão) ou XLSX (?format=xlsx), enviadas em fluxo.
+
+    Filtros opcionais: departamento_id, subordinados=1 (inclui a subárvore),
+    data_inicio e data_termino (YYYY-MM-DD) e elemento_id.
+    """
+    logger.info("API exportar despesas.")
+    try:
+        cabecalho, linhas = service.exportar_despesas(
+            departamento_id=_parametro_inteiro(request, "departamento_id"),
+            incluir_subordinados=_parametro_booleano(request, "subordinados"),
+            data_inicio=request.GET.get("data_inicio"),
+            data_termino=request.GET.get("data_termino"),
+            elemento_id=_parametro_inteiro(request, "elemento_id"),
+        )
+        return resposta_exportacao(
+            "despesas", cabecalho, linhas, request.GET.get("format", "csv"), isinstance(request, ASGIRequest)
+        )
+    except BusinessError as e:
+        return RespostaJson({"error": str(e)}, status=400)
+    except Exception as e:
+        logger.error(f"Erro ao exportar despesas: {str(e)}")
+        return RespostaJson({"error": "Erro interno do servidor"}, status=500)
+
+@csrf_exempt
+@ajax_login_required
+@require_http_methods(["GET"])
+def detalhar_despesas_departamento(request, departamento_id):
+    """
+    Totais de despesas do departamento por elemento e por tipo de gasto.
+
+    Filtros opcionais: subordinados=1 (inclui a subárvore), data_inicio e data_termino
+    (YYYY-MM-DD), por_mes=1 (detalha cada total por mês) e format=columnar.
+    """
+    logger.info(f"API detalhar despesas departamento {departamento_id}")
+    try:
+        colunar = ler_formato_colunar(request)
+        resultado = service.detalhar_despesas_departamento(
+            departamento_id,
+            data_inicio=request.GET.get("data_inicio"),
+            data_termino=request.GET.get("data_termino"),
+            incluir_subordinados=_parametro_booleano(request, "subordinados"),
+            por_mes=_parametro_booleano(request, "por_mes"),
+        )
+        if colunar:
+            colunar_listas(resultado, ("por_elemento", "por_tipo_gasto", "por_mes"))
+        return RespostaJson(resultado, status=200)
+    except BusinessError as e:
+        return RespostaJson({"error": str(e)}, status=400)
+    except Exception as e:
+        logger.error(f"Erro ao detalhar despesas do departamento {departamento_id}: {str(e)}")
+        return RespostaJson({"error": "Erro interno do servidor"}, status=500)
+
+@csrf_exempt
+@ajax_login_required
+@require_http_methods(["GET"])
+def exportar_verbas(request):
+    """
+    Exporta verbas em CSV (padrão) ou XLSX (?format=xlsx), enviadas em fluxo.
+
+    Filtros opcionais: departamento_id, subordinados=1 (inclui a subárvore),
+    ano_inicio e ano_termino.
+    """
+    logger.info("API exportar verbas.")
+    try:
+        cabecalho, linhas = service.exportar_verbas(
+            departamento_id=_parametro_inteiro(request, "departamento_id"),
+            incluir_subordinados=_parametro_booleano(request, "subordinados"),
+            ano_inicio=_parametro_inteiro(request, "ano_inicio"),
+            ano_termino=_parametro_inteiro(request, "ano_termino"),
+        )
+        return resposta_exportacao(
+            "verbas", cabecalho, linhas, request.GET.get("format", "csv"), isinstance(request, ASGIRequest)
+        )
+    except BusinessError as e:
+        return RespostaJson({"error": str(e)}, status=400)
+    except Exception as e:
+        logger.error(f"Erro ao exportar verbas: {str(e)}")
+        return RespostaJson({"error": "Erro interno do servidor"}, status=500)
 
 @csrf_exempt
 @ajax_login_required
@@ -507,7 +777,7 @@ def update_subordinacao(request, id):
     
     # Previne laços de subordinação direta
     if id_departamento_a == id_departamento_b:
-        return JsonResponse(
+        return RespostaJson(
             {"error": "Um departamento não pode ser subordinado a si mesmo."}, 
             status=400
         )
@@ -519,12 +789,12 @@ def update_subordinacao(request, id):
             subordinado_id=id_departamento_b,
             observacao=observacao
         )
-        return JsonResponse(subordinacao, status=200)
+        return RespostaJson(subordinacao, status=200)
     except BusinessError as e:
-        return JsonResponse({"error": str(e)}, status=400)
+        return RespostaJson({"error": str(e)}, status=400)
     except Exception as e:
         logger.error(f"Erro ao atualizar subordinação: {str(e)}")
-        return JsonResponse({"error": "Erro interno do servidor"}, status=500)
+        return RespostaJson({"error": "Erro interno do servidor"}, status=500)
 
 @csrf_exempt
 @ajax_login_required
@@ -535,12 +805,12 @@ def delete_subordinacao(request, id):
     
     try:
         service.delete_subordinacao(id)
-        return JsonResponse({"message": "Subordinação removida com sucesso."}, status=200)
+        return RespostaJson({"message": "Subordinação removida com sucesso."}, status=200)
     except BusinessError as e:
-        return JsonResponse({"error": str(e)}, status=400)
+        return RespostaJson({"error": str(e)}, status=400)
     except Exception as e:
         logger.error(f"Erro ao remover subordinação: {str(e)}")
-        return JsonResponse({"error": "Erro interno do servidor"}, status=500)
+        return RespostaJson({"error": "Erro interno do servidor"}, status=500)
 
 @csrf_exempt
 @ajax_login_required
@@ -553,7 +823,7 @@ def add_verba(request):
         request: Requisição HTTP contendo os dados da verba
         
     Returns:
-        JsonResponse: Resposta HTTP com os dados da verba criada
+        RespostaJson: Resposta HTTP com os dados da verba criada
         
     Raises:
         HTTP_400_BAD_REQUEST: Se os dados forem inválidos
@@ -569,7 +839,7 @@ def add_verba(request):
         required_fields = ['valor', 'departamento_id', 'ano']
         for field in required_fields:
             if field not in data:
-                return JsonResponse(
+                return RespostaJson(
                     {"error": f"Campo obrigatório não fornecido: {field}"},
                     status=400
                 )
@@ -578,7 +848,7 @@ def add_verba(request):
         try:
             valor = Decimal(str(data['valor']))
         except (ValueError, InvalidOperation):
-            return JsonResponse(
+            return RespostaJson(
                 {"error": "Valor inválido. Forneça um número válido."},
                 status=400
             )
@@ -587,7 +857,7 @@ def add_verba(request):
         try:
             ano = int(data['ano'])
         except (ValueError, TypeError):
-            return JsonResponse(
+            return RespostaJson(
                 {"error": "Ano inválido. Forneça um número inteiro."},
                 status=400
             )
@@ -601,13 +871,13 @@ def add_verba(request):
             descricao=data.get('descricao', '')
         )
         
-        return JsonResponse(verba, status=201)
+        return RespostaJson(verba, status=201)
         
     except BusinessError as e:
-        return JsonResponse({"error": str(e)}, status=400)
+        return RespostaJson({"error": str(e)}, status=400)
     except Exception as e:
         logger.error(f"Erro ao adicionar verba: {str(e)}", exc_info=True)
-        return JsonResponse(
+        return RespostaJson(
             {"error": "Erro interno do servidor"},
             status=500
         )
@@ -624,7 +894,7 @@ def update_verba(request, id):
         id: ID da verba a ser atualizada
         
     Returns:
-        JsonResponse: Resposta HTTP com os dados da verba atualizada
+        RespostaJson: Resposta HTTP com os dados da verba atualizada
         
     Raises:
         HTTP_400_BAD_REQUEST: Se os dados forem inválidos
@@ -641,7 +911,7 @@ def update_verba(request, id):
         required_fields = ['valor', 'departamento_id', 'ano']
         for field in required_fields:
             if field not in data:
-                return JsonResponse(
+                return RespostaJson(
                     {"error": f"Campo obrigatório não fornecido: {field}"},
                     status=400
                 )
@@ -650,7 +920,7 @@ def update_verba(request, id):
         try:
             valor = Decimal(str(data['valor']))
         except (ValueError, InvalidOperation):
-            return JsonResponse(
+            return RespostaJson(
                 {"error": "Valor inválido. Forneça um número válido."},
                 status=400
             )
@@ -659,7 +929,7 @@ def update_verba(request, id):
         try:
             ano = int(data['ano'])
         except (ValueError, TypeError):
-            return JsonResponse(
+            return RespostaJson(
                 {"error": "Ano inválido. Forneça um número inteiro."},
                 status=400
             )
@@ -673,13 +943,13 @@ def update_verba(request, id):
             descricao=data.get('descricao', '')
         )
         
-        return JsonResponse(verba, status=200)
+        return RespostaJson(verba, status=200)
         
     except BusinessError as e:
-        return JsonResponse({"error": str(e)}, status=400)
+        return RespostaJson({"error": str(e)}, status=400)
     except Exception as e:
         logger.error(f"Erro ao atualizar verba: {str(e)}", exc_info=True)
-        return JsonResponse(
+        return RespostaJson(
             {"error": "Erro interno do servidor"},
             status=500
         )
@@ -696,7 +966,7 @@ def delete_verba(request, id):
         id: ID da verba a ser removida
         
     Returns:
-        JsonResponse: Resposta HTTP indicando sucesso
+        RespostaJson: Resposta HTTP indicando sucesso
         
     Raises:
         HTTP_404_NOT_FOUND: Se a verba não for encontrada
@@ -706,13 +976,13 @@ def delete_verba(request, id):
     
     try:
         service.delete_verba(id)
-        return JsonResponse({"message": "Verba excluída com sucesso"}, status=200)
+        return RespostaJson({"message": "Verba excluída com sucesso"}, status=200)
         
     except BusinessError as e:
-        return JsonResponse({"error": str(e)}, status=404)
+        return RespostaJson({"error": str(e)}, status=404)
     except Exception as e:
         logger.error(f"Erro ao remover verba: {str(e)}", exc_info=True)
-        return JsonResponse(
+        return RespostaJson(
             {"error": "Erro interno do servidor"},
             status=500
         )
@@ -720,6 +990,8 @@ def delete_verba(request, id):
 @csrf_exempt
 @ajax_login_required
 @require_http_methods(["GET"])
+@cache_control(private=True, no_cache=True)
+@condicional(_versao_verba)
 def get_verba(request, id):
     """
     Retorna os dados de uma verba específica.
@@ -729,7 +1001,7 @@ def get_verba(request, id):
         id: ID da verba
         
     Returns:
-        JsonResponse: Resposta HTTP com os dados da verba
+        RespostaJson: Resposta HTTP com os dados da verba
         
     Raises:
         HTTP_404_NOT_FOUND: Se a verba não for encontrada
@@ -739,13 +1011,13 @@ def get_verba(request, id):
     
     try:
         verba = service.get_verba(id)
-        return JsonResponse(verba, status=200)
+        return RespostaJson(verba, status=200)
         
     except BusinessError as e:
-        return JsonResponse({"error": str(e)}, status=404)
+        return RespostaJson({"error": str(e)}, status=404)
     except Exception as e:
         logger.error(f"Erro ao buscar verba: {str(e)}", exc_info=True)
-        return JsonResponse(
+        return RespostaJson(
             {"error": "Erro interno do servidor"},
             status=500
         )
@@ -753,6 +1025,8 @@ def get_verba(request, id):
 @csrf_exempt
 @ajax_login_required
 @require_http_methods(["GET"])
+@cache_control(private=True, no_cache=True)
+@condicional(_versao_verbas)
 def list_verbas(request):
     """
     Lista todas as verbas com paginação.
@@ -761,7 +1035,7 @@ def list_verbas(request):
         request: Requisição HTTP com parâmetros de paginação opcionais
         
     Returns:
-        JsonResponse: Lista de verbas serializadas com informações de paginação
+        RespostaJson: Lista de verbas serializadas com informações de paginação
     """
     try:
         logger.info(f"Iniciando listagem de verbas. Usuário: {request.user.username}")
@@ -769,38 +1043,42 @@ def list_verbas(request):
         # Verifica se o usuário está autenticado
         if not request.user.is_authenticated:
             logger.error(f"Usuário não autenticado tentou acessar listagem de verbas")
-            return JsonResponse({'error': 'Usuário não autenticado'}, status=401)
+            return RespostaJson({'error': 'Usuário não autenticado'}, status=401)
         
         # Obter parâmetros de paginação
         page = int(request.GET.get('page', 1))
         per_page = int(request.GET.get('per_page', 10))
         
         # Lista as verbas com paginação
-        result = service.list_verbas(page=page, per_page=per_page)
+        result = service.list_verbas(
+            page=page, per_page=per_page, campos=ler_campos(request), colunar=ler_formato_colunar(request)
+        )
         
         # Verifica se há verbas
         if not result['verbas']:
             logger.info("Nenhuma verba encontrada")
-            return JsonResponse({
+            return RespostaJson({
                 'verbas': [], 
                 'paginacao': result['paginacao'],
                 'message': 'Nenhuma verba encontrada'
             })
             
         logger.info(f"Listagem de verbas concluída com sucesso. Página {page} de {result['paginacao']['total_paginas']}")
-        return JsonResponse(result)
+        return RespostaJson(result)
         
     except BusinessError as e:
         logger.error(f"Erro de negócio ao listar verbas: {str(e)}")
-        return JsonResponse({'error': str(e)}, status=400)
+        return RespostaJson({'error': str(e)}, status=400)
     except Exception as e:
         logger.error(f"Erro ao listar verbas: {str(e)}", exc_info=True)
-        return JsonResponse({'error': 'Erro interno ao listar verbas'}, status=500)
+        return RespostaJson({'error': 'Erro interno ao listar verbas'}, status=500)
 
 @csrf_exempt
 @require_http_methods(["GET"])
 @ajax_login_required
-def list_verbas_departamento(request, departamento_id):
+@cache_control(private=True, no_cache=True)
+@condicional(_versao_verbas_departamento)
+async def list_verbas_departamento(request, departamento_id):
     """
     Lista todas as verbas de um departamento específico.
     
@@ -809,38 +1087,36 @@ def list_verbas_departamento(request, departamento_id):
         departamento_id: ID do departamento
         
     Returns:
-        JsonResponse: Lista de verbas do departamento serializadas
+        RespostaJson: Lista de verbas do departamento serializadas
     """
     try:
-        logger.info(f"Iniciando listagem de verbas do departamento {departamento_id}. Usuário: {request.user.username}")
-        
-        # Verifica se o usuário está autenticado
-        if not request.user.is_authenticated:
-            logger.error(f"Usuário não autenticado tentou acessar listagem de verbas do departamento {departamento_id}")
-            return JsonResponse({'error': 'Usuário não autenticado'}, status=401)
+        user = await request.auser()
+        logger.info(f"Iniciando listagem de verbas do departamento {departamento_id}. Usuário: {user.username}")
             
         # Lista as verbas do departamento
-        verbas = service.list_verbas_departamento(departamento_id)
+        verbas = await service.alist_verbas_departamento(
+            departamento_id, campos=ler_campos(request), colunar=ler_formato_colunar(request)
+        )
         
         # Verifica se há verbas
         if not verbas:
             logger.info(f"Nenhuma verba encontrada para o departamento {departamento_id}")
-            return JsonResponse({'verbas': [], 'message': f'Nenhuma verba encontrada para o departamento {departamento_id}'})
+            return RespostaJson({'verbas': [], 'message': f'Nenhuma verba encontrada para o departamento {departamento_id}'})
             
         logger.info(f"Listagem de verbas do departamento {departamento_id} concluída com sucesso. Total: {len(verbas)}")
-        return JsonResponse({'verbas': verbas})
+        return RespostaJson({'verbas': verbas})
         
     except BusinessError as e:
         logger.error(f"Erro de negócio ao listar verbas do departamento {departamento_id}: {str(e)}")
-        return JsonResponse({'error': str(e)}, status=400)
+        return RespostaJson({'error': str(e)}, status=400)
     except Exception as e:
         logger.error(f"Erro ao listar verbas do departamento {departamento_id}: {str(e)}", exc_info=True)
-        return JsonResponse({'error': 'Erro interno ao listar verbas do departamento'}, status=500)
+        return RespostaJson({'error': 'Erro interno ao listar verbas do departamento'}, status=500)
 
 @csrf_exempt
 @require_http_methods(["GET"])
 @ajax_login_required
-def get_verba_departamento_ano(request, departamento_id, ano):
+async def get_verba_departamento_ano(request, departamento_id, ano):
     """
     Retorna a verba de um departamento para um ano específico.
     
@@ -850,7 +1126,7 @@ def get_verba_departamento_ano(request, departamento_id, ano):
         ano: Ano da verba
         
     Returns:
-        JsonResponse: Resposta HTTP com os dados da verba
+        RespostaJson: Resposta HTTP com os dados da verba
         
     Raises:
         HTTP_400_BAD_REQUEST: Se o ano for inválido
@@ -864,19 +1140,19 @@ def get_verba_departamento_ano(request, departamento_id, ano):
         try:
             ano = int(ano)
         except (ValueError, TypeError):
-            return JsonResponse(
+            return RespostaJson(
                 {"error": "Ano inválido. Forneça um número inteiro."},
                 status=400
             )
         
-        verba = service.get_verba_departamento_ano(departamento_id, ano)
-        return JsonResponse(verba, status=200)
+        verba = await service.aget_verba_departamento_ano(departamento_id, ano)
+        return RespostaJson(verba, status=200)
         
     except BusinessError as e:
-        return JsonResponse({"error": str(e)}, status=404)
+        return RespostaJson({"error": str(e)}, status=404)
     except Exception as e:
         logger.error(f"Erro ao buscar verba do departamento: {str(e)}", exc_info=True)
-        return JsonResponse(
+        return RespostaJson(
             {"error": "Erro interno do servidor"},
             status=500
         )
@@ -884,7 +1160,7 @@ def get_verba_departamento_ano(request, departamento_id, ano):
 @csrf_exempt
 @ajax_login_required
 @require_http_methods(["GET"])
-def get_ultima_verba_departamento(request, departamento_id):
+async def get_ultima_verba_departamento(request, departamento_id):
     """
     Retorna a última verba definida para um departamento específico.
     
@@ -893,7 +1169,7 @@ def get_ultima_verba_departamento(request, departamento_id):
         departamento_id: ID do departamento
         
     Returns:
-        JsonResponse: Dados da última verba definida para o departamento
+        RespostaJson: Dados da última verba definida para o departamento
         
     Raises:
         HTTP_404_NOT_FOUND: Se o departamento não for encontrado ou não houver verba
@@ -903,62 +1179,99 @@ def get_ultima_verba_departamento(request, departamento_id):
     
     try:
         # Obtém a última verba para o departamento
-        ultima_verba = service.get_ultima_verba_departamento(departamento_id)
+        ultima_verba = await service.aget_ultima_verba_departamento(departamento_id)
         
         if not ultima_verba:
             logger.info(f"Nenhuma verba encontrada para o departamento {departamento_id}")
-            return JsonResponse({'error': f'Nenhuma verba encontrada para o departamento {departamento_id}'}, status=404)
+            return RespostaJson({'error': f'Nenhuma verba encontrada para o departamento {departamento_id}'}, status=404)
         
         logger.info(f"Última verba do departamento {departamento_id} recuperada com sucesso")
-        return JsonResponse(ultima_verba, status=200)
+        return RespostaJson(ultima_verba, status=200)
         
     except BusinessError as e:
         logger.error(f"Erro de negócio ao buscar última verba do departamento {departamento_id}: {str(e)}")
-        return JsonResponse({'error': str(e)}, status=404)
+        return RespostaJson({'error': str(e)}, status=404)
     except Exception as e:
         logger.error(f"Erro ao buscar última verba do departamento {departamento_id}: {str(e)}", exc_info=True)
-        return JsonResponse({'error': 'Erro interno ao buscar última verba'}, status=500)
+        return RespostaJson({'error': 'Erro interno ao buscar última verba'}, status=500)
 
 @csrf_exempt
 @ajax_login_required
 @require_http_methods(["GET"])
-def list_despesas_departamento_periodo(request, departamento_id, data_inicio, data_termino):
+@cache_control(private=True, no_cache=True)
+@condicional(_versao_despesas_periodo)
+async def list_despesas_departamento_periodo(request, departamento_id, data_inicio, data_termino):
     """Lista despesas de um departamento em um período específico"""
     try:
         page = int(request.GET.get('page', 1))
         per_page = int(request.GET.get('per_page', 10))
 
-        despesas = service.list_despesas_departamento_periodo(
+        despesas = await service.alist_despesas_departamento_periodo(
             departamento_id=departamento_id,
             data_inicio=data_inicio,
             data_termino=data_termino,
             page=page,
-            per_page=per_page
+            per_page=per_page,
+            campos=ler_campos(request),
+            colunar=ler_formato_colunar(request),
         )
-        return JsonResponse(despesas, safe=False)
+        return RespostaJson(despesas, safe=False)
     except BusinessError as e:
-        return JsonResponse({"error": str(e)}, status=400)
+        return RespostaJson({"error": str(e)}, status=400)
     except Exception as e:
         logger.error(f"Erro ao listar despesas do departamento: {str(e)}")
-        return JsonResponse({"error": "Erro interno do servidor"}, status=500)
+        return RespostaJson({"error": "Erro interno do servidor"}, status=500)
 
 @csrf_exempt
 @ajax_login_required
 @require_http_methods(["GET"])
-def total_despesas_departamento_periodo(request, departamento_id, data_inicio, data_termino):
+async def total_despesas_departamento_periodo(request, departamento_id, data_inicio, data_termino):
     """Retorna o valor total das despesas de um departamento em um período específico"""
     try:
-        total = service.total_despesas_departamento_periodo(
+        total = await service.atotal_despesas_departamento_periodo(
             departamento_id=departamento_id,
             data_inicio=data_inicio,
             data_termino=data_termino
         )
-        return JsonResponse({"total": str(total)}, safe=False)
+        return RespostaJson({"total": str(total)}, safe=False)
     except BusinessError as e:
-        return JsonResponse({"error": str(e)}, status=400)
+        return RespostaJson({"error": str(e)}, status=400)
     except Exception as e:
         logger.error(f"Erro ao calcular total de despesas do departamento: {str(e)}")
-        return JsonResponse({"error": "Erro interno do servidor"}, status=500)
+        return RespostaJson({"error": "Erro interno do servidor"}, status=500)
+
+@csrf_exempt
+@ajax_login_required
+@require_http_methods(["GET"])
+def get_orcamento_consolidado_departamento(request, departamento_id, ano):
+    """
+    Retorna verba e despesas de um departamento e de toda a sua subárvore em um ano.
+    
+    Args:
+        request: Requisição HTTP
+        departamento_id: ID do departamento raiz
+        ano: Ano de referência
+        
+    Returns:
+        RespostaJson: Totais por departamento e totais consolidados
+        
+    Raises:
+        HTTP_404_NOT_FOUND: Se o departamento não for encontrado ou o ano for inválido
+        HTTP_500_INTERNAL_SERVER_ERROR: Se ocorrer um erro interno
+    """
+    logger.info(f"API get orcamento consolidado: departamento_id={departamento_id}, ano={ano}")
+
+    colunar = ler_formato_colunar(request)
+    try:
+        resultado = service.get_orcamento_consolidado_departamento(departamento_id, ano)
+        if colunar:
+            colunar_listas(resultado, ("departamentos",))
+        return RespostaJson(resultado, status=200)
+    except BusinessError as e:
+        return RespostaJson({"error": str(e)}, status=404)
+    except Exception as e:
+        logger.error(f"Erro ao consolidar orçamento do departamento: {str(e)}", exc_info=True)
+        return RespostaJson({"error": "Erro interno do servidor"}, status=500)
 
 @csrf_exempt
 @ajax_login_required
@@ -969,12 +1282,12 @@ def delete_despesa(request, id):
     
     try:
         service.delete_despesa(id)
-        return JsonResponse({"success": True}, status=200)
+        return RespostaJson({"success": True}, status=200)
     except BusinessError as e:
-        return JsonResponse({"error": str(e)}, status=400)
+        return RespostaJson({"error": str(e)}, status=400)
     except Exception as e:
         logger.error(f"Erro ao remover despesa: {str(e)}")
-        return JsonResponse({"error": "Erro interno do servidor"}, status=500)
+        return RespostaJson({"error": "Erro interno do servidor"}, status=500)
 
 @csrf_exempt
 @ajax_login_required
@@ -992,12 +1305,12 @@ def add_elemento(request):
             elemento=elemento,
             descricao=descricao
         )
-        return JsonResponse(new_elemento, status=201)
+        return RespostaJson(new_elemento, status=201)
     except BusinessError as e:
-        return JsonResponse({"error": str(e)}, status=400)
+        return RespostaJson({"error": str(e)}, status=400)
     except Exception as e:
         logger.error(f"Erro ao adicionar elemento: {str(e)}")
-        return JsonResponse({"error": "Erro interno do servidor"}, status=500)
+        return RespostaJson({"error": "Erro interno do servidor"}, status=500)
 
 @csrf_exempt
 @ajax_login_required
@@ -1017,12 +1330,12 @@ def update_elemento(request):
             elemento=elemento,
             descricao=descricao
         )
-        return JsonResponse(updated_elemento, status=200)
+        return RespostaJson(updated_elemento, status=200)
     except BusinessError as e:
-        return JsonResponse({"error": str(e)}, status=400)
+        return RespostaJson({"error": str(e)}, status=400)
     except Exception as e:
         logger.error(f"Erro ao atualizar elemento: {str(e)}")
-        return JsonResponse({"error": "Erro interno do servidor"}, status=500)
+        return RespostaJson({"error": "Erro interno do servidor"}, status=500)
 
 @csrf_exempt
 @ajax_login_required
@@ -1033,12 +1346,12 @@ def delete_elemento(request, id):
     
     try:
         service.delete_elemento(id)
-        return JsonResponse({}, status=204)
+        return RespostaJson({}, status=204)
     except BusinessError as e:
-        return JsonResponse({"error": str(e)}, status=400)
+        return RespostaJson({"error": str(e)}, status=400)
     except Exception as e:
         logger.error(f"Erro ao deletar elemento: {str(e)}")
-        return JsonResponse({"error": "Erro interno do servidor"}, status=500)
+        return RespostaJson({"error": "Erro interno do servidor"}, status=500)
 
 @csrf_exempt
 @ajax_login_required
@@ -1056,12 +1369,12 @@ def add_tipo_gasto(request):
             tipo_gasto=tipo_gasto,
             descricao=descricao
         )
-        return JsonResponse(new_tipo_gasto, status=201)
+        return RespostaJson(new_tipo_gasto, status=201)
     except BusinessError as e:
-        return JsonResponse({"error": str(e)}, status=400)
+        return RespostaJson({"error": str(e)}, status=400)
     except Exception as e:
         logger.error(f"Erro ao adicionar tipo de gasto: {str(e)}")
-        return JsonResponse({"error": "Erro interno do servidor"}, status=500)
+        return RespostaJson({"error": "Erro interno do servidor"}, status=500)
 
 @csrf_exempt
 @ajax_login_required
@@ -1081,12 +1394,12 @@ def update_tipo_gasto(request):
             tipo_gasto=tipo_gasto,
             descricao=descricao
         )
-        return JsonResponse(updated_tipo_gasto, status=200)
+        return RespostaJson(updated_tipo_gasto, status=200)
     except BusinessError as e:
-        return JsonResponse({"error": str(e)}, status=400)
+        return RespostaJson({"error": str(e)}, status=400)
     except Exception as e:
         logger.error(f"Erro ao atualizar tipo de gasto: {str(e)}")
-        return JsonResponse({"error": "Erro interno do servidor"}, status=500)
+        return RespostaJson({"error": "Erro interno do servidor"}, status=500)
 
 @csrf_exempt
 @ajax_login_required
@@ -1097,12 +1410,12 @@ def delete_tipo_gasto(request, id):
     
     try:
         service.delete_tipo_gasto(id)
-        return JsonResponse({}, status=204)
+        return RespostaJson({}, status=204)
     except BusinessError as e:
-        return JsonResponse({"error": str(e)}, status=400)
+        return RespostaJson({"error": str(e)}, status=400)
     except Exception as e:
         logger.error(f"Erro ao deletar tipo de gasto: {str(e)}")
-        return JsonResponse({"error": "Erro interno do servidor"}, status=500)
+        return RespostaJson({"error": "Erro interno do servidor"}, status=500)
 
 @csrf_exempt
 @ajax_login_required
@@ -1120,12 +1433,12 @@ def add_elemento_tipo_gasto(request):
             elemento_id=elemento_id,
             tipo_gasto_id=tipo_gasto_id
         )
-        return JsonResponse(new_relacao, status=201)
+        return RespostaJson(new_relacao, status=201)
     except BusinessError as e:
-        return JsonResponse({"error": str(e)}, status=400)
+        return RespostaJson({"error": str(e)}, status=400)
     except Exception as e:
         logger.error(f"Erro ao adicionar relacionamento: {str(e)}")
-        return JsonResponse({"error": "Erro interno do servidor"}, status=500)
+        return RespostaJson({"error": "Erro interno do servidor"}, status=500)
 
 @csrf_exempt
 @ajax_login_required
@@ -1136,12 +1449,12 @@ def delete_elemento_tipo_gasto(request, id):
     
     try:
         service.delete_elemento_tipo_gasto(id)
-        return JsonResponse({}, status=204)
+        return RespostaJson({}, status=204)
     except BusinessError as e:
-        return JsonResponse({"error": str(e)}, status=400)
+        return RespostaJson({"error": str(e)}, status=400)
     except Exception as e:
         logger.error(f"Erro ao deletar relacionamento: {str(e)}")
-        return JsonResponse({"error": "Erro interno do servidor"}, status=500)
+        return RespostaJson({"error": "Erro interno do servidor"}, status=500)
 
 @csrf_exempt
 @ajax_login_required
@@ -1152,12 +1465,12 @@ def total_despesas_departamento_elemento(request, departamento_id, elemento_id):
     
     try:
         total = service.total_despesas_departamento_elemento(departamento_id, elemento_id)
-        return JsonResponse({"total_despesas": float(total)}, status=200)
+        return RespostaJson({"total_despesas": float(total)}, status=200)
     except BusinessError as e:
-        return JsonResponse({"error": str(e)}, status=400)
+        return RespostaJson({"error": str(e)}, status=400)
     except Exception as e:
         logger.error(f"Erro ao buscar total de despesas do departamento por elemento: {str(e)}")
-        return JsonResponse({"error": "Erro interno do servidor"}, status=500)
+        return RespostaJson({"error": "Erro interno do servidor"}, status=500)
 
 @csrf_exempt
 @ajax_login_required
@@ -1168,9 +1481,59 @@ def delete_departamento(request, id):
     
     try:
         response_data = service.delete_departamento(departamento_id=id)
-        return JsonResponse(response_data, status=200)
+        return RespostaJson(response_data, status=200)
     except BusinessError as e:
-        return JsonResponse({"error": str(e)}, status=400)
+        return RespostaJson({"error": str(e)}, status=400)
     except Exception as e:
         logger.error(f"Erro ao deletar departamento: {str(e)}")
-        return JsonResponse({"error": "Erro interno do servidor"}, status=500)
\ No newline at end of file
+        return RespostaJson({"error": "Erro interno do servidor"}, status=500)
+
+
+@csrf_exempt
+@ajax_login_required
+@require_http_methods(["GET"])
+def buscar(request):
+    """Busca em departamentos, elementos, tipos de gasto e despesas (?q=, page, per_page)."""
+    logger.info("API buscar.")
+    try:
+        page = int(request.GET.get("page", 1))
+        per_page = int(request.GET.get("per_page", 20))
+        resultado = service.buscar(request.GET.get("q", ""), page, per_page)
+        resultado["resultados"] = projetar_lista(resultado["resultados"], ler_campos(request))
+        return RespostaJson(resultado, status=200)
+    except ValueError:
+        return RespostaJson({"error": "Parâmetros de paginação inválidos."}, status=400)
+    except BusinessError as e:
+        return RespostaJson({"error": str(e)}, status=400)
+    except Exception as e:
+        logger.error(f"Erro na busca: {str(e)}")
+        return RespostaJson({"error": "Erro interno do servidor"}, status=500)
+
+@csrf_exempt
+@ajax_login_required
+@require_http_methods(["GET"])
+async def dashboard(request):
+    """Painéis do dashboard dos departamentos do usuário (?ano=, departamento=, ultimas=, format=)."""
+    logger.info("API dashboard.")
+    try:
+        colunar = ler_formato_colunar(request)
+        user = await request.auser()
+        departamento_id = _parametro_inteiro(request, "departamento")
+        resultado = await service.adashboard(
+            user.id,
+            ano=_parametro_inteiro(request, "ano"),
+            departamento_id=departamento_id,
+            ultimas=int(request.GET.get("ultimas", 5)),
+        )
+        if departamento_id is not None and not resultado["departamentos"]:
+            return RespostaJson({"error": "Departamento não encontrado entre os do usuário."}, status=404)
+        if colunar:
+            colunar_listas(resultado, ("departamentos", "gasto_por_elemento", "gasto_por_mes", "ultimas_despesas"))
+        return RespostaJson(resultado, status=200)
+    except ValueError:
+        return RespostaJson({"error": "Parâmetros inválidos."}, status=400)
+    except BusinessError as e:
+        return RespostaJson({"error": str(e)}, status=400)
+    except Exception as e:
+        logger.error(f"Erro ao montar dashboard: {str(e)}", exc_info=True)
+        return RespostaJson({"error": "Erro interno do servidor"}, status=500)
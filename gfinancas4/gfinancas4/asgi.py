@@ -0,0 +1,26 @@
+"""
+ASGI config for gfinancas4 project.
+
+It exposes the ASGI callable as a module-level variable named ``application``.
+Sob ASGI, as views assíncronas (listagens e totais de despesas e verbas) atendem
+várias requisições por worker enquanto esperam o banco. Use DB_CONN_MAX_AGE=0:
+conexões persistentes não são reaproveitadas entre requisições assíncronas.
+As exportações (core/exportacao.py) respondem com um iterador assíncrono e seguem
+em fluxo também aqui, sem juntar o arquivo em memória antes do envio.
+
+    uvicorn gfinancas4.gfinancas4.asgi:application --workers 4
+
+For more information on this file, see
+https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
+"""
+
+import os
+
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault(
+    "DJANGO_SETTINGS_MODULE",
+    "gfinancas4.gfinancas4.settings",
+)
+
+application = get_asgi_application()
@@ -79,6 +79,9 @@ LOCAL_APPS = [
 INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS
 
 MIDDLEWARE = [
+    "gfinancas4.base.middlewares.DesempenhoMiddleware",
+    "gfinancas4.base.middlewares.DetectorConsultasMiddleware",
+    "gfinancas4.base.middlewares.CompressaoMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -94,6 +97,29 @@ MIDDLEWARE = [
 #     before_common = MIDDLEWARE.index("django.middleware.common.CommonMiddleware")
 #     MIDDLEWARE.insert(before_common, "corsheaders.middleware.CorsMiddleware")
 
+# Renderizador das respostas JSON (gfinancas4/base/renderizacao.py): auto, orjson, padrao ou django
+RENDERIZADOR_JSON = config("RENDERIZADOR_JSON", default="auto")
+
+# Compressão das respostas (gfinancas4/base/compressao.py): codificações em ordem de preferência
+# (br e zstd só valem com os pacotes brotli e zstandard instalados), tamanho mínimo em bytes e
+# cache dos corpos comprimidos do catálogo
+COMPRESSAO_CODIFICACOES = config("COMPRESSAO_CODIFICACOES", default="zstd,br,gzip", cast=Csv())
+COMPRESSAO_MINIMO_BYTES = config("COMPRESSAO_MINIMO_BYTES", default=1024, cast=int)
+COMPRESSAO_CACHE = config("COMPRESSAO_CACHE", default="compressao")
+
+# Threads que rodam os painéis do dashboard em paralelo (só PostgreSQL); 0 roda em sequência
+# na conexão da requisição. Cada thread mantém uma conexão própria com o banco
+DASHBOARD_PAINEIS_PARALELOS = config("DASHBOARD_PAINEIS_PARALELOS", default=0, cast=int)
+
+# Token exigido em /api/metrics (Authorization: Bearer ...); vazio restringe o endpoint a usuários staff
+METRICAS_TOKEN = config("METRICAS_TOKEN", default="")
+
+# Detector de N+1 e consultas lentas (gfinancas4/base/detector.py), para desenvolvimento e homologação
+DETECTOR_CONSULTAS = config("DETECTOR_CONSULTAS", default=False, cast=bool)
+DETECTOR_CONSULTAS_REPETICOES = config("DETECTOR_CONSULTAS_REPETICOES", default=5, cast=int)
+DETECTOR_CONSULTAS_LENTA_MS = config("DETECTOR_CONSULTAS_LENTA_MS", default=200, cast=float)
+DETECTOR_CONSULTAS_LEVANTAR = config("DETECTOR_CONSULTAS_LEVANTAR", default=False, cast=bool)
+
 ROOT_URLCONF = "gfinancas4.gfinancas4.urls"
 
 TEMPLATES = [
@@ -113,6 +139,7 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = "gfinancas4.gfinancas4.wsgi.application"
+ASGI_APPLICATION = "gfinancas4.gfinancas4.asgi.application"
 
 AUTH_USER_MODEL = "accounts.User"
 
@@ -124,11 +151,38 @@ DATABASE_URL = config("DATABASE_URL")
 DATABASES = {
     "default": dj_database_url.parse(
         DATABASE_URL,
-        conn_max_age=600,
+        # Sob ASGI use 0: cada requisição assíncrona abre e fecha sua conexão
+        conn_max_age=config("DB_CONN_MAX_AGE", default=600, cast=int),
         conn_health_checks=True,
     )
 }
 
+# Cache
+# O catálogo (elementos e tipos de gasto) usa o alias "catalogo". Por padrão é um cache
+# local de cada processo; com vários workers, aponte CATALOGO_CACHE_BACKEND para um backend
+# compartilhado (Redis, Memcached, banco) para que a invalidação valha para todos.
+# Os corpos comprimidos (COMPRESSAO_CACHE) ficam num alias próprio, para não despejar as
+# entradas do catálogo; como a chave inclui o ETag, não precisam de invalidação.
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "gfinancas-default",
+    },
+    "catalogo": {
+        "BACKEND": config(
+            "CATALOGO_CACHE_BACKEND", default="django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": config("CATALOGO_CACHE_LOCATION", default="gfinancas-catalogo"),
+        "TIMEOUT": config("CATALOGO_CACHE_TIMEOUT", default=300, cast=int),
+    },
+    "compressao": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "gfinancas-compressao",
+        "TIMEOUT": 300,
+        "OPTIONS": {"MAX_ENTRIES": 200},
+    },
+}
+
 EXPLORER_DEFAULT_CONNECTION = config("EXPLORER_DEFAULT_CONNECTION", default="default")
 EXPLORER_CONNECTIONS = {
     "default": "default",
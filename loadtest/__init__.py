@@ -0,0 +1,7 @@
+"""
+Testes de carga HTTP da API do G Financas, só com a biblioteca padrão.
+
+Cada usuário virtual faz login em /api/accounts/login e sorteia tarefas de um cenário
+ponderado (estilo Locust); ao final o relatório traz, por endpoint, req/s e latências
+p50/p95/p99. Uso: python -m loadtest --help
+"""
@@ -0,0 +1,92 @@
+"""
+Executa um teste de carga contra um servidor já no ar (runserver ou uWSGI).
+
+Exemplo, com a base gerada por seed_gfinancas:
+
+    python manage.py seed_gfinancas --departamentos 2000 --despesas 200000 --senha carga123
+    python -m loadtest --url http://localhost:8000 --usuario sintetico --senha carga123 \\
+        --usuarios 20 --duracao 60 --cenario misto --json resultado.json
+"""
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+
+from .cenarios import CENARIOS, descobrir_contexto
+from .cliente import Sessao
+from .estatisticas import Estatisticas, formatar_tabela
+
+
+def _usuario_virtual(indice, argumentos, contexto, tarefas, estatisticas, fim, semente):
+    aleatorio = random.Random(semente + indice)
+    sessao = Sessao(argumentos.url, timeout=argumentos.timeout)
+    resultado = sessao.login(argumentos.usuario, argumentos.senha)
+    estatisticas.registrar(resultado)
+    if not resultado.sucesso:
+        return
+
+    pesos = [tarefa.peso for tarefa in tarefas]
+    while time.monotonic() < fim:
+        tarefa = aleatorio.choices(tarefas, weights=pesos)[0]
+        estatisticas.registrar(tarefa.executar(sessao, contexto, aleatorio))
+        if argumentos.pausa:
+            time.sleep(aleatorio.uniform(0, 2 * argumentos.pausa))
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m loadtest", description="Teste de carga da API do G Financas.")
+    parser.add_argument("--url", default="http://localhost:8000", help="Endereço do servidor")
+    parser.add_argument("--usuario", default="sintetico")
+    parser.add_argument("--senha", required=True)
+    parser.add_argument("--usuarios", type=int, default=10, help="Usuários virtuais simultâneos")
+    parser.add_argument("--duracao", type=float, default=30, help="Duração em segundos")
+    parser.add_argument("--rampa", type=float, default=0, help="Segundos para iniciar todos os usuários")
+    parser.add_argument("--pausa", type=float, default=0, help="Pausa média entre tarefas, em segundos")
+    parser.add_argument("--cenario", choices=sorted(CENARIOS), default="leitura")
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", help="Grava o resumo em JSON neste arquivo")
+    argumentos = parser.parse_args(argv)
+
+    sessao = Sessao(argumentos.url, timeout=argumentos.timeout)
+    if not sessao.login(argumentos.usuario, argumentos.senha).sucesso:
+        print("Falha no login; confira usuário e senha (seed_gfinancas --senha).", file=sys.stderr)
+        return 2
+    try:
+        contexto = descobrir_contexto(sessao)
+    except RuntimeError as e:
+        print(str(e), file=sys.stderr)
+        return 2
+    print(f"{len(contexto.departamentos)} departamentos e {len(contexto.pares)} pares no contexto; "
+          f"cenário {argumentos.cenario}, {argumentos.usuarios} usuários por {argumentos.duracao:g} s.")
+
+    estatisticas = Estatisticas()
+    inicio = time.monotonic()
+    fim = inicio + argumentos.rampa + argumentos.duracao
+    threads = []
+    for indice in range(argumentos.usuarios):
+        thread = threading.Thread(
+            target=_usuario_virtual,
+            args=(indice, argumentos, contexto, CENARIOS[argumentos.cenario], estatisticas, fim, argumentos.seed),
+            daemon=True,
+        )
+        thread.start()
+        threads.append(thread)
+        if argumentos.rampa:
+            time.sleep(argumentos.rampa / argumentos.usuarios)
+    for thread in threads:
+        thread.join()
+
+    resumo = estatisticas.resumo(time.monotonic() - inicio)
+    print(formatar_tabela(resumo))
+    if argumentos.json:
+        with open(argumentos.json, "w", encoding="utf-8") as arquivo:
+            json.dump(resumo, arquivo, indent=2, sort_keys=True)
+            arquivo.write("\n")
+    return 1 if resumo["total"]["falhas"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
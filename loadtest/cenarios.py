@@ -0,0 +1,129 @@
+"""
+Cenários de carga: tarefas ponderadas sobre os endpoints de Despesa, Verba e Departamento.
+
+Os ids usados nas tarefas são descobertos pela própria API no início do teste, então os
+cenários funcionam com qualquer base (por exemplo, a gerada por `manage.py seed_gfinancas`).
+"""
+import random
+from datetime import date, timedelta
+from typing import Callable, Dict, List, NamedTuple
+
+from .cliente import Resultado, Sessao
+
+
+class Contexto(NamedTuple):
+    departamentos: List[int]
+    pares: List[tuple]
+    anos: List[int]
+
+
+class Tarefa(NamedTuple):
+    nome: str
+    peso: int
+    executar: Callable[[Sessao, Contexto, random.Random], Resultado]
+
+
+def descobrir_contexto(sessao: Sessao, maximo_departamentos: int = 500) -> Contexto:
+    """
+    Lê pela API os departamentos, pares elemento/tipo de gasto e anos com verba.
+
+    Raises:
+        RuntimeError: Se a base não tiver departamentos ou catálogo
+    """
+    _, dados = sessao.requisitar(
+        "descoberta", "GET", f"/api/core/departamentos/list?page=1&per_page={maximo_departamentos}"
+    )
+    departamentos = [d["id"] for d in (dados or {}).get("departamentos", [])]
+
+    _, dados = sessao.requisitar("descoberta", "GET", "/api/core/elementos/list")
+    pares = []
+    for elemento in (dados or {}).get("elementos", [])[:20]:
+        _, vinculos = sessao.requisitar("descoberta", "GET", f"/api/core/tipo-gastos/por-elemento/{elemento['id']}")
+        pares += [(v["elemento"]["id"], v["tipoGasto"]["id"]) for v in (vinculos or {}).get("tipo_gastos", [])]
+
+    _, dados = sessao.requisitar("descoberta", "GET", "/api/core/verbas/list?page=1&per_page=100")
+    anos = sorted({v["ano"] for v in (dados or {}).get("verbas", [])}) or [date.today().year]
+
+    if not departamentos or not pares:
+        raise RuntimeError("A base não tem departamentos ou catálogo; rode manage.py seed_gfinancas antes.")
+    return Contexto(departamentos, pares, anos)
+
+
+def _periodo(aleatorio: random.Random) -> tuple:
+    fim = date.today() - timedelta(days=aleatorio.randrange(0, 365))
+    return (fim - timedelta(days=aleatorio.choice((30, 90, 180)))).isoformat(), fim.isoformat()
+
+
+def _get(nome: str, caminho: Callable[[Contexto, random.Random], str]):
+    def executar(sessao, contexto, aleatorio):
+        return sessao.requisitar(nome, "GET", caminho(contexto, aleatorio))[0]
+    return executar
+
+
+def _add_despesa(sessao, contexto, aleatorio):
+    elemento_id, tipo_gasto_id = aleatorio.choice(contexto.pares)
+    corpo = {
+        "departamento_id": aleatorio.choice(contexto.departamentos),
+        "elemento_id": elemento_id,
+        "tipo_gasto_id": tipo_gasto_id,
+        "valor": round(aleatorio.uniform(10, 5000), 2),
+        "justificativa": "Teste de carga",
+    }
+    return sessao.requisitar("despesas/add", "POST", "/api/core/despesas/add", corpo)[0]
+
+
+def _update_despesa(sessao, contexto, aleatorio):
+    resultado, dados = sessao.requisitar("despesas/list", "GET", "/api/core/despesas/list?cursor=&per_page=20")
+    despesas = (dados or {}).get("despesas") or []
+    if not despesas:
+        return resultado
+    corpo = {"id": aleatorio.choice(despesas)["id"], "valor": round(aleatorio.uniform(10, 5000), 2)}
+    return sessao.requisitar("despesas/update", "PUT", "/api/core/despesas/update", corpo)[0]
+
+
+LEITURA = [
+    Tarefa("despesas/list", 15, _get(
+        "despesas/list", lambda c, a: f"/api/core/despesas/list?page={a.randint(1, 50)}&per_page=20")),
+    Tarefa("despesas/list?cursor", 10, _get(
+        "despesas/list?cursor", lambda c, a: "/api/core/despesas/list?cursor=&per_page=50")),
+    Tarefa("despesas/list/<departamento>", 15, _get(
+        "despesas/list/<departamento>", lambda c, a: f"/api/core/despesas/list/{a.choice(c.departamentos)}")),
+    Tarefa("despesas/periodo", 5, _get(
+        "despesas/periodo",
+        lambda c, a: "/api/core/despesas/list/departamento/{}/periodo/{}/{}".format(
+            a.choice(c.departamentos), *_periodo(a)))),
+    Tarefa("departamentos/total-despesas", 10, _get(
+        "departamentos/total-despesas",
+        lambda c, a: f"/api/core/departamentos/total-despesas/{a.choice(c.departamentos)}")),
+    Tarefa("departamentos/total-despesas-periodo", 5, _get(
+        "departamentos/total-despesas-periodo",
+        lambda c, a: "/api/core/departamentos/total-despesas-periodo/{}/data/{}/{}".format(
+            a.choice(c.departamentos), *_periodo(a)))),
+    Tarefa("departamentos/orcamento-consolidado", 5, _get(
+        "departamentos/orcamento-consolidado",
+        lambda c, a: "/api/core/departamentos/orcamento-consolidado/{}/ano/{}".format(
+            a.choice(c.departamentos), a.choice(c.anos)))),
+    Tarefa("departamentos/list", 5, _get(
+        "departamentos/list", lambda c, a: f"/api/core/departamentos/list?page={a.randint(1, 10)}&per_page=20")),
+    Tarefa("subordinacoes/descendentes", 3, _get(
+        "subordinacoes/descendentes",
+        lambda c, a: f"/api/core/subordinacoes/descendentes/{a.choice(c.departamentos)}")),
+    Tarefa("verbas/list", 5, _get(
+        "verbas/list", lambda c, a: f"/api/core/verbas/list?page={a.randint(1, 20)}")),
+    Tarefa("verbas/departamento", 5, _get(
+        "verbas/departamento", lambda c, a: f"/api/core/verbas/departamento/{a.choice(c.departamentos)}")),
+    Tarefa("verbas/ultima-do-departamento", 5, _get(
+        "verbas/ultima-do-departamento",
+        lambda c, a: f"/api/core/verbas/ultima-do-departamento/{a.choice(c.departamentos)}")),
+]
+
+ESCRITA = [
+    Tarefa("despesas/add", 6, _add_despesa),
+    Tarefa("despesas/update", 2, _update_despesa),
+]
+
+CENARIOS: Dict[str, List[Tarefa]] = {
+    "leitura": LEITURA,
+    "misto": LEITURA + ESCRITA,
+    "escrita": ESCRITA,
+}
@@ -0,0 +1,61 @@
+"""Sessão HTTP de um usuário virtual (cookies de sessão mantidos entre as requisições)."""
+import json
+import time
+import urllib.error
+import urllib.request
+from http.cookiejar import CookieJar
+from typing import NamedTuple
+
+
+class Resultado(NamedTuple):
+    nome: str
+    status: int
+    segundos: float
+    bytes: int
+    erro: str = ""
+
+    @property
+    def sucesso(self) -> bool:
+        return not self.erro and self.status < 400
+
+
+class Sessao:
+    def __init__(self, url_base: str, timeout: float = 30):
+        self.url_base = url_base.rstrip("/")
+        self.timeout = timeout
+        self._abridor = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(CookieJar()))
+
+    def requisitar(self, nome: str, metodo: str, caminho: str, corpo=None) -> tuple:
+        """
+        Executa uma requisição e mede o tempo até o último byte da resposta.
+
+        Returns:
+            tuple: (Resultado, corpo decodificado como JSON ou None)
+        """
+        dados = json.dumps(corpo).encode("utf-8") if corpo is not None else None
+        requisicao = urllib.request.Request(
+            self.url_base + caminho, data=dados, method=metodo,
+            headers={"Content-Type": "application/json", "Accept": "application/json"},
+        )
+        inicio = time.perf_counter()
+        try:
+            with self._abridor.open(requisicao, timeout=self.timeout) as resposta:
+                conteudo = resposta.read()
+                status = resposta.status
+        except urllib.error.HTTPError as e:
+            conteudo = e.read()
+            status = e.code
+        except (urllib.error.URLError, OSError) as e:
+            return Resultado(nome, 0, time.perf_counter() - inicio, 0, str(e)), None
+        segundos = time.perf_counter() - inicio
+
+        try:
+            json_resposta = json.loads(conteudo) if conteudo else None
+        except ValueError:
+            json_resposta = None
+        return Resultado(nome, status, segundos, len(conteudo)), json_resposta
+
+    def login(self, usuario: str, senha: str) -> Resultado:
+        resultado, _ = self.requisitar("login", "POST", "/api/accounts/login",
+                                       {"username": usuario, "password": senha})
+        return resultado
@@ -0,0 +1,71 @@
+"""Acumulação dos resultados e relatório por endpoint."""
+import math
+import threading
+from collections import defaultdict
+from typing import Dict, List
+
+from .cliente import Resultado
+
+
+def percentil(valores_ordenados: List[float], p: float) -> float:
+    """Percentil pelo método do posto mais próximo (valores já ordenados)."""
+    if not valores_ordenados:
+        return 0.0
+    posto = max(math.ceil(p / 100 * len(valores_ordenados)), 1)
+    return valores_ordenados[posto - 1]
+
+
+class Estatisticas:
+    def __init__(self):
+        self._trava = threading.Lock()
+        self._tempos: Dict[str, List[float]] = defaultdict(list)
+        self._falhas: Dict[str, int] = defaultdict(int)
+        self._status: Dict[str, Dict[int, int]] = defaultdict(lambda: defaultdict(int))
+
+    def registrar(self, resultado: Resultado) -> None:
+        with self._trava:
+            self._tempos[resultado.nome].append(resultado.segundos)
+            self._status[resultado.nome][resultado.status] += 1
+            if not resultado.sucesso:
+                self._falhas[resultado.nome] += 1
+
+    def resumo(self, duracao: float) -> dict:
+        """Resumo por endpoint e total, com latências em milissegundos."""
+        with self._trava:
+            tempos = {nome: sorted(valores) for nome, valores in self._tempos.items()}
+            falhas = dict(self._falhas)
+            status = {nome: dict(contagem) for nome, contagem in self._status.items()}
+
+        def linha(valores, quantidade_falhas, contagem_status=None):
+            dados = {
+                "requisicoes": len(valores),
+                "falhas": quantidade_falhas,
+                "req_s": round(len(valores) / duracao, 2) if duracao else 0.0,
+                "p50_ms": round(percentil(valores, 50) * 1000, 1),
+                "p95_ms": round(percentil(valores, 95) * 1000, 1),
+                "p99_ms": round(percentil(valores, 99) * 1000, 1),
+                "max_ms": round(valores[-1] * 1000, 1) if valores else 0.0,
+            }
+            if contagem_status is not None:
+                dados["status"] = {str(codigo): n for codigo, n in sorted(contagem_status.items())}
+            return dados
+
+        todos = sorted(t for valores in tempos.values() for t in valores)
+        return {
+            "duracao_s": round(duracao, 1),
+            "endpoints": {nome: linha(tempos[nome], falhas.get(nome, 0), status[nome]) for nome in sorted(tempos)},
+            "total": linha(todos, sum(falhas.values())),
+        }
+
+
+def formatar_tabela(resumo: dict) -> str:
+    cabecalho = f"{'endpoint':<34}{'req':>8}{'falhas':>8}{'req/s':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}"
+    linhas = [cabecalho, "-" * len(cabecalho)]
+    itens = list(resumo["endpoints"].items()) + [("TOTAL", resumo["total"])]
+    for nome, dados in itens:
+        linhas.append(
+            f"{nome:<34}{dados['requisicoes']:>8}{dados['falhas']:>8}{dados['req_s']:>9.1f}"
+            f"{dados['p50_ms']:>9.1f}{dados['p95_ms']:>9.1f}{dados['p99_ms']:>9.1f}{dados['max_ms']:>9.1f}"
+        )
+    linhas.append(f"Duração: {resumo['duracao_s']} s; latências em ms.")
+    return "\n".join(linhas)
@@ -0,0 +1,41 @@
+import pytest
+
+from loadtest.cliente import Resultado
+from loadtest.estatisticas import Estatisticas, formatar_tabela, percentil
+
+
+@pytest.mark.parametrize("p, esperado", [(0, 1.0), (50, 5.0), (95, 10.0), (99, 10.0), (100, 10.0)])
+def test_percentil_pelo_posto_mais_proximo(p, esperado):
+    assert percentil([float(v) for v in range(1, 11)], p) == esperado
+
+
+def test_percentil_sem_valores():
+    assert percentil([], 95) == 0.0
+
+
+def test_resumo_por_endpoint_e_total():
+    estatisticas = Estatisticas()
+    for segundos in (0.3, 0.1, 0.2):
+        estatisticas.registrar(Resultado("despesas/list", 200, segundos, 100))
+    estatisticas.registrar(Resultado("despesas/add", 500, 0.4, 10))
+    estatisticas.registrar(Resultado("despesas/add", 0, 1.0, 0, erro="timeout"))
+
+    resumo = estatisticas.resumo(duracao=10)
+
+    assert resumo["duracao_s"] == 10
+    assert list(resumo["endpoints"]) == ["despesas/add", "despesas/list"]
+    assert resumo["endpoints"]["despesas/list"] == {
+        "requisicoes": 3, "falhas": 0, "req_s": 0.3,
+        "p50_ms": 200.0, "p95_ms": 300.0, "p99_ms": 300.0, "max_ms": 300.0,
+        "status": {"200": 3},
+    }
+    add = resumo["endpoints"]["despesas/add"]
+    assert (add["falhas"], add["status"]) == (2, {"0": 1, "500": 1})
+    assert resumo["total"] == {
+        "requisicoes": 5, "falhas": 2, "req_s": 0.5,
+        "p50_ms": 300.0, "p95_ms": 1000.0, "p99_ms": 1000.0, "max_ms": 1000.0,
+    }
+
+    tabela = formatar_tabela(resumo)
+    assert tabela.splitlines()[-2].startswith("TOTAL")
+    assert "Duração: 10 s" in tabela